@@ -8,6 +8,7 @@ VERSION_BRANCH: str = ""  # Usually "" or "Pre-Release"
 # The folder & file names where TagStudio keeps its data relative to a library.
 TS_FOLDER_NAME: str = ".TagStudio"
 BACKUP_FOLDER_NAME: str = "backups"
+BACKUP_MANIFEST_NAME: str = "backups.json"
 COLLAGE_FOLDER_NAME: str = "collages"
 IGNORE_NAME: str = ".ts_ignore"
 THUMB_CACHE_NAME: str = "thumbs"
@@ -0,0 +1,243 @@
+# Copyright (C) 2025
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Online SQLite backups and the manifest that keeps track of them."""
+
+import gzip
+import os
+import shutil
+import sqlite3
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Lock
+
+import structlog
+import ujson
+
+from tagstudio.core.constants import BACKUP_MANIFEST_NAME
+
+logger = structlog.get_logger(__name__)
+
+# The number of database pages copied per backup step. Other connections are free to read from
+# and write to the library between steps, so smaller values keep the library more responsive
+# at the cost of a longer overall backup.
+BACKUP_PAGES_PER_STEP: int = 1024
+# Seconds to wait before retrying a step when the source database is busy or locked.
+BACKUP_STEP_SLEEP: float = 0.05
+BACKUP_PREFIX: str = "ts_library_backup_"
+BACKUP_SUFFIX: str = ".sqlite"
+BACKUP_COMPRESSED_SUFFIX: str = ".sqlite.gz"
+BACKUP_PARTIAL_SUFFIX: str = ".partial"
+MANIFEST_VERSION: int = 1
+
+
+@dataclass(frozen=True)
+class BackupRecord:
+    """A single library backup file tracked by a BackupManifest."""
+
+    filename: str
+    size: int
+    created: str
+    compressed: bool = False
+
+
+class BackupManifest:
+    """Keep track of the backup files inside a library's backups folder.
+
+    The manifest is stored as a JSON file next to the backups so that the backups count and size
+    can be read without statting every backup file. If the manifest is missing, unreadable, or
+    the backups folder has been modified outside of TagStudio, it's rebuilt from a single scan.
+    """
+
+    _lock: Lock = Lock()
+
+    @staticmethod
+    def is_backup(filename: str) -> bool:
+        """Return whether a file in the backups folder is a library backup made by TagStudio.
+
+        Other files, such as legacy JSON backups or anything a user keeps there, are neither
+        tracked nor pruned.
+        """
+        return filename.startswith(BACKUP_PREFIX) and filename.endswith(
+            (BACKUP_SUFFIX, BACKUP_COMPRESSED_SUFFIX)
+        )
+
+    def __init__(self, backups_dir: Path):
+        self.backups_dir: Path = backups_dir
+        self.path: Path = backups_dir / BACKUP_MANIFEST_NAME
+        self.records: list[BackupRecord] = []
+        self.__dir_mtime_ns: int = -1
+
+    @classmethod
+    def load(cls, backups_dir: Path) -> "BackupManifest":
+        """Load the manifest for a backups folder, rebuilding it if it's stale or missing."""
+        manifest = cls(backups_dir)
+        with cls._lock:
+            if not manifest.__read():
+                manifest.__rebuild()
+                manifest.__write()
+        return manifest
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_size(self) -> int:
+        return sum(r.size for r in self.records)
+
+    def add(self, path: Path) -> BackupRecord:
+        """Record a newly written backup file and save the manifest."""
+        record = BackupRecord(
+            filename=path.name,
+            size=path.stat().st_size,
+            created=datetime.now(UTC).isoformat(),
+            compressed=path.name.endswith(BACKUP_COMPRESSED_SUFFIX),
+        )
+        with self._lock:
+            self.records = [r for r in self.records if r.filename != record.filename]
+            self.records.append(record)
+            self.__write()
+        return record
+
+    def prune(self, keep: int) -> list[Path]:
+        """Delete the oldest backups so that no more than `keep` backups remain.
+
+        Args:
+            keep (int): The number of most recent backups to retain. Values below 1 keep all.
+
+        Returns:
+            The paths of the backups that were removed.
+        """
+        if keep < 1 or len(self.records) <= keep:
+            return []
+
+        removed: list[Path] = []
+        with self._lock:
+            ordered = sorted(self.records, key=lambda r: r.created)
+            for record in ordered[: len(ordered) - keep]:
+                path = self.backups_dir / record.filename
+                try:
+                    path.unlink(missing_ok=True)
+                    removed.append(path)
+                except OSError as e:
+                    logger.error("[BackupManifest] Could not remove old backup", path=path, error=e)
+            removed_names = {p.name for p in removed}
+            self.records = [r for r in self.records if r.filename not in removed_names]
+            self.__write()
+
+        logger.info("[BackupManifest] Pruned old backups", removed=len(removed), keep=keep)
+        return removed
+
+    def __read(self) -> bool:
+        """Read the manifest from disk, returning False if it can't be trusted."""
+        try:
+            with open(self.path, encoding="utf8") as f:
+                data = ujson.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return False
+            if data.get("dir_mtime_ns") != self.backups_dir.stat().st_mtime_ns:
+                return False
+            records = [BackupRecord(**r) for r in data.get("backups", [])]
+            self.records = [r for r in records if self.is_backup(r.filename)]
+            self.__dir_mtime_ns = data["dir_mtime_ns"]
+            return True
+        except (OSError, ValueError, TypeError, KeyError):
+            return False
+
+    def __rebuild(self):
+        """Rebuild the manifest from the contents of the backups folder."""
+        self.records = []
+        if not self.backups_dir.exists():
+            return
+        logger.info("[BackupManifest] Rebuilding backup manifest", path=self.backups_dir)
+        for entry in os.scandir(self.backups_dir):
+            if not entry.is_file() or not self.is_backup(entry.name):
+                continue
+            stat = entry.stat()
+            self.records.append(
+                BackupRecord(
+                    filename=entry.name,
+                    size=stat.st_size,
+                    created=datetime.fromtimestamp(stat.st_mtime, UTC).isoformat(),
+                    compressed=entry.name.endswith(BACKUP_COMPRESSED_SUFFIX),
+                )
+            )
+
+    def __write(self):
+        if not self.backups_dir.exists():
+            return
+        try:
+            # Creating the manifest file changes the folder's mtime, so make sure it exists before
+            # reading the mtime. Rewriting an existing file in place leaves the mtime unchanged.
+            self.path.touch(exist_ok=True)
+            self.__dir_mtime_ns = self.backups_dir.stat().st_mtime_ns
+            with open(self.path, "w", encoding="utf8") as f:
+                ujson.dump(
+                    {
+                        "version": MANIFEST_VERSION,
+                        "dir_mtime_ns": self.__dir_mtime_ns,
+                        "backups": [asdict(r) for r in self.records],
+                    },
+                    f,
+                )
+        except OSError as e:
+            logger.error("[BackupManifest] Could not write backup manifest", error=e)
+
+
+def backup_sqlite(
+    source: sqlite3.Connection,
+    target: Path,
+    compress: bool = False,
+    pages: int = BACKUP_PAGES_PER_STEP,
+) -> Path:
+    """Copy a live SQLite database to disk using SQLite's online backup API.
+
+    The database is copied `pages` pages at a time, allowing other connections to keep reading
+    from and writing to the source between steps. The copy is written to a temporary file first
+    so that a partially written backup is never mistaken for a complete one.
+
+    Args:
+        source (sqlite3.Connection): The connection to the database to back up.
+        target (Path): The path of the backup file, without any compression suffix.
+        compress (bool): Whether to gzip the finished backup.
+        pages (int): The number of pages to copy per step.
+
+    Returns:
+        The path of the finished backup file.
+    """
+    partial_path = target.with_name(f"{target.name}{BACKUP_PARTIAL_SUFFIX}")
+    start_time = datetime.now()
+
+    def progress(status: int, remaining: int, total: int):
+        logger.debug("[Backup] Copying pages", remaining=remaining, total=total)
+
+    try:
+        dest = sqlite3.connect(partial_path)
+        try:
+            source.backup(dest, pages=pages, progress=progress, sleep=BACKUP_STEP_SLEEP)
+        finally:
+            dest.close()
+
+        if compress:
+            final_path = target.with_name(target.name.removesuffix(BACKUP_SUFFIX))
+            final_path = final_path.with_name(f"{final_path.name}{BACKUP_COMPRESSED_SUFFIX}")
+            with open(partial_path, "rb") as f_in, gzip.open(final_path, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            partial_path.unlink()
+        else:
+            final_path = target
+            os.replace(partial_path, final_path)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
+
+    logger.info(
+        "[Backup] SQLite backup finished",
+        path=final_path,
+        compressed=compress,
+        duration=(datetime.now() - start_time).total_seconds(),
+    )
+    return final_path
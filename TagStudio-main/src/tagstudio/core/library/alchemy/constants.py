@@ -13,6 +13,17 @@ DB_VERSION_CURRENT_KEY: str = "CURRENT"
 DB_VERSION_INITIAL_KEY: str = "INITIAL"
 DB_VERSION: int = 102
 
+# The number of tags loaded at a time when streaming tag search results.
+TAG_SEARCH_CHUNK_SIZE: int = 50
+# The number of entry IDs fetched at a time when streaming entry search results.
+SEARCH_CHUNK_SIZE: int = 1000
+# The number of idle connections kept open to a library file.
+CONNECTION_POOL_SIZE: int = 8
+# The number of connections opened beyond the pool when all of its connections are in use.
+CONNECTION_POOL_OVERFLOW: int = 8
+# The number of most used tags included in the library statistics.
+STATS_TOP_TAGS: int = 10
+
 TAG_CHILDREN_QUERY = text("""
 WITH RECURSIVE ChildTags AS (
     SELECT :tag_id AS tag_id
@@ -6,7 +6,7 @@ from pathlib import Path
 import structlog
 
 from tagstudio.core.query_lang.ast import AST
-from tagstudio.core.query_lang.parser import Parser
+from tagstudio.core.query_lang.parser import parse_query
 
 MAX_SQL_VARIABLES = 32766  # 32766 is the max sql bind parameter count as defined here: https://github.com/sqlite/sqlite/blob/master/src/sqliteLimit.h#L140
 
@@ -89,7 +89,7 @@ class BrowsingState:
     def ast(self) -> AST | None:
         if self.query is None:
             return None
-        return Parser(self.query).parse()
+        return parse_query(self.query)
 
     @classmethod
     def show_all(cls) -> "BrowsingState":
@@ -9,14 +9,19 @@
 
 import re
 import shutil
+import sqlite3
 import time
 import unicodedata
-from collections.abc import Iterable, Iterator
-from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, replace
 from datetime import UTC, datetime
+from functools import partial
 from os import makedirs
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from threading import Lock, local
+from typing import TYPE_CHECKING, Any, TypeVar
 from uuid import uuid4
 from warnings import catch_warnings
 
@@ -26,16 +31,22 @@ from humanfriendly import format_timespan  # pyright: ignore[reportUnknownVariab
 from sqlalchemy import (
     URL,
     ColumnExpressionArgument,
+    Connection,
     Engine,
-    NullPool,
+    QueuePool,
     ScalarResult,
+    Select,
+    StaticPool,
     and_,
     asc,
+    case,
     create_engine,
     delete,
     desc,
+    event,
     exists,
     func,
+    insert,
     inspect,
     or_,
     select,
@@ -46,6 +57,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import (
     InstanceState,
     Session,
+    aliased,
     contains_eager,
     joinedload,
     make_transient,
@@ -68,14 +80,25 @@ from tagstudio.core.constants import (
 )
 from tagstudio.core.enums import LibraryPrefs
 from tagstudio.core.library.alchemy import default_color_groups
+from tagstudio.core.library.alchemy.backup import (
+    BACKUP_COMPRESSED_SUFFIX,
+    BACKUP_PREFIX,
+    BACKUP_SUFFIX,
+    BackupManifest,
+    backup_sqlite,
+)
 from tagstudio.core.library.alchemy.constants import (
+    CONNECTION_POOL_OVERFLOW,
+    CONNECTION_POOL_SIZE,
     DB_VERSION,
     DB_VERSION_CURRENT_KEY,
     DB_VERSION_INITIAL_KEY,
     DB_VERSION_LEGACY_KEY,
     JSON_FILENAME,
+    SEARCH_CHUNK_SIZE,
     SQL_FILENAME,
-    TAG_CHILDREN_QUERY,
+    STATS_TOP_TAGS,
+    TAG_SEARCH_CHUNK_SIZE,
 )
 from tagstudio.core.library.alchemy.db import make_tables
 from tagstudio.core.library.alchemy.enums import (
@@ -102,14 +125,22 @@ from tagstudio.core.library.alchemy.models import (
     ValueType,
     Version,
 )
+from tagstudio.core.library.alchemy.query_plans import QueryKeyBuilder, QueryPlanCache
+from tagstudio.core.library.alchemy.search_index import SearchIndex
+from tagstudio.core.library.alchemy.tag_catalogue import TagCatalogue
 from tagstudio.core.library.alchemy.visitors import SQLBoolExpressionBuilder
 from tagstudio.core.library.json.library import Library as JsonLibrary
+from tagstudio.core.media_types import MediaCategories
+from tagstudio.core.utils.metrics import metrics
 from tagstudio.core.utils.types import unwrap
 from tagstudio.qt.translations import Translations
 
 if TYPE_CHECKING:
     from sqlalchemy import Select
 
+    from tagstudio.core.library.alchemy.writer import LibraryWriter
+
+T = TypeVar("T")
 
 logger = structlog.get_logger(__name__)
 
@@ -212,6 +243,40 @@ class LibraryStatus:
     json_migration_req: bool = False
 
 
+@dataclass(frozen=True)
+class LibraryStats:
+    """Counts and breakdowns of what's in a library.
+
+    Attributes:
+        entries (int): The number of entries.
+        tagged_entries (int): The number of entries with at least one tag.
+        tags (int): The number of tags.
+        fields (int): The number of field types.
+        namespaces (int): The number of namespaces.
+        colors (int): The number of tag colors.
+        media_types (dict[str, int]): The number of entries of each media type, by the name of
+            the type, from most to least common. Entries can be of more than one type, and
+            entries of no known type are counted as "other".
+        top_tags (list[tuple[int, str, int]]): The ID, name, and number of entries of the most
+            used tags, from most to least used.
+        total_bytes (int | None): The total size of the entries' files, if it was requested.
+    """
+
+    entries: int
+    tagged_entries: int
+    tags: int
+    fields: int
+    namespaces: int
+    colors: int
+    media_types: dict[str, int]
+    top_tags: list[tuple[int, str, int]]
+    total_bytes: int | None = None
+
+    @property
+    def untagged_entries(self) -> int:
+        return self.entries - self.tagged_entries
+
+
 class Library:
     """Class for the Library object, and all CRUD operations made upon it."""
 
@@ -227,13 +292,203 @@ class Library:
         self.ignored_entries_count: int = -1
         self.unlinked_entries_count: int = -1
 
+        self.__tag_catalogue: TagCatalogue | None = None
+        self.__tag_catalogue_lock: Lock = Lock()
+        self.__query_plans: QueryPlanCache = QueryPlanCache()
+        # Counts up with every commit, so that cached statistics can tell they're out of date.
+        self.__generation: int = 0
+        self.__stats: tuple[int, LibraryStats] | None = None
+        # Log every search statement with its values inlined. Rendering large IN lists as
+        # literals is slow, so this is only enabled with the --debug launch argument.
+        self.log_queries: bool = False
+        # Searches are answered from an in-memory index of tags and file extensions when this
+        # is enabled before opening a library. See the in_memory_search setting.
+        self.use_search_index: bool = False
+        self.search_index: SearchIndex | None = None
+        # Library files are opened in write-ahead log mode when this is enabled before opening a
+        # library. See the write_ahead_log setting.
+        self.use_write_ahead_log: bool = False
+        # Holds the connection of a transaction() started by the current thread, if any, and the
+        # updates to in-memory state to make once it commits.
+        self.__transaction: local = local()
+        # Holds the session the current thread reads with during a library call or batch().
+        self.__reads: local = local()
+        self.writer: LibraryWriter | None = None
+
+    def __session(self, **kwargs: Any) -> Session:
+        """Create a session, which joins the current thread's transaction() if there is one."""
+        connection: Connection | None = getattr(self.__transaction, "connection", None)
+        return Session(
+            connection or unwrap(self.engine), join_transaction_mode="create_savepoint", **kwargs
+        )
+
+    @contextmanager
+    def __read_session(self) -> Iterator[Session]:
+        """Reuse the current thread's read session, or open one for the outermost read.
+
+        A read session never commits, so every query made with it reads from the same snapshot of
+        the library. Within a batch() the session stays open between calls, and only the objects
+        it loaded are let go of after each one.
+        """
+        session: Session | None = getattr(self.__reads, "session", None)
+        if session is not None:
+            depth: int = self.__reads.depth
+            self.__reads.depth = depth + 1
+            try:
+                yield session
+            finally:
+                self.__reads.depth = depth
+                if depth == 0:
+                    session.expunge_all()
+            return
+
+        connection: Connection | None = getattr(self.__transaction, "connection", None)
+        session = Session(connection or unwrap(self.engine), join_transaction_mode="rollback_only")
+        self.__reads.session, self.__reads.depth = session, 1
+        try:
+            yield session
+        finally:
+            self.__reads.session = None
+            session.close()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Reuse one connection and read session for every library call made within the block.
+
+        Many small calls, such as looking up tags one at a time, are much cheaper this way. The
+        block runs in a transaction(), so calls see the changes made earlier in it, and those
+        changes are only committed once the block exits.
+        """
+        if getattr(self.__reads, "session", None) is not None:
+            yield
+            return
+
+        with self.transaction() as connection:
+            session = Session(connection, join_transaction_mode="rollback_only")
+            self.__reads.session, self.__reads.depth = session, 0
+            try:
+                yield
+            finally:
+                self.__reads.session = None
+                session.close()
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator[Connection]:
+        """Group every change the current thread makes to the library into one transaction.
+
+        Library methods called within the block commit to savepoints instead of the database,
+        and see each other's changes. Everything is committed once the block exits, or rolled
+        back if it raises. Nested calls join the outermost transaction.
+
+        Args:
+            immediate (bool): Lock the database for writing as soon as the transaction begins,
+                rather than at its first change. This avoids deadlocking with another
+                connection that's also waiting to write.
+        """
+        connection: Connection | None = getattr(self.__transaction, "connection", None)
+        if connection is not None:
+            yield connection
+            return
+
+        pending: list[Callable[[], None]] = []
+        with unwrap(self.engine).connect() as connection, connection.begin():
+            # pysqlite only begins transactions before data changes, so the first savepoint
+            # would otherwise start its own transaction, and releasing it would commit.
+            connection.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            self.__transaction.connection = connection
+            self.__transaction.pending = pending
+            try:
+                yield connection
+            finally:
+                self.__transaction.connection = None
+                self.__transaction.pending = None
+
+        # Only reached once the transaction has been committed.
+        for callback in pending:
+            callback()
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        """Make changes within the current thread's transaction() that are undone on their own.
+
+        If the block raises, its changes are rolled back, along with the in-memory updates they
+        deferred, while the rest of the transaction carries on.
+        """
+        connection: Connection | None = getattr(self.__transaction, "connection", None)
+        assert connection is not None, "savepoint() must be used within a transaction()"
+        pending: list[Callable[[], None]] = self.__transaction.pending
+        count = len(pending)
+        try:
+            with connection.begin_nested():
+                yield
+        except BaseException:
+            del pending[count:]
+            raise
+
+    def __after_commit(self, callback: Callable[[], None]) -> None:
+        """Update in-memory state, such as the search index, once a change is committed.
+
+        Within a transaction(), the callback is deferred until the outermost transaction
+        commits, so other threads don't see the change before it's in the database, and it's
+        dropped if the transaction is rolled back. Otherwise it's run right away.
+        """
+        pending: list[Callable[[], None]] | None = getattr(self.__transaction, "pending", None)
+        if pending is None:
+            callback()
+        else:
+            pending.append(callback)
+
+    def __has_uncommitted_changes(self) -> bool:
+        """Return whether the current thread's transaction() has deferred in-memory updates.
+
+        While it has, the shared tag catalogue, search statements, and search index don't
+        reflect its changes, so the thread reads from the database instead.
+        """
+        return bool(getattr(self.__transaction, "pending", None))
+
+    def start_writer(self) -> None:
+        """Make write() queue changes for a dedicated writer thread, until the library closes."""
+        from tagstudio.core.library.alchemy.writer import LibraryWriter
+
+        if self.writer is None:
+            self.writer = LibraryWriter(self)
+
+    def write(self, function: Callable[..., T], /, *args: Any, **kwargs: Any) -> "Future[T]":
+        """Make a change to the library through the writer thread, if it's been started.
+
+        Otherwise, or if the current thread is already in a transaction(), such as the writer
+        thread itself, the change is made right away on the current thread.
+
+        Args:
+            function (Callable[..., T]): The function that makes the change.
+            *args: The positional arguments to call the function with.
+            **kwargs: The keyword arguments to call the function with.
+
+        Returns:
+            A future that completes with the function's return value once it's been committed.
+        """
+        if self.writer is not None and getattr(self.__transaction, "connection", None) is None:
+            return self.writer.submit(function, *args, **kwargs)
+
+        future: Future[T] = Future()
+        try:
+            future.set_result(function(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
     def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
         if self.engine:
             self.engine.dispose()
         self.library_dir = None
         self.storage_path = None
         self.folder = None
         self.included_files = set()
+        self.search_index = None
+        self.invalidate_tag_catalogue()
 
         self.dupe_entries_count = -1
         self.dupe_files_count = -1
@@ -305,6 +560,7 @@ class Library:
                 for entry in json_lib.entries
             ]
         )
+        fields: list[tuple[int, FieldID, str | datetime | None]] = []
         for entry in json_lib.entries:
             for field in entry.fields:  # pyright: ignore[reportUnknownVariableType]
                 for k, v in field.items():  # pyright: ignore[reportUnknownVariableType]
@@ -312,11 +568,14 @@ class Library:
                     if k in LEGACY_TAG_FIELD_IDS:
                         self.add_tags_to_entries(entry_ids=entry.id + 1, tag_ids=v)
                     else:
-                        self.add_field_to_entry(
-                            entry_id=(entry.id + 1),  # JSON IDs start at 0 instead of 1
-                            field_id=self.get_field_name_from_id(k),
-                            value=v,
+                        fields.append(
+                            (
+                                entry.id + 1,  # JSON IDs start at 0 instead of 1
+                                unwrap(self.get_field_name_from_id(k)),
+                                v,  # pyright: ignore[reportUnknownArgumentType]
+                            )
                         )
+        self.add_entry_fields(fields)
 
         # Preferences
         self.set_prefs(LibraryPrefs.EXTENSION_LIST, [x.strip(".") for x in json_lib.ext_list])
@@ -336,7 +595,7 @@ class Library:
             return "<NO TAG>"
 
         if tag.disambiguation_id:
-            with Session(self.engine) as session:
+            with self.__read_session() as session:
                 disam_tag = session.scalar(select(Tag).where(Tag.id == tag.disambiguation_id))
                 if not disam_tag:
                     return "<NO DISAM TAG>"
@@ -375,14 +634,26 @@ class Library:
             drivername="sqlite",
             database=str(self.storage_path),
         )
-        # NOTE: File-based databases should use NullPool to create new DB connection in order to
-        # keep connections on separate threads, which prevents the DB files from being locked
-        # even after a connection has been closed.
-        # SingletonThreadPool (the default for :memory:) should still be used for in-memory DBs.
+        # NOTE: File-based databases keep a pool of connections that are handed to one thread
+        # at a time, rather than connecting to the file for every session. Each thread gets a
+        # connection of its own while it holds one, and a nested session gets another one, so
+        # closing it can't roll back the outer session. The pool is closed along with the library,
+        # which releases the DB files. If write-ahead logging is enabled, reads see a snapshot of
+        # the library and aren't blocked by a write that's being committed.
+        # In-memory DBs share a single connection across threads with StaticPool, since with
+        # SingletonThreadPool (the default for :memory:) every thread would get its own empty DB
+        # and background searches and preview loads would fail.
         # More info can be found on the SQLAlchemy docs:
-        # https://docs.sqlalchemy.org/en/20/changelog/migration_07.html
-        # Under -> sqlite-the-sqlite-dialect-now-uses-nullpool-for-file-based-databases
-        poolclass = None if self.storage_path == ":memory:" else NullPool
+        # https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#threading-pooling-behavior
+        # https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#using-a-memory-database-in-multiple-threads
+        in_memory = self.storage_path == ":memory:"
+        poolclass = StaticPool if in_memory else QueuePool
+        pool_args = (
+            {}
+            if in_memory
+            else {"pool_size": CONNECTION_POOL_SIZE, "max_overflow": CONNECTION_POOL_OVERFLOW}
+        )
+        connect_args = {"check_same_thread": False}
         loaded_db_version: int = 0
 
         logger.info(
@@ -390,8 +661,14 @@ class Library:
             library_dir=library_dir,
             connection_string=connection_string,
         )
-        self.engine = create_engine(connection_string, poolclass=poolclass)
-        with Session(self.engine) as session:
+        self.engine = create_engine(
+            connection_string, poolclass=poolclass, connect_args=connect_args, **pool_args
+        )
+        if not in_memory:
+            event.listen(self.engine, "connect", self.__configure_connection)
+        event.listen(self.engine, "commit", self.__on_commit)
+        self.invalidate_tag_catalogue()
+        with self.__session() as session:
             # Don't check DB version when creating new library
             if not is_new:
                 loaded_db_version = self.get_version(DB_VERSION_CURRENT_KEY)
@@ -559,10 +836,44 @@ class Library:
             if loaded_db_version < DB_VERSION:
                 self.set_version(DB_VERSION_CURRENT_KEY, DB_VERSION)
 
+        if self.use_search_index:
+            start_time = time.time()
+            with self.__session() as session:
+                self.search_index = SearchIndex.from_session(session)
+            end_time = time.time()
+            logger.info(f"[Library] Search index built ({format_timespan(end_time - start_time)})")
+
         # everything is fine, set the library path
         self.library_dir = library_dir
         return LibraryStatus(success=True, library_path=library_dir)
 
+    def __on_commit(self, _: Connection) -> None:
+        self.__generation += 1
+
+    def __configure_connection(self, dbapi_connection: Any, _: Any) -> None:
+        if not self.use_write_ahead_log:
+            return
+
+        # NOTE: Write-ahead logging keeps -wal and -shm files next to the library file, and needs
+        # shared memory that doesn't work on network filesystems, so it's opt-in. SQLite keeps
+        # the default rollback journal if the mode can't be changed.
+        cursor = dbapi_connection.cursor()
+        try:
+            journal_mode = cursor.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        except sqlite3.OperationalError as e:
+            logger.warning("[Library] Could not enable write-ahead logging", error=e)
+            journal_mode = None
+        if journal_mode == "wal":
+            # In WAL mode, this only syncs at checkpoints instead of every commit, and is still
+            # safe from corruption.
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        else:
+            logger.warning(
+                "[Library] Write-ahead logging is unavailable, using the rollback journal",
+                journal_mode=journal_mode,
+            )
+        cursor.close()
+
     def __apply_repairs_for_db6(self, session: Session):
         """Apply database repairs introduced in DB_VERSION 7."""
         logger.info("[Library][Migration] Applying patches to DB_VERSION: 6 library...")
@@ -728,7 +1039,7 @@ class Library:
 
     @property
     def default_fields(self) -> list[BaseField]:
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             types = session.scalars(
                 select(ValueType).where(
                     # check if field is default
@@ -739,7 +1050,7 @@ class Library:
 
     def get_entry(self, entry_id: int) -> Entry | None:
         """Load entry without joins."""
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             entry = session.scalar(select(Entry).where(Entry.id == entry_id))
             if not entry:
                 return None
@@ -747,6 +1058,7 @@ class Library:
             make_transient(entry)
             return entry
 
+    @metrics.timed("library.get_entry_full")
     def get_entry_full(
         self, entry_id: int, with_fields: bool = True, with_tags: bool = True
     ) -> Entry | None:
@@ -755,7 +1067,7 @@ class Library:
         # those into a final Entry object (if using "with" args). This was done due to it being
         # much more efficient than the existing join query, however there likely exists a single
         # query that can accomplish the same task without exhibiting the same slowdown.
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             tags: set[Tag] | None = None
             tag_stmt: Select[tuple[Tag]]
             entry_stmt = select(Entry).where(Entry.id == entry_id).limit(1)
@@ -800,14 +1112,20 @@ class Library:
             return entry
 
     def get_entries(self, entry_ids: Iterable[int]) -> list[Entry]:
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             statement = select(Entry).where(Entry.id.in_(entry_ids))
             entries = dict((e.id, e) for e in session.scalars(statement))
             return [entries[id] for id in entry_ids]
 
+    def get_entry_paths(self, entry_ids: Iterable[int]) -> dict[int, Path]:
+        """Return the paths of entries relative to the library directory, by entry ID."""
+        with self.__read_session() as session:
+            statement = select(Entry.id, Entry.path).where(Entry.id.in_(entry_ids))
+            return dict(session.execute(statement).tuples())
+
     def get_entries_full(self, entry_ids: list[int] | set[int]) -> Iterator[Entry]:
         """Load entry and join with all joins and all tags."""
-        with Session(self.engine) as session:
+        with self.__session() as session:
             statement = select(Entry).where(Entry.id.in_(set(entry_ids)))
             statement = (
                 statement.outerjoin(Entry.text_fields)
@@ -835,7 +1153,7 @@ class Library:
 
     def get_entry_full_by_path(self, path: Path) -> Entry | None:
         """Get the entry with the corresponding path."""
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             stmt = select(Entry).where(Entry.path == path)
             stmt = (
                 stmt.outerjoin(Entry.text_fields)
@@ -864,7 +1182,7 @@ class Library:
     ) -> dict[int, set[int]]:
         """Returns a dict of tag_id->(entry_ids with tag_id)."""
         tag_entries: dict[int, set[int]] = dict((id, set()) for id in tag_ids)
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             statement = select(TagEntry).where(
                 and_(TagEntry.tag_id.in_(tag_ids), TagEntry.entry_id.in_(entry_ids))
             )
@@ -874,12 +1192,12 @@ class Library:
 
     @property
     def entries_count(self) -> int:
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             return unwrap(session.scalar(select(func.count(Entry.id))))
 
     def all_entries(self, with_joins: bool = False) -> Iterator[Entry]:
         """Load entries without joins."""
-        with Session(self.engine) as session:
+        with self.__session() as session:
             stmt = select(Entry)
             if with_joins:
                 # load Entry with all joins and all tags
@@ -906,7 +1224,7 @@ class Library:
 
     @property
     def tags(self) -> list[Tag]:
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             # load all tags and join parent tags
             tags_query = select(Tag).options(selectinload(Tag.parent_tags))
             tags = session.scalars(tags_query).unique()
@@ -917,6 +1235,136 @@ class Library:
 
         return list(tags_list)
 
+    @property
+    def tag_catalogue(self) -> TagCatalogue:
+        """Return the in-memory catalogue of tag names, building it if needed.
+
+        The catalogue is cheaper to query than the tags property for completions, tag counts, and
+        prefix lookups. It's discarded whenever a tag, alias, or the library itself changes.
+        """
+        if self.__has_uncommitted_changes():
+            with self.__session() as session:
+                return TagCatalogue.from_session(session)
+
+        with self.__tag_catalogue_lock:
+            if self.__tag_catalogue is None:
+                with self.__session() as session:
+                    self.__tag_catalogue = TagCatalogue.from_session(session)
+            return self.__tag_catalogue
+
+    def invalidate_tag_catalogue(self) -> None:
+        """Discard the tag catalogue so that it's rebuilt the next time it's needed.
+
+        Cached search statements are discarded as well, since they hold the IDs that tag names
+        resolved to. Within a transaction(), this happens once it commits.
+        """
+        self.__after_commit(self.__discard_tag_catalogue)
+
+    def __discard_tag_catalogue(self) -> None:
+        with self.__tag_catalogue_lock:
+            self.__tag_catalogue = None
+        self.__discard_query_plans()
+
+    def invalidate_query_plans(self) -> None:
+        """Discard cached search statements, after tag names, aliases, or parents change."""
+        self.__after_commit(self.__discard_query_plans)
+
+    def __discard_query_plans(self) -> None:
+        self.__query_plans.clear()
+        if self.search_index is not None:
+            self.search_index.clear_tag_names()
+
+    @property
+    def tags_count(self) -> int:
+        return len(self.tag_catalogue)
+
+    def get_stats(self, with_file_sizes: bool = False) -> LibraryStats:
+        """Return counts and breakdowns of what's in the library.
+
+        The counts are computed with aggregate queries in a single read session, and cached until
+        the next change to the library is committed.
+
+        Args:
+            with_file_sizes (bool): Also add up the sizes of the entries' files. The library
+                doesn't store these, so every file is statted, which is slow for large libraries.
+        """
+        generation = self.__generation
+        cached = self.__stats
+        if cached is not None and cached[0] == generation:
+            stats = cached[1]
+        else:
+            with metrics.span("library.get_stats"), self.__read_session() as session:
+                stats = self.__aggregate_stats(session)
+            self.__stats = (generation, stats)
+
+        if with_file_sizes and stats.total_bytes is None:
+            stats = replace(stats, total_bytes=self.__total_file_size())
+            if self.__generation == generation:
+                self.__stats = (generation, stats)
+        return stats
+
+    @staticmethod
+    def __aggregate_stats(session: Session) -> LibraryStats:
+        def count(*columns: Any) -> Any:
+            return select(func.count(*columns)).scalar_subquery()
+
+        counts = session.execute(
+            select(
+                count(Entry.id),
+                select(func.count(func.distinct(TagEntry.entry_id))).scalar_subquery(),
+                count(Tag.id),
+                count(ValueType.key),
+                count(Namespace.namespace),
+                select(func.count()).select_from(TagColorGroup).scalar_subquery(),
+            )
+        ).one()
+
+        media_types: dict[str, int] = {}
+        for suffix, suffix_count in session.execute(
+            select(func.lower(Entry.suffix), func.count(Entry.id)).group_by(
+                func.lower(Entry.suffix)
+            )
+        ).tuples():
+            types = MediaCategories.get_types(f".{suffix}", mime_fallback=True)
+            for name in {media_type.value for media_type in types} or {"other"}:
+                media_types[name] = media_types.get(name, 0) + suffix_count
+
+        entry_count = func.count(TagEntry.entry_id).label("entry_count")
+        top_tags = session.execute(
+            select(Tag.id, Tag.name, entry_count)
+            .join(TagEntry, TagEntry.tag_id == Tag.id)
+            .group_by(Tag.id)
+            .order_by(entry_count.desc(), Tag.name)
+            .limit(STATS_TOP_TAGS)
+        ).tuples()
+
+        return LibraryStats(
+            entries=counts[0],
+            tagged_entries=counts[1],
+            tags=counts[2],
+            fields=counts[3],
+            namespaces=counts[4],
+            colors=counts[5],
+            media_types=dict(sorted(media_types.items(), key=lambda kv: (-kv[1], kv[0]))),
+            top_tags=[(tag_id, name, tag_count) for tag_id, name, tag_count in top_tags],
+        )
+
+    def __total_file_size(self) -> int:
+        library_dir = unwrap(self.library_dir)
+
+        def size(paths: list[str]) -> int:
+            total = 0
+            for path in paths:
+                with suppress(OSError):
+                    total += (library_dir / path).stat().st_size
+            return total
+
+        paths = self.get_paths()
+        chunk_size = 1000
+        chunks = [paths[i : i + chunk_size] for i in range(0, len(paths), chunk_size)]
+        with metrics.span("library.total_file_size"), ThreadPoolExecutor() as executor:
+            return sum(executor.map(size, chunks))
+
     def verify_ts_folder(self, library_dir: Path | None) -> bool:
         """Verify/create folders required by TagStudio.
 
@@ -936,11 +1384,12 @@ class Library:
             return False
         return True
 
+    @metrics.timed("library.add_entries")
     def add_entries(self, items: list[Entry]) -> list[int]:
         """Add multiple Entry records to the Library."""
         assert items
 
-        with Session(self.engine) as session:
+        with self.__session() as session:
             # add all items
 
             try:
@@ -952,13 +1401,17 @@ class Library:
                 return []
 
             new_ids = [item.id for item in items]
+            if self.search_index is not None:
+                suffixes = [item.suffix for item in items]
+                self.__after_commit(partial(self.search_index.add_entries, new_ids, suffixes))
             session.expunge_all()
 
         return new_ids
 
+    @metrics.timed("library.remove_entries")
     def remove_entries(self, entry_ids: list[int]) -> None:
         """Remove Entry items matching supplied IDs from the Library."""
-        with Session(self.engine) as session:
+        with self.__session() as session:
             for sub_list in [
                 entry_ids[i : i + MAX_SQL_VARIABLES]
                 for i in range(0, len(entry_ids), MAX_SQL_VARIABLES)
@@ -966,14 +1419,95 @@ class Library:
                 session.query(Entry).where(Entry.id.in_(sub_list)).delete()
             session.commit()
 
+        if self.search_index is not None:
+            self.__after_commit(partial(self.search_index.remove_entries, entry_ids))
+
     def has_path_entry(self, path: Path) -> bool:
         """Check if item with given path is in library already."""
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             return session.query(exists().where(Entry.path == path)).scalar()
 
+    @property
+    def folders(self) -> list[Folder]:
+        """Return every root folder of the library, starting with the library directory.
+
+        Entries in the library directory have paths relative to it. Entries in any other root
+        have absolute paths, so that joining them to the library directory gives the same path.
+        """
+        with self.__read_session() as session:
+            folders: list[Folder] = list(session.scalars(select(Folder).order_by(Folder.id)))
+        library_dir = unwrap(self.library_dir)
+        return sorted(folders, key=lambda folder: folder.path != library_dir)
+
+    def __root_of(self, path: Path) -> tuple[Path, Path] | None:
+        """Return the full path of a file and the root folder it's in, if it's in any of them."""
+        library_dir = unwrap(self.library_dir)
+        full_path = library_dir / path
+        if full_path.is_relative_to(library_dir):
+            return full_path, library_dir
+        for folder in self.folders:
+            if full_path.is_relative_to(folder.path):
+                return full_path, folder.path
+        return None
+
+    def relative_to_root(self, path: Path) -> Path | None:
+        """Return the path of a file relative to the root folder it's in.
+
+        This is what the library's ignore patterns are matched against, in every root.
+
+        Args:
+            path (Path): The full path of the file, or the path of its entry.
+
+        Returns:
+            The relative path, or None if the file isn't in any root folder of the library.
+        """
+        found = self.__root_of(path)
+        return found[0].relative_to(found[1]) if found is not None else None
+
+    def entry_path(self, path: Path) -> Path | None:
+        """Return the path that an entry for a file has, relative to the library directory.
+
+        Files in other root folders keep their absolute paths, like their entries do.
+
+        Args:
+            path (Path): The full path of the file.
+
+        Returns:
+            The entry path, or None if the file isn't in any root folder of the library.
+        """
+        found = self.__root_of(path)
+        if found is None:
+            return None
+        full_path, root = found
+        return full_path.relative_to(root) if root == self.library_dir else full_path
+
+    def add_folder(self, path: Path) -> Folder:
+        """Add a folder outside of the library directory as another root of the library.
+
+        Raises:
+            ValueError: If the folder overlaps with the library directory or another root, or is
+                the directory of another library.
+        """
+        path = path.resolve()
+        if not path.is_dir():
+            raise ValueError(f"Not a folder: {path}")
+        if (path / TS_FOLDER_NAME).exists():
+            raise ValueError(f"Folder is the directory of another library: {path}")
+        for folder in self.folders:
+            if path.is_relative_to(folder.path) or folder.path.is_relative_to(path):
+                raise ValueError(f"Folder overlaps with the library root {folder.path}")
+
+        folder = Folder(path=path, uuid=str(uuid4()))
+        with self.__session(expire_on_commit=False) as session:
+            session.add(folder)
+            session.commit()
+            session.expunge(folder)
+        logger.info("[Library] Added root folder", path=path)
+        return folder
+
     def get_paths(self, limit: int = -1) -> list[str]:
         path_strings: list[str] = []
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             if limit > 0:
                 paths = session.scalars(select(Entry.path).limit(limit)).unique()
             else:
@@ -981,6 +1515,7 @@ class Library:
             path_strings = list(map(lambda x: x.as_posix(), paths))
             return path_strings
 
+    @metrics.timed("library.search_library")
     def search_library(
         self,
         search: BrowsingState,
@@ -993,43 +1528,36 @@ class Library:
         assert isinstance(search, BrowsingState)
         assert self.library_dir
 
-        with Session(unwrap(self.engine), expire_on_commit=False) as session:
+        if self.search_index is not None and not self.__has_uncommitted_changes():
+            start_time = time.time()
+            ids = self.search_index.search(self, search)
             if page_size:
-                statement = (
-                    select(Entry.id, func.count().over())
-                    .offset(search.page_index * page_size)
-                    .limit(page_size)
-                )
+                start = search.page_index * page_size
+                page = ids[start : start + page_size]
             else:
-                statement = select(Entry.id)
-
-            if search.ast:
-                start_time = time.time()
-                statement = statement.where(SQLBoolExpressionBuilder(self).visit(search.ast))
-                end_time = time.time()
-                logger.info(
-                    f"SQL Expression Builder finished ({format_timespan(end_time - start_time)})"
-                )
-            statement = statement.distinct(Entry.id)
-
-            sort_on: ColumnExpressionArgument = Entry.id
-            match search.sorting_mode:
-                case SortingModeEnum.DATE_ADDED:
-                    sort_on = Entry.id
-                case SortingModeEnum.FILE_NAME:
-                    sort_on = func.lower(Entry.filename)
-                case SortingModeEnum.PATH:
-                    sort_on = func.lower(Entry.path)
-                case SortingModeEnum.RANDOM:
-                    sort_on = func.sin(Entry.id * search.random_seed)
-
-            statement = statement.order_by(asc(sort_on) if search.ascending else desc(sort_on))
-
+                page = ids
+            end_time = time.time()
             logger.info(
                 "searching library",
                 filter=search,
-                query_full=str(statement.compile(compile_kwargs={"literal_binds": True})),
+                search_index=True,
+                duration=format_timespan(end_time - start_time),
             )
+            return SearchResult(total_count=len(ids), ids=page.tolist())
+
+        with self.__session(expire_on_commit=False) as session:
+            statement = self.__search_statement(search, paged=bool(page_size))
+            if page_size:
+                statement = statement.offset(search.page_index * page_size).limit(page_size)
+
+            if self.log_queries:
+                logger.info(
+                    "searching library",
+                    filter=search,
+                    query_full=str(statement.compile(compile_kwargs={"literal_binds": True})),
+                )
+            else:
+                logger.info("searching library", filter=search)
 
             start_time = time.time()
             if page_size:
@@ -1054,55 +1582,229 @@ class Library:
 
             return res
 
-    def search_tags(self, name: str | None, limit: int = 100) -> list[set[Tag]]:
-        """Return a list of Tag records matching the query."""
-        with Session(self.engine) as session:
-            query = select(Tag).outerjoin(TagAlias).order_by(func.lower(Tag.name))
-            query = query.options(
-                selectinload(Tag.parent_tags),
-                selectinload(Tag.aliases),
-            )
-            if limit > 0:
-                query = query.limit(limit)
-
-            if name:
-                query = query.where(
-                    or_(
-                        Tag.name.icontains(name),
-                        Tag.shorthand.icontains(name),
-                        TagAlias.name.icontains(name),
-                    )
-                )
+    def search_library_chunks(
+        self, search: BrowsingState, chunk_size: int = SEARCH_CHUNK_SIZE
+    ) -> Iterator[list[int]]:
+        """Yield the IDs of all entries matching a search in order, a chunk at a time.
 
-            direct_tags = set(session.scalars(query))
-            ancestor_tag_ids: list[Tag] = []
-            for tag in direct_tags:
-                ancestor_tag_ids.extend(
-                    list(session.scalars(TAG_CHILDREN_QUERY, {"tag_id": tag.id}))
-                )
+        Rows are fetched from the database as they are consumed, so the first chunk is available
+        long before all results are, and the total number of results isn't counted. Use
+        count_search() for that.
+        """
+        assert isinstance(search, BrowsingState)
+        assert self.library_dir
 
-            ancestor_tags = session.scalars(
-                select(Tag)
-                .where(Tag.id.in_(ancestor_tag_ids))
-                .options(selectinload(Tag.parent_tags), selectinload(Tag.aliases))
-            )
+        if self.search_index is not None and not self.__has_uncommitted_changes():
+            ids = self.search_index.search(self, search)
+            for start in range(0, len(ids), chunk_size):
+                yield ids[start : start + chunk_size].tolist()
+            return
 
-            res = [
-                direct_tags,
-                {at for at in ancestor_tags if at not in direct_tags},
-            ]
+        statement = self.__search_statement(search, paged=False)
+        logger.info("streaming library search", filter=search, chunk_size=chunk_size)
+        with self.__session() as session:
+            result = session.scalars(statement, execution_options={"yield_per": chunk_size})
+            for chunk in result.partitions():
+                yield list(chunk)
+
+    def count_search(self, search: BrowsingState) -> int:
+        """Return the number of entries matching a search."""
+        if self.search_index is not None and not self.__has_uncommitted_changes():
+            return len(self.search_index.search(self, search))
+
+        statement = self.__search_statement(search, paged=False).order_by(None)
+        with self.__session() as session:
+            return session.scalar(select(func.count()).select_from(statement.subquery())) or 0
 
+    def __search_statement(self, search: BrowsingState, paged: bool) -> Select:
+        """Return the unpaged statement selecting the IDs of entries that match a search.
+
+        Statements are cached by the normalized query and sorting options, so that repeated
+        searches and paging don't parse the query or resolve tag names again. The values that
+        change between pages are bound parameters, so SQLAlchemy's compiled cache is reused too.
+        """
+        ast = search.ast
+        key = (
+            QueryKeyBuilder().visit(ast) if ast else None,
+            paged,
+            search.sorting_mode,
+            search.ascending,
+            search.random_seed if search.sorting_mode == SortingModeEnum.RANDOM else None,
+        )
+        # Statements built during a transaction's uncommitted changes to tags aren't cached.
+        cacheable = not self.__has_uncommitted_changes()
+        cached = self.__query_plans.get(key) if cacheable else None
+        if cached is not None:
+            return cached
+
+        statement = select(Entry.id, func.count().over()) if paged else select(Entry.id)
+
+        if ast:
+            start_time = time.time()
+            statement = statement.where(SQLBoolExpressionBuilder(self).visit(ast))
+            end_time = time.time()
             logger.info(
-                "searching tags",
-                search=name,
-                limit=limit,
-                statement=str(query),
-                results=len(res),
+                f"SQL Expression Builder finished ({format_timespan(end_time - start_time)})"
             )
+        statement = statement.distinct(Entry.id)
+
+        sort_on: ColumnExpressionArgument = Entry.id
+        match search.sorting_mode:
+            case SortingModeEnum.DATE_ADDED:
+                sort_on = Entry.id
+            case SortingModeEnum.FILE_NAME:
+                sort_on = func.lower(Entry.filename)
+            case SortingModeEnum.PATH:
+                sort_on = func.lower(Entry.path)
+            case SortingModeEnum.RANDOM:
+                sort_on = func.sin(Entry.id * search.random_seed)
+
+        statement = statement.order_by(asc(sort_on) if search.ascending else desc(sort_on))
+        if cacheable:
+            self.__query_plans.put(key, statement)
+        return statement
+
+    @metrics.timed("library.search_tags")
+    def search_tags(self, name: str | None, limit: int = 100) -> list[set[Tag]]:
+        """Return a list of Tag records matching the query.
 
-            session.expunge_all()
+        Returns:
+            A set of tags matching the query directly, and a set of tags that don't match but
+            are children of a direct match.
+        """
+        with self.__session() as session:
+            ranked = session.execute(self.__ranked_tags_query(name, limit)).all()
 
-            return res
+        tags = {t.id: t for chunk in self.__load_tags([r.id for r in ranked]) for t in chunk}
+        direct_tags = {tags[r.id] for r in ranked if r.is_direct and r.id in tags}
+        res = [direct_tags, {tags[r.id] for r in ranked if not r.is_direct and r.id in tags}]
+
+        logger.info(
+            "searching tags",
+            search=name,
+            limit=limit,
+            results=len(tags),
+        )
+        return res
+
+    @metrics.timed("library.search_tags_ranked")
+    def search_tags_ranked(
+        self,
+        name: str | None,
+        limit: int = 100,
+        exclude: Iterable[int] | None = None,
+        chunk_size: int = TAG_SEARCH_CHUNK_SIZE,
+    ) -> Iterator[list[Tag]]:
+        """Search for tags, yielding the results in ranked order a chunk at a time.
+
+        The direct matches, their children, and the ranking are resolved in a single query that
+        only returns tag IDs. The full Tag records are then loaded `chunk_size` at a time, so the
+        first results can be shown before the rest have been loaded.
+
+        Tags with a name starting with the query come first, shortest name first, followed by
+        the remaining direct matches and then the remaining children, alphabetically.
+
+        Args:
+            name (str | None): The text to search for in tag names, shorthands, and aliases.
+            limit (int): The maximum number of tags to return. Values below 1 return every tag.
+            exclude (Iterable[int] | None): IDs of tags to leave out of the results.
+            chunk_size (int): The number of tags to yield at a time.
+        """
+        excluded = set(exclude or ())
+        with self.__session() as session:
+            tag_ids = [
+                tag_id
+                for tag_id in session.scalars(self.__ranked_tags_query(name, limit, ranked=True))
+                if tag_id not in excluded
+            ]
+        if limit > 0:
+            tag_ids = tag_ids[:limit]
+
+        logger.info(
+            "[Library] Streaming tag search", search=name, limit=limit, results=len(tag_ids)
+        )
+        yield from self.__load_tags(tag_ids, chunk_size)
+
+    def __ranked_tags_query(
+        self, name: str | None, limit: int, ranked: bool = False
+    ) -> "Select[Any]":
+        """Build a query for the IDs of tags matching a search and the children of those tags.
+
+        Args:
+            name (str | None): The text to search for in tag names, shorthands, and aliases.
+            limit (int): The maximum number of direct matches. Values below 1 don't limit.
+            ranked (bool): Select only the IDs in ranked order instead of the IDs alongside
+                whether they were a direct match.
+        """
+        query = (name or "").lower()
+
+        # Direct matches, with tags that have a name, shorthand, or alias starting with the query
+        # chosen first when the number of matches is limited.
+        prefix_match = or_(
+            func.lower(Tag.name).startswith(query, autoescape=True),
+            func.lower(Tag.shorthand).startswith(query, autoescape=True),
+            func.lower(TagAlias.name).startswith(query, autoescape=True),
+        )
+        direct_stmt = (
+            select(Tag.id.label("tag_id"))
+            .outerjoin(TagAlias)
+            .group_by(Tag.id)
+            .order_by(func.min(case((prefix_match, 0), else_=1)), func.lower(Tag.name))
+        )
+        if query:
+            direct_stmt = direct_stmt.where(
+                or_(
+                    Tag.name.icontains(query),
+                    Tag.shorthand.icontains(query),
+                    TagAlias.name.icontains(query),
+                )
+            )
+        if limit > 0:
+            direct_stmt = direct_stmt.limit(limit)
+        direct = direct_stmt.cte("direct_tags")
+
+        # The direct matches and all of their children, in the same way as TAG_CHILDREN_QUERY.
+        hierarchy = select(direct.c.tag_id).cte("tag_hierarchy", recursive=True)
+        hierarchy = hierarchy.union(
+            select(TagParent.child_id).join(hierarchy, TagParent.parent_id == hierarchy.c.tag_id)
+        )
+
+        is_direct = direct.c.tag_id.is_not(None)
+        stmt = (
+            select(Tag.id, is_direct.label("is_direct"))
+            .outerjoin(direct, direct.c.tag_id == Tag.id)
+            .where(Tag.id.in_(select(hierarchy.c.tag_id)))
+        )
+        if not ranked:
+            return stmt
+
+        order_by: list[ColumnExpressionArgument[Any]] = []
+        if query.strip():
+            name_prefix = func.lower(Tag.name).startswith(query, autoescape=True)
+            order_by.extend(
+                [
+                    case((name_prefix, 0), else_=1),
+                    case((name_prefix, func.length(Tag.name)), else_=0),
+                ]
+            )
+        order_by.extend([case((is_direct, 0), else_=1), func.lower(Tag.name)])
+        return stmt.with_only_columns(Tag.id).order_by(*order_by)
+
+    def __load_tags(
+        self, tag_ids: list[int], chunk_size: int = MAX_SQL_VARIABLES
+    ) -> Iterator[list[Tag]]:
+        """Load tags along with their parent tags and aliases, preserving the order of tag_ids."""
+        for i in range(0, len(tag_ids), chunk_size):
+            chunk = tag_ids[i : i + chunk_size]
+            with self.__session() as session:
+                found: ScalarResult[Tag] = session.scalars(
+                    select(Tag)
+                    .where(Tag.id.in_(chunk))
+                    .options(selectinload(Tag.parent_tags), selectinload(Tag.aliases))
+                )
+                tags = {t.id: t for t in found}
+                session.expunge_all()
+            yield [tags[tag_id] for tag_id in chunk if tag_id in tags]
 
     def update_entry_path(self, entry_id: int | Entry, path: Path) -> bool:
         """Set the path field of an entry.
@@ -1114,7 +1816,7 @@ class Library:
         if isinstance(entry_id, Entry):
             entry_id = entry_id.id
 
-        with Session(self.engine) as session:
+        with self.__session() as session:
             update_stmt = (
                 update(Entry)
                 .where(
@@ -1127,10 +1829,13 @@ class Library:
 
             session.execute(update_stmt)
             session.commit()
+
+        if self.search_index is not None:
+            self.__after_commit(self.search_index.entry_paths_changed)
         return True
 
     def remove_tag(self, tag_id: int):
-        with Session(self.engine, expire_on_commit=False) as session:
+        with self.__session(expire_on_commit=False) as session:
             try:
                 aliases = session.scalars(select(TagAlias).where(TagAlias.tag_id == tag_id))
                 for alias in aliases:
@@ -1158,6 +1863,8 @@ class Library:
             except IntegrityError as e:
                 logger.error(e)
                 session.rollback()
+            finally:
+                self.invalidate_tag_catalogue()
 
     def update_field_position(
         self,
@@ -1168,28 +1875,42 @@ class Library:
         if isinstance(entry_ids, int):
             entry_ids = [entry_ids]
 
-        with Session(self.engine) as session:
-            for entry_id in entry_ids:
-                rows = list(
-                    session.scalars(
-                        select(field_class)
-                        .where(
-                            and_(
-                                field_class.entry_id == entry_id,
-                                field_class.type_key == field_type,
-                            )
-                        )
-                        .order_by(field_class.id)
-                    )
-                )
+        with self.__session() as session:
+            self.__update_field_positions(session, field_class, [field_type], entry_ids)
+            session.commit()
 
-                # Reassign `order` starting from 0
-                for index, row in enumerate(rows):
-                    row.position = index
-                    session.add(row)
-                    session.flush()
-                if rows:
-                    session.commit()
+    @staticmethod
+    def __update_field_positions(
+        session: Session,
+        field_class: type[BaseField],
+        field_types: Iterable[str],
+        entry_ids: Iterable[int],
+    ) -> None:
+        """Reassign the positions of fields, starting from 0 in the order they were added."""
+        field_types = list(set(field_types))
+        entry_ids = list(set(entry_ids))
+        other = aliased(field_class)
+        # The position of a field is the number of fields of the same type added before it.
+        position = (
+            select(func.count(other.id))
+            .where(
+                other.entry_id == field_class.entry_id,
+                other.type_key == field_class.type_key,
+                other.id < field_class.id,
+            )
+            .scalar_subquery()
+        )
+        chunk_size = MAX_SQL_VARIABLES - len(field_types)
+        for i in range(0, len(entry_ids), chunk_size):
+            session.execute(
+                update(field_class)
+                .where(
+                    field_class.entry_id.in_(entry_ids[i : i + chunk_size]),
+                    field_class.type_key.in_(field_types),
+                )
+                .values(position=position)
+                .execution_options(synchronize_session=False)
+            )
 
     def remove_entry_field(
         self,
@@ -1207,7 +1928,7 @@ class Library:
             pos=field.position,
         )
 
-        with Session(self.engine) as session:
+        with self.__session() as session:
             # remove all fields matching entry and field_type
             delete_stmt = delete(FieldClass).where(
                 and_(
@@ -1235,7 +1956,7 @@ class Library:
 
         FieldClass = type(field)  # noqa: N806
 
-        with Session(self.engine) as session:
+        with self.__session() as session:
             update_stmt = (
                 update(FieldClass)
                 .where(
@@ -1251,13 +1972,30 @@ class Library:
             session.execute(update_stmt)
             session.commit()
 
+    def update_fields(self, values: Iterable[tuple[BaseField, str | datetime]]) -> None:
+        """Set the values of existing fields in a single transaction.
+
+        Args:
+            values (Iterable[tuple[BaseField, str | datetime]]): Each field and its new value.
+        """
+        grouped: dict[type[BaseField], list[dict[str, Any]]] = {}
+        for field, value in values:
+            grouped.setdefault(type(field), []).append({"id": field.id, "value": value})
+        if not grouped:
+            return
+
+        with self.__session() as session:
+            for field_class, rows in grouped.items():
+                session.execute(update(field_class), rows)
+            session.commit()
+
     @property
     def field_types(self) -> dict[str, ValueType]:
-        with Session(self.engine) as session:
+        with self.__session() as session:
             return {x.key: x for x in session.scalars(select(ValueType)).all()}
 
     def get_value_type(self, field_key: str) -> ValueType:
-        with Session(self.engine) as session:
+        with self.__session() as session:
             field = unwrap(session.scalar(select(ValueType).where(ValueType.key == field_key)))
             session.expunge(field)
             return field
@@ -1280,67 +2018,171 @@ class Library:
         # supply only instance or ID, not both
         assert bool(field) != (field_id is not None)
 
-        if not field:
-            if isinstance(field_id, FieldID):
-                field_id = field_id.name
-            field = self.get_value_type(unwrap(field_id))
+        return self.add_entry_fields([(entry_id, unwrap(field or field_id), value)]) > 0
 
-        field_model: TextField | DatetimeField
-        if field.type in (FieldTypeEnum.TEXT_LINE, FieldTypeEnum.TEXT_BOX):
-            field_model = TextField(
-                type_key=field.key,
-                value=value or "",
-            )
+    def add_fields_to_entries(
+        self,
+        entry_ids: int | Iterable[int],
+        fields: Iterable[tuple[ValueType | FieldID | str, str | datetime | None]],
+        skip_existing: bool = False,
+    ) -> int:
+        """Add the same fields to one or more entries.
 
-        elif field.type == FieldTypeEnum.DATETIME:
-            field_model = DatetimeField(
-                type_key=field.key,
-                value=value,
+        Args:
+            entry_ids (int | Iterable[int]): The entries to add the fields to.
+            fields (Iterable[tuple[ValueType | FieldID | str, str | datetime | None]]): The
+                type and value of each field to add.
+            skip_existing (bool): Don't add a field to an entry that already has a field of the
+                same type and value.
+
+        Returns:
+            The total number of fields added across all entries.
+        """
+        entry_ids_ = [entry_ids] if isinstance(entry_ids, int) else list(entry_ids)
+        fields_ = list(fields)
+        return self.add_entry_fields(
+            ((entry_id, key, value) for entry_id in entry_ids_ for key, value in fields_),
+            skip_existing=skip_existing,
+        )
+
+    def add_entry_fields(
+        self,
+        fields: Iterable[tuple[int, ValueType | FieldID | str, str | datetime | None]],
+        skip_existing: bool = False,
+    ) -> int:
+        """Add fields to entries in a single transaction.
+
+        Fields are added after any existing fields of the same type on each entry. Fields with a
+        type that isn't in the library are skipped.
+
+        Args:
+            fields (Iterable[tuple[int, ValueType | FieldID | str, str | datetime | None]]):
+                The entry ID, type, and value of each field to add.
+            skip_existing (bool): Don't add a field to an entry that already has a field of the
+                same type and value, or that is given more than once.
+
+        Returns:
+            The total number of fields added across all entries, or 0 if they couldn't be added.
+        """
+        rows: list[tuple[int, str, str | datetime | None]] = []
+        for entry_id, key, value in fields:
+            if isinstance(key, ValueType):
+                key = key.key
+            elif isinstance(key, FieldID):
+                key = key.name
+            rows.append((entry_id, key, value))
+        if not rows:
+            return 0
+
+        with self.__session() as session:
+            found: ScalarResult[ValueType] = session.scalars(
+                select(ValueType).where(ValueType.key.in_({key for _, key, _ in rows}))
             )
-        else:
-            raise NotImplementedError(f"field type not implemented: {field.type}")
+            value_types = {value_type.key: value_type for value_type in found}
+            unknown_keys = {key for _, key, _ in rows if key not in value_types}
+            if unknown_keys:
+                logger.warning(
+                    "[Library][add_entry_fields] Skipping unknown fields", keys=unknown_keys
+                )
 
-        with Session(self.engine) as session:
+            # Group the new fields by the table they're stored in
+            grouped: dict[type[BaseField], list[dict[str, Any]]] = {}
+            for entry_id, key, value in rows:
+                value_type = value_types.get(key)
+                if value_type is None:
+                    continue
+                field_class: type[BaseField]
+                if value_type.type in (FieldTypeEnum.TEXT_LINE, FieldTypeEnum.TEXT_BOX):
+                    field_class = TextField
+                    value = value or ""
+                elif value_type.type == FieldTypeEnum.DATETIME:
+                    field_class = DatetimeField
+                else:
+                    raise NotImplementedError(f"field type not implemented: {value_type.type}")
+                grouped.setdefault(field_class, []).append(
+                    {"entry_id": entry_id, "type_key": key, "value": value}
+                )
+
+            total_added: int = 0
             try:
-                field_model.entry_id = entry_id
-                session.add(field_model)
-                session.flush()
+                for field_class, values in grouped.items():
+                    if skip_existing:
+                        values = self.__new_field_values(session, field_class, values)
+                    if not values:
+                        continue
+                    session.execute(insert(field_class), values)
+                    self.__update_field_positions(
+                        session,
+                        field_class,
+                        (v["type_key"] for v in values),
+                        (v["entry_id"] for v in values),
+                    )
+                    total_added += len(values)
                 session.commit()
             except IntegrityError as e:
                 logger.error(e)
                 session.rollback()
-                return False
-                # TODO - trigger error signal
+                return 0
 
-        # recalculate the positions of fields
-        self.update_field_position(
-            field_class=type(field_model),
-            field_type=field.key,
-            entry_ids=entry_id,
-        )
-        return True
+        logger.info("[Library][add_entry_fields]", total_added=total_added)
+        return total_added
+
+    @staticmethod
+    def __new_field_values(
+        session: Session, field_class: type[BaseField], values: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Drop values for fields that already exist on their entry, or are given twice."""
+        field_types = list({v["type_key"] for v in values})
+        entry_ids = list({v["entry_id"] for v in values})
+        chunk_size = MAX_SQL_VARIABLES - len(field_types)
+
+        seen: set[tuple[int, str, Any]] = set()
+        for i in range(0, len(entry_ids), chunk_size):
+            seen.update(
+                session.execute(
+                    select(field_class.entry_id, field_class.type_key, field_class.value).where(
+                        field_class.entry_id.in_(entry_ids[i : i + chunk_size]),
+                        field_class.type_key.in_(field_types),
+                    )
+                ).all()
+            )
+
+        new_values: list[dict[str, Any]] = []
+        for v in values:
+            row = (v["entry_id"], v["type_key"], v["value"])
+            if row not in seen:
+                seen.add(row)
+                new_values.append(v)
+        return new_values
 
     def tag_from_strings(self, strings: list[str] | str) -> list[int]:
-        """Create a Tag from a given string."""
+        """Return the IDs of the tags with the given names, creating any that don't exist yet."""
         # TODO: Port over tag searching with aliases fallbacks
         # and context clue ranking for string searches.
-        tags: list[int] = []
-
         if isinstance(strings, str):
             strings = [strings]
+        names = list(dict.fromkeys(strings))
+        if not names:
+            return []
+
+        tag_ids: dict[str, int] = {}
+        with self.__session() as session:
+            for i in range(0, len(names), MAX_SQL_VARIABLES):
+                for name, tag_id in session.execute(
+                    select(Tag.name, Tag.id).where(Tag.name.in_(names[i : i + MAX_SQL_VARIABLES]))
+                ).tuples():
+                    tag_ids.setdefault(name, tag_id)
+
+            new_tags = [Tag(name=name) for name in names if name not in tag_ids]
+            if new_tags:
+                session.add_all(new_tags)
+                session.flush()
+                tag_ids.update((tag.name, tag.id) for tag in new_tags)
+                session.commit()
 
-        with Session(self.engine) as session:
-            for string in strings:
-                tag = session.scalar(select(Tag).where(Tag.name == string))
-                if tag:
-                    tags.append(tag.id)
-                else:
-                    new = session.add(Tag(name=string))  # type: ignore
-                    if new:
-                        tags.append(new.id)
-                        session.flush()
-            session.commit()
-        return tags
+        if new_tags:
+            self.invalidate_tag_catalogue()
+        return [tag_ids[name] for name in strings]
 
     def add_namespace(self, namespace: Namespace) -> bool:
         """Add a namespace value to the library.
@@ -1348,7 +2190,7 @@ class Library:
         Args:
             namespace(str): The namespace slug. No special characters
         """
-        with Session(self.engine) as session:
+        with self.__session() as session:
             if not namespace.namespace:
                 logger.warning("[LIBRARY][add_namespace] Namespace slug must not be empty")
                 return False
@@ -1386,7 +2228,7 @@ class Library:
             if namespace.namespace.startswith(RESERVED_NAMESPACE_PREFIX):
                 raise ReservedNamespaceError
 
-        with Session(self.engine, expire_on_commit=False) as session:
+        with self.__session(expire_on_commit=False) as session:
             try:
                 namespace_: Namespace | None = None
                 if isinstance(namespace, str):
@@ -1422,7 +2264,7 @@ class Library:
         alias_names: list[str] | set[str] | None = None,
         alias_ids: list[int] | set[int] | None = None,
     ) -> Tag | None:
-        with Session(self.engine, expire_on_commit=False) as session:
+        with self.__session(expire_on_commit=False) as session:
             try:
                 session.add(tag)
                 session.flush()
@@ -1441,7 +2283,10 @@ class Library:
                 logger.error(e)
                 session.rollback()
                 return None
+            finally:
+                self.invalidate_tag_catalogue()
 
+    @metrics.timed("library.add_tags_to_entries")
     def add_tags_to_entries(
         self, entry_ids: int | list[int] | set[int], tag_ids: int | list[int] | set[int]
     ) -> int:
@@ -1450,57 +2295,124 @@ class Library:
         Returns:
             The total number of tags added across all entries.
         """
-        total_added: int = 0
         logger.info(
             "[Library][add_tags_to_entries]",
             entry_ids=entry_ids,
             tag_ids=tag_ids,
         )
+        changed = self.set_tags_on_entries(entry_ids, tag_ids, value=True)
+        return sum(len(ids) for ids in changed.values())
 
-        entry_ids_ = [entry_ids] if isinstance(entry_ids, int) else entry_ids
-        tag_ids_ = [tag_ids] if isinstance(tag_ids, int) else tag_ids
-        with Session(self.engine, expire_on_commit=False) as session:
-            for tag_id in tag_ids_:
-                for entry_id in entry_ids_:
-                    try:
-                        session.add(TagEntry(tag_id=tag_id, entry_id=entry_id))
-                        total_added += 1
-                        session.commit()
-                    except IntegrityError:
-                        session.rollback()
-
-        return total_added
-
+    @metrics.timed("library.remove_tags_from_entries")
     def remove_tags_from_entries(
         self, entry_ids: int | list[int] | set[int], tag_ids: int | list[int] | set[int]
     ) -> bool:
         """Remove one or more tags from one or more entries."""
-        entry_ids_ = [entry_ids] if isinstance(entry_ids, int) else entry_ids
-        tag_ids_ = [tag_ids] if isinstance(tag_ids, int) else tag_ids
-        with Session(self.engine, expire_on_commit=False) as session:
-            try:
-                for tag_id in tag_ids_:
-                    for entry_id in entry_ids_:
-                        tag_entry = session.scalars(
-                            select(TagEntry).where(
-                                and_(
-                                    TagEntry.tag_id == tag_id,
-                                    TagEntry.entry_id == entry_id,
-                                )
-                            )
-                        ).first()
-                        if tag_entry:
-                            session.delete(tag_entry)
-                            session.flush()
-                session.commit()
-                return True
-            except IntegrityError as e:
-                logger.error(e)
-                session.rollback()
-                return False
+        try:
+            self.set_tags_on_entries(entry_ids, tag_ids, value=False)
+            return True
+        except IntegrityError as e:
+            logger.error(e)
+            return False
+
+    def set_tags_on_entries(
+        self,
+        entry_ids: int | Iterable[int],
+        tag_ids: int | Iterable[int],
+        value: bool,
+    ) -> dict[int, list[int]]:
+        """Add tags to or remove tags from entries with set-based statements in one transaction.
+
+        Args:
+            entry_ids (int | Iterable[int]): The entries to change.
+            tag_ids (int | Iterable[int]): The tags to add or remove.
+            value (bool): Whether to add the tags (True) or remove them (False).
+
+        Returns:
+            The IDs of the entries each tag was actually added to or removed from. Calling this
+            again with those entries and the opposite value undoes the change.
+        """
+        entry_ids_ = list(dict.fromkeys([entry_ids] if isinstance(entry_ids, int) else entry_ids))
+        tag_ids_ = list(dict.fromkeys([tag_ids] if isinstance(tag_ids, int) else tag_ids))
+        changed: dict[int, list[int]] = {}
+        if not entry_ids_ or not tag_ids_:
+            return changed
+
+        with self.__session() as session:
+            for tag_id in tag_ids_:
+                ids = self.__set_tag_on_entries(session, tag_id, entry_ids_, value)
+                if ids:
+                    changed[tag_id] = ids
+            session.commit()
+
+        if self.search_index is not None:
+            index_update = self.search_index.add_tags if value else self.search_index.remove_tags
+            self.__after_commit(partial(index_update, entry_ids_, tag_ids_))
+        return changed
+
+    def add_entry_tags(self, entry_tags: Iterable[tuple[int, int]]) -> int:
+        """Add tags to entries in a single transaction, skipping any the entries already have.
+
+        Args:
+            entry_tags (Iterable[tuple[int, int]]): The entry ID and tag ID of each tag to add.
+
+        Returns:
+            The total number of tags added across all entries.
+        """
+        entry_ids_by_tag: dict[int, list[int]] = {}
+        for entry_id, tag_id in entry_tags:
+            entry_ids_by_tag.setdefault(tag_id, []).append(entry_id)
+        if not entry_ids_by_tag:
+            return 0
+
+        changed: dict[int, list[int]] = {}
+        with self.__session() as session:
+            for tag_id, entry_ids in entry_ids_by_tag.items():
+                ids = self.__set_tag_on_entries(
+                    session, tag_id, list(dict.fromkeys(entry_ids)), value=True
+                )
+                if ids:
+                    changed[tag_id] = ids
+            session.commit()
+
+        if self.search_index is not None:
+            for tag_id, ids in changed.items():
+                self.__after_commit(partial(self.search_index.add_tags, ids, [tag_id]))
+        return sum(len(ids) for ids in changed.values())
+
+    @staticmethod
+    def __set_tag_on_entries(
+        session: Session, tag_id: int, entry_ids: list[int], value: bool
+    ) -> list[int]:
+        """Add a tag to or remove a tag from entries, returning the entries actually changed."""
+        chunks = [
+            entry_ids[i : i + MAX_SQL_VARIABLES]
+            for i in range(0, len(entry_ids), MAX_SQL_VARIABLES)
+        ]
+        tagged: set[int] = set()
+        for chunk in chunks:
+            tagged.update(
+                session.scalars(
+                    select(TagEntry.entry_id).where(
+                        TagEntry.tag_id == tag_id, TagEntry.entry_id.in_(chunk)
+                    )
+                )
+            )
+        ids = [i for i in entry_ids if (i in tagged) != value]
+        if not ids:
+            return ids
+
+        if value:
+            session.execute(insert(TagEntry), [{"tag_id": tag_id, "entry_id": i} for i in ids])
+        else:
+            for chunk in chunks:
+                session.execute(
+                    delete(TagEntry).where(TagEntry.tag_id == tag_id, TagEntry.entry_id.in_(chunk))
+                )
+        return ids
 
     def add_color(self, color_group: TagColorGroup) -> TagColorGroup | None:
-        with Session(self.engine, expire_on_commit=False) as session:
+        with self.__session(expire_on_commit=False) as session:
             try:
                 session.add(color_group)
                 session.commit()
@@ -1516,7 +2428,7 @@ class Library:
                 return None
 
     def delete_color(self, color: TagColorGroup):
-        with Session(self.engine, expire_on_commit=False) as session:
+        with self.__session(expire_on_commit=False) as session:
             try:
                 session.delete(color)
                 session.commit()
@@ -1526,31 +2438,65 @@ class Library:
                 session.rollback()
                 return None
 
-    def save_library_backup_to_disk(self) -> Path:
-        assert isinstance(self.library_dir, Path)
-        makedirs(str(self.library_dir / TS_FOLDER_NAME / BACKUP_FOLDER_NAME), exist_ok=True)
+    def save_library_backup_to_disk(self, compress: bool = False, keep: int = 0) -> Path:
+        """Save a snapshot of the library database to the backups folder.
 
-        filename = f"ts_library_backup_{datetime.now(UTC).strftime('%Y_%m_%d_%H%M%S')}.sqlite"
+        The snapshot is taken with SQLite's online backup API, so it's safe to call while other
+        connections are writing to the library.
 
-        target_path = self.library_dir / TS_FOLDER_NAME / BACKUP_FOLDER_NAME / filename
+        Args:
+            compress (bool): Whether to gzip the backup file.
+            keep (int): The maximum number of backups to retain, removing the oldest ones first.
+                Values below 1 keep every backup.
 
-        shutil.copy2(
-            self.library_dir / TS_FOLDER_NAME / SQL_FILENAME,
-            target_path,
-        )
+        Returns:
+            The path of the new backup file.
+        """
+        assert isinstance(self.library_dir, Path)
+        backups_dir = self.library_dir / TS_FOLDER_NAME / BACKUP_FOLDER_NAME
+        makedirs(str(backups_dir), exist_ok=True)
+
+        timestamp = datetime.now(UTC).strftime("%Y_%m_%d_%H%M%S")
+        target_path = backups_dir / f"{BACKUP_PREFIX}{timestamp}{BACKUP_SUFFIX}"
+        # Avoid overwriting a backup taken within the same second.
+        index = 1
+        while target_path.exists() or target_path.with_suffix(BACKUP_COMPRESSED_SUFFIX).exists():
+            target_path = backups_dir / f"{BACKUP_PREFIX}{timestamp}_{index}{BACKUP_SUFFIX}"
+            index += 1
+
+        raw_connection = unwrap(self.engine).raw_connection()
+        try:
+            target_path = backup_sqlite(
+                raw_connection.driver_connection,  # pyright: ignore[reportArgumentType]
+                target_path,
+                compress=compress,
+            )
+        finally:
+            raw_connection.close()
+
+        manifest = BackupManifest.load(backups_dir)
+        manifest.add(target_path)
+        manifest.prune(keep)
 
         logger.info("Library backup saved to disk.", path=target_path)
 
         return target_path
 
+    def get_backup_manifest(self) -> BackupManifest:
+        """Return the manifest of the backups saved for this library."""
+        return BackupManifest.load(unwrap(self.library_dir) / TS_FOLDER_NAME / BACKUP_FOLDER_NAME)
+
+    @metrics.timed("library.get_tag")
     def get_tag(self, tag_id: int) -> Tag | None:
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
+            # A single tag has few parents and aliases, so joining them is cheaper than loading
+            # them with separate queries.
             tags_query = select(Tag).options(
-                selectinload(Tag.parent_tags),
-                selectinload(Tag.aliases),
+                joinedload(Tag.parent_tags),
+                joinedload(Tag.aliases),
                 joinedload(Tag.color),
             )
-            tag = session.scalar(tags_query.where(Tag.id == tag_id))
+            tag = session.scalars(tags_query.where(Tag.id == tag_id)).unique().first()
 
             if tag is not None:
                 session.expunge(tag)
@@ -1564,7 +2510,7 @@ class Library:
         return tag
 
     def get_tag_by_name(self, tag_name: str) -> Tag | None:
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             statement = (
                 select(Tag)
                 .options(selectinload(Tag.parent_tags), selectinload(Tag.aliases))
@@ -1586,13 +2532,13 @@ class Library:
         return tag
 
     def get_alias(self, tag_id: int, alias_id: int) -> TagAlias | None:
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             alias_query = select(TagAlias).where(TagAlias.id == alias_id, TagAlias.tag_id == tag_id)
 
             return session.scalar(alias_query.where(TagAlias.id == alias_id))
 
     def get_tag_color(self, slug: str, namespace: str) -> TagColorGroup | None:
-        with Session(self.engine) as session:
+        with self.__read_session() as session:
             statement = select(TagColorGroup).where(
                 and_(TagColorGroup.slug == slug, TagColorGroup.namespace == namespace)
             )
@@ -1606,7 +2552,7 @@ class Library:
         all_tags: dict[int, Tag] = {}
         all_tag_parents: dict[int, list[int]] = {}
 
-        with Session(self.engine) as session:
+        with self.__session() as session:
             while len(current_tag_ids) > 0:
                 all_tag_ids.update(current_tag_ids)
                 statement = select(TagParent).where(TagParent.child_id.in_(current_tag_ids))
@@ -1649,7 +2595,7 @@ class Library:
             return False
 
         # open session and save as parent tag
-        with Session(self.engine) as session:
+        with self.__session() as session:
             parent_tag = TagParent(
                 parent_id=parent_id,
                 child_id=child_id,
@@ -1663,9 +2609,11 @@ class Library:
                 session.rollback()
                 logger.error("IntegrityError")
                 return False
+            finally:
+                self.invalidate_query_plans()
 
     def add_alias(self, name: str, tag_id: int) -> bool:
-        with Session(self.engine) as session:
+        with self.__session() as session:
             if not name:
                 logger.warning("[LIBRARY][add_alias] Alias value must not be empty")
                 return False
@@ -1682,15 +2630,18 @@ class Library:
                 session.rollback()
                 logger.error("IntegrityError")
                 return False
+            finally:
+                self.invalidate_tag_catalogue()
 
     def remove_parent_tag(self, base_id: int, remove_tag_id: int) -> bool:
-        with Session(self.engine) as session:
+        with self.__session() as session:
             p_id = base_id
             r_id = remove_tag_id
             remove = session.query(TagParent).filter_by(parent_id=p_id, child_id=r_id).one()
             session.delete(remove)
             session.commit()
 
+        self.invalidate_query_plans()
         return True
 
     def update_tag(
@@ -1705,7 +2656,7 @@ class Library:
 
     def update_color(self, old_color_group: TagColorGroup, new_color_group: TagColorGroup) -> None:
         """Update a TagColorGroup in the Library. If it doesn't already exist, create it."""
-        with Session(self.engine) as session:
+        with self.__session() as session:
             existing_color = session.scalar(
                 select(TagColorGroup).where(
                     and_(
@@ -1806,7 +2757,7 @@ class Library:
         Args:
             key(str): The key for the name of the version type to set.
         """
-        with Session(self.engine) as session:
+        with self.__session() as session:
             engine = sqlalchemy.inspect(self.engine)
             try:
                 # "Version" table added in DB_VERSION 101
@@ -1833,7 +2784,7 @@ class Library:
             key(str): The key for the name of the version type to set.
             value(int): The version value to set.
         """
-        with Session(self.engine) as session:
+        with self.__session() as session:
             try:
                 version = session.scalar(select(Version).where(Version.key == key))
                 assert version
@@ -1861,7 +2812,7 @@ class Library:
     @deprecated("Use `get_version() for version and `ts_ignore` system for extension exclusion.")
     def prefs(self, key: str | LibraryPrefs):  # pyright: ignore[reportUnknownParameterType]
         # load given item from Preferences table
-        with Session(self.engine) as session:
+        with self.__session() as session:
             if isinstance(key, LibraryPrefs):
                 return unwrap(
                     session.scalar(select(Preferences).where(Preferences.key == key.name))
@@ -1875,7 +2826,7 @@ class Library:
     @deprecated("Use `get_version() for version and `ts_ignore` system for extension exclusion.")
     def set_prefs(self, key: str | LibraryPrefs, value: Any) -> None:  # pyright: ignore[reportExplicitAny]
         # set given item in Preferences table
-        with Session(self.engine) as session:
+        with self.__session() as session:
             # load existing preference and update value
             stuff = session.scalars(select(Preferences))
             logger.info([x.key for x in list(stuff)])
@@ -1895,35 +2846,34 @@ class Library:
             # TODO - try/except
 
     def mirror_entry_fields(self, *entries: Entry) -> None:
-        """Mirror fields among multiple Entry items."""
-        fields = {}
+        """Mirror fields among multiple Entry items.
+
+        Every entry is given a copy of each type of field found on the other entries, unless it
+        already has a field of that type.
+        """
+        fields: dict[str, BaseField] = {}
         # load all fields
-        existing_fields = {field.type_key for field in entries[0].fields}
         for entry in entries:
             for entry_field in entry.fields:
                 fields[entry_field.type_key] = entry_field
 
-        # assign the field to all entries
+        # assign the missing fields to each entry
+        new_fields: list[tuple[int, str, str | datetime | None]] = []
         for entry in entries:
-            for field_key, field in fields.items():  # pyright: ignore[reportUnknownVariableType]
+            existing_fields = {field.type_key for field in entry.fields}
+            for field_key, field in fields.items():
                 if field_key not in existing_fields:
-                    self.add_field_to_entry(
-                        entry_id=entry.id,
-                        field_id=field.type_key,
-                        value=field.value,
-                    )
+                    new_fields.append((entry.id, field_key, field.value))
+        self.add_entry_fields(new_fields)
 
     def merge_entries(self, from_entry: Entry, into_entry: Entry) -> bool:
-        """Add fields and tags from the first entry to the second, and then delete the first."""
-        success = True
-        for field in from_entry.fields:
-            result = self.add_field_to_entry(
-                entry_id=into_entry.id,
-                field_id=field.type_key,
-                value=field.value,
-            )
-            if not result:
-                success = False
+        """Add fields and tags from the first entry to the second, and then delete the first.
+
+        Returns:
+            Whether every field was added to the second entry.
+        """
+        fields = [(field.type_key, field.value) for field in from_entry.fields]
+        success = self.add_fields_to_entries(into_entry.id, fields) == len(fields)
         tag_ids = [tag.id for tag in from_entry.tags]
         self.add_tags_to_entries(into_entry.id, tag_ids)
         self.remove_entries([from_entry.id])
@@ -1933,7 +2883,7 @@ class Library:
     @property
     def tag_color_groups(self) -> dict[str, list[TagColorGroup]]:
         """Return every TagColorGroup in the library."""
-        with Session(self.engine) as session:
+        with self.__session() as session:
             color_groups: dict[str, list[TagColorGroup]] = {}
             results = session.scalars(select(TagColorGroup).order_by(asc(TagColorGroup.namespace)))
             for color in results:
@@ -1963,12 +2913,12 @@ class Library:
     @property
     def namespaces(self) -> list[Namespace]:
         """Return every Namespace in the library."""
-        with Session(self.engine) as session:
+        with self.__session() as session:
             namespaces = session.scalars(select(Namespace).order_by(asc(Namespace.name)))
             return list(namespaces)
 
     def get_namespace_name(self, namespace: str) -> str:
-        with Session(self.engine) as session:
+        with self.__session() as session:
             result = session.scalar(select(Namespace).where(Namespace.namespace == namespace))
             if result:
                 session.expunge(result)
@@ -0,0 +1,80 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""A cache of search statements, keyed by the normalized form of their query."""
+
+from collections.abc import Hashable
+
+from sqlalchemy import Select
+
+from tagstudio.core.query_lang.ast import (
+    AST,
+    ANDList,
+    BaseVisitor,
+    Constraint,
+    ConstraintType,
+    Not,
+    ORList,
+    Property,
+)
+from tagstudio.core.utils.lru_cache import LruCache
+
+QUERY_PLAN_CACHE_SIZE: int = 256
+
+# Constraints compared with ILIKE, which only ignores the case of ASCII characters.
+_CASE_INSENSITIVE_TYPES: set[ConstraintType] = {
+    ConstraintType.Tag,
+    ConstraintType.FileType,
+    ConstraintType.Special,
+}
+
+
+class QueryKeyBuilder(BaseVisitor[Hashable]):
+    """Build a hashable key that is equal for queries that always match the same entries.
+
+    Nested lists of the same kind are flattened, the terms of AND and OR lists are sorted, and
+    values compared case-insensitively are lowercased, so that "A and (b and C)" and
+    "c and a and b" share a key.
+    """
+
+    def visit_and_list(self, node: ANDList) -> Hashable:
+        return ("and", self.__terms(node.terms, ANDList))
+
+    def visit_or_list(self, node: ORList) -> Hashable:
+        return ("or", self.__terms(node.elements, ORList))
+
+    def visit_constraint(self, node: Constraint) -> Hashable:
+        value = node.value
+        if node.type in _CASE_INSENSITIVE_TYPES and value.isascii():
+            value = value.lower()
+        elif node.type == ConstraintType.TagID and value.strip().isdigit():
+            value = str(int(value))
+        properties = tuple(self.visit(p) for p in node.properties)
+        return ("constraint", node.type.value, value, properties)
+
+    def visit_property(self, node: Property) -> Hashable:
+        return ("property", node.key, node.value)
+
+    def visit_not(self, node: Not) -> Hashable:
+        return ("not", self.visit(node.child))
+
+    def __terms(self, terms: list[AST], list_type: type[AST]) -> tuple[Hashable, ...]:
+        keys: set[Hashable] = set()
+        for term in terms:
+            key = self.visit(term)
+            if isinstance(term, list_type):
+                keys.update(key[1])  # pyright: ignore[reportIndexIssue]
+            else:
+                keys.add(key)
+        return tuple(sorted(keys, key=repr))
+
+
+class QueryPlanCache(LruCache[Hashable, Select]):
+    """Recently built search statements, with tag names already resolved to tag IDs.
+
+    The statements depend on the names, aliases, and parents of tags, so the Library clears this
+    cache whenever any of those change. Hits and misses are counted as the "query_plans" metrics.
+    """
+
+    def __init__(self, max_size: int = QUERY_PLAN_CACHE_SIZE):
+        super().__init__(max_size, "query_plans")
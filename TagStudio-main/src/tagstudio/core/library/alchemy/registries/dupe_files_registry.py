@@ -28,7 +28,6 @@ class DupeFilesRegistry:
         A duplicate file is defined as an identical or near-identical file as determined
         by a DupeGuru results file.
         """
-        library_dir = self.library.library_dir
         if not isinstance(results_filepath, Path):
             results_filepath = Path(results_filepath)
 
@@ -45,10 +44,9 @@ class DupeFilesRegistry:
                 if element.tag == "file":
                     file_path = Path(element.attrib.get("path"))
 
-                    try:
-                        path_relative = file_path.relative_to(library_dir)
-                    except ValueError:
-                        # The file is not in the library directory
+                    path_relative = self.library.entry_path(file_path)
+                    if path_relative is None:
+                        # The file is not in any root folder of the library
                         continue
 
                     results = self.library.search_library(
@@ -40,25 +40,31 @@ class UnlinkedRegistry:
             yield i
 
     def match_unlinked_file_entry(self, match_entry: Entry) -> list[Path]:
-        """Try and match unlinked file entries with matching results in the library directory.
+        """Try and match unlinked file entries with matching results in the library's roots.
 
         Works if files were just moved to different subfolders and don't have duplicate names.
+        Matches are returned as entry paths, so files in other root folders have absolute paths.
         """
         library_dir = unwrap(self.lib.library_dir)
         matches: list[Path] = []
 
         # NOTE: ignore_to_glob() is needed for wcmatch, not ripgrep.
         ignore_patterns = ignore_to_glob(Ignore.get_patterns(library_dir))
-        for path in pathlib.Path(str(library_dir)).glob(
-            f"***/{match_entry.path.name}",
-            flags=PATH_GLOB_FLAGS,
-            exclude=ignore_patterns,
-        ):
-            if path.is_dir():
+        for folder in self.lib.folders:
+            if not folder.path.is_dir():
                 continue
-            if path.name == match_entry.path.name:
-                new_path = Path(path).relative_to(library_dir)
-                matches.append(new_path)
+            for path in pathlib.Path(str(folder.path)).glob(
+                f"***/{match_entry.path.name}",
+                flags=PATH_GLOB_FLAGS,
+                exclude=ignore_patterns,
+            ):
+                if path.is_dir():
+                    continue
+                if path.name == match_entry.path.name:
+                    new_path = Path(path)
+                    if folder.path == library_dir:
+                        new_path = new_path.relative_to(library_dir)
+                    matches.append(new_path)
 
         logger.info("[UnlinkedRegistry] Matches", matches=matches)
         return matches
@@ -0,0 +1,368 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""An optional in-memory index of the entries each tag and file extension is on.
+
+Searches are evaluated as set operations on the index instead of in SQL, falling back to SQL
+for the parts of a query the index doesn't cover, such as path searches.
+"""
+
+from collections.abc import Iterable
+from threading import RLock
+from typing import TYPE_CHECKING
+
+import numpy as np
+import structlog
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from tagstudio.core.library.alchemy.enums import BrowsingState, SortingModeEnum
+from tagstudio.core.library.alchemy.joins import TagEntry
+from tagstudio.core.library.alchemy.models import Entry
+from tagstudio.core.library.alchemy.visitors import (
+    SQLBoolExpressionBuilder,
+    get_filetype_equivalency_list,
+)
+from tagstudio.core.media_types import MediaCategories
+from tagstudio.core.query_lang.ast import (
+    AST,
+    ANDList,
+    BaseVisitor,
+    Constraint,
+    ConstraintType,
+    Not,
+    ORList,
+    Property,
+)
+
+# Only import for type checking/autocompletion, will not be imported at runtime.
+if TYPE_CHECKING:
+    from tagstudio.core.library.alchemy.library import Library
+else:
+    Library = None  # don't import library because of circular imports
+
+logger = structlog.get_logger(__name__)
+
+type Mask = np.ndarray[tuple[int], np.dtype[np.bool_]]
+type IDs = np.ndarray[tuple[int], np.dtype[np.uint32]]
+
+
+def _ids(values: Iterable[int]) -> IDs:
+    """Return the sorted, unique entry IDs in an iterable."""
+    return np.unique(np.fromiter(values, dtype=np.uint32))
+
+
+class Postings:
+    """The IDs of the entries a tag or file extension is on.
+
+    Like the containers of a Roaring bitmap, the IDs are stored as a sorted array while that is
+    smaller than a bitmap of every ID up to the largest one, and as a packed bitmap otherwise.
+    """
+
+    __slots__ = ("__array", "__bitmap", "__count")
+
+    def __init__(self, ids: IDs) -> None:
+        """Store the given sorted, unique IDs."""
+        self.__array: IDs | None = None
+        self.__bitmap: np.ndarray | None = None
+        self.__count = len(ids)
+        if len(ids) == 0 or len(ids) * ids.itemsize <= int(ids[-1]) // 8 + 1:
+            self.__array = ids
+        else:
+            bits = np.zeros(int(ids[-1]) + 1, dtype=np.bool_)
+            bits[ids] = True
+            self.__bitmap = np.packbits(bits, bitorder="little")
+
+    def __len__(self) -> int:
+        return self.__count
+
+    @property
+    def is_bitmap(self) -> bool:
+        return self.__bitmap is not None
+
+    def ids(self) -> IDs:
+        """Return the sorted IDs."""
+        if self.__array is not None:
+            return self.__array
+        bits = np.unpackbits(self.__bitmap, bitorder="little")  # pyright: ignore[reportArgumentType]
+        return np.flatnonzero(bits).astype(np.uint32)
+
+    def fill(self, mask: Mask) -> None:
+        """Set the positions of these IDs to True in a mask indexed by entry ID."""
+        if self.__array is not None:
+            mask[self.__array[self.__array < len(mask)]] = True
+        else:
+            bits = np.unpackbits(self.__bitmap, bitorder="little")  # pyright: ignore[reportArgumentType]
+            size = min(len(bits), len(mask))
+            mask[:size] |= bits[:size].view(np.bool_)
+
+    def union(self, ids: IDs) -> tuple["Postings", IDs]:
+        """Return postings with the given IDs added, and which of the IDs weren't here before."""
+        current = self.ids()
+        added = np.setdiff1d(ids, current, assume_unique=True)
+        return Postings(np.union1d(current, added).astype(np.uint32)), added
+
+    def difference(self, ids: IDs) -> tuple["Postings", IDs]:
+        """Return postings with the given IDs removed, and which of the IDs were here before."""
+        current = self.ids()
+        removed = np.intersect1d(ids, current, assume_unique=True)
+        if len(removed) == 0:
+            return self, removed
+        return Postings(np.setdiff1d(current, removed, assume_unique=True)), removed
+
+
+class SearchIndex:
+    """The entries each tag and file extension is on, and the order entries are sorted in.
+
+    The index is built from the library when it's opened, and the Library updates it after each
+    change to entries or their tags. Like the tag_entries table, it keeps the tags of removed
+    entries and deleted tags, which are hidden by only matching entries that exist. It can be
+    read and updated from any thread.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[tuple[int, str]],
+        tag_entries: Iterable[tuple[int, int]],
+    ):
+        """Build the index.
+
+        Args:
+            entries (Iterable[tuple[int, str]]): (id, suffix) for every entry.
+            tag_entries (Iterable[tuple[int, int]]): (tag_id, entry_id) for every tagged entry.
+        """
+        self.__lock = RLock()
+        self.__exists: Mask = np.zeros(0, dtype=np.bool_)
+        # The number of tags on each entry, indexed by entry ID.
+        self.__tag_counts: np.ndarray = np.zeros(0, dtype=np.uint32)
+        self.__tags: dict[int, Postings] = {}
+        self.__suffixes: dict[str, Postings] = {}
+        # Entry IDs in the order of each sorting mode that isn't by ID.
+        self.__orders: dict[SortingModeEnum, IDs] = {}
+        # The tag IDs that each tag name refers to, including child tags.
+        self.__tag_names: dict[str, list[int]] = {}
+
+        entry_rows = list(entries)
+        self.add_entries(
+            [entry_id for entry_id, _ in entry_rows], [suffix for _, suffix in entry_rows]
+        )
+
+        pairs = np.array(list(tag_entries), dtype=np.uint32).reshape(-1, 2)
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        tag_ids, starts = np.unique(pairs[:, 0], return_index=True)
+        for tag_id, entry_ids in zip(tag_ids, np.split(pairs[:, 1], starts[1:]), strict=True):
+            self.__tags[int(tag_id)] = Postings(np.unique(entry_ids))
+        self.__grow(int(pairs[:, 1].max()) + 1 if len(pairs) else 0)
+        np.add.at(self.__tag_counts, pairs[:, 1], 1)
+
+    @classmethod
+    def from_session(cls, session: Session) -> "SearchIndex":
+        """Build an index of the entries and tags currently stored in the library."""
+        entries = session.execute(select(Entry.id, Entry.suffix))
+        tag_entries = session.execute(select(TagEntry.tag_id, TagEntry.entry_id))
+        index = cls(entries, tag_entries)  # pyright: ignore[reportArgumentType]
+        logger.info(
+            "[SearchIndex] Built search index",
+            entries=int(index.__exists.sum()),
+            tags=len(index.__tags),
+            bitmaps=sum(p.is_bitmap for p in index.__tags.values()),
+        )
+        return index
+
+    def __grow(self, size: int) -> None:
+        """Make room for entry IDs below the given size."""
+        if size <= len(self.__exists):
+            return
+        size = max(size, len(self.__exists) * 2)
+        self.__exists = np.concatenate(
+            [self.__exists, np.zeros(size - len(self.__exists), dtype=np.bool_)]
+        )
+        self.__tag_counts = np.concatenate(
+            [self.__tag_counts, np.zeros(size - len(self.__tag_counts), dtype=np.uint32)]
+        )
+
+    def add_entries(self, entry_ids: list[int], suffixes: list[str]) -> None:
+        """Add new entries with the given file extensions."""
+        with self.__lock:
+            if not entry_ids:
+                return
+            ids = np.array(entry_ids, dtype=np.uint32)
+            self.__grow(int(ids.max()) + 1)
+            self.__exists[ids] = True
+            by_suffix: dict[str, list[int]] = {}
+            for entry_id, suffix in zip(entry_ids, suffixes, strict=True):
+                by_suffix.setdefault(suffix.lower(), []).append(entry_id)
+            for suffix, suffix_ids in by_suffix.items():
+                postings = self.__suffixes.get(suffix, Postings(_ids(())))
+                self.__suffixes[suffix] = postings.union(_ids(suffix_ids))[0]
+            self.__orders.clear()
+
+    def remove_entries(self, entry_ids: Iterable[int]) -> None:
+        """Remove entries."""
+        with self.__lock:
+            ids = _ids(entry_ids)
+            ids = ids[ids < len(self.__exists)]
+            self.__exists[ids] = False
+            for key, postings in list(self.__suffixes.items()):
+                self.__suffixes[key] = postings.difference(ids)[0]
+            self.__orders.clear()
+
+    def entry_paths_changed(self) -> None:
+        """Forget the order of entries sorted by file name or path, after a path changes."""
+        with self.__lock:
+            self.__orders.clear()
+
+    def add_tags(self, entry_ids: Iterable[int], tag_ids: Iterable[int]) -> None:
+        """Add each of the tags to each of the entries."""
+        with self.__lock:
+            ids = _ids(entry_ids)
+            self.__grow(int(ids.max()) + 1 if len(ids) else 0)
+            for tag_id in set(tag_ids):
+                postings = self.__tags.get(tag_id, Postings(_ids(())))
+                self.__tags[tag_id], added = postings.union(ids)
+                self.__tag_counts[added] += 1
+
+    def remove_tags(self, entry_ids: Iterable[int], tag_ids: Iterable[int]) -> None:
+        """Remove each of the tags from each of the entries."""
+        with self.__lock:
+            ids = _ids(entry_ids)
+            for tag_id in set(tag_ids):
+                postings = self.__tags.get(tag_id)
+                if postings is None:
+                    continue
+                self.__tags[tag_id], removed = postings.difference(ids)
+                self.__tag_counts[removed] -= 1
+
+    def clear_tag_names(self) -> None:
+        """Forget what tag names refer to, after tag names, aliases, or parents change."""
+        with self.__lock:
+            self.__tag_names.clear()
+
+    def tag_ids(self, tag_name: str, sql: SQLBoolExpressionBuilder) -> list[int]:
+        """Return the IDs of the tags a tag name refers to, including their child tags."""
+        with self.__lock:
+            key = tag_name.lower() if tag_name.isascii() else tag_name
+            if key not in self.__tag_names:
+                self.__tag_names[key] = sql.get_tag_ids(tag_name)
+            return self.__tag_names[key]
+
+    def all_entries(self) -> Mask:
+        """Return a mask of every entry in the library."""
+        return self.__exists.copy()
+
+    def untagged(self) -> Mask:
+        """Return a mask of the entries with no tags."""
+        return self.__exists & (self.__tag_counts == 0)
+
+    def with_tags(self, tag_ids: Iterable[int]) -> Mask:
+        """Return a mask of the entries with any of the given tags."""
+        mask = np.zeros(len(self.__exists), dtype=np.bool_)
+        for tag_id in tag_ids:
+            if (postings := self.__tags.get(tag_id)) is not None:
+                postings.fill(mask)
+        return mask & self.__exists
+
+    def with_suffixes(self, suffixes: Iterable[str]) -> Mask:
+        """Return a mask of the entries with any of the given file extensions."""
+        mask = np.zeros(len(self.__exists), dtype=np.bool_)
+        for suffix in suffixes:
+            if (postings := self.__suffixes.get(suffix.lower())) is not None:
+                postings.fill(mask)
+        return mask & self.__exists
+
+    def with_ids(self, entry_ids: Iterable[int]) -> Mask:
+        """Return a mask of the given entries."""
+        mask = np.zeros(len(self.__exists), dtype=np.bool_)
+        ids = _ids(entry_ids)
+        mask[ids[ids < len(mask)]] = True
+        return mask & self.__exists
+
+    def search(self, lib: Library, state: BrowsingState) -> IDs:
+        """Return the IDs of the entries matching a search, in the order they're sorted in."""
+        with self.__lock:
+            ast = state.ast
+            mask = BitmapBuilder(lib, self).visit(ast) if ast else self.all_entries()
+            match state.sorting_mode:
+                case SortingModeEnum.FILE_NAME | SortingModeEnum.PATH:
+                    order = self.__order(lib, state.sorting_mode)
+                    ids = order[mask[order]]
+                case SortingModeEnum.RANDOM:
+                    ids = np.flatnonzero(mask).astype(np.uint32)
+                    # Sorted by the same key as in SQL, so that paging is stable.
+                    ids = ids[np.argsort(np.sin(ids * state.random_seed), kind="stable")]
+                case _:
+                    ids = np.flatnonzero(mask).astype(np.uint32)
+            return ids if state.ascending else ids[::-1]
+
+    def __order(self, lib: Library, sorting_mode: SortingModeEnum) -> IDs:
+        """Return the IDs of every entry sorted by file name or path, reading them if needed."""
+        if sorting_mode not in self.__orders:
+            column = Entry.filename if sorting_mode == SortingModeEnum.FILE_NAME else Entry.path
+            with Session(lib.engine) as session:
+                self.__orders[sorting_mode] = np.fromiter(
+                    session.scalars(select(Entry.id).order_by(func.lower(column), Entry.id)),
+                    dtype=np.uint32,
+                )
+        order: IDs = self.__orders[sorting_mode]
+        return order[order < len(self.__exists)]
+
+
+class BitmapBuilder(BaseVisitor[Mask]):
+    """Evaluate a query as a mask of matching entries, indexed by entry ID.
+
+    Constraints the SearchIndex doesn't cover are evaluated in SQL and turned into a mask.
+    """
+
+    def __init__(self, lib: Library, index: SearchIndex) -> None:
+        super().__init__()
+        self.lib = lib
+        self.index = index
+        self.sql = SQLBoolExpressionBuilder(lib)
+
+    def visit_or_list(self, node: ORList) -> Mask:
+        if not node.elements:
+            return self.index.all_entries()
+        mask = self.visit(node.elements[0])
+        for element in node.elements[1:]:
+            mask |= self.visit(element)
+        return mask
+
+    def visit_and_list(self, node: ANDList) -> Mask:
+        mask = self.index.all_entries()
+        for term in node.terms:
+            mask &= self.visit(term)
+        return mask
+
+    def visit_constraint(self, node: Constraint) -> Mask:
+        if len(node.properties) != 0:
+            raise NotImplementedError("Properties are not implemented yet")
+
+        match node.type:
+            case ConstraintType.Tag:
+                return self.index.with_tags(self.index.tag_ids(node.value, self.sql))
+            case ConstraintType.TagID:
+                return self.index.with_tags([int(node.value)])
+            case ConstraintType.MediaType:
+                for media_cat in MediaCategories.ALL_CATEGORIES:
+                    if node.value == media_cat.name:
+                        return self.index.with_suffixes(
+                            ext.replace(".", "") for ext in media_cat.extensions
+                        )
+                return self.index.with_suffixes(())
+            case ConstraintType.FileType if not any(c in node.value for c in "%_"):
+                return self.index.with_suffixes(get_filetype_equivalency_list(node.value))
+            case ConstraintType.Special if node.value.lower() == "untagged":
+                return self.index.untagged()
+        return self.__from_sql(node)
+
+    def visit_property(self, node: Property) -> Mask:
+        raise NotImplementedError("This should never be reached!")
+
+    def visit_not(self, node: Not) -> Mask:
+        return self.index.all_entries() & ~self.visit(node.child)
+
+    def __from_sql(self, node: AST) -> Mask:
+        with Session(self.lib.engine) as session:
+            return self.index.with_ids(
+                session.scalars(select(Entry.id).where(self.sql.visit(node)))
+            )
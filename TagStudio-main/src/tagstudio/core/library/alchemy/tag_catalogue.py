@@ -0,0 +1,121 @@
+# Copyright (C) 2025
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""An in-memory index of tag names used for fast completions and prefix lookups."""
+
+from bisect import bisect_left
+from collections.abc import Iterable
+
+import structlog
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from tagstudio.core.library.alchemy.models import Tag, TagAlias
+
+logger = structlog.get_logger(__name__)
+
+
+class TagCatalogue:
+    """A read-only snapshot of every tag's ID, name, shorthand, and aliases.
+
+    Names, shorthands, and aliases are lowercased and kept in a sorted array so that prefix
+    lookups are a binary search instead of a full table scan. The catalogue is never updated in
+    place; the Library discards it whenever tags are changed and builds a new one on demand.
+    """
+
+    def __init__(
+        self,
+        tags: Iterable[tuple[int, str, str | None]],
+        aliases: Iterable[tuple[int, str]] = (),
+    ):
+        """Build the catalogue.
+
+        Args:
+            tags (Iterable[tuple[int, str, str | None]]): (id, name, shorthand) for every tag.
+            aliases (Iterable[tuple[int, str]]): (tag_id, alias name) for every tag alias.
+        """
+        self.names: dict[int, str] = {}
+        index: list[tuple[str, int]] = []
+
+        for tag_id, name, shorthand in tags:
+            self.names[tag_id] = name
+            index.append((name.lower(), tag_id))
+            if shorthand:
+                index.append((shorthand.lower(), tag_id))
+        for tag_id, alias in aliases:
+            if alias and tag_id in self.names:
+                index.append((alias.lower(), tag_id))
+
+        index.sort()
+        self.__keys: list[str] = [k for k, _ in index]
+        self.__ids: list[int] = [i for _, i in index]
+
+    @classmethod
+    def from_session(cls, session: Session) -> "TagCatalogue":
+        """Build a catalogue from the tags and aliases currently stored in the library."""
+        tags = session.execute(select(Tag.id, Tag.name, Tag.shorthand))
+        aliases = session.execute(select(TagAlias.tag_id, TagAlias.name))
+        catalogue = cls(tags, aliases)
+        logger.info("[TagCatalogue] Built tag catalogue", tags=len(catalogue))
+        return catalogue
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, tag_id: object) -> bool:
+        return tag_id in self.names
+
+    @property
+    def ids(self) -> list[int]:
+        """Return every tag ID in ascending order."""
+        return sorted(self.names)
+
+    def prefix_search(self, prefix: str, limit: int = -1) -> list[int]:
+        """Return the IDs of tags with a name, shorthand, or alias starting with a prefix.
+
+        Results are ranked by the length of the matching key, so that the closest matches come
+        first, and then alphabetically.
+
+        Args:
+            prefix (str): The case-insensitive prefix to search for.
+            limit (int): The maximum number of IDs to return. Values below 1 return every match.
+        """
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+
+        matches: list[tuple[int, str, int]] = []
+        i = bisect_left(self.__keys, prefix)
+        while i < len(self.__keys) and self.__keys[i].startswith(prefix):
+            matches.append((len(self.__keys[i]), self.__keys[i], self.__ids[i]))
+            i += 1
+        matches.sort()
+
+        ids: list[int] = []
+        seen: set[int] = set()
+        for _, _, tag_id in matches:
+            if tag_id in seen:
+                continue
+            seen.add(tag_id)
+            ids.append(tag_id)
+            if 0 < limit <= len(ids):
+                break
+        return ids
+
+    def names_with_prefix(self, prefix: str, limit: int = -1) -> list[str]:
+        """Return the names of tags with a name starting with a prefix, in alphabetical order.
+
+        Unlike prefix_search(), shorthands and aliases are not matched.
+        """
+        prefix = prefix.lower()
+        names: list[str] = []
+        i = bisect_left(self.__keys, prefix)
+        while i < len(self.__keys) and self.__keys[i].startswith(prefix):
+            name = self.names[self.__ids[i]]
+            if self.__keys[i] == name.lower():
+                names.append(name)
+                if 0 < limit <= len(names):
+                    break
+            i += 1
+        return names
@@ -6,8 +6,8 @@ import re
 from typing import TYPE_CHECKING, override
 
 import structlog
-from sqlalchemy import ColumnElement, and_, distinct, func, or_, select
-from sqlalchemy.orm import Session
+from sqlalchemy import ColumnElement, and_, exists, func, intersect, literal, or_, select
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy.sql.operators import ilike_op
 
 from tagstudio.core.library.alchemy.constants import TAG_CHILDREN_ID_QUERY
@@ -33,6 +33,14 @@ else:
 
 logger = structlog.get_logger(__name__)
 
+# Tags are counted up to this many entries when choosing how to search for entries with all of
+# a set of tags. Counting stops there so that choosing a plan never costs more than running it.
+TAG_COUNT_LIMIT: int = 10_000
+# Entries with all of a set of tags are found by checking each entry of the rarest tag for the
+# other tags when the rarest tag is on this many times fewer entries than the next rarest.
+# Otherwise, the entries of each tag are intersected.
+SEMI_JOIN_RATIO: int = 8
+
 
 def get_filetype_equivalency_list(item: str) -> list[str] | set[str]:
     for s in FILETYPE_EQUIVALENTS:
@@ -67,7 +75,7 @@ class SQLBoolExpressionBuilder(BaseVisitor[ColumnElement[bool]]):
             raise NotImplementedError("Properties are not implemented yet")  # TODO TSQLANG
 
         if node.type == ConstraintType.Tag:
-            return self.__entry_has_any_tags(self.__get_tag_ids(node.value))
+            return self.__entry_has_any_tags(self.get_tag_ids(node.value))
         elif node.type == ConstraintType.TagID:
             return self.__entry_has_any_tags([int(node.value)])
         elif node.type == ConstraintType.Path:
@@ -107,7 +115,9 @@ class SQLBoolExpressionBuilder(BaseVisitor[ColumnElement[bool]]):
             )
         elif node.type == ConstraintType.Special:  # noqa: SIM102 unnecessary once there is a second special constraint
             if node.value.lower() == "untagged":
-                return ~Entry.id.in_(select(Entry.id).join(TagEntry))
+                # tag_entries has no index starting with entry_id, so a correlated NOT EXISTS
+                # would scan it once per entry. Reading it once into a set is faster.
+                return Entry.id.not_in(select(TagEntry.entry_id))
 
         # raise exception if Constraint stays unhandled
         raise NotImplementedError("This type of constraint is not implemented yet")
@@ -120,7 +130,7 @@ class SQLBoolExpressionBuilder(BaseVisitor[ColumnElement[bool]]):
     def visit_not(self, node: Not) -> ColumnElement[bool]:  # type: ignore
         return ~self.visit(node.child)
 
-    def __get_tag_ids(self, tag_name: str, include_children: bool = True) -> list[int]:
+    def get_tag_ids(self, tag_name: str, include_children: bool = True) -> list[int]:
         """Given a tag name find the ids of all tags that this name could refer to."""
         with Session(self.lib.engine) as session:
             tag_ids = list(
@@ -162,7 +172,7 @@ class SQLBoolExpressionBuilder(BaseVisitor[ColumnElement[bool]]):
                             )
                         continue
                     case ConstraintType.Tag:
-                        ids = self.__get_tag_ids(term.value)
+                        ids = self.get_tag_ids(term.value)
                         if not only_single:
                             tag_ids.update(ids)
                             continue
@@ -181,18 +191,52 @@ class SQLBoolExpressionBuilder(BaseVisitor[ColumnElement[bool]]):
             bool_expressions.append(self.visit(term))
         return list(tag_ids), bool_expressions
 
+    def __count_tag_entries(self, tag_ids: list[int]) -> dict[int, int]:
+        """Count the entries each tag is on, up to TAG_COUNT_LIMIT."""
+        with Session(self.lib.engine) as session:
+            return {
+                tag_id: session.scalar(
+                    select(func.count()).select_from(
+                        select(literal(1))
+                        .where(TagEntry.tag_id == tag_id)
+                        .limit(TAG_COUNT_LIMIT)
+                        .subquery()
+                    )
+                )
+                or 0
+                for tag_id in tag_ids
+            }
+
     def __entry_has_all_tags(self, tag_ids: list[int]) -> ColumnElement[bool]:
-        """Returns Binary Expression that is true if the Entry has all provided tag ids."""
-        # Relational Division Query
+        """Returns Binary Expression that is true if the Entry has all provided tag ids.
+
+        The plan is chosen from how many entries each tag is on, starting from the rarest tag.
+        Plans are cached by the Library while tags are added to and removed from entries, so the
+        counts only decide how fast the expression is, never what it matches.
+        """
+        if len(tag_ids) == 1:
+            return self.__entry_has_any_tags(tag_ids)
+
+        counts = self.__count_tag_entries(tag_ids)
+        tag_ids = sorted(tag_ids, key=lambda tag_id: counts[tag_id])
+        rarest, *others = tag_ids
+        if counts[rarest] * SEMI_JOIN_RATIO <= counts[others[0]]:
+            # Look up each of the rarest tag's entries in the (tag_id, entry_id) primary key
+            # of the other tags, rather than reading every entry of the common tags.
+            entry_ids = select(TagEntry.entry_id).where(TagEntry.tag_id == rarest)
+            for tag_id in others:
+                other = aliased(TagEntry)
+                entry_ids = entry_ids.where(
+                    exists().where(other.tag_id == tag_id, other.entry_id == TagEntry.entry_id)
+                )
+            return Entry.id.in_(entry_ids)
+
         return Entry.id.in_(
-            select(TagEntry.entry_id)
-            .where(TagEntry.tag_id.in_(tag_ids))
-            .group_by(TagEntry.entry_id)
-            .having(func.count(distinct(TagEntry.tag_id)) == len(tag_ids))
+            intersect(
+                *(select(TagEntry.entry_id).where(TagEntry.tag_id == tag_id) for tag_id in tag_ids)
+            )
         )
 
     def __entry_has_any_tags(self, tag_ids: list[int]) -> ColumnElement[bool]:
         """Returns Binary Expression that is true if the Entry has any of the provided tag ids."""
-        return Entry.id.in_(
-            select(TagEntry.entry_id).where(TagEntry.tag_id.in_(tag_ids)).distinct()
-        )
+        return Entry.id.in_(select(TagEntry.entry_id).where(TagEntry.tag_id.in_(tag_ids)))
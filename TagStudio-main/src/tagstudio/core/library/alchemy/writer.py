@@ -0,0 +1,136 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""A single thread that writes changes to a library in grouped transactions."""
+
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread, current_thread
+from typing import Any, TypeVar
+
+import structlog
+
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.utils.metrics import metrics
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+# The most commands that are written to the library in a single transaction.
+WRITE_GROUP_SIZE: int = 256
+
+
+@dataclass
+class WriteCommand:
+    """A change to make to the library, and the future its result is reported through."""
+
+    function: Callable[..., Any]
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+    future: Future = field(default_factory=Future)
+
+
+class LibraryWriter:
+    """Make changes to a library one at a time, on a dedicated thread.
+
+    Commands are run in the order they're submitted. Whatever has queued up while a transaction
+    was being written is run together in the next one, each command in its own savepoint, so a
+    failing command only undoes its own changes. A command's future only completes once its
+    transaction has been committed, so a caller that waits for it will read its changes.
+    """
+
+    def __init__(self, library: Library):
+        self.library = library
+        self.__queue: SimpleQueue[WriteCommand | None] = SimpleQueue()
+        self.__lock = Lock()
+        self.__closed = False
+        self.__thread = Thread(target=self.__run, name="LibraryWriter", daemon=True)
+        self.__thread.start()
+
+    def submit(self, function: Callable[..., T], /, *args: Any, **kwargs: Any) -> "Future[T]":
+        """Queue a change to the library, such as a call to one of its methods.
+
+        Args:
+            function (Callable[..., T]): The function that makes the change.
+            *args: The positional arguments to call the function with.
+            **kwargs: The keyword arguments to call the function with.
+
+        Returns:
+            A future that completes with the function's return value once it's been committed.
+        """
+        command = WriteCommand(function, args, kwargs)
+        with self.__lock:
+            if self.__closed:
+                raise RuntimeError("LibraryWriter is closed")
+            self.__queue.put(command)
+        metrics.set_gauge("library_writer.queue", self.__queue.qsize())
+        return command.future
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Wait for every change submitted so far to be committed.
+
+        On the writer thread itself, such as from within a command, this returns right away:
+        the commands before it have already run in the current transaction, and waiting for the
+        queue would deadlock.
+        """
+        if current_thread() is self.__thread:
+            return
+        self.submit(lambda: None).result(timeout)
+
+    def close(self) -> None:
+        """Write every change submitted so far, then stop the writer thread."""
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__queue.put(None)
+        self.__thread.join()
+
+    def __run(self):
+        closing = False
+        while not closing:
+            command = self.__queue.get()
+            if command is None:
+                break
+            group = [command]
+            while len(group) < WRITE_GROUP_SIZE:
+                try:
+                    command = self.__queue.get_nowait()
+                except Empty:
+                    break
+                if command is None:
+                    closing = True
+                    break
+                group.append(command)
+            metrics.set_gauge("library_writer.queue", self.__queue.qsize())
+            with metrics.span("library_writer.write"):
+                self.__write(group)
+
+    def __write(self, group: list[WriteCommand]):
+        results: list[tuple[WriteCommand, Any, BaseException | None]] = []
+        try:
+            with self.library.transaction(immediate=True):
+                for command in group:
+                    if not command.future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self.library.savepoint():
+                            result = command.function(*command.args, **command.kwargs)
+                        results.append((command, result, None))
+                    except Exception as e:
+                        results.append((command, None, e))
+        except Exception as e:
+            logger.error("[LibraryWriter] Could not commit changes", commands=len(group), error=e)
+            for command in group:
+                if not command.future.done():
+                    command.future.set_exception(e)
+            return
+
+        for command, result, error in results:
+            if error is None:
+                command.future.set_result(result)
+            else:
+                command.future.set_exception(error)
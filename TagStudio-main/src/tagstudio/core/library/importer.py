@@ -0,0 +1,285 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Copying files into a library and adding them as entries, without a refresh."""
+
+import hashlib
+import os
+import platform
+import shutil
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime as dt
+from pathlib import Path
+from threading import Lock
+
+import structlog
+
+from tagstudio.core.enums import MacroID
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.alchemy.models import Entry
+from tagstudio.core.macro_engine import MacroEngine
+from tagstudio.core.utils.metrics import metrics
+from tagstudio.core.utils.types import unwrap
+
+logger = structlog.get_logger(__name__)
+
+# The number of files copied at the same time.
+IMPORT_WORKERS: int = 4
+# The number of copied files that are added to the library at once.
+IMPORT_BATCH_SIZE: int = 200
+# The size of the chunks files are read and hashed in, in bytes.
+COPY_CHUNK_SIZE: int = 1024 * 1024
+# The ioctl that clones a file on copy-on-write filesystems on Linux, such as Btrfs and XFS.
+FICLONE: int = 0x40049409
+# The suffix of the hidden file a file is copied to, until it's known not to be a duplicate.
+IMPORT_PARTIAL_SUFFIX: str = ".partial"
+
+
+def hash_file(path: Path) -> str:
+    """Return the BLAKE2b digest of a file's contents."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while chunk := f.read(COPY_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _clone_file(source: Path, destination: Path) -> bool:
+    """Clone a file without copying its data, on filesystems that support it.
+
+    Returns:
+        Whether the file was cloned. Nothing is left at the destination when it wasn't.
+    """
+    if platform.system() != "Linux":
+        return False
+    import fcntl
+
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return True
+        except OSError:
+            pass
+    destination.unlink()
+    return False
+
+
+def copy_file(source: Path, destination: Path, checksum: bool = True) -> str | None:
+    """Copy a file, using the fastest method the platform and filesystem allow.
+
+    The file is cloned where the filesystem supports it, which only needs its source to be read
+    for the checksum. Otherwise its data is hashed while it's being copied, so that it's only
+    read once. Without a checksum, the copy is left to the kernel with copy_file_range, or to
+    shutil, which uses the platform's own fast copy.
+
+    Args:
+        source (Path): The file to copy.
+        destination (Path): The path to copy it to, which is overwritten if it exists.
+        checksum (bool): Whether to compute the BLAKE2b digest of the file.
+
+    Returns:
+        The digest of the file, or None when no checksum was computed.
+    """
+    if _clone_file(source, destination):
+        shutil.copystat(source, destination)
+        return hash_file(source) if checksum else None
+
+    if not checksum:
+        if not hasattr(os, "copy_file_range"):
+            shutil.copy2(source, destination)
+            return None
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            try:
+                while os.copy_file_range(src.fileno(), dst.fileno(), COPY_CHUNK_SIZE * 64):
+                    pass
+            except OSError:
+                # Not supported between these filesystems, so fall back to copying the data.
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        shutil.copystat(source, destination)
+        return None
+
+    digest = hashlib.blake2b()
+    buffer = memoryview(bytearray(COPY_CHUNK_SIZE))
+    with open(source, "rb", buffering=0) as src, open(destination, "wb") as dst:
+        while size := src.readinto(buffer):
+            digest.update(buffer[:size])
+            dst.write(buffer[:size])
+    shutil.copystat(source, destination)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ImportJob:
+    """A file to import, and the path to copy it to relative to the library directory."""
+
+    source: Path
+    destination: Path
+
+
+@dataclass
+class ImportProgress:
+    """How far an import has gotten."""
+
+    files_total: int
+    bytes_total: int
+    files_done: int = 0
+    bytes_done: int = 0
+    # Files with the same contents as a file imported earlier, which weren't kept.
+    duplicates: int = 0
+    failed: int = 0
+    start_time: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    @property
+    def throughput(self) -> float:
+        """The number of bytes copied per second so far."""
+        elapsed = self.elapsed
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """The estimated number of seconds left, or None if nothing has been copied yet."""
+        throughput = self.throughput
+        if not throughput:
+            return None
+        return (self.bytes_total - self.bytes_done) / throughput
+
+
+@dataclass
+class FileImporter:
+    """Copy files into a library on a thread pool, adding them as entries as they're copied.
+
+    When skip_duplicates is set, each file is hashed while it's copied to a temporary file next to
+    its destination, and a file with the same contents as one copied earlier in the same import
+    is discarded instead of being moved into place. This is separate from how files that already
+    exist at their destination are handled, which is up to the jobs. Copied files are added to
+    the library in batches, so no refresh is needed afterwards.
+    """
+
+    library: Library
+    max_workers: int = IMPORT_WORKERS
+    skip_duplicates: bool = False
+    # Run on each batch of new entries as it's saved, if set.
+    new_file_macro: MacroID | None = None
+    entry_ids: list[int] = field(default_factory=list, init=False)
+    __digests: dict[str, Path] = field(default_factory=dict, init=False, repr=False)
+    __folders: set[Path] = field(default_factory=set, init=False, repr=False)
+    __lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def run(self, jobs: Iterable[ImportJob]) -> Iterator[ImportProgress]:
+        """Import files, yielding the progress each time a file is done.
+
+        When several files would be copied to the same path, only the last one is copied.
+        """
+        jobs = list({job.destination: job for job in jobs}.values())
+        sizes = {job: self.__size(job.source) for job in jobs}
+        progress = ImportProgress(files_total=len(jobs), bytes_total=sum(sizes.values()))
+        engine = MacroEngine(self.library) if self.new_file_macro is not None else None
+        pending_paths: list[Path] = []
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="FileImporter") as executor:
+            remaining = iter(jobs)
+            running: dict[Future[Path | None], ImportJob] = {}
+            # Only a few files per worker are queued at once, so that a huge import doesn't
+            # build a future for every file up front.
+            while True:
+                while len(running) < self.max_workers * 4 and (job := next(remaining, None)):
+                    running[executor.submit(self.__import, job)] = job
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    progress.files_done += 1
+                    progress.bytes_done += sizes[job]
+                    try:
+                        path = future.result()
+                    except OSError as e:
+                        logger.error("[FileImporter] Couldn't import file", job=job, error=e)
+                        progress.failed += 1
+                        continue
+                    if path is None:
+                        progress.duplicates += 1
+                    else:
+                        pending_paths.append(path)
+
+                if len(pending_paths) >= IMPORT_BATCH_SIZE:
+                    self.__add_entries(pending_paths, engine)
+                    pending_paths = []
+                yield progress
+
+        if pending_paths:
+            self.__add_entries(pending_paths, engine)
+        metrics.observe("importer.run", progress.elapsed)
+        logger.info(
+            "[FileImporter] Imported files",
+            files=progress.files_done,
+            duplicates=progress.duplicates,
+            failed=progress.failed,
+            duration=progress.elapsed,
+        )
+
+    @staticmethod
+    def __size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    def __import(self, job: ImportJob) -> Path | None:
+        """Copy a file into the library.
+
+        Returns:
+            The path of the copy relative to the library directory, or None if it was a duplicate.
+        """
+        destination = unwrap(self.library.library_dir) / job.destination
+        folder = destination.parent
+        if folder not in self.__folders:
+            folder.mkdir(parents=True, exist_ok=True)
+            with self.__lock:
+                self.__folders.add(folder)
+
+        if not self.skip_duplicates:
+            with metrics.span("importer.copy"):
+                copy_file(job.source, destination, checksum=False)
+            return job.destination
+
+        # The file is only moved to its destination once it's known not to be a duplicate, so a
+        # file that's already there is never replaced by one that's then skipped.
+        partial_path = destination.with_name(f".{destination.name}{IMPORT_PARTIAL_SUFFIX}")
+        try:
+            with metrics.span("importer.copy"):
+                digest = unwrap(copy_file(job.source, partial_path))
+            with self.__lock:
+                original = self.__digests.setdefault(digest, job.destination)
+            if original != job.destination:
+                logger.info("[FileImporter] Skipping duplicate", path=job.source, original=original)
+                return None
+            os.replace(partial_path, destination)
+        finally:
+            partial_path.unlink(missing_ok=True)
+        return job.destination
+
+    def __add_entries(self, paths: list[Path], engine: MacroEngine | None):
+        # Overwritten files may already have entries.
+        new_paths = [path for path in paths if not self.library.has_path_entry(path)]
+        if not new_paths:
+            return
+        folder = unwrap(self.library.folder)
+        entries = [
+            Entry(path=path, folder=folder, fields=[], date_added=dt.now()) for path in new_paths
+        ]
+        entry_ids = self.library.write(self.library.add_entries, entries).result()
+        self.entry_ids.extend(entry_ids)
+        if engine is not None and entry_ids:
+            engine.apply(unwrap(self.new_file_macro), entry_ids)
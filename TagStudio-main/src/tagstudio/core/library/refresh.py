@@ -5,6 +5,7 @@
 
 import shutil
 from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from datetime import datetime as dt
 from pathlib import Path
@@ -13,27 +14,58 @@ from time import time
 import structlog
 from wcmatch import pathlib
 
+from tagstudio.core.constants import TS_FOLDER_NAME
+from tagstudio.core.enums import MacroID
 from tagstudio.core.library.alchemy.library import Library
-from tagstudio.core.library.alchemy.models import Entry
+from tagstudio.core.library.alchemy.models import Entry, Folder
 from tagstudio.core.library.ignore import PATH_GLOB_FLAGS, Ignore, ignore_to_glob
+from tagstudio.core.macro_engine import MacroEngine
+from tagstudio.core.utils.metrics import metrics
 from tagstudio.core.utils.silent_subprocess import silent_run  # pyright: ignore
 from tagstudio.core.utils.types import unwrap
 
 logger = structlog.get_logger(__name__)
 
+# The number of seconds between progress updates while scanning.
+PROGRESS_INTERVAL: float = 0.034
+
 
 @dataclass
 class RefreshTracker:
     library: Library
     files_not_in_library: list[Path] = field(default_factory=list)
+    # Run on each batch of new entries as it's saved, if set.
+    new_file_macro: MacroID | None = None
+    # The new files found in each root by a scan that's still running.
+    __found: dict[Path, list[Path]] = field(default_factory=dict, init=False, repr=False)
 
     @property
     def files_count(self) -> int:
-        return len(self.files_not_in_library)
+        return len(self.files_not_in_library) + sum(len(f) for f in self.__found.values())
 
     def save_new_files(self) -> Iterator[int]:
-        """Save the list of files that are not in the library."""
+        """Save the list of files that are not in the library, running new_file_macro on them.
+
+        Files with absolute paths are added to the root folder they're in, and the rest to the
+        library directory. Files from every root are added together in the same batches.
+        """
         batch_size = 200
+        engine = MacroEngine(self.library) if self.new_file_macro is not None else None
+        library_dir = unwrap(self.library.library_dir)
+        library_folder = unwrap(self.library.folder)
+        # The deepest roots first, in case one contains another.
+        roots = sorted(
+            (f for f in self.library.folders if f.path != library_dir),
+            key=lambda f: len(f.path.parts),
+            reverse=True,
+        )
+
+        def folder_of(path: Path) -> Folder:
+            if path.is_absolute():
+                for root in roots:
+                    if path.is_relative_to(root.path):
+                        return root
+            return library_folder
 
         index = 0
         while index < len(self.files_not_in_library):
@@ -42,13 +74,15 @@ class RefreshTracker:
             entries = [
                 Entry(
                     path=entry_path,
-                    folder=unwrap(self.library.folder),
+                    folder=folder_of(entry_path),
                     fields=[],
                     date_added=dt.now(),
                 )
                 for entry_path in self.files_not_in_library[index:end]
             ]
-            self.library.add_entries(entries)
+            entry_ids = self.library.write(self.library.add_entries, entries).result()
+            if engine is not None:
+                engine.apply(unwrap(self.new_file_macro), entry_ids)
             index = end
         self.files_not_in_library = []
 
@@ -63,20 +97,92 @@ class RefreshTracker:
         if self.library.library_dir is None:
             raise ValueError("No library directory set.")
 
+        self.files_not_in_library = []
+        return self.__scan(library_dir, self.files_not_in_library, force_internal_tools)
+
+    def refresh_roots(self, force_internal_tools: bool = False) -> Iterator[dict[Path, int]]:
+        """Scan every root folder of the library at the same time, each on its own thread.
+
+        New files in the library directory are added with paths relative to it, and new files in
+        other roots with absolute paths. A root that's still being scanned, such as one on a slow
+        network share, doesn't hold back the results of the others.
+
+        Roots that don't exist, such as unmounted drives or the old directory of a moved library,
+        and roots that are the directory of another library, are skipped.
+
+        Args:
+            force_internal_tools (bool): Option to force the use of internal tools for scanning
+                (i.e. wcmatch) instead of using tools found on the system (i.e. ripgrep).
+
+        Yields:
+            The number of files scanned so far in each root, by the path of the root.
+        """
+        library_dir = unwrap(self.library.library_dir)
+        roots: list[Path] = []
+        # Other roots may be read-only, so their ignore files are kept in the library, named by
+        # the root's folder.
+        ignore_file_names: dict[Path, str] = {}
+        for folder in self.library.folders:
+            if folder.path == library_dir:
+                roots.append(folder.path)
+            elif not folder.path.is_dir() or (folder.path / TS_FOLDER_NAME).exists():
+                logger.warning("[Refresh]: Skipping root folder", path=folder.path)
+            else:
+                roots.append(folder.path)
+                ignore_file_names[folder.path] = f".compiled_ignore_{folder.uuid}"
+
+        progress: dict[Path, int] = dict.fromkeys(roots, 0)
+        found: dict[Path, list[Path]] = {root: [] for root in roots}
+        self.__found = found
+
+        def scan(root: Path):
+            ignore_file_name = ignore_file_names.get(root, ".compiled_ignore")
+            for count in self.__scan(root, found[root], force_internal_tools, ignore_file_name):
+                progress[root] = count
+
+        self.files_not_in_library = []
+        with ThreadPoolExecutor(max(len(roots), 1), thread_name_prefix="Refresh") as executor:
+            pending: set[Future[None]] = {executor.submit(scan, root) for root in roots}
+            while pending:
+                done, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+                for future in done:
+                    future.result()
+                yield dict(progress)
+
+        for root in roots:
+            self.files_not_in_library.extend(found[root])
+        self.__found = {}
+
+    def __scan(
+        self,
+        root: Path,
+        found: list[Path],
+        force_internal_tools: bool,
+        ignore_file_name: str = ".compiled_ignore",
+    ) -> Iterator[int]:
+        """Scan a root folder for files that aren't in the library yet, adding them to found.
+
+        Files in the library directory are added with paths relative to it, and files in other
+        roots with absolute paths. The library's ignore patterns apply to every root, and are
+        passed to ripgrep through a file of the given name in the library's .TagStudio folder.
+        """
+        library_dir = unwrap(self.library.library_dir)
         ignore_patterns = Ignore.get_patterns(library_dir)
 
         if force_internal_tools:
-            return self.__wc_add(library_dir, ignore_to_glob(ignore_patterns))
+            return self.__wc_add(root, found, ignore_to_glob(ignore_patterns))
 
-        dir_list: list[str] | None = self.__get_dir_list(library_dir, ignore_patterns)
+        dir_list: list[str] | None = self.__get_dir_list(root, ignore_patterns, ignore_file_name)
 
         # Use ripgrep if it was found and working, else fallback to wcmatch.
         if dir_list is not None:
-            return self.__rg_add(library_dir, dir_list)
+            return self.__rg_add(root, found, dir_list)
         else:
-            return self.__wc_add(library_dir, ignore_to_glob(ignore_patterns))
+            return self.__wc_add(root, found, ignore_to_glob(ignore_patterns))
 
-    def __get_dir_list(self, library_dir: Path, ignore_patterns: list[str]) -> list[str] | None:
+    def __get_dir_list(
+        self, root: Path, ignore_patterns: list[str], ignore_file_name: str
+    ) -> list[str] | None:
         """Use ripgrep to return a list of matched directories and files.
 
         Return `None` if ripgrep not found on system.
@@ -86,29 +192,32 @@ class RefreshTracker:
         if rg_path is not None:
             logger.info("[Refresh: Using ripgrep for scanning]")
 
-            compiled_ignore_path = library_dir / ".TagStudio" / ".compiled_ignore"
+            library_dir = unwrap(self.library.library_dir)
+            compiled_ignore_path = library_dir / ".TagStudio" / ignore_file_name
 
             # Write compiled ignore patterns (built-in + user) to a temp file to pass to ripgrep
             with open(compiled_ignore_path, "w") as pattern_file:
                 pattern_file.write("\n".join(ignore_patterns))
 
-            result = silent_run(
-                " ".join(
-                    [
-                        "rg",
-                        "--files",
-                        "--follow",
-                        "--hidden",
-                        "--ignore-file",
-                        f'"{str(compiled_ignore_path)}"',
-                    ]
-                ),
-                cwd=library_dir,
-                capture_output=True,
-                text=True,
-                shell=True,
-            )
-            compiled_ignore_path.unlink()
+            try:
+                result = silent_run(
+                    " ".join(
+                        [
+                            "rg",
+                            "--files",
+                            "--follow",
+                            "--hidden",
+                            "--ignore-file",
+                            f'"{str(compiled_ignore_path)}"',
+                        ]
+                    ),
+                    cwd=root,
+                    capture_output=True,
+                    text=True,
+                    shell=True,
+                )
+            finally:
+                compiled_ignore_path.unlink(missing_ok=True)
 
             if result.stderr:
                 logger.error(result.stderr)
@@ -118,18 +227,19 @@ class RefreshTracker:
         logger.warning("[Refresh: ripgrep not found on system]")
         return None
 
-    def __rg_add(self, library_dir: Path, dir_list: list[str]) -> Iterator[int]:
+    def __rg_add(self, root: Path, found: list[Path], dir_list: list[str]) -> Iterator[int]:
         start_time_total = time()
         start_time_loop = time()
         dir_file_count = 0
-        self.files_not_in_library = []
+        # Paths in other roots are made absolute, so they can't be mistaken for library paths.
+        prefix = None if root == self.library.library_dir else root
 
         for r in dir_list:
-            f = pathlib.Path(r)
+            f = pathlib.Path(r) if prefix is None else prefix / r
 
             end_time_loop = time()
             # Yield output every 1/30 of a second
-            if (end_time_loop - start_time_loop) > 0.034:
+            if (end_time_loop - start_time_loop) > PROGRESS_INTERVAL:
                 yield dir_file_count
                 start_time_loop = time()
 
@@ -146,33 +256,34 @@ class RefreshTracker:
             self.library.included_files.add(f)
 
             if not self.library.has_path_entry(f):
-                self.files_not_in_library.append(f)
+                found.append(f)
 
         end_time_total = time()
+        metrics.observe("refresh.scan", end_time_total - start_time_total)
         yield dir_file_count
         logger.info(
             "[Refresh]: Directory scan time",
-            path=library_dir,
+            path=root,
             duration=(end_time_total - start_time_total),
             files_scanned=dir_file_count,
             tool_used="ripgrep (system)",
         )
 
-    def __wc_add(self, library_dir: Path, ignore_patterns: list[str]) -> Iterator[int]:
+    def __wc_add(self, root: Path, found: list[Path], ignore_patterns: list[str]) -> Iterator[int]:
         start_time_total = time()
         start_time_loop = time()
         dir_file_count = 0
-        self.files_not_in_library = []
+        is_library_dir = root == self.library.library_dir
 
         logger.info("[Refresh]: Falling back to wcmatch for scanning")
 
         try:
-            for f in pathlib.Path(str(library_dir)).glob(
+            for f in pathlib.Path(str(root)).glob(
                 "***/*", flags=PATH_GLOB_FLAGS, exclude=ignore_patterns
             ):
                 end_time_loop = time()
                 # Yield output every 1/30 of a second
-                if (end_time_loop - start_time_loop) > 0.034:
+                if (end_time_loop - start_time_loop) > PROGRESS_INTERVAL:
                     yield dir_file_count
                     start_time_loop = time()
 
@@ -188,18 +299,20 @@ class RefreshTracker:
                 dir_file_count += 1
                 self.library.included_files.add(f)
 
-                relative_path = f.relative_to(library_dir)
+                # Paths in other roots are kept absolute.
+                entry_path = f.relative_to(root) if is_library_dir else Path(f)
 
-                if not self.library.has_path_entry(relative_path):
-                    self.files_not_in_library.append(relative_path)
+                if not self.library.has_path_entry(entry_path):
+                    found.append(entry_path)
         except ValueError:
             logger.info("[Refresh]: ValueError when refreshing directory with wcmatch!")
 
         end_time_total = time()
+        metrics.observe("refresh.scan", end_time_total - start_time_total)
         yield dir_file_count
         logger.info(
             "[Refresh]: Directory scan time",
-            path=library_dir,
+            path=root,
             duration=(end_time_total - start_time_total),
             files_scanned=dir_file_count,
             tool_used="wcmatch (internal)",
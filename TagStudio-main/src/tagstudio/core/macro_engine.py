@@ -0,0 +1,204 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Running macros over batches of entries."""
+
+import json
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import structlog
+
+from tagstudio.core.constants import TS_FOLDER_NAME
+from tagstudio.core.enums import MacroID
+from tagstudio.core.library.alchemy.enums import FieldTypeEnum
+from tagstudio.core.library.alchemy.fields import BaseField, FieldID
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.alchemy.models import Entry
+from tagstudio.core.ts_core import SIDECAR_TAGS, TagStudioCore
+from tagstudio.core.utils.str_formatting import strip_web_protocol
+from tagstudio.core.utils.types import unwrap
+
+logger = structlog.get_logger(__name__)
+
+# The number of entries whose macro results are written to the library at once.
+MACRO_BATCH_SIZE: int = 500
+# The number of sidecar files read at the same time.
+MACRO_WORKERS: int = 8
+CONDITIONS_NAME: str = "conditions.json"
+
+
+@dataclass(frozen=True)
+class ConditionMatcher:
+    """The fields from a library's conditions file, by the folder or file they apply to."""
+
+    fields: dict[Path, list[tuple[str, str]]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, library_dir: Path) -> "ConditionMatcher":
+        """Read and compile the conditions file of a library, if it has one."""
+        cond_file = library_dir / TS_FOLDER_NAME / CONDITIONS_NAME
+        if not cond_file.is_file():
+            return cls()
+
+        fields: dict[Path, list[tuple[str, str]]] = {}
+        try:
+            with open(cond_file, encoding="utf8") as f:
+                for c in json.load(f)["conditions"]:
+                    values = [(v["id"], v["value"]) for v in c.get("fields") or []]
+                    for path_c in c["path_conditions"]:
+                        path = Path(path_c)
+                        if path.is_absolute() and path.is_relative_to(library_dir):
+                            path = path.relative_to(library_dir)
+                        fields.setdefault(path, []).extend(values)
+        except Exception:
+            logger.exception("Error reading conditions.", path=cond_file)
+            return cls()
+        return cls(fields)
+
+    def match(self, path: Path) -> list[tuple[str, str]]:
+        """Return the fields of every condition whose path contains, or is, the given path."""
+        if not self.fields:
+            return []
+        matched: list[tuple[str, str]] = []
+        for prefix in reversed((path, *path.parents)):
+            matched.extend(self.fields.get(prefix, ()))
+        return matched
+
+
+@dataclass
+class MacroResults:
+    """The changes that running macros on a batch of entries makes to the library."""
+
+    new_fields: list[tuple[int, FieldID | str, str | datetime | None]] = field(default_factory=list)
+    updated_fields: list[tuple[BaseField, str | datetime]] = field(default_factory=list)
+    tag_names: list[tuple[int, str]] = field(default_factory=list)
+
+
+@dataclass
+class MacroEngine:
+    """Run macros over entries in batches.
+
+    Sidecar files are read on a thread pool, the conditions file is only read once, and the
+    results of each batch are written with a handful of bulk statements.
+    """
+
+    library: Library
+    max_workers: int = MACRO_WORKERS
+    __conditions: ConditionMatcher | None = field(default=None, init=False, repr=False)
+
+    @property
+    def conditions(self) -> ConditionMatcher:
+        if self.__conditions is None:
+            self.__conditions = ConditionMatcher.load(unwrap(self.library.library_dir))
+        return self.__conditions
+
+    def run(
+        self, macro: MacroID, entry_ids: Iterable[int], batch_size: int = MACRO_BATCH_SIZE
+    ) -> Iterator[int]:
+        """Run a macro on entries, yielding the number of entries done after each batch."""
+        ids = list(entry_ids)
+        for i in range(0, len(ids), batch_size):
+            self.apply(macro, ids[i : i + batch_size])
+            yield min(len(ids), i + batch_size)
+
+    def apply(self, macro: MacroID, entry_ids: list[int]) -> MacroResults:
+        """Run a macro on a batch of entries and write the results to the library."""
+        macros = (
+            [m for m in MacroID if m != MacroID.AUTOFILL] if macro == MacroID.AUTOFILL else [macro]
+        )
+        entries = list(self.library.get_entries_full(entry_ids))
+        results = MacroResults()
+
+        logger.info("[MacroEngine] Running macros", macros=macros, entries=len(entries))
+        for macro_id in macros:
+            if macro_id == MacroID.SIDECAR:
+                self.__sidecar(entries, results)
+            elif macro_id == MacroID.BUILD_URL:
+                self.__build_url(entries, results)
+            elif macro_id == MacroID.MATCH:
+                self.__match(entries, results)
+            elif macro_id == MacroID.CLEAN_URL:
+                self.__clean_url(entries, results)
+
+        self.library.write(self.__write, results).result()
+        return results
+
+    @staticmethod
+    def __source(entry: Entry) -> str:
+        return "" if entry.path.parent == Path(".") else entry.path.parts[0].lower()
+
+    def __sidecar(self, entries: list[Entry], results: MacroResults):
+        library_dir = unwrap(self.library.library_dir)
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            sidecars = executor.map(
+                lambda e: TagStudioCore.get_gdl_sidecar(library_dir / e.path, self.__source(e)),
+                entries,
+            )
+            for entry, parsed_items in zip(entries, sidecars, strict=True):
+                for field_id, value in parsed_items.items():
+                    if field_id == SIDECAR_TAGS:
+                        results.tag_names.extend((entry.id, name) for name in value)
+                    else:
+                        results.new_fields.append((entry.id, field_id, value))
+
+    def __build_url(self, entries: list[Entry], results: MacroResults):
+        for entry in entries:
+            url = TagStudioCore.build_url(entry, self.__source(entry))
+            if url:
+                results.new_fields.append((entry.id, FieldID.SOURCE, url))
+
+    def __match(self, entries: list[Entry], results: MacroResults):
+        for entry in entries:
+            matched = self.conditions.match(entry.path)
+            if not matched:
+                continue
+            entry_fields = {f.type_key: f for f in entry.fields}
+            for field_key, value in matched:
+                if field_key in entry_fields:
+                    results.updated_fields.append((entry_fields[field_key], value))
+                else:
+                    results.new_fields.append((entry.id, field_key, value))
+
+    def __clean_url(self, entries: list[Entry], results: MacroResults):
+        field_types = self.library.field_types
+
+        def is_text_line(key: FieldID | str) -> bool:
+            value_type = field_types.get(key.name if isinstance(key, FieldID) else key)
+            return value_type is not None and value_type.type == FieldTypeEnum.TEXT_LINE
+
+        # Fields added by earlier macros are cleaned before they're written.
+        results.new_fields = [
+            (entry_id, key, strip_web_protocol(value))
+            if isinstance(value, str) and is_text_line(key)
+            else (entry_id, key, value)
+            for entry_id, key, value in results.new_fields
+        ]
+        results.updated_fields = [
+            (f, strip_web_protocol(value))
+            if isinstance(value, str) and f.type.type == FieldTypeEnum.TEXT_LINE
+            else (f, value)
+            for f, value in results.updated_fields
+        ]
+
+        updated = {f.id for f, _ in results.updated_fields}
+        for entry in entries:
+            for f in entry.text_fields:
+                if f.type.type != FieldTypeEnum.TEXT_LINE or not f.value or f.id in updated:
+                    continue
+                cleaned = strip_web_protocol(f.value)
+                if cleaned != f.value:
+                    results.updated_fields.append((f, cleaned))
+
+    def __write(self, results: MacroResults):
+        if results.tag_names:
+            tag_ids = self.library.tag_from_strings([name for _, name in results.tag_names])
+            self.library.add_entry_tags(
+                (entry_id, tag_id)
+                for (entry_id, _), tag_id in zip(results.tag_names, tag_ids, strict=True)
+            )
+        self.library.add_entry_fields(results.new_fields, skip_existing=True)
+        self.library.update_fields(results.updated_fields)
@@ -2,6 +2,7 @@
 # Licensed under the GPL-3.0 License.
 # Created for TagStudio: https://github.com/CyanVoxel/TagStudio
 
+from functools import lru_cache
 
 from tagstudio.core.query_lang.ast import (
     AST,
@@ -139,3 +140,12 @@ class Parser:
 
     def __syntax_error(self, msg: str = "Syntax Error") -> ParsingError:
         return ParsingError(self.next_token.start, self.next_token.end, msg)
+
+
+@lru_cache(maxsize=256)
+def parse_query(text: str) -> AST:
+    """Parse a search query, reusing the tree of recently parsed queries.
+
+    The returned tree is shared with other callers and must not be modified.
+    """
+    return Parser(text).parse()
@@ -6,16 +6,21 @@
 
 import json
 from pathlib import Path
+from typing import Any
 
 import structlog
 
-from tagstudio.core.constants import TS_FOLDER_NAME
 from tagstudio.core.library.alchemy.fields import FieldID
 from tagstudio.core.library.alchemy.library import Library
 from tagstudio.core.library.alchemy.models import Entry
 
 logger = structlog.get_logger(__name__)
 
+# The sources Gallery-DL sidecar files can be read for.
+GDL_SOURCES: frozenset[str] = frozenset({"twitter", "instagram", "artstation", "newgrounds"})
+# The key of the tag names read from a sidecar file.
+SIDECAR_TAGS: str = "tags"
+
 
 class TagStudioCore:
     def __init__(self):
@@ -26,8 +31,11 @@ class TagStudioCore:
         """Attempt to open and dump a Gallery-DL Sidecar file for the filepath.
 
         Return a formatted object with notable values or an empty object if none is found.
+        Values are keyed by their FieldID, except for tag names, which are keyed by SIDECAR_TAGS.
         """
-        info = {}
+        info: dict[FieldID | str, Any] = {}
+        if source not in GDL_SOURCES:
+            return info
         _filepath = filepath.parent / (filepath.name + ".json")
 
         # NOTE: This fixes an unknown (recent?) bug in Gallery-DL where Instagram sidecar
@@ -37,6 +45,8 @@ class TagStudioCore:
             newstem = _filepath.stem[:-16] + "1" + _filepath.stem[-15:]
             _filepath = _filepath.parent / (newstem + ".json")
 
+        if not _filepath.is_file():
+            return info
         logger.info("get_gdl_sidecar", filepath=filepath, source=source, sidecar=_filepath)
 
         try:
@@ -55,14 +65,14 @@ class TagStudioCore:
                     info[FieldID.TITLE] = json_dump["title"].strip()
                     info[FieldID.ARTIST] = json_dump["user"]["full_name"].strip()
                     info[FieldID.DESCRIPTION] = json_dump["description"].strip()
-                    info[FieldID.TAGS] = json_dump["tags"]
+                    info[SIDECAR_TAGS] = json_dump["tags"]
                     # info["tags"] = [x for x in json_dump["mediums"]["name"]]
                     info[FieldID.DATE_PUBLISHED] = json_dump["date"]
                 elif source == "newgrounds":
                     # info["title"] = json_dump["title"]
                     # info["artist"] = json_dump["artist"]
                     # info["description"] = json_dump["description"]
-                    info[FieldID.TAGS] = json_dump["tags"]
+                    info[SIDECAR_TAGS] = json_dump["tags"]
                     info[FieldID.DATE_PUBLISHED] = json_dump["date"]
                     info[FieldID.ARTIST] = json_dump["user"].strip()
                     info[FieldID.DESCRIPTION] = json_dump["description"].strip()
@@ -96,49 +106,6 @@ class TagStudioCore:
     # 	# 	# print("Could not resolve URL.")
     # 	# 	pass
 
-    @classmethod
-    def match_conditions(cls, lib: Library, entry_id: int) -> bool:
-        """Match defined conditions against a file to add Entry data."""
-        # TODO - what even is this file format?
-        # TODO: Make this stored somewhere better instead of temporarily in this JSON file.
-        cond_file = lib.library_dir / TS_FOLDER_NAME / "conditions.json"
-        if not cond_file.is_file():
-            return False
-
-        entry: Entry = lib.get_entry(entry_id)
-
-        try:
-            with open(cond_file, encoding="utf8") as f:
-                json_dump = json.load(f)
-                for c in json_dump["conditions"]:
-                    match: bool = False
-                    for path_c in c["path_conditions"]:
-                        if Path(path_c).is_relative_to(entry.path):
-                            match = True
-                            break
-
-                    if not match:
-                        return False
-
-                    if not c.get("fields"):
-                        return False
-
-                    fields = c["fields"]
-                    entry_field_types = {field.type_key: field for field in entry.fields}
-
-                    for field in fields:
-                        is_new = field["id"] not in entry_field_types
-                        field_key = field["id"]
-                        if is_new:
-                            lib.add_field_to_entry(entry.id, field_key, field["value"])
-                        else:
-                            lib.update_entry_field(entry.id, field_key, field["value"])
-
-        except Exception:
-            logger.exception("Error matching conditions.", entry=entry)
-
-        return False
-
     @classmethod
     def build_url(cls, entry: Entry, source: str):
         """Try to rebuild a source URL given a specific filename structure."""
@@ -2,25 +2,88 @@
 # Licensed under the GPL-3.0 License.
 # Created for TagStudio: https://github.com/CyanVoxel/TagStudio
 
+import codecs
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from chardet.universaldetector import UniversalDetector
+from tagstudio.core.utils.lazy_import import lazy_import
+from tagstudio.core.utils.lru_cache import LruCache
+
+if TYPE_CHECKING:
+    from chardet import universaldetector
+else:
+    universaldetector = lazy_import("chardet.universaldetector")
+
+# The number of bytes read from the start of a file to detect its encoding.
+TEXT_SAMPLE_SIZE: int = 64 * 1024
+# The number of files whose detected encoding is remembered.
+ENCODING_CACHE_SIZE: int = 1024
+
+# Longer byte order marks first, since the UTF-32 LE mark begins with the UTF-16 LE one.
+BOMS: tuple[tuple[bytes, str], ...] = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Key: (Path, Modified Time, File Size), Value: The encoding, or "" if none was detected.
+_encodings: LruCache[tuple[Path, int, int], str] = LruCache(ENCODING_CACHE_SIZE, "encodings")
+
+
+def read_text_sample(filepath: Path, size: int = TEXT_SAMPLE_SIZE) -> bytes:
+    """Read no more than a fixed number of bytes from the start of a file."""
+    with open(filepath, "rb") as text_file:
+        return text_file.read(size)
+
+
+def detect_sample_encoding(sample: bytes, complete: bool = True) -> str | None:
+    """Attempts to detect the character encoding of the start of a text file.
+
+    Byte order marks and UTF-8 are checked first, and chardet is only used for anything else.
+
+    Args:
+    sample (bytes): The bytes to analyze.
+    complete (bool): Whether the sample holds the whole file, rather than being cut off at an
+        arbitrary point, such as in the middle of a character.
+
+    Returns:
+    str | None: The detected character encoding, if any.
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=complete)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    detector = universaldetector.UniversalDetector()
+    detector.feed(sample)
+    detector.close()
+    return detector.result["encoding"]
 
 
 def detect_char_encoding(filepath: Path) -> str | None:
     """Attempts to detect the character encoding of a text file.
 
+    Only the first TEXT_SAMPLE_SIZE bytes of the file are read, and the result is cached until
+    the file is modified.
+
     Args:
     filepath (Path): The path of the text file to analyze.
 
     Returns:
     str | None: The detected character encoding, if any.
     """
-    detector = UniversalDetector()
-    with open(filepath, "rb") as text_file:
-        for line in text_file.readlines():
-            detector.feed(line)
-            if detector.done:
-                break
-        detector.close()
-    return detector.result["encoding"]
+    stat = filepath.stat()
+    key = (filepath, stat.st_mtime_ns, stat.st_size)
+    encoding = _encodings.get(key)
+    if encoding is None:
+        sample = read_text_sample(filepath)
+        encoding = detect_sample_encoding(sample, complete=len(sample) >= stat.st_size) or ""
+        _encodings.put(key, encoding)
+    return encoding or None
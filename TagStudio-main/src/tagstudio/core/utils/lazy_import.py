@@ -0,0 +1,66 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Defer importing heavy modules until they're first used."""
+
+import importlib
+import time
+from threading import Lock
+from types import ModuleType
+from typing import Any
+
+import structlog
+
+from tagstudio.core.utils.startup_profiler import startup_profiler
+
+logger = structlog.get_logger(__name__)
+
+
+class LazyModule(ModuleType):
+    """A stand-in for a module that imports the real module on first attribute access.
+
+    Use it for optional or rarely needed dependencies so that they don't add to startup time:
+
+        if TYPE_CHECKING:
+            import cv2
+        else:
+            cv2 = lazy_import("cv2")
+
+    Modules used in a class definition at import time (e.g. as a base class) can't be deferred
+    this way, since the class statement itself accesses the module.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__lock = Lock()
+        self.__module: ModuleType | None = None
+
+    def __load(self) -> ModuleType:
+        with self.__lock:
+            if self.__module is None:
+                start = time.perf_counter()
+                self.__module = importlib.import_module(self.__name__)
+                elapsed = time.perf_counter() - start
+                logger.info(
+                    "[LazyModule] Imported module",
+                    module=self.__name__,
+                    ms=round(elapsed * 1000, 1),
+                )
+                startup_profiler.record_import(self.__name__, elapsed, lazy=True)
+            return self.__module
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the proxy itself.
+        return getattr(self.__load(), name)
+
+    def __dir__(self) -> list[str]:
+        return dir(self.__load())
+
+
+def lazy_import(name: str) -> Any:
+    """Return a proxy for a module that is only imported when one of its attributes is used.
+
+    Args:
+        name (str): The absolute name of the module, e.g. "mutagen.flac".
+    """
+    return LazyModule(name)
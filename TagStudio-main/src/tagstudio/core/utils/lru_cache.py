@@ -0,0 +1,52 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from threading import Lock
+from typing import Generic, TypeVar
+
+from tagstudio.core.utils.metrics import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LruCache(Generic[K, V]):
+    """A thread-safe mapping that only keeps its most recently used items.
+
+    Caches with a name count their hits and misses as the "<name>.hits" and "<name>.misses"
+    metrics.
+    """
+
+    def __init__(self, max_size: int, name: str | None = None):
+        self.max_size = max_size
+        self.name = name
+        self.__items: OrderedDict[K, V] = OrderedDict()
+        self.__lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.__items
+
+    def get(self, key: K) -> V | None:
+        with self.__lock:
+            item = self.__items.get(key)
+            if item is not None:
+                self.__items.move_to_end(key)
+        if self.name is not None:
+            metrics.increment(f"{self.name}.{'hits' if item is not None else 'misses'}")
+        return item
+
+    def put(self, key: K, item: V) -> None:
+        with self.__lock:
+            self.__items[key] = item
+            self.__items.move_to_end(key)
+            while len(self.__items) > self.max_size:
+                self.__items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__items.clear()
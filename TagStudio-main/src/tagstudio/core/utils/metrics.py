@@ -0,0 +1,238 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Timing histograms, counters, and gauges for the hot paths of TagStudio."""
+
+import functools
+import json
+import re
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# The upper bounds of the histogram buckets, in seconds. Timings above the last bound fall in
+# an extra bucket that has no upper bound.
+BUCKETS: tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+PROMETHEUS_PREFIX: str = "tagstudio"
+
+
+class Histogram:
+    """A distribution of timings, counted in fixed buckets.
+
+    Recording a timing only finds and increments its bucket, so the cost doesn't grow with the
+    number of timings recorded. Quantiles are estimated from the buckets.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.max: float = 0.0
+        self.__lock = Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self.__lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(value, self.max)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile, such as 0.95, by interpolating within its bucket."""
+        with self.__lock:
+            counts, count, max_value = list(self.counts), self.count, self.max
+        if not count:
+            return 0.0
+
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else max_value
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(estimate, max_value)
+            seen += bucket_count
+        return max_value
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.__lock:
+            counts, count, total, max_value = list(self.counts), self.count, self.sum, self.max
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": max_value,
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], counts, strict=True)),
+        }
+
+
+class Metrics:
+    """A registry of named timings, counters, and gauges.
+
+    Names are dotted paths, such as "library.search_library" or "renderer.png". Timings are in
+    seconds. Recording can be turned off with the enabled attribute, which leaves spans and
+    timed functions with the cost of a single check.
+    """
+
+    def __init__(self) -> None:
+        self.enabled: bool = True
+        self.__histograms: dict[str, Histogram] = {}
+        self.__counters: dict[str, int] = {}
+        self.__gauges: dict[str, float] = {}
+        self.__lock = Lock()
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a timing."""
+        if not self.enabled:
+            return
+        histogram = self.__histograms.get(name)
+        if histogram is None:
+            with self.__lock:
+                histogram = self.__histograms.setdefault(name, Histogram())
+        histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Record how long the block takes, including when it raises."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+        """Decorate a function to record how long each call takes.
+
+        Generator functions return before they're iterated, so time those with span() instead.
+        """
+
+        def decorator(function: Callable[P, R]) -> Callable[P, R]:
+            @functools.wraps(function)
+            def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Add to a counter, such as the number of cache hits."""
+        if not self.enabled:
+            return
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a value that can go up and down, such as the length of a queue."""
+        if self.enabled:
+            self.__gauges[name] = value
+
+    def histogram(self, name: str) -> Histogram | None:
+        return self.__histograms.get(name)
+
+    def counter(self, name: str) -> int:
+        return self.__counters.get(name, 0)
+
+    def gauge(self, name: str) -> float | None:
+        return self.__gauges.get(name)
+
+    def reset(self) -> None:
+        """Discard everything that's been recorded."""
+        with self.__lock:
+            self.__histograms.clear()
+            self.__counters.clear()
+            self.__gauges.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return everything that's been recorded, sorted by name."""
+        with self.__lock:
+            histograms = dict(self.__histograms)
+            counters = dict(self.__counters)
+            gauges = dict(self.__gauges)
+        return {
+            "histograms": {name: histograms[name].snapshot() for name in sorted(histograms)},
+            "counters": dict(sorted(counters.items())),
+            "gauges": dict(sorted(gauges.items())),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Format everything that's been recorded in the Prometheus text exposition format.
+
+        Timings are exported as a single histogram with the metric name as its "name" label, and
+        likewise for counters and gauges, so that names don't need to be valid metric names.
+        """
+        snapshot = self.snapshot()
+        lines: list[str] = []
+
+        duration = f"{PROMETHEUS_PREFIX}_duration_seconds"
+        lines.append(f"# HELP {duration} Time spent in instrumented operations.")
+        lines.append(f"# TYPE {duration} histogram")
+        for name, histogram in snapshot["histograms"].items():
+            label = f'name="{_escape_label(name)}"'
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                lines.append(f'{duration}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{duration}_sum{{{label}}} {histogram['sum']!r}")
+            lines.append(f"{duration}_count{{{label}}} {histogram['count']}")
+
+        events = f"{PROMETHEUS_PREFIX}_events_total"
+        lines.append(f"# HELP {events} Counted events, such as cache hits.")
+        lines.append(f"# TYPE {events} counter")
+        for name, value in snapshot["counters"].items():
+            lines.append(f'{events}{{name="{_escape_label(name)}"}} {value}')
+
+        gauge = f"{PROMETHEUS_PREFIX}_gauge"
+        lines.append(f"# HELP {gauge} Current values, such as queue lengths.")
+        lines.append(f"# TYPE {gauge} gauge")
+        for name, value in snapshot["gauges"].items():
+            lines.append(f'{gauge}{{name="{_escape_label(name)}"}} {value!r}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return re.sub(r'(["\\])', r"\\\1", value).replace("\n", "\\n")
+
+
+metrics = Metrics()
@@ -0,0 +1,137 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Measure where time is spent while TagStudio starts up."""
+
+import builtins
+import contextlib
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from importlib.util import resolve_name
+from types import ModuleType
+
+
+@dataclass
+class ImportTiming:
+    """How long a module took to import.
+
+    Attributes:
+        name (str): The module name.
+        total (float): Seconds spent importing the module, including the modules it imported.
+        own (float): Seconds spent importing the module itself.
+        lazy (bool): Whether the module was imported lazily, after startup.
+    """
+
+    name: str
+    total: float
+    own: float
+    lazy: bool = False
+
+
+class StartupProfiler:
+    """Record module import times and named initialization phases.
+
+    Nothing is recorded until enable() is called, so the profiler costs nothing during normal
+    use. Imports are timed by wrapping builtins.__import__, which sees every import statement,
+    including those made on other threads.
+    """
+
+    def __init__(self) -> None:
+        self.enabled: bool = False
+        self.imports: dict[str, ImportTiming] = {}
+        self.phases: list[tuple[str, float]] = []
+        self.__start: float = 0.0
+        self.__original_import: Callable[..., ModuleType] = builtins.__import__
+        # Time spent importing child modules, per level of nested imports, on each thread.
+        self.__local = threading.local()
+
+    def enable(self) -> None:
+        """Start recording imports and phases."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.__start = time.perf_counter()
+        self.__original_import = builtins.__import__
+        builtins.__import__ = self.__import
+
+    def disable(self) -> None:
+        """Stop recording imports. Recorded data is kept."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        builtins.__import__ = self.__original_import
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a named initialization phase, such as creating the main window."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def record_import(self, name: str, seconds: float, lazy: bool = False) -> None:
+        """Record an import that wasn't made with an import statement."""
+        if self.enabled:
+            self.imports.setdefault(name, ImportTiming(name, seconds, seconds, lazy))
+
+    def report(self, limit: int = 30) -> str:
+        """Format the slowest imports and every recorded phase as a plain text table."""
+        elapsed = time.perf_counter() - self.__start
+        lines = [f"Startup profile ({elapsed * 1000:.0f} ms since profiling started)", ""]
+
+        lines.append(f"{'Phase':<52} {'ms':>9}")
+        for name, seconds in self.phases:
+            lines.append(f"{name:<52} {seconds * 1000:>9.1f}")
+
+        header = f"Module (slowest {limit})"
+        lines.extend(["", f"{header:<52} {'own ms':>9} {'total ms':>9}"])
+        slowest = sorted(self.imports.values(), key=lambda i: i.own, reverse=True)[:limit]
+        for timing in slowest:
+            name = f"{timing.name} (lazy)" if timing.lazy else timing.name
+            lines.append(f"{name:<52} {timing.own * 1000:>9.1f} {timing.total * 1000:>9.1f}")
+
+        return "\n".join(lines)
+
+    def __import(
+        self,
+        name: str,
+        globals: Mapping[str, object] | None = None,
+        locals: Mapping[str, object] | None = None,
+        fromlist: Sequence[str] | None = (),
+        level: int = 0,
+    ) -> ModuleType:
+        module_name = name
+        if level > 0 and globals:
+            package = globals.get("__package__")
+            with contextlib.suppress(ImportError, ValueError):
+                module_name = resolve_name(
+                    "." * level + name, package if isinstance(package, str) else None
+                )
+        if not module_name or module_name in sys.modules:
+            return self.__original_import(name, globals, locals, fromlist, level)
+
+        child_time: list[float] | None = getattr(self.__local, "child_time", None)
+        if child_time is None:
+            child_time = self.__local.child_time = []
+        child_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.__original_import(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            children = child_time.pop()
+            if child_time:
+                child_time[-1] += total
+            if module_name not in self.imports:
+                self.imports[module_name] = ImportTiming(module_name, total, total - children)
+
+
+startup_profiler = StartupProfiler()
@@ -12,7 +12,7 @@ import traceback
 import structlog
 
 from tagstudio.core.constants import VERSION, VERSION_BRANCH
-from tagstudio.qt.ts_qt import QtDriver
+from tagstudio.core.utils.startup_profiler import startup_profiler
 
 logger = structlog.get_logger(__name__)
 
@@ -55,6 +55,12 @@ def main():
         action="store_true",
         help="Reveals additional internal data useful for debugging.",
     )
+    parser.add_argument(
+        "--profile-startup",
+        dest="profile_startup",
+        action="store_true",
+        help="Prints how long each module took to import and each part of startup took.",
+    )
     parser.add_argument(
         "-v",
         "--version",
@@ -64,7 +70,15 @@ def main():
     )
     args = parser.parse_args()
 
-    driver = QtDriver(args)
+    if args.profile_startup:
+        startup_profiler.enable()
+
+    # Imported after parsing arguments so that the profiler can time the import.
+    with startup_profiler.phase("Import Qt driver"):
+        from tagstudio.qt.ts_qt import QtDriver
+
+    with startup_profiler.phase("Initialize Qt driver"):
+        driver = QtDriver(args)
     ui_name = "Qt"
 
     # Run the chosen frontend driver.
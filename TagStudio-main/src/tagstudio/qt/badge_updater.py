@@ -0,0 +1,123 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Background application of thumbnail badge changes to the library, with undo."""
+
+from dataclasses import dataclass
+from threading import Lock
+
+import structlog
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.qt.mixed.item_thumb import BADGE_TAGS, BadgeType
+from tagstudio.qt.utils.custom_runnable import CustomRunnable
+
+logger = structlog.get_logger(__name__)
+
+# The number of badge updates that can be undone.
+BADGE_UNDO_LIMIT: int = 50
+
+
+@dataclass(frozen=True)
+class BadgeChange:
+    """A badge's tag being added to or removed from entries.
+
+    Attributes:
+        badge_type (BadgeType): The badge that changed.
+        value (bool): Whether the badge's tag was added (True) or removed (False).
+        entry_ids (list[int]): The entries the tag was actually added to or removed from.
+    """
+
+    badge_type: BadgeType
+    value: bool
+    entry_ids: list[int]
+
+    def inverse(self) -> "BadgeChange":
+        return BadgeChange(self.badge_type, not self.value, self.entry_ids)
+
+
+class BadgeUpdater(QObject):
+    """Write badge changes to the library on a background thread, and undo them.
+
+    Changes are written one at a time in the order they were made, each with a single
+    set-based statement per badge. Undoing a change reverts only the entries it actually
+    changed, so entries that already had the badge keep it.
+    """
+
+    # The changes written by an update, or the inverse changes written by an undo.
+    applied = Signal(list)
+    undone = Signal(list)
+
+    def __init__(self):
+        super().__init__()
+        self.__undo_stack: list[list[BadgeChange]] = []
+        self.__lock = Lock()
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(1)
+
+    def apply(self, library: Library, entry_ids: list[int], badge_values: dict[BadgeType, bool]):
+        """Start writing badge changes for a set of entries to the library."""
+        if not entry_ids or not badge_values:
+            return
+        self.__pool.start(CustomRunnable(lambda: self.__apply(library, entry_ids, badge_values)))
+
+    def undo(self, library: Library):
+        """Start reverting the most recent badge update that hasn't been undone yet."""
+        self.__pool.start(CustomRunnable(lambda: self.__undo(library)))
+
+    def can_undo(self) -> bool:
+        with self.__lock:
+            return bool(self.__undo_stack)
+
+    def clear(self):
+        """Forget every change that could be undone, such as when the library is closed."""
+        with self.__lock:
+            self.__undo_stack.clear()
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Wait for any pending changes to be written. Returns False if the wait timed out."""
+        return self.__pool.waitForDone(msecs)
+
+    @staticmethod
+    def __write(library: Library, changes: list[BadgeChange]) -> list[BadgeChange]:
+        written: list[BadgeChange] = []
+        for change in changes:
+            tag_id = BADGE_TAGS[change.badge_type]
+            changed = library.write(
+                library.set_tags_on_entries, change.entry_ids, tag_id, change.value
+            ).result()
+            written.append(BadgeChange(change.badge_type, change.value, changed.get(tag_id, [])))
+        return written
+
+    def __apply(self, library: Library, entry_ids: list[int], badge_values: dict[BadgeType, bool]):
+        try:
+            changes = self.__write(
+                library, [BadgeChange(b, v, entry_ids) for b, v in badge_values.items()]
+            )
+        except Exception as e:
+            logger.error("[BadgeUpdater] Could not update badges", error=e)
+            return
+
+        with self.__lock:
+            self.__undo_stack.append(changes)
+            del self.__undo_stack[:-BADGE_UNDO_LIMIT]
+        logger.info(
+            "[BadgeUpdater] Updated badges",
+            changes={c.badge_type: (c.value, len(c.entry_ids)) for c in changes},
+        )
+        self.applied.emit(changes)
+
+    def __undo(self, library: Library):
+        with self.__lock:
+            if not self.__undo_stack:
+                return
+            changes = self.__undo_stack.pop()
+
+        try:
+            undone = self.__write(library, [c.inverse() for c in reversed(changes)])
+        except Exception as e:
+            logger.error("[BadgeUpdater] Could not undo badge update", error=e)
+            return
+        logger.info("[BadgeUpdater] Undid badge update")
+        self.undone.emit(undone)
@@ -1,7 +1,6 @@
 # Copyright (C) 2025 Travis Abendshien (CyanVoxel).
 # Licensed under the GPL-3.0 License.
 # Created for TagStudio: https://github.com/CyanVoxel/TagStudio
-import os
 from pathlib import Path
 from typing import TYPE_CHECKING, override
 from warnings import catch_warnings
@@ -9,6 +8,8 @@ from warnings import catch_warnings
 import structlog
 from humanfriendly import format_size  # pyright: ignore[reportUnknownVariableType]
 from PySide6 import QtGui
+from PySide6.QtCore import Qt, QThreadPool, Signal
+from PySide6.QtWidgets import QFileDialog, QTableWidgetItem
 
 from tagstudio.core.constants import BACKUP_FOLDER_NAME, TS_FOLDER_NAME
 from tagstudio.core.library.alchemy.constants import (
@@ -16,10 +17,12 @@ from tagstudio.core.library.alchemy.constants import (
     DB_VERSION_CURRENT_KEY,
     JSON_FILENAME,
 )
-from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.alchemy.library import Library, LibraryStats
+from tagstudio.core.utils.metrics import metrics
 from tagstudio.core.utils.types import unwrap
 from tagstudio.qt.translations import Translations
 from tagstudio.qt.utils import file_opener
+from tagstudio.qt.utils.custom_runnable import CustomRunnable
 from tagstudio.qt.views.library_info_window_view import LibraryInfoWindowView
 
 # Only import for type checking/autocompletion, will not be imported at runtime.
@@ -30,8 +33,12 @@ logger = structlog.get_logger(__name__)
 
 
 class LibraryInfoWindow(LibraryInfoWindowView):
+    # Emitted from a worker thread with the library's LibraryStats once file sizes are added up.
+    file_sizes_loaded = Signal(object)
+
     def __init__(self, library: "Library", driver: "QtDriver"):
         super().__init__(library, driver)
+        self.file_sizes_loaded.connect(self.__update_size)
 
         # Statistics Buttons
         self.manage_tags_button.clicked.connect(
@@ -52,6 +59,16 @@ class LibraryInfoWindow(LibraryInfoWindowView):
             self.driver.main_window.menu_bar.fix_dupe_files_action.trigger
         )
 
+        # Performance Buttons
+        self.refresh_metrics_button.clicked.connect(self.update_metrics)
+        self.reset_metrics_button.clicked.connect(self.reset_metrics)
+        self.export_json_button.clicked.connect(
+            lambda: self.export_metrics(metrics.to_json(), "json")
+        )
+        self.export_prometheus_button.clicked.connect(
+            lambda: self.export_metrics(metrics.to_prometheus(), "prom")
+        )
+
         # General Buttons
         self.close_button.clicked.connect(lambda: self.close())
 
@@ -63,17 +80,52 @@ class LibraryInfoWindow(LibraryInfoWindowView):
         self.title_label.setText(f"<h2>{title}</h2>")
 
     def update_stats(self):
-        self.entry_count_label.setText(f"<b>{self.lib.entries_count}</b>")
-        self.tag_count_label.setText(f"<b>{len(self.lib.tags)}</b>")
-        self.field_count_label.setText(f"<b>{len(self.lib.field_types)}</b>")
-        self.namespaces_count_label.setText(f"<b>{len(self.lib.namespaces)}</b>")
-        colors_total = 0
-        for c in self.lib.tag_color_groups.values():
-            colors_total += len(c)
-        self.color_count_label.setText(f"<b>{colors_total}</b>")
+        stats = self.lib.get_stats()
+        self.entry_count_label.setText(f"<b>{stats.entries}</b>")
+        self.tag_count_label.setText(f"<b>{stats.tags}</b>")
+        self.field_count_label.setText(f"<b>{stats.fields}</b>")
+        self.namespaces_count_label.setText(f"<b>{stats.namespaces}</b>")
+        self.color_count_label.setText(f"<b>{stats.colors}</b>")
+        self.untagged_count_label.setText(f"<b>{stats.untagged_entries}</b>")
 
         self.macros_count_label.setText("<b>1</b>")  # TODO: Implement macros system
 
+        media_types = "<br>".join(
+            f"{media_type}: <b>{count}</b>" for media_type, count in stats.media_types.items()
+        )
+        self.entry_count_label.setToolTip(
+            f"{Translations['library_info.stats.media_types']}<br>{media_types}"
+        )
+        top_tags = "<br>".join(f"{name}: <b>{count}</b>" for _, name, count in stats.top_tags)
+        self.tag_count_label.setToolTip(
+            f"{Translations['library_info.stats.top_tags']}<br>{top_tags}"
+        )
+
+        # Every file is statted to add up their sizes, which is left to a worker thread.
+        if stats.total_bytes is not None:
+            self.__update_size(stats)
+        else:
+            self.size_value_label.setText("<b>—</b>")
+            library_dir = unwrap(self.lib.library_dir)
+            QThreadPool.globalInstance().start(
+                CustomRunnable(lambda: self.__load_file_sizes(library_dir))
+            )
+
+    def __load_file_sizes(self, library_dir: Path):
+        # The library may have been closed, or another one opened, since the worker was started.
+        if self.lib.library_dir != library_dir:
+            return
+        try:
+            stats = self.lib.get_stats(with_file_sizes=True)
+        except Exception as e:
+            logger.warning("[LibraryInfoWindow] Couldn't add up file sizes", error=e)
+            return
+        if self.lib.library_dir == library_dir:
+            self.file_sizes_loaded.emit(stats)
+
+    def __update_size(self, stats: LibraryStats):
+        self.size_value_label.setText(f"<b>{format_size(unwrap(stats.total_bytes))}</b>")
+
     def update_cleanup(self):
         # Unlinked Entries
         unlinked_count: str = (
@@ -102,8 +154,9 @@ class LibraryInfoWindow(LibraryInfoWindowView):
         self.legacy_json_status_label.setText(f"<b>{json_library_text}</b>")
 
         # Backups
+        backups = self.lib.get_backup_manifest()
         self.backups_count_label.setText(
-            f"<b>{self.__backups_count}</b> ({format_size(self.__backups_size)})"
+            f"<b>{backups.count}</b> ({format_size(backups.total_size)})"
         )
 
         # Buttons
@@ -133,33 +186,58 @@ class LibraryInfoWindow(LibraryInfoWindowView):
             Translations.format("library_info.version", version=version_text)
         )
 
+    def update_metrics(self):
+        snapshot = metrics.snapshot()
+        rows: list[tuple[str, float, list[float]]] = [
+            (
+                name,
+                histogram["count"],
+                [histogram[key] * 1000 for key in ("mean", "p50", "p95", "max")],
+            )
+            for name, histogram in snapshot["histograms"].items()
+        ]
+        rows.extend((name, value, []) for name, value in snapshot["counters"].items())
+        rows.extend((name, value, []) for name, value in snapshot["gauges"].items())
+
+        # Rows are moved as soon as they're sorted, so sorting waits until they're all filled.
+        self.metrics_table.setSortingEnabled(False)
+        self.metrics_table.setRowCount(len(rows))
+        for row, (name, count, timings) in enumerate(rows):
+            self.metrics_table.setItem(row, 0, QTableWidgetItem(name))
+            for column, value in enumerate([count, *timings], start=1):
+                item = QTableWidgetItem()
+                item.setData(Qt.ItemDataRole.DisplayRole, round(value, 3))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.metrics_table.setItem(row, column, item)
+        self.metrics_table.setSortingEnabled(True)
+
+    def reset_metrics(self):
+        metrics.reset()
+        self.update_metrics()
+
+    def export_metrics(self, text: str, suffix: str):
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            Translations["library_info.performance.export_title"],
+            str(Path.home() / f"tagstudio_metrics.{suffix}"),
+        )
+        if not path:
+            return
+        Path(path).write_text(text, encoding="utf-8")
+        logger.info("[LibraryInfoWindow] Exported metrics", path=path)
+
     def refresh(self):
         self.update_title()
         self.update_stats()
         self.update_cleanup()
         self.update_version()
+        self.update_metrics()
 
     @property
     def __is_json_library_present(self):
         json_path = unwrap(self.lib.library_dir) / TS_FOLDER_NAME / JSON_FILENAME
         return json_path.exists()
 
-    @property
-    def __backups_count(self):
-        backups_path = unwrap(self.lib.library_dir) / TS_FOLDER_NAME / BACKUP_FOLDER_NAME
-        return len(os.listdir(backups_path))
-
-    @property
-    def __backups_size(self):
-        backups_path = unwrap(self.lib.library_dir) / TS_FOLDER_NAME / BACKUP_FOLDER_NAME
-        size: int = 0
-
-        for f in backups_path.glob("*"):
-            if not f.is_dir() and f.exists():
-                size += Path(f).stat().st_size
-
-        return size
-
     @override
     def showEvent(self, event: QtGui.QShowEvent):  # type: ignore
         self.refresh()
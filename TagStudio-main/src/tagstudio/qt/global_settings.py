@@ -72,6 +72,13 @@ class GlobalSettings(BaseModel):
     theme: Theme = Field(default=Theme.SYSTEM)
     splash: Splash = Field(default=Splash.DEFAULT)
     windows_start_command: bool = Field(default=False)
+    compress_backups: bool = Field(default=False)
+    max_backups: int = Field(default=0)  # 0 keeps every backup
+    in_memory_search: bool = Field(default=False)
+    autofill_new_files: bool = Field(default=False)
+    queue_library_writes: bool = Field(default=False)
+    write_ahead_log: bool = Field(default=False)
+    skip_duplicate_imports: bool = Field(default=False)
 
     date_format: str = Field(default="%x")
     hour_format: bool = Field(default=True)
@@ -0,0 +1,84 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Hand images between Qt and PIL without encoding them or converting their pixels twice."""
+
+from PIL import Image
+from PySide6.QtGui import QImage, QPixmap
+
+# QImage formats that have the same memory layout as a PIL mode, so a PIL image can be mapped
+# directly onto the QImage's pixels.
+_MAPPED_MODES: dict[QImage.Format, str] = {
+    QImage.Format.Format_RGBA8888: "RGBA",
+    QImage.Format.Format_RGBX8888: "RGBX",
+    QImage.Format.Format_Grayscale8: "L",
+}
+
+# PIL modes that can be copied into a QImage as-is.
+_QIMAGE_FORMATS: dict[str, QImage.Format] = {
+    "RGBA": QImage.Format.Format_RGBA8888,
+    "RGB": QImage.Format.Format_RGB888,
+    "L": QImage.Format.Format_Grayscale8,
+}
+
+
+class _QImageBuffer:
+    """Expose the pixels of a QImage through the buffer protocol.
+
+    The memoryview returned by QImage.constBits() doesn't keep the QImage alive, so this holds
+    on to it for as long as anything (such as a PIL image) is using the buffer.
+    """
+
+    def __init__(self, q_image: QImage):
+        self.q_image = q_image
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return memoryview(self.q_image.constBits())  # pyright: ignore[reportArgumentType]
+
+
+def qimage_to_pil(q_image: QImage) -> Image.Image:
+    """Return a read-only PIL image backed by the pixels of a QImage.
+
+    QImages in RGBA8888, RGBX8888 or Grayscale8 format are shared without copying. Other
+    formats are converted to RGBA8888 by Qt first.
+    """
+    mode = _MAPPED_MODES.get(q_image.format())
+    if mode is None:
+        q_image = q_image.convertToFormat(QImage.Format.Format_RGBA8888)
+        mode = "RGBA"
+    return Image.frombuffer(
+        mode,
+        (q_image.width(), q_image.height()),
+        # The memoryview keeps the wrapper, and so the QImage, alive.
+        memoryview(_QImageBuffer(q_image)),
+        "raw",
+        mode,
+        q_image.bytesPerLine(),
+        1,
+    )
+
+
+def pil_to_qimage(image: Image.Image) -> QImage:
+    """Copy a PIL image into a QImage in a format matching its mode.
+
+    Unlike ImageQt, RGB and RGBA images are copied once without swapping their channels.
+    Images in other modes are converted to RGBA first.
+    """
+    q_format = _QIMAGE_FORMATS.get(image.mode)
+    if q_format is None:
+        image = image.convert("RGBA")
+        q_format = _QIMAGE_FORMATS["RGBA"]
+    data = image.tobytes()
+    # QImage keeps a reference to the data for as long as it exists.
+    return QImage(
+        data,
+        image.width,
+        image.height,
+        len(data) // max(image.height, 1),
+        q_format,
+    )
+
+
+def pil_to_qpixmap(image: Image.Image) -> QPixmap:
+    """Copy a PIL image into a QPixmap."""
+    return QPixmap.fromImage(pil_to_qimage(image))
@@ -4,13 +4,13 @@
 
 
 import enum
-import shutil
 from pathlib import Path
 from typing import TYPE_CHECKING, override
 
 import structlog
+from humanfriendly import format_size, format_timespan  # pyright: ignore[reportUnknownVariableType]
 from PySide6 import QtCore, QtGui
-from PySide6.QtCore import Qt, QUrl
+from PySide6.QtCore import Qt, QThreadPool, QUrl
 from PySide6.QtGui import QStandardItem, QStandardItemModel
 from PySide6.QtWidgets import (
     QHBoxLayout,
@@ -21,9 +21,13 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from tagstudio.core.enums import MacroID
+from tagstudio.core.library.importer import FileImporter, ImportJob, ImportProgress
 from tagstudio.core.utils.types import unwrap
 from tagstudio.qt.mixed.progress_bar import ProgressWidget
 from tagstudio.qt.translations import Translations
+from tagstudio.qt.utils.custom_runnable import CustomRunnable
+from tagstudio.qt.utils.function_iterator import FunctionIterator
 
 if TYPE_CHECKING:
     from tagstudio.qt.ts_qt import QtDriver
@@ -165,56 +169,103 @@ class DropImportModal(QWidget):
         if self.choice == DuplicateChoice.CANCEL:
             return
 
-        def displayed_text(x):
-            return Translations.format(
-                "drop_import.progress.label.singular"
-                if x[0] + 1 == 1
-                else "drop_import.progress.label.plural",
-                count=x[0] + 1,
-                suffix=f" {x[1]} {self.choice.value}" if self.choice else "",
+        jobs = self.plan_jobs()
+        handled_duplicates = len(self.duplicate_files) if self.choice else 0
+        importer = FileImporter(
+            self.driver.lib,
+            skip_duplicates=self.driver.settings.skip_duplicate_imports,
+            new_file_macro=(MacroID.AUTOFILL if self.driver.settings.autofill_new_files else None),
+        )
+
+        def displayed_text(progress: ImportProgress) -> str:
+            eta = progress.eta
+            return "\n".join(
+                [
+                    Translations.format(
+                        "drop_import.progress.label.singular"
+                        if progress.files_done == 1
+                        else "drop_import.progress.label.plural",
+                        count=progress.files_done,
+                        suffix=(
+                            f" {handled_duplicates} {unwrap(self.choice).value}"
+                            if self.choice
+                            else ""
+                        ),
+                    ),
+                    Translations.format(
+                        "drop_import.progress.throughput",
+                        copied=format_size(progress.bytes_done),
+                        total=format_size(progress.bytes_total),
+                        rate=format_size(progress.throughput),
+                        eta=format_timespan(eta) if eta is not None else "—",
+                    ),
+                ]
             )
 
         pw = ProgressWidget(
             cancel_button_text=None,
             minimum=0,
-            maximum=len(self.files),
+            maximum=len(jobs),
         )
         pw.setWindowTitle(Translations["drop_import.progress.window_title"])
         pw.update_label(Translations["drop_import.progress.label.initial"])
+        pw.show()
 
-        pw.from_iterable_function(
-            self.copy_files,
-            displayed_text,
-            self.driver.add_new_files_callback,
-            self.deleteLater,
+        iterator = FunctionIterator(lambda: importer.run(jobs))
+        iterator.value.connect(
+            lambda progress: (
+                pw.update_progress(progress.files_done),
+                pw.update_label(displayed_text(progress)),
+            )
         )
-
-    def copy_files(self):
-        """Copy files from original location to the library directory."""
-        file_count = 0
-        duplicated_files_progress = 0
+        errors: list[Exception] = []
+
+        def import_files():
+            try:
+                iterator.run()
+            except Exception as e:
+                logger.exception("[DropImport] Couldn't import files", error=e)
+                errors.append(e)
+
+        def on_done():
+            try:
+                pw.hide()
+                pw.deleteLater()
+                if errors:
+                    self.driver.main_window.status_bar.showMessage(
+                        Translations.format("drop_import.failed", error=errors[0])
+                    )
+                # The copied files were added as entries, so the library needn't be refreshed.
+                if importer.entry_ids:
+                    self.driver.update_browsing_state()
+            finally:
+                self.deleteLater()
+
+        r = CustomRunnable(import_files)
+        r.done.connect(on_done)
+        QThreadPool.globalInstance().start(r)
+
+    def plan_jobs(self) -> list[ImportJob]:
+        """Decide where in the library each file is copied to, following the duplicate choice."""
+        jobs: list[ImportJob] = []
+        duplicate_files = set(self.duplicate_files)
+        planned: set[Path] = set()
         for file in self.files:
             if file.is_dir():
                 continue
 
             dest_file = self._get_relative_path(file)
 
-            if file in self.duplicate_files:
-                duplicated_files_progress += 1
+            if file in duplicate_files:
                 if self.choice == DuplicateChoice.SKIP:
-                    file_count += 1
                     continue
                 elif self.choice == DuplicateChoice.RENAME:
-                    new_name = self._get_renamed_duplicate_filename(dest_file)
+                    new_name = self._get_renamed_duplicate_filename(dest_file, planned)
                     dest_file = dest_file.with_name(new_name)
 
-            (unwrap(self.driver.lib.library_dir) / dest_file).parent.mkdir(
-                parents=True, exist_ok=True
-            )
-            shutil.copyfile(file, unwrap(self.driver.lib.library_dir) / dest_file)
-
-            file_count += 1
-            yield [file_count, duplicated_files_progress]
+            planned.add(dest_file)
+            jobs.append(ImportJob(file, dest_file))
+        return jobs
 
     def _get_relative_path(self, path: Path) -> Path:
         for dir in self.dirs_in_root:
@@ -222,7 +273,9 @@ class DropImportModal(QWidget):
                 return path.relative_to(dir)
         return Path(path.name)
 
-    def _get_renamed_duplicate_filename(self, filepath: Path) -> str:
+    def _get_renamed_duplicate_filename(
+        self, filepath: Path, planned: set[Path] | None = None
+    ) -> str:
         index = 2
         o_filename = filepath.name
 
@@ -231,7 +284,9 @@ class DropImportModal(QWidget):
         except ValueError:
             dot_idx = len(o_filename)
 
-        while (unwrap(self.driver.lib.library_dir) / filepath).exists():
+        while (unwrap(self.driver.lib.library_dir) / filepath).exists() or (
+            planned is not None and filepath in planned
+        ):
             filepath = filepath.with_name(
                 o_filename[:dot_idx] + f" ({index})" + o_filename[dot_idx:]
             )
@@ -112,18 +112,38 @@ class FieldContainers(QWidget):
         logger.warning("[FieldContainers] Updating Selection", entry_id=entry_id)
 
         entry = unwrap(self.lib.get_entry_full(entry_id))
+        self.set_entry(entry, update_badges=update_badges)
+
+    def set_entry(
+        self,
+        entry: Entry,
+        hierarchy_tags: dict[int, Tag] | None = None,
+        update_badges: bool = True,
+    ):
+        """Update tags and fields from a single Entry that has already been loaded.
+
+        Args:
+            entry (Entry): The entry, loaded along with its tags and fields.
+            hierarchy_tags (dict[int, Tag] | None): The result of Library.get_tag_hierarchy()
+                for the entry's tags. Fetched from the library if not given.
+            update_badges (bool): Whether to update the badges of the selected thumbnails.
+        """
         self.cached_entries = [entry]
-        self.update_granular(entry.tags, entry.fields, update_badges)
+        self.update_granular(entry.tags, entry.fields, update_badges, hierarchy_tags)
 
     def update_granular(
-        self, entry_tags: set[Tag], entry_fields: list[BaseField], update_badges: bool = True
+        self,
+        entry_tags: set[Tag],
+        entry_fields: list[BaseField],
+        update_badges: bool = True,
+        hierarchy_tags: dict[int, Tag] | None = None,
     ):
         """Individually update elements of the item preview."""
         container_len: int = len(entry_fields)
         container_index = 0
         # Write tag container(s)
         if entry_tags:
-            categories = self.get_tag_categories(entry_tags)
+            categories = self.get_tag_categories(entry_tags, hierarchy_tags)
             for cat, tags in sorted(categories.items(), key=lambda kv: (kv[0] is None, kv)):
                 self.write_tag_container(
                     container_index, tags=tags, category_tag=cat, is_mixed=False
@@ -145,6 +165,9 @@ class FieldContainers(QWidget):
 
     def update_toggled_tag(self, tag_id: int, toggle_value: bool):
         """Visually add or remove a tag from the item preview without needing to query the db."""
+        if not self.cached_entries:
+            # The entry is still being loaded, and will be shown with the tag already toggled.
+            return
         entry = self.cached_entries[0]
         tag = self.lib.get_tag(tag_id)
         if not tag:
@@ -161,7 +184,9 @@ class FieldContainers(QWidget):
         for c in self.containers:
             c.setHidden(True)
 
-    def get_tag_categories(self, tags: set[Tag]) -> dict[Tag | None, set[Tag]]:
+    def get_tag_categories(
+        self, tags: set[Tag], hierarchy_tags: dict[int, Tag] | None = None
+    ) -> dict[Tag | None, set[Tag]]:
         """Get a dictionary of category tags mapped to their respective tags.
 
         Example:
@@ -172,7 +197,8 @@ class FieldContainers(QWidget):
         """
         loop_cutoff = 1024  # Used for stopping the while loop
 
-        hierarchy_tags = self.lib.get_tag_hierarchy(t.id for t in tags)
+        if hierarchy_tags is None:
+            hierarchy_tags = self.lib.get_tag_hierarchy(t.id for t in tags)
         categories: dict[Tag | None, set[Tag]] = {None: set()}
 
         for tag in hierarchy_tags.values():
@@ -219,12 +245,10 @@ class FieldContainers(QWidget):
             selected=self.driver.selected,
             fields=field_list,
         )
-        for entry_id in self.driver.selected:
-            for field_item in field_list:
-                self.lib.add_field_to_entry(
-                    entry_id,
-                    field_id=field_item.data(Qt.ItemDataRole.UserRole),
-                )
+        self.lib.add_fields_to_entries(
+            self.driver.selected,
+            [(field_item.data(Qt.ItemDataRole.UserRole), None) for field_item in field_list],
+        )
 
     def add_tags_to_selected(self, tags: int | list[int]):
         """Add list of tags to one or more selected items.
@@ -490,20 +490,6 @@ class ItemThumb(FlowWidget):
         # self.driver.update_badges() method.
         self.driver.update_badges(badge_values, self.item_id)
 
-    def toggle_item_tag(
-        self,
-        entry_id: int,
-        toggle_value: bool,
-        tag_id: int,
-    ):
-        if entry_id in self.driver.selected:
-            if len(self.driver.selected) == 1:
-                self.driver.main_window.preview_panel.field_containers_widget.update_toggled_tag(
-                    tag_id, toggle_value
-                )
-            else:
-                pass
-
     @override
     def mouseMoveEvent(self, event: QMouseEvent) -> None:  # type: ignore[misc]
         if event.buttons() is not Qt.MouseButton.LeftButton:
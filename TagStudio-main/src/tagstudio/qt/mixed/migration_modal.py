@@ -496,6 +496,8 @@ class JsonMigrationModal(QObject):
     def finish_migration(self):
         """Finish the migration upon user approval."""
         final_name = self.json_lib.library_dir / TS_FOLDER_NAME / SQL_FILENAME
+        # Closing the library writes its pending changes into the file before it's moved.
+        self.sql_lib.close()
         if self.temp_path.exists():
             self.temp_path.rename(final_name)
 
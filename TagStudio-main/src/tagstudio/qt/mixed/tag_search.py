@@ -3,13 +3,13 @@
 # Created for TagStudio: https://github.com/CyanVoxel/TagStudio
 
 
-import contextlib
+from collections.abc import Iterator
 from typing import TYPE_CHECKING, Union
 from warnings import catch_warnings
 
 import structlog
 from PySide6 import QtCore, QtGui
-from PySide6.QtCore import QSize, Qt, Signal
+from PySide6.QtCore import QSize, Qt, QTimer, Signal
 from PySide6.QtGui import QShowEvent
 from PySide6.QtWidgets import (
     QComboBox,
@@ -67,6 +67,7 @@ class TagSearchPanel(PanelWidget):
     driver: Union["QtDriver", None]
     is_initialized: bool = False
     first_tag_id: int | None = None
+    search_generation: int = 0
     is_tag_chooser: bool
     exclude: list[int]
 
@@ -210,7 +211,11 @@ class TagSearchPanel(PanelWidget):
         self.add_tag_modal.show()
 
     def update_tags(self, query: str | None = None):
-        """Update the tag list given a search query."""
+        """Update the tag list given a search query.
+
+        The first chunk of results is shown right away. Any further chunks are loaded and shown
+        from the event loop, so the panel stays responsive while large result sets are resolved.
+        """
         logger.info("[TagSearchPanel] Updating Tags")
 
         # Remove the "Create & Add" button if one exists
@@ -218,53 +223,53 @@ class TagSearchPanel(PanelWidget):
             self.scroll_layout.takeAt(self.scroll_layout.count() - 1).widget().deleteLater()
             self.create_button_in_layout = False
 
-        # Get results for the search query
-        query_lower = "" if not query else query.lower()
         # Only use the tag limit if it's an actual number (aka not "All Tags")
         tag_limit = TagSearchPanel.tag_limit if isinstance(TagSearchPanel.tag_limit, int) else -1
-        tag_results: list[set[Tag]] = self.lib.search_tags(name=query, limit=tag_limit)
-        if self.exclude:
-            tag_results[0] = {t for t in tag_results[0] if t.id not in self.exclude}
-            tag_results[1] = {t for t in tag_results[1] if t.id not in self.exclude}
-
-        # Sort and prioritize the results
-        results_0 = list(tag_results[0])
-        results_0.sort(key=lambda tag: tag.name.lower())
-        results_1 = list(tag_results[1])
-        results_1.sort(key=lambda tag: tag.name.lower())
-        raw_results = list(results_0 + results_1)
-        priority_results: set[Tag] = set()
-        all_results: list[Tag] = []
-
-        if query and query.strip():
-            for tag in raw_results:
-                if tag.name.lower().startswith(query_lower):
-                    priority_results.add(tag)
-
-        all_results = sorted(list(priority_results), key=lambda tag: len(tag.name)) + [
-            r for r in raw_results if r not in priority_results
-        ]
-        if tag_limit > 0:
-            all_results = all_results[:tag_limit]
-
-        if all_results:
-            self.first_tag_id = None
-            self.first_tag_id = all_results[0].id if len(all_results) > 0 else all_results[0].id
+        results: Iterator[list[Tag]] = self.lib.search_tags_ranked(
+            name=query, limit=tag_limit, exclude=self.exclude
+        )
 
-        else:
-            self.first_tag_id = None
+        # Any results still being streamed in from a previous search are discarded.
+        self.search_generation += 1
+        self.first_tag_id = None
 
         # Update every tag widget with the new search result data
-        norm_previous = self.previous_limit if self.previous_limit > 0 else len(self.lib.tags)
-        norm_limit = tag_limit if tag_limit > 0 else len(self.lib.tags)
+        tags_count = self.lib.tags_count
+        norm_previous = self.previous_limit if self.previous_limit > 0 else tags_count
+        norm_limit = tag_limit if tag_limit > 0 else tags_count
         range_limit = max(norm_previous, norm_limit)
-        for i in range(0, range_limit):
-            tag = None
-            with contextlib.suppress(IndexError):
-                tag = all_results[i]
-            self.set_tag_widget(tag=tag, index=i)
         self.previous_limit = tag_limit
 
+        self.__show_tag_results(results, query, 0, range_limit, self.search_generation)
+
+    def __show_tag_results(
+        self,
+        results: Iterator[list[Tag]],
+        query: str | None,
+        index: int,
+        range_limit: int,
+        generation: int,
+    ):
+        """Show the next chunk of tag search results, starting at a given tag widget index."""
+        if generation != self.search_generation:
+            return
+
+        chunk = next(results, None)
+        if chunk:
+            if self.first_tag_id is None:
+                self.first_tag_id = chunk[0].id
+            for tag in chunk:
+                self.set_tag_widget(tag=tag, index=index)
+                index += 1
+            QTimer.singleShot(
+                0, lambda: self.__show_tag_results(results, query, index, range_limit, generation)
+            )
+            return
+
+        # Hide any tag widgets left over from previous results
+        for i in range(index, min(range_limit, self.scroll_layout.count())):
+            self.set_tag_widget(tag=None, index=i)
+
         # Add back the "Create & Add" button
         if query and query.strip():
             cb: QPushButton = self.build_create_button(query)
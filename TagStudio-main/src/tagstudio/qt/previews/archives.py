@@ -0,0 +1,215 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Archive readers with a common API, used to find and extract comic book covers."""
+
+import tarfile
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Literal
+
+import py7zr
+import py7zr.io
+import rarfile
+import structlog
+
+from tagstudio.core.utils.lru_cache import LruCache
+from tagstudio.core.utils.types import unwrap
+
+logger = structlog.get_logger(__name__)
+
+COMIC_INFO: str = "ComicInfo.xml"
+COVER_EXTENSIONS: tuple[str, ...] = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".svg")
+# Covers larger than this (uncompressed) are skipped rather than extracted.
+MAX_COVER_SIZE: int = 32 * 1024 * 1024  # 32 MiB
+MAX_COMIC_INFO_SIZE: int = 1024 * 1024  # 1 MiB
+# The longest time spent finding and extracting a single cover.
+COVER_TIME_LIMIT: float = 5.0
+COVER_CACHE_SIZE: int = 4096
+READ_CHUNK_SIZE: int = 1024 * 1024
+
+
+class ArchiveBudgetError(Exception):
+    """Reading an archive member would exceed the size or time allowed for it."""
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    """A file stored in an archive.
+
+    Attributes:
+        name (str): The path of the file inside the archive.
+        size (int): The uncompressed size of the file in bytes.
+    """
+
+    name: str
+    size: int
+
+
+def _read_stream(stream: IO[bytes], limit: int, deadline: float) -> bytes:
+    """Read a stream in chunks, giving up once it passes a size limit or deadline."""
+    chunks: list[bytes] = []
+    total = 0
+    while chunk := stream.read(READ_CHUNK_SIZE):
+        total += len(chunk)
+        if total > limit:
+            raise ArchiveBudgetError(f"member is larger than {limit} bytes")
+        if time.monotonic() > deadline:
+            raise ArchiveBudgetError("ran out of time reading member")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class ZipFile(zipfile.ZipFile):
+    """Wrapper around zipfile.ZipFile with the common archive API."""
+
+    def list_members(self) -> list[ArchiveMember]:
+        return [ArchiveMember(i.filename, i.file_size) for i in self.infolist() if not i.is_dir()]
+
+    def read_member(self, name: str, limit: int, deadline: float) -> bytes:
+        with self.open(name) as stream:
+            return _read_stream(stream, limit, deadline)
+
+
+class RarFile(rarfile.RarFile):
+    """Wrapper around rarfile.RarFile with the common archive API."""
+
+    def list_members(self) -> list[ArchiveMember]:
+        return [ArchiveMember(i.filename, i.file_size) for i in self.infolist() if not i.is_dir()]
+
+    def read_member(self, name: str, limit: int, deadline: float) -> bytes:
+        with self.open(name) as stream:
+            return _read_stream(stream, limit, deadline)
+
+
+class SevenZipFile(py7zr.SevenZipFile):
+    """Wrapper around py7zr.SevenZipFile with the common archive API."""
+
+    def __init__(self, filepath: Path, mode: Literal["r"]) -> None:
+        super().__init__(filepath, mode)
+
+    def list_members(self) -> list[ArchiveMember]:
+        return [
+            ArchiveMember(i.filename, i.uncompressed) for i in self.list() if not i.is_directory
+        ]
+
+    def read_member(self, name: str, limit: int, deadline: float) -> bytes:
+        # SevenZipFile must be reset after every extraction
+        # See https://py7zr.readthedocs.io/en/stable/api.html#py7zr.SevenZipFile.extract
+        # Members of solid archives can't be streamed, so the deadline is checked afterwards.
+        self.reset()
+        factory = py7zr.io.BytesIOFactory(limit=limit)
+        self.extract(targets=[name], factory=factory)
+        if time.monotonic() > deadline:
+            raise ArchiveBudgetError("ran out of time reading member")
+        return factory.get(name).read()
+
+
+class TarFile(tarfile.TarFile):
+    """Wrapper around tarfile.TarFile with the common archive API."""
+
+    def __init__(self, filepath: Path, mode: Literal["r"]) -> None:
+        super().__init__(filepath, mode)
+
+    def list_members(self) -> list[ArchiveMember]:
+        return [ArchiveMember(i.name, i.size) for i in self.getmembers() if i.isfile()]
+
+    def read_member(self, name: str, limit: int, deadline: float) -> bytes:
+        return _read_stream(unwrap(self.extractfile(name)), limit, deadline)
+
+
+type Archive_T = type[ZipFile] | type[RarFile] | type[SevenZipFile] | type[TarFile]
+type Archive = ZipFile | RarFile | SevenZipFile | TarFile
+
+
+ARCHIVERS: dict[str, Archive_T] = {
+    ".cb7": SevenZipFile,
+    ".cbr": RarFile,
+    ".cbt": TarFile,
+}
+
+
+def get_archiver(ext: str) -> Archive_T:
+    """Return the archive class used to read a comic book archive with the given extension."""
+    return ARCHIVERS.get(ext, ZipFile)
+
+
+class CoverCache:
+    """The name of the cover chosen for recently read archives, keyed by path and mtime."""
+
+    def __init__(self, max_size: int = COVER_CACHE_SIZE):
+        # Names are wrapped in a tuple, so that an archive without a cover is cached as (None,)
+        # rather than as the None that LruCache.get returns for a key it doesn't have.
+        self.__covers: LruCache[tuple[Path, int], tuple[str | None]] = LruCache(max_size)
+
+    def get(self, key: tuple[Path, int]) -> tuple[bool, str | None]:
+        """Return whether the key is cached, and the cover member name if it is."""
+        cached = self.__covers.get(key)
+        return (False, None) if cached is None else (True, cached[0])
+
+    def put(self, key: tuple[Path, int], name: str | None) -> None:
+        self.__covers.put(key, (name,))
+
+    def clear(self) -> None:
+        self.__covers.clear()
+
+
+cover_cache = CoverCache()
+
+
+def find_cover(archive: Archive, deadline: float) -> ArchiveMember | None:
+    """Choose the cover of a comic book archive from a single listing of its members.
+
+    The cover is the front (or failing that, inner) cover named by ComicInfo.xml, or else the
+    first image in the archive.
+    """
+    members = archive.list_members()
+    by_name = {m.name: m for m in members}
+
+    comic_info = by_name.get(COMIC_INFO)
+    if comic_info is not None:
+        root = ET.fromstring(archive.read_member(COMIC_INFO, MAX_COMIC_INFO_SIZE, deadline))
+        pages = [m for m in members if m.name != COMIC_INFO]
+        for cover_type in ("FrontCover", "InnerCover"):
+            cover = root.find(f"./*Page[@Type='{cover_type}']")
+            if cover is None:
+                continue
+            try:
+                page = pages[int(unwrap(cover.get("Image")))]
+            except (IndexError, ValueError):
+                continue
+            if page.name.lower().endswith(COVER_EXTENSIONS):
+                return page
+
+    return next((m for m in members if m.name.lower().endswith(COVER_EXTENSIONS)), None)
+
+
+def read_cover(filepath: Path, ext: str) -> bytes | None:
+    """Return the data of the cover image of a comic book archive, if it has one.
+
+    The chosen cover is cached per archive, so that later reads of an unchanged archive open
+    only that member.
+
+    Raises:
+        ArchiveBudgetError: The cover is larger than MAX_COVER_SIZE, or it took longer than
+            COVER_TIME_LIMIT to find and extract.
+    """
+    deadline = time.monotonic() + COVER_TIME_LIMIT
+    key = (filepath, filepath.stat().st_mtime_ns)
+
+    with get_archiver(ext)(filepath, "r") as archive:
+        is_cached, name = cover_cache.get(key)
+        if not is_cached:
+            cover = find_cover(archive, deadline)
+            if cover is not None and cover.size > MAX_COVER_SIZE:
+                logger.warning("[Archives] Cover is too large", filepath=filepath, cover=cover.name)
+                cover = None
+            name = cover.name if cover is not None else None
+            cover_cache.put(key, name)
+
+        if name is None:
+            return None
+        return archive.read_member(name, MAX_COVER_SIZE, deadline)
@@ -0,0 +1,254 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Background loading of the data shown in the preview panel."""
+
+import io
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import structlog
+from PIL import Image, UnidentifiedImageError
+from PIL.Image import DecompressionBombError
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.alchemy.models import Entry, Tag
+from tagstudio.core.media_types import MediaCategories, MediaType
+from tagstudio.core.utils.lazy_import import lazy_import
+from tagstudio.core.utils.types import unwrap
+from tagstudio.qt.helpers.file_tester import is_readable_video
+from tagstudio.qt.mixed.file_attributes import FileAttributeData
+from tagstudio.qt.utils.custom_runnable import CustomRunnable
+
+if TYPE_CHECKING:
+    import cv2
+    import rawpy
+else:
+    cv2 = lazy_import("cv2")
+    rawpy = lazy_import("rawpy")
+
+logger = structlog.get_logger(__name__)
+Image.MAX_IMAGE_PIXELS = None
+
+# Previews are loaded one or two at a time. Requests that haven't started by the time a newer
+# one arrives are dropped, so a larger pool would only spend time on stale selections.
+PREVIEW_LOADER_THREADS: int = 2
+
+
+@dataclass
+class FilePreviewData:
+    """Everything needed to display a file preview, gathered without touching any widgets.
+
+    Attributes:
+        filepath (Path): The file to preview.
+        media_type (MediaType): How the file should be previewed. One of VIDEO, AUDIO,
+            IMAGE_ANIMATED, or IMAGE, where IMAGE covers every file rendered as a thumbnail.
+        stats (FileAttributeData): The dimensions of the file, if known.
+        animation (Path | bytes | None): The source of an animated image. Formats QMovie can
+            read are streamed from the file itself, others are converted to GIF data up front.
+    """
+
+    filepath: Path
+    media_type: MediaType
+    stats: FileAttributeData = field(default_factory=FileAttributeData)
+    animation: Path | bytes | None = None
+
+
+@dataclass
+class EntryPreviewData:
+    """The data loaded for a single selected entry."""
+
+    request_id: int
+    entry: Entry
+    filepath: Path
+    hierarchy_tags: dict[int, Tag]
+    file: FilePreviewData | None = None
+
+
+def load_file_preview(filepath: Path) -> FilePreviewData:
+    """Probe a file for the information needed to preview it.
+
+    This may be slow for large or remote files and is safe to call from any thread.
+    """
+    ext = filepath.suffix.lower()
+
+    # Video
+    if MediaCategories.VIDEO_TYPES.contains(ext, mime_fallback=True) and is_readable_video(
+        filepath
+    ):
+        stats = FileAttributeData()
+        try:
+            stats.width, stats.height = _get_video_size(filepath) or (None, None)
+        except cv2.error as e:
+            logger.error("[PreviewLoader] Could not play video", filepath=filepath, error=e)
+        return FilePreviewData(filepath, MediaType.VIDEO, stats)
+    # Audio
+    elif MediaCategories.AUDIO_TYPES.contains(ext, mime_fallback=True):
+        return FilePreviewData(filepath, MediaType.AUDIO)
+    # Animated Images
+    elif MediaCategories.IMAGE_ANIMATED_TYPES.contains(ext, mime_fallback=True):
+        return FilePreviewData(
+            filepath,
+            MediaType.IMAGE_ANIMATED,
+            _get_image_stats(filepath),
+            _get_animation(filepath),
+        )
+    # Other Types (Including Images)
+    else:
+        return FilePreviewData(filepath, MediaType.IMAGE, _get_image_stats(filepath))
+
+
+def _get_image_stats(filepath: Path) -> FileAttributeData:
+    """Get the width and height of an image."""
+    stats = FileAttributeData()
+    ext = filepath.suffix.lower()
+
+    if filepath.is_dir():
+        pass
+    elif MediaCategories.IMAGE_RAW_TYPES.contains(ext, mime_fallback=True):
+        try:
+            with rawpy.imread(str(filepath)) as raw:
+                rgb = raw.postprocess()
+                stats.width = rgb.shape[1]
+                stats.height = rgb.shape[0]
+        except (
+            rawpy._rawpy.LibRawIOError,  # pyright: ignore[reportAttributeAccessIssue]
+            rawpy._rawpy.LibRawFileUnsupportedError,  # pyright: ignore[reportAttributeAccessIssue]
+            FileNotFoundError,
+        ):
+            pass
+    elif MediaCategories.IMAGE_RASTER_TYPES.contains(ext, mime_fallback=True):
+        try:
+            with Image.open(str(filepath)) as image:
+                stats.width = image.width
+                stats.height = image.height
+        except (
+            DecompressionBombError,
+            FileNotFoundError,
+            NotImplementedError,
+            UnidentifiedImageError,
+        ) as e:
+            logger.error("[PreviewLoader] Could not get image stats", filepath=filepath, error=e)
+    elif MediaCategories.IMAGE_VECTOR_TYPES.contains(ext, mime_fallback=True):
+        # Dimensions aren't read from vector images.
+        pass
+
+    return stats
+
+
+def _get_animation(filepath: Path) -> Path | bytes | None:
+    """Get the source an animated image should be played from.
+
+    Most animated images are played straight from the file so that frames are only read from
+    disk as they're needed. APNGs aren't supported by QMovie and are converted to GIF data.
+    """
+    if filepath.suffix.lower() != ".apng":
+        return filepath
+
+    try:
+        with Image.open(filepath) as image:
+            image_bytes_io = io.BytesIO()
+            image.save(
+                image_bytes_io,
+                "GIF",
+                lossless=True,
+                save_all=True,
+                loop=0,
+                disposal=2,
+            )
+        return image_bytes_io.getvalue()
+    except (UnidentifiedImageError, FileNotFoundError) as e:
+        logger.error("[PreviewLoader] Could not load animated image", filepath=filepath, error=e)
+        return None
+
+
+def _get_video_size(filepath: Path) -> tuple[int, int] | None:
+    """Get the width and height of the first frame of a video."""
+    video = cv2.VideoCapture(str(filepath), cv2.CAP_FFMPEG)
+    try:
+        success, frame = video.read()
+    finally:
+        video.release()
+    if not success or frame is None:
+        return None
+    return (frame.shape[1], frame.shape[0])
+
+
+class PreviewLoader(QObject):
+    """Load preview panel data for the selected entry on a background thread.
+
+    Only the most recent request is ever delivered. Each new request supersedes any earlier one:
+    requests that haven't started yet are dropped, and requests that are already running stop
+    at the next step and never emit their results.
+    """
+
+    loaded = Signal(EntryPreviewData)
+
+    def __init__(self, library: Library):
+        super().__init__()
+        self.lib = library
+        self.__request_id: int = 0
+        self.__pending: tuple[int, bool] | None = None
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(PREVIEW_LOADER_THREADS)
+        self.loaded.connect(self.__on_loaded)
+
+    def request(self, entry_id: int, load_file: bool = True) -> int:
+        """Start loading the preview data for an entry, superseding any earlier request.
+
+        Args:
+            entry_id (int): The ID of the entry to load.
+            load_file (bool): Whether to load the file preview, or only the entry's tags and
+                fields. An earlier undelivered request for the same entry that loads the file
+                preview keeps doing so.
+
+        Returns:
+            The ID of the new request.
+        """
+        if self.__pending is not None and self.__pending[0] == entry_id:
+            load_file = load_file or self.__pending[1]
+        self.__pending = (entry_id, load_file)
+
+        self.__request_id += 1
+        request_id = self.__request_id
+        self.__pool.clear()
+        self.__pool.start(CustomRunnable(lambda: self.__load(request_id, entry_id, load_file)))
+        return request_id
+
+    def cancel(self) -> None:
+        """Stop any pending request from being delivered."""
+        self.__request_id += 1
+        self.__pending = None
+        self.__pool.clear()
+
+    def is_current(self, request_id: int) -> bool:
+        return request_id == self.__request_id
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Wait for any running requests to finish. Returns False if the wait timed out."""
+        return self.__pool.waitForDone(msecs)
+
+    def __on_loaded(self, data: EntryPreviewData):
+        if self.is_current(data.request_id):
+            self.__pending = None
+
+    def __load(self, request_id: int, entry_id: int, load_file: bool):
+        try:
+            entry = self.lib.get_entry_full(entry_id)
+            if entry is None or not self.is_current(request_id):
+                return
+
+            hierarchy_tags = self.lib.get_tag_hierarchy(t.id for t in entry.tags)
+            filepath = unwrap(self.lib.library_dir) / entry.path
+            if not self.is_current(request_id):
+                return
+
+            file = load_file_preview(filepath) if load_file else None
+            if not self.is_current(request_id):
+                return
+
+            self.loaded.emit(EntryPreviewData(request_id, entry, filepath, hierarchy_tags, file))
+        except Exception as e:
+            logger.error("[PreviewLoader] Could not load preview", entry_id=entry_id, error=e)
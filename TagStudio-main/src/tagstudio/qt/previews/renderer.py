@@ -7,43 +7,28 @@ import contextlib
 import hashlib
 import math
 import os
-import tarfile
-import xml.etree.ElementTree as ET
+import time
 import zipfile
-from copy import deepcopy
 from io import BytesIO
 from pathlib import Path
-from typing import TYPE_CHECKING, Literal, cast
+from typing import TYPE_CHECKING, cast
 from warnings import catch_warnings
-from xml.etree.ElementTree import Element
 
-import cv2
-import numpy as np
 import pillow_avif  # noqa: F401 # pyright: ignore[reportUnusedImport]
-import py7zr
-import py7zr.io
-import rarfile
-import rawpy
-import srctools
 import structlog
-from cv2.typing import MatLike
-from mutagen import flac, id3, mp4
-from mutagen._util import MutagenError
 from PIL import (
+    ExifTags,
     Image,
-    ImageChops,
     ImageDraw,
     ImageEnhance,
     ImageFile,
     ImageFont,
     ImageOps,
-    ImageQt,
     UnidentifiedImageError,
 )
 from PIL.Image import DecompressionBombError
 from pillow_heif import register_heif_opener
 from PySide6.QtCore import (
-    QBuffer,
     QFile,
     QFileDevice,
     QIODeviceBase,
@@ -65,28 +50,60 @@ from tagstudio.core.exceptions import NoRendererError
 from tagstudio.core.library.ignore import Ignore
 from tagstudio.core.media_types import MediaCategories, MediaType
 from tagstudio.core.utils.encoding import detect_char_encoding
+from tagstudio.core.utils.lazy_import import lazy_import
+from tagstudio.core.utils.lru_cache import LruCache
+from tagstudio.core.utils.metrics import metrics
 from tagstudio.core.utils.types import unwrap
 from tagstudio.qt.global_settings import DEFAULT_CACHED_IMAGE_RES
 from tagstudio.qt.helpers.color_overlay import theme_fg_overlay
 from tagstudio.qt.helpers.file_tester import is_readable_video
-from tagstudio.qt.helpers.gradients import four_corner_gradient
 from tagstudio.qt.helpers.image_effects import replace_transparent_pixels
+from tagstudio.qt.helpers.qimage_bridge import pil_to_qpixmap, qimage_to_pil
 from tagstudio.qt.helpers.text_wrapper import wrap_full_text
+from tagstudio.qt.helpers.thumb_finishing import (
+    EdgeOverlay,
+    apply_edge_overlay,
+    finish_thumb,
+    make_edge_overlay,
+)
 from tagstudio.qt.models.palette import UI_COLORS, ColorType, UiColor, get_ui_color
 from tagstudio.qt.previews.vendored.blender_renderer import blend_thumb
-from tagstudio.qt.previews.vendored.pydub.audio_segment import (
-    _AudioSegment as AudioSegment,
-)
 from tagstudio.qt.resource_manager import ResourceManager
 
+# Decoders for specific file types are only imported once a file of that type is rendered.
 if TYPE_CHECKING:
+    import cv2
+    import mutagen
+    import numpy as np
+    import rawpy
+    import srctools
+    from cv2.typing import MatLike
+    from mutagen import flac, id3, mp4
+
+    from tagstudio.qt.previews import archives
+    from tagstudio.qt.previews.vendored.pydub import audio_segment
     from tagstudio.qt.ts_qt import QtDriver
+else:
+    archives = lazy_import("tagstudio.qt.previews.archives")
+    audio_segment = lazy_import("tagstudio.qt.previews.vendored.pydub.audio_segment")
+    cv2 = lazy_import("cv2")
+    flac = lazy_import("mutagen.flac")
+    id3 = lazy_import("mutagen.id3")
+    mp4 = lazy_import("mutagen.mp4")
+    mutagen = lazy_import("mutagen")
+    np = lazy_import("numpy")
+    rawpy = lazy_import("rawpy")
+    srctools = lazy_import("srctools")
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 os.environ["OPENCV_IO_ENABLE_OPENEXR"] = "1"
 
 logger = structlog.get_logger(__name__)
 Image.MAX_IMAGE_PIXELS = None
+
+# The number of masks and edges, and of icons, kept in memory for reuse.
+THUMB_ELEMENT_CACHE_SIZE: int = 32
+ICON_CACHE_SIZE: int = 256
 register_heif_opener()
 
 try:
@@ -95,40 +112,6 @@ except ImportError:
     logger.exception('[ThumbRenderer] Could not import the "pillow_jxl" module')
 
 
-class _SevenZipFile(py7zr.SevenZipFile):
-    """Wrapper around py7zr.SevenZipFile to mimic zipfile.ZipFile's API."""
-
-    def __init__(self, filepath: Path, mode: Literal["r"]) -> None:
-        super().__init__(filepath, mode)
-
-    def read(self, name: str) -> bytes:
-        # SevenZipFile must be reset after every extraction
-        # See https://py7zr.readthedocs.io/en/stable/api.html#py7zr.SevenZipFile.extract
-        self.reset()
-        factory = py7zr.io.BytesIOFactory(limit=10485760)  # 10 MiB
-        self.extract(targets=[name], factory=factory)
-        return factory.get(name).read()
-
-
-class _TarFile(tarfile.TarFile):
-    """Wrapper around tarfile.TarFile to mimic zipfile.ZipFile's API."""
-
-    def __init__(self, filepath: Path, mode: Literal["r"]) -> None:
-        super().__init__(filepath, mode)
-
-    def namelist(self) -> list[str]:
-        return self.getnames()
-
-    def read(self, name: str) -> bytes:
-        return unwrap(self.extractfile(name)).read()
-
-
-type _Archive_T = (
-    type[zipfile.ZipFile] | type[rarfile.RarFile] | type[_SevenZipFile] | type[_TarFile]
-)
-type _Archive = zipfile.ZipFile | rarfile.RarFile | _SevenZipFile | _TarFile
-
-
 class ThumbRenderer(QObject):
     """A class for rendering image and file thumbnails."""
 
@@ -137,6 +120,16 @@ class ThumbRenderer(QObject):
     updated_ratio = Signal(float)
     cached_img_ext: str = ".webp"
 
+    # Images are reduced to no less than this multiple of their thumbnail size before resizing.
+    REDUCING_GAP: int = 2
+    REDUCIBLE_MODES: frozenset[str] = frozenset({"L", "LA", "RGB", "RGBA", "CMYK"})
+    # LibRaw's image orientation flags and the transposition that undoes them.
+    RAW_FLIP_TRANSPOSE: dict[int, Image.Transpose] = {
+        3: Image.Transpose.ROTATE_180,
+        5: Image.Transpose.ROTATE_90,
+        6: Image.Transpose.ROTATE_270,
+    }
+
     def __init__(self, driver: "QtDriver") -> None:
         """Initialize the class."""
         super().__init__()
@@ -152,11 +145,19 @@ class ThumbRenderer(QObject):
         # Cached thumbnail elements.
         # Key: Size + Pixel Ratio Tuple + Radius Scale
         #      (Ex. (512, 512, 1.25, 4))
-        self.thumb_masks: dict[tuple[int, int, float, float], Image.Image] = {}
-        self.raised_edges: dict[tuple[int, int, float], tuple[Image.Image, Image.Image]] = {}
+        self.thumb_masks: LruCache[tuple[int, int, float, float], Image.Image] = LruCache(
+            THUMB_ELEMENT_CACHE_SIZE, "renderer.thumb_masks"
+        )
+        # Key: Size + Pixel Ratio Tuple + Dark Theme + Faded
+        #      (Ex. (512, 512, 1.25, True, False))
+        self.edge_overlays: LruCache[tuple[int, int, float, bool, bool], EdgeOverlay] = LruCache(
+            THUMB_ELEMENT_CACHE_SIZE, "renderer.edge_overlays"
+        )
 
-        # Key: ("name", UiColor, 512, 512, 1.25)
-        self.icons: dict[tuple[str, UiColor, int, int, float], Image.Image] = {}
+        # Key: ("name", UiColor, 512, 512, 1.25, Dark Theme)
+        self.icons: LruCache[tuple[str, UiColor, int, int, float, bool], Image.Image] = LruCache(
+            ICON_CACHE_SIZE, "renderer.icons"
+        )
 
     def _get_resource_id(self, url: Path) -> str:
         """Return the name of the icon resource to use for a file type.
@@ -210,24 +211,32 @@ class ThumbRenderer(QObject):
         item: Image.Image | None = self.thumb_masks.get((*size, pixel_ratio, radius_scale))
         if not item:
             item = self._render_mask(size, pixel_ratio, radius_scale)
-            self.thumb_masks[(*size, pixel_ratio, radius_scale)] = item
+            self.thumb_masks.put((*size, pixel_ratio, radius_scale), item)
         return item
 
-    def _get_edge(
-        self, size: tuple[int, int], pixel_ratio: float
-    ) -> tuple[Image.Image, Image.Image]:
-        """Return a thumbnail edge given a size, pixel ratio, and radius scaling option.
+    def _get_edge_overlay(
+        self, size: tuple[int, int], pixel_ratio: float, faded: bool = False
+    ) -> EdgeOverlay:
+        """Return a thumbnail edge overlay given a size, pixel ratio, and fade option.
 
-        If one is not already cached, a new one will be rendered.
+        If one is not already cached, a new one will be rendered for the current theme.
 
         Args:
             size (tuple[int, int]): The size of the graphic.
             pixel_ratio (float): The screen pixel ratio.
+            faded (bool): Whether or not to return a faded version of the edge.
+                Used for light themes.
         """
-        item: tuple[Image.Image, Image.Image] | None = self.raised_edges.get((*size, pixel_ratio))
+        is_dark: bool = QGuiApplication.styleHints().colorScheme() is Qt.ColorScheme.Dark
+        key = (*size, pixel_ratio, is_dark, faded)
+        item: EdgeOverlay | None = self.edge_overlays.get(key)
         if not item:
-            item = self._render_edge(size, pixel_ratio)
-            self.raised_edges[(*size, pixel_ratio)] = item
+            opacity: float = 1.0 if not faded else 0.8
+            shade_reduction: float = 0 if is_dark else 0.3
+            item = make_edge_overlay(
+                self._render_edge(size, pixel_ratio), opacity, max(0, opacity - shade_reduction)
+            )
+            self.edge_overlays.put(key, item)
         return item
 
     def _get_icon(
@@ -255,7 +264,9 @@ class ThumbRenderer(QObject):
         if name == "thumb_loading":
             draw_border = False
 
-        item: Image.Image | None = self.icons.get((name, color, *size, pixel_ratio))
+        is_dark: bool = QGuiApplication.styleHints().colorScheme() is Qt.ColorScheme.Dark
+        key = (name, color, *size, pixel_ratio, is_dark)
+        item: Image.Image | None = self.icons.get(key)
         if not item:
             item_flat: Image.Image = (
                 self._render_corner_icon(name, color, size, pixel_ratio, bg_image)
@@ -263,9 +274,8 @@ class ThumbRenderer(QObject):
                 else self._render_center_icon(name, color, size, pixel_ratio, draw_border, bg_image)
             )
             if draw_edge:
-                edge: tuple[Image.Image, Image.Image] = self._get_edge(size, pixel_ratio)
-                item = self._apply_edge(item_flat, edge, faded=True)
-                self.icons[(name, color, *size, pixel_ratio)] = item
+                item = self._apply_edge(item_flat, pixel_ratio, faded=True)
+                self.icons.put(key, item)
             else:
                 item = item_flat
         return item
@@ -605,38 +615,21 @@ class ThumbRenderer(QObject):
     def _apply_edge(
         self,
         image: Image.Image,
-        edge: tuple[Image.Image, Image.Image],
+        pixel_ratio: float,
         faded: bool = False,
     ) -> Image.Image:
-        """Apply a given edge effect to an image.
+        """Apply the raised edge effect to an image.
 
         Args:
             image (Image.Image): The image to apply the edge to.
-            edge (tuple[Image.Image, Image.Image]): The edge images to apply.
-                Item 0 is the inner highlight, and item 1 is the outer shadow.
+            pixel_ratio (float): The screen pixel ratio.
             faded (bool): Whether or not to apply a faded version of the edge.
                 Used for light themes.
         """
-        opacity: float = 1.0 if not faded else 0.8
-        shade_reduction: float = (
-            0 if QGuiApplication.styleHints().colorScheme() is Qt.ColorScheme.Dark else 0.3
-        )
-        im: Image.Image = image
-        im_hl, im_sh = deepcopy(edge)
-
-        # Configure and apply a soft light overlay.
-        # This makes up the bulk of the effect.
-        im_hl.putalpha(ImageEnhance.Brightness(im_hl.getchannel(3)).enhance(opacity))
-        im.paste(ImageChops.soft_light(im, im_hl), mask=im_hl.getchannel(3))
-
-        # Configure and apply a normal shading overlay.
-        # This helps with contrast.
-        im_sh.putalpha(
-            ImageEnhance.Brightness(im_sh.getchannel(3)).enhance(max(0, opacity - shade_reduction))
-        )
-        im.paste(im_sh, mask=im_sh.getchannel(3))
-
-        return im
+        overlay = self._get_edge_overlay(image.size, pixel_ratio, faded)
+        pixels = np.array(image.convert("RGBA"))
+        apply_edge_overlay(pixels, overlay)
+        return Image.fromarray(pixels, "RGBA")
 
     @staticmethod
     def _audio_album_thumb(filepath: Path, ext: str) -> Image.Image | None:
@@ -674,7 +667,7 @@ class ThumbRenderer(QObject):
             id3.ID3NoHeaderError,  # pyright: ignore[reportPrivateImportUsage]
             mp4.MP4MetadataError,
             mp4.MP4StreamInfoError,
-            MutagenError,
+            mutagen.MutagenError,
         ) as e:
             logger.error("Couldn't read album artwork", path=filepath, error=type(e).__name__)
         return image
@@ -701,7 +694,7 @@ class ThumbRenderer(QObject):
 
         try:
             bar_count: int = min(math.floor((size // pixel_ratio) / 5), 64)
-            audio = AudioSegment.from_file(filepath, ext[1:])
+            audio = audio_segment._AudioSegment.from_file(filepath, ext[1:])
             data = np.frombuffer(buffer=audio._data, dtype=np.int16)
             data_indices = np.linspace(1, len(data), num=bar_count * samples_per_bar)
             bar_margin: float = ((size_scaled / (bar_count * 3)) * base_scale) / 2
@@ -907,62 +900,14 @@ class ThumbRenderer(QObject):
         """
         im: Image.Image | None = None
         try:
-            archiver: _Archive_T = zipfile.ZipFile
-            if ext == ".cb7":
-                archiver = _SevenZipFile
-            elif ext == ".cbr":
-                archiver = rarfile.RarFile
-            elif ext == ".cbt":
-                archiver = _TarFile
-
-            with archiver(filepath, "r") as archive:
-                if "ComicInfo.xml" in archive.namelist():
-                    comic_info = ET.fromstring(archive.read("ComicInfo.xml"))
-                    im = ThumbRenderer.__cover_from_comic_info(archive, comic_info, "FrontCover")
-                    if not im:
-                        im = ThumbRenderer.__cover_from_comic_info(
-                            archive, comic_info, "InnerCover"
-                        )
-
-                if not im:
-                    for file_name in archive.namelist():
-                        if file_name.lower().endswith(
-                            (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".svg")
-                        ):
-                            image_data = archive.read(file_name)
-                            im = Image.open(BytesIO(image_data))
-                            break
+            cover_data = archives.read_cover(filepath, ext)
+            if cover_data:
+                im = Image.open(BytesIO(cover_data))
         except Exception as e:
             logger.error("Couldn't render thumbnail", filepath=filepath, error=type(e).__name__)
 
         return im
 
-    @staticmethod
-    def __cover_from_comic_info(
-        archive: _Archive, comic_info: Element, cover_type: str
-    ) -> Image.Image | None:
-        """Extract the cover specified in ComicInfo.xml.
-
-        Args:
-            archive (_Archive): The current ePub file.
-            comic_info (Element): The parsed ComicInfo.xml.
-            cover_type (str): The type of cover to load.
-
-        Returns:
-            Image: The cover specified in ComicInfo.xml.
-        """
-        im: Image.Image | None = None
-
-        cover = comic_info.find(f"./*Page[@Type='{cover_type}']")
-        if cover is not None:
-            pages = [f for f in archive.namelist() if f != "ComicInfo.xml"]
-            page_name = pages[int(unwrap(cover.get("Image")))]
-            if page_name.endswith((".png", ".jpg", ".jpeg", ".gif", ".bmp", ".svg")):
-                image_data = archive.read(page_name)
-                im = Image.open(BytesIO(image_data))
-
-        return im
-
     def _font_short_thumb(self, filepath: Path, size: int) -> Image.Image | None:
         """Render a small font preview ("Aa") thumbnail from a font file.
 
@@ -1059,22 +1004,31 @@ class ThumbRenderer(QObject):
         return im
 
     @staticmethod
-    def _image_raw_thumb(filepath: Path) -> Image.Image | None:
+    def _image_raw_thumb(filepath: Path, size: int | None = None) -> Image.Image | None:
         """Render a thumbnail for a RAW image type.
 
         Args:
             filepath (Path): The path of the file.
+            size (int | None): The size the thumbnail will be shown at. If given, the preview
+                image embedded in the file is used when it's large enough, and otherwise the
+                image is decoded at half resolution when that's still large enough.
         """
         im: Image.Image | None = None
         try:
             with rawpy.imread(str(filepath)) as raw:
-                rgb = raw.postprocess(use_camera_wb=True)
-                im = Image.frombytes(
-                    "RGB",
-                    (rgb.shape[1], rgb.shape[0]),
-                    rgb,
-                    decoder_name="raw",
-                )
+                if size:
+                    im = ThumbRenderer.__raw_embedded_thumb(raw, size)
+                if im is None:
+                    half_size = size is not None and max(raw.sizes.width, raw.sizes.height) >= (
+                        size * 2
+                    )
+                    rgb = raw.postprocess(use_camera_wb=True, half_size=half_size)
+                    im = Image.frombytes(
+                        "RGB",
+                        (rgb.shape[1], rgb.shape[0]),
+                        rgb,
+                        decoder_name="raw",
+                    )
         except (
             DecompressionBombError,
             rawpy._rawpy.LibRawIOError,  # pyright: ignore[reportAttributeAccessIssue]
@@ -1083,6 +1037,34 @@ class ThumbRenderer(QObject):
             logger.error("Couldn't render thumbnail", filepath=filepath, error=type(e).__name__)
         return im
 
+    @staticmethod
+    def __raw_embedded_thumb(raw: "rawpy.RawPy", size: int) -> Image.Image | None:
+        """Return the preview image embedded in a RAW file, if it's at least a given size."""
+        try:
+            thumb = raw.extract_thumb()
+        except (
+            rawpy._rawpy.LibRawNoThumbnailError,  # pyright: ignore[reportAttributeAccessIssue]
+            rawpy._rawpy.LibRawUnsupportedThumbnailError,  # pyright: ignore[reportAttributeAccessIssue]
+        ):
+            return None
+
+        im: Image.Image
+        if thumb.format == rawpy.ThumbFormat.JPEG:
+            im = ThumbRenderer._open_reduced(Image.open(BytesIO(thumb.data)), size)
+        elif isinstance(thumb.data, np.ndarray):
+            im = Image.fromarray(thumb.data)
+        else:
+            return None
+        if max(im.size) < size:
+            return None
+
+        # Embedded previews aren't rotated, so apply the orientation of the RAW image itself
+        # unless the preview has its own.
+        if im.getexif().get(ExifTags.Base.Orientation, 1) != 1:
+            return unwrap(ImageOps.exif_transpose(im))
+        transpose = ThumbRenderer.RAW_FLIP_TRANSPOSE.get(raw.sizes.flip)
+        return im.transpose(transpose) if transpose is not None else im
+
     @staticmethod
     def _image_exr_thumb(filepath: Path) -> Image.Image | None:
         """Render a thumbnail for a EXR image type.
@@ -1114,22 +1096,26 @@ class ThumbRenderer(QObject):
         return im
 
     @staticmethod
-    def _image_thumb(filepath: Path) -> Image.Image | None:
+    def _image_thumb(filepath: Path, size: int | None = None) -> Image.Image | None:
         """Render a thumbnail for a standard image type.
 
         Args:
             filepath (Path): The path of the file.
+            size (int | None): The size the thumbnail will be shown at. If given, the image is
+                decoded at a reduced resolution where possible, before any conversion is done.
         """
         im: Image.Image | None = None
         try:
             im = Image.open(filepath)
+            if size:
+                im = ThumbRenderer._open_reduced(im, size)
+            im = unwrap(ImageOps.exif_transpose(im))
             if im.mode != "RGB" and im.mode != "RGBA":
                 im = im.convert(mode="RGBA")
             if im.mode == "RGBA":
                 new_bg = Image.new("RGB", im.size, color="#1e1e1e")
                 new_bg.paste(im, mask=im.getchannel(3))
                 im = new_bg
-            im = unwrap(ImageOps.exif_transpose(im))
         except (
             FileNotFoundError,
             UnidentifiedImageError,
@@ -1139,6 +1125,32 @@ class ThumbRenderer(QObject):
             logger.error("Couldn't render thumbnail", filepath=filepath, error=type(e).__name__)
         return im
 
+    @staticmethod
+    def _open_reduced(im: Image.Image, size: int) -> Image.Image:
+        """Load an opened image at the smallest resolution that can still be resized to a size.
+
+        JPEGs are decoded at 1/2, 1/4, or 1/8 scale directly by the decoder. Other images are
+        decoded in full and then shrunk by an integer factor, keeping them at least twice the
+        requested size so that the final resize stays smooth.
+
+        Args:
+            im (Image.Image): An opened image that hasn't been loaded yet.
+            size (int): The size the longest side of the image will be resized to.
+        """
+        width, height = im.size
+        if max(width, height) <= size:
+            return im
+
+        # The longest side has to be at least the requested size, in either orientation.
+        scale = size / max(width, height)
+        im.draft(None, (math.ceil(width * scale), math.ceil(height * scale)))
+        im.load()
+
+        factor = max(im.size) // (size * ThumbRenderer.REDUCING_GAP)
+        if factor > 1 and im.mode in ThumbRenderer.REDUCIBLE_MODES:
+            im = im.reduce(factor)
+        return im
+
     @staticmethod
     def _image_vector_thumb(filepath: Path, size: int) -> Image.Image:
         """Render a thumbnail for a vector image, such as SVG.
@@ -1147,9 +1159,8 @@ class ThumbRenderer(QObject):
             filepath (Path): The path of the file.
             size (tuple[int,int]): The size of the thumbnail.
         """
-        im: Image.Image | None = None
         # Create an image to draw the svg to and a painter to do the drawing
-        q_image: QImage = QImage(size, size, QImage.Format.Format_ARGB32)
+        q_image: QImage = QImage(size, size, QImage.Format.Format_RGBA8888)
         q_image.fill("#1e1e1e")
 
         # Create an svg renderer, then render to the painter
@@ -1163,18 +1174,8 @@ class ThumbRenderer(QObject):
         svg.render(painter)
         painter.end()
 
-        # Write the image to a buffer as png
-        buffer: QBuffer = QBuffer()
-        buffer.open(QBuffer.OpenModeFlag.ReadWrite)
-        q_image.save(buffer, "PNG")  # type: ignore[call-overload]
-
-        # Load the image from the buffer
-        im = Image.new("RGB", (size, size), color="#1e1e1e")
-        im.paste(Image.open(BytesIO(buffer.data().data())))
-        im = im.convert(mode="RGB")
-
-        buffer.close()
-        return im
+        # The background is opaque, so the alpha channel can be dropped
+        return qimage_to_pil(q_image).convert(mode="RGB")
 
     @staticmethod
     def _iwork_thumb(filepath: Path) -> Image.Image | None:
@@ -1285,13 +1286,7 @@ class ThumbRenderer(QObject):
         )
         # Convert QImage to PIL Image
         q_image: QImage = document.render(0, page_size.toSize(), render_options)
-        buffer: QBuffer = QBuffer()
-        buffer.open(QBuffer.OpenModeFlag.ReadWrite)
-        try:
-            q_image.save(buffer, "PNG")  # type: ignore # pyright: ignore
-            im = Image.open(BytesIO(buffer.buffer().data()))
-        finally:
-            buffer.close()
+        im = qimage_to_pil(q_image)
         # Replace transparent pixels with white (otherwise Background defaults to transparent)
         return replace_transparent_pixels(im)
 
@@ -1518,12 +1513,11 @@ class ThumbRenderer(QObject):
             if image:
                 image = self._resize_image(image, (adj_size, adj_size))
                 if render_mask_and_edge:
-                    mask = self._get_mask((adj_size, adj_size), pixel_ratio)
-                    edge: tuple[Image.Image, Image.Image] = self._get_edge(
-                        (adj_size, adj_size), pixel_ratio
-                    )
-                    image = self._apply_edge(
-                        four_corner_gradient(image, (adj_size, adj_size), mask), edge
+                    image = finish_thumb(
+                        image,
+                        (adj_size, adj_size),
+                        self._get_mask((adj_size, adj_size), pixel_ratio),
+                        self._get_edge_overlay((adj_size, adj_size), pixel_ratio),
                     )
 
             # Check if the file is supposed to be ignored and render an overlay if needed
@@ -1531,12 +1525,11 @@ class ThumbRenderer(QObject):
                 if (
                     image
                     and Ignore.compiled_patterns
-                    and Ignore.compiled_patterns.match(
-                        filepath.relative_to(unwrap(self.driver.lib.library_dir))
-                    )
+                    and (relative_path := self.driver.lib.relative_to_root(filepath)) is not None
+                    and Ignore.compiled_patterns.match(relative_path)
                 ):
                     image = render_ignored((adj_size, adj_size), pixel_ratio, image)
-            except TypeError:
+            except (TypeError, ValueError):
                 pass
 
         # A loading thumbnail (cached in memory)
@@ -1567,8 +1560,7 @@ class ThumbRenderer(QObject):
             image = Image.new("RGBA", (128, 128), color="#FF00FF")
 
         # Convert the final image to a pixmap to emit.
-        qim = ImageQt.ImageQt(image)
-        pixmap = QPixmap.fromImage(qim)
+        pixmap = pil_to_qpixmap(image)
         pixmap.setDevicePixelRatio(pixel_ratio)
         self.updated_ratio.emit(image.size[0] / image.size[1])
         if pixmap:
@@ -1616,8 +1608,9 @@ class ThumbRenderer(QObject):
         savable_media_type: bool = True
 
         if _filepath and _filepath.is_file():
+            ext: str = _filepath.suffix.lower() if _filepath.suffix else _filepath.stem.lower()
+            start_time = time.perf_counter()
             try:
-                ext: str = _filepath.suffix.lower() if _filepath.suffix else _filepath.stem.lower()
                 # Ebooks =======================================================
                 if MediaCategories.is_ext_in_category(
                     ext, MediaCategories.EBOOK_TYPES, mime_fallback=True
@@ -1641,7 +1634,7 @@ class ThumbRenderer(QObject):
                     if MediaCategories.is_ext_in_category(
                         ext, MediaCategories.IMAGE_RAW_TYPES, mime_fallback=True
                     ):
-                        image = self._image_raw_thumb(_filepath)
+                        image = self._image_raw_thumb(_filepath, adj_size)
                     # Vector Images --------------------------------------------
                     elif MediaCategories.is_ext_in_category(
                         ext, MediaCategories.IMAGE_VECTOR_TYPES, mime_fallback=True
@@ -1652,7 +1645,7 @@ class ThumbRenderer(QObject):
                         image = self._image_exr_thumb(_filepath)
                     # Normal Images --------------------------------------------
                     else:
-                        image = self._image_thumb(_filepath)
+                        image = self._image_thumb(_filepath, adj_size)
                 # Videos =======================================================
                 elif MediaCategories.is_ext_in_category(
                     ext, MediaCategories.VIDEO_TYPES, mime_fallback=True
@@ -1724,6 +1717,7 @@ class ThumbRenderer(QObject):
                 image = None
             except NoRendererError:
                 image = None
+            metrics.observe(f"renderer.{ext.lstrip('.')}", time.perf_counter() - start_time)
 
         return image
 
@@ -0,0 +1,110 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Background streaming of library search results."""
+
+from threading import Lock
+
+import structlog
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+from tagstudio.core.library.alchemy.enums import BrowsingState
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.qt.utils.custom_runnable import CustomRunnable
+
+logger = structlog.get_logger(__name__)
+
+# One thread streams the results while the other counts them.
+SEARCH_LOADER_THREADS: int = 2
+# The first chunk is delivered as soon as it's read so the first screen can be shown. Later
+# chunks are grouped into ever larger batches, up to this many IDs, so that very large results
+# don't lay out the grid thousands of times.
+MAX_SEARCH_BATCH_SIZE: int = 64_000
+
+
+class SearchLoader(QObject):
+    """Stream the IDs of entries matching a search from a background thread.
+
+    The IDs are delivered in order through chunk_loaded, while the total number of results is
+    counted on a second thread and delivered once through counted, whichever of the count or
+    the stream finishes first. Each new request supersedes any earlier one: results of earlier
+    requests are never emitted after a new request is made.
+    """
+
+    chunk_loaded = Signal(int, list)
+    counted = Signal(int, int)
+    finished = Signal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.__request_id: int = 0
+        self.__counted_id: int = 0
+        self.__count_lock = Lock()
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(SEARCH_LOADER_THREADS)
+
+    def request(self, library: Library, state: BrowsingState) -> int:
+        """Start streaming the results of a search, superseding any earlier request.
+
+        Returns:
+            The ID of the new request, which is passed along with every signal it emits.
+        """
+        self.__request_id += 1
+        request_id = self.__request_id
+        self.__pool.clear()
+        self.__pool.start(CustomRunnable(lambda: self.__stream(library, state, request_id)))
+        self.__pool.start(CustomRunnable(lambda: self.__count(library, state, request_id)))
+        return request_id
+
+    def cancel(self) -> None:
+        """Stop any pending request from being delivered."""
+        self.__request_id += 1
+        self.__pool.clear()
+
+    def is_current(self, request_id: int) -> bool:
+        return request_id == self.__request_id
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Wait for any running requests to finish. Returns False if the wait timed out."""
+        return self.__pool.waitForDone(msecs)
+
+    def __emit_count(self, request_id: int, total: int):
+        with self.__count_lock:
+            if self.__counted_id >= request_id or not self.is_current(request_id):
+                return
+            self.__counted_id = request_id
+        self.counted.emit(request_id, total)
+
+    def __stream(self, library: Library, state: BrowsingState, request_id: int):
+        try:
+            total = 0
+            batch: list[int] = []
+            batch_size = 0
+            chunks = library.search_library_chunks(state)
+            for chunk in chunks:
+                if not self.is_current(request_id):
+                    chunks.close()
+                    return
+                batch.extend(chunk)
+                total += len(chunk)
+                if len(batch) >= batch_size:
+                    self.chunk_loaded.emit(request_id, batch)
+                    batch_size = min(max(batch_size, len(batch)) * 2, MAX_SEARCH_BATCH_SIZE)
+                    batch = []
+
+            if not self.is_current(request_id):
+                return
+            if batch:
+                self.chunk_loaded.emit(request_id, batch)
+            self.__emit_count(request_id, total)
+            self.finished.emit(request_id)
+        except Exception as e:
+            logger.error("[SearchLoader] Could not stream search results", state=state, error=e)
+
+    def __count(self, library: Library, state: BrowsingState, request_id: int):
+        try:
+            if not self.is_current(request_id):
+                return
+            self.__emit_count(request_id, library.count_search(state))
+        except Exception as e:
+            logger.error("[SearchLoader] Could not count search results", state=state, error=e)
@@ -1,15 +1,16 @@
 import math
 import time
+from collections.abc import Iterable, Sequence
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, override
 
+import numpy as np
 from PySide6.QtCore import QPoint, QRect, QSize
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import QLayout, QLayoutItem, QScrollArea
 
 from tagstudio.core.constants import TAG_ARCHIVED, TAG_FAVORITE
 from tagstudio.core.library.alchemy.enums import ItemType
-from tagstudio.core.library.alchemy.models import Entry
 from tagstudio.core.utils.types import unwrap
 from tagstudio.qt.mixed.item_thumb import BadgeType, ItemThumb
 from tagstudio.qt.previews.renderer import ThumbRenderer
@@ -17,6 +18,14 @@ from tagstudio.qt.previews.renderer import ThumbRenderer
 if TYPE_CHECKING:
     from tagstudio.qt.ts_qt import QtDriver
 
+# Flags kept for every result, in grid order.
+_FETCHED: int = 1
+_SELECTED: int = 2
+_ARCHIVED: int = 4
+_FAVORITE: int = 8
+_TAG_FLAGS: dict[int, int] = {TAG_ARCHIVED: _ARCHIVED, TAG_FAVORITE: _FAVORITE}
+_BADGE_FLAGS: dict[BadgeType, int] = {BadgeType.ARCHIVED: _ARCHIVED, BadgeType.FAVORITE: _FAVORITE}
+
 
 class ThumbGridLayout(QLayout):
     def __init__(self, driver: "QtDriver", scroll_area: QScrollArea) -> None:
@@ -26,15 +35,20 @@ class ThumbGridLayout(QLayout):
 
         self._item_thumbs: list[ItemThumb] = []
         self._items: list[QLayoutItem] = []
-        # Entry.id -> _entry_ids[index]
-        self._selected: dict[int, int] = {}
-        # _entry_ids[index]
+        # _ids[index]
         self._last_selected: int | None = None
 
-        self._entry_ids: list[int] = []
-        self._entries: dict[int, Entry] = {}
-        # Tag.id -> {Entry.id}
-        self._tag_entries: dict[int, set[int]] = {}
+        # Result IDs in grid order, followed by spare room for appended results.
+        self._ids: np.ndarray = np.empty(0, dtype=np.int64)
+        # _FETCHED, _SELECTED, and tag flags of each result, in grid order.
+        self._flags: np.ndarray = np.empty(0, dtype=np.uint8)
+        self._count: int = 0
+        # Entry.id -> _ids[index], or -1 for entries that aren't in the results.
+        self._positions: np.ndarray = np.empty(0, dtype=np.int32)
+        # Selected entries that aren't in the results (yet), in the order they were selected.
+        self._selected_outside: dict[int, None] = {}
+        # Entry.id -> absolute path, for the results that have been laid out.
+        self._paths: dict[int, Path] = {}
         self._entry_paths: dict[Path, int] = {}
         # Entry.id -> _items[index]
         self._entry_items: dict[int, int] = {}
@@ -44,18 +58,26 @@ class ThumbGridLayout(QLayout):
         self._renderer.updated.connect(self._on_rendered)
         self._render_cutoff: float = 0.0
 
-        # _entry_ids[StartIndex:EndIndex]
+        # _ids[StartIndex:EndIndex]
         self._last_page_update: tuple[int, int] | None = None
 
-    def set_entries(self, entry_ids: list[int]):
+    @property
+    def entry_ids(self) -> np.ndarray:
+        """The IDs of all results in grid order. Only valid until the results change."""
+        return self._ids[: self._count]
+
+    def set_entries(self, entry_ids: Sequence[int]):
         self.scroll_area.verticalScrollBar().setValue(0)
 
-        self._selected.clear()
         self._last_selected = None
-
-        self._entry_ids = entry_ids
-        self._entries.clear()
-        self._tag_entries.clear()
+        self._selected_outside.clear()
+
+        self._positions[self.entry_ids] = -1
+        self._ids = np.empty(0, dtype=np.int64)
+        self._flags = np.empty(0, dtype=np.uint8)
+        self._count = 0
+        self._append(entry_ids)
+        self._paths.clear()
         self._entry_paths.clear()
 
         self._entry_items.clear()
@@ -83,53 +105,120 @@ class ThumbGridLayout(QLayout):
 
         self._last_page_update = None
 
-    def select_all(self):
-        self._selected.clear()
-        for index, id in enumerate(self._entry_ids):
-            self._selected[id] = index
-            self._last_selected = index
+    def append_entries(self, entry_ids: Sequence[int]):
+        """Add entries to the end of the grid, keeping the scroll position and selection."""
+        if not len(entry_ids):
+            return
+        count = self._count
+        self._append(entry_ids)
 
-        for entry_id in self._entry_items:
-            self._set_selected(entry_id)
+        # Only lay out the visible thumbnails again if the new entries could be among them.
+        if self._last_page_update is None or self._last_page_update[1] >= count:
+            self._last_page_update = None
+        self.invalidate()
 
-    def select_inverse(self):
-        selected = {}
-        for index, id in enumerate(self._entry_ids):
-            if id not in self._selected:
-                selected[id] = index
-                self._last_selected = index
+    def _append(self, entry_ids: Sequence[int]):
+        ids = np.asarray(entry_ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        start = self._count
+        end = start + len(ids)
+
+        # Grow the arrays geometrically, so streaming results in chunks stays linear.
+        if end > len(self._ids):
+            capacity = max(end, 2 * len(self._ids)) if start else end
+            self._ids = np.concatenate((self._ids[:start], np.empty(capacity - start, np.int64)))
+            self._flags = np.concatenate(
+                (self._flags[:start], np.empty(capacity - start, np.uint8))
+            )
+        self._ids[start:end] = ids
+        self._flags[start:end] = 0
+
+        max_id = int(ids.max())
+        if max_id >= len(self._positions):
+            positions = np.full(max(max_id + 1, 2 * len(self._positions)), -1, dtype=np.int32)
+            positions[: len(self._positions)] = self._positions
+            self._positions = positions
+        self._positions[ids] = np.arange(start, end, dtype=np.int32)
+        self._count = end
+
+        if self._selected_outside:
+            for index in self._indices(self._selected_outside):
+                self._flags[index] |= _SELECTED
+                self._selected_outside.pop(int(self._ids[index]))
+
+    def _position(self, entry_id: int) -> int | None:
+        """Return the index of an entry in the results, if it's among them."""
+        if 0 <= entry_id < len(self._positions) and (index := int(self._positions[entry_id])) >= 0:
+            return index
+        return None
+
+    def _indices(self, entry_ids: Iterable[int]) -> np.ndarray:
+        """Return the indices of the given entries that are among the results."""
+        ids = np.fromiter(entry_ids, dtype=np.int64)
+        ids = ids[(ids >= 0) & (ids < len(self._positions))]
+        indices = self._positions[ids]
+        return indices[indices >= 0]
+
+    def _selection(self) -> np.ndarray:
+        return (self._flags[: self._count] & _SELECTED) != 0
+
+    def selected_ids(self) -> list[int]:
+        """Return the IDs of the selected entries in grid order.
+
+        Selected entries that aren't in the results come last, in the order they were selected.
+        """
+        return [*self.entry_ids[self._selection()].tolist(), *self._selected_outside]
+
+    def is_selected(self, entry_id: int) -> bool:
+        index = self._position(entry_id)
+        if index is None:
+            return entry_id in self._selected_outside
+        return bool(self._flags[index] & _SELECTED)
 
-        for id in self._selected:
-            if id not in selected:
-                self._set_selected(id, value=False)
-        for id in selected:
-            self._set_selected(id)
+    def select_all(self):
+        self._selected_outside.clear()
+        self._flags[: self._count] |= _SELECTED
+        self._last_selected = self._count - 1 if self._count else None
+        self._update_selected()
 
-        self._selected = selected
+    def select_inverse(self):
+        self._selected_outside.clear()
+        self._flags[: self._count] ^= _SELECTED
+        selected = np.flatnonzero(self._selection())
+        self._last_selected = int(selected[-1]) if len(selected) else None
+        self._update_selected()
 
     def select_entry(self, entry_id: int):
-        if entry_id in self._selected:
-            index = self._selected.pop(entry_id)
+        index = self._position(entry_id)
+        if index is None:
+            # Entries can be selected before they're among the results, such as while results
+            # are still being streamed in.
+            if entry_id in self._selected_outside:
+                del self._selected_outside[entry_id]
+            else:
+                self._selected_outside[entry_id] = None
+            return
+        if self._flags[index] & _SELECTED:
+            self._flags[index] &= ~np.uint8(_SELECTED)
             if index == self._last_selected:
                 self._last_selected = None
             self._set_selected(entry_id, value=False)
         else:
-            try:
-                index = self._entry_ids.index(entry_id)
-            except ValueError:
-                index = -1
-
-            self._selected[entry_id] = index
+            self._flags[index] |= _SELECTED
             self._last_selected = index
             self._set_selected(entry_id)
 
     def select_to_entry(self, entry_id: int):
-        index = self._entry_ids.index(entry_id)
-        if len(self._selected) == 0:
+        index = self._position(entry_id)
+        if index is None:
+            return
+        selected = np.flatnonzero(self._selection())
+        if len(selected) == 0:
             self.select_entry(entry_id)
             return
         if self._last_selected is None:
-            self._last_selected = min(self._selected.values(), key=lambda i: abs(index - i))
+            self._last_selected = int(selected[np.abs(selected - index).argmin()])
 
         start = self._last_selected
         self._last_selected = index
@@ -139,17 +228,19 @@ class ThumbGridLayout(QLayout):
         else:
             index += 1
 
-        for i in range(start, index):
-            entry_id = self._entry_ids[i]
-            self._selected[entry_id] = i
-            self._set_selected(entry_id)
+        self._flags[start:index] |= _SELECTED
+        self._update_selected()
 
     def clear_selected(self):
-        for entry_id in self._entry_items:
-            self._set_selected(entry_id, value=False)
-
-        self._selected.clear()
+        self._selected_outside.clear()
+        self._flags[: self._count] &= ~np.uint8(_SELECTED)
         self._last_selected = None
+        self._update_selected()
+
+    def _update_selected(self):
+        """Show the selection state of every laid out thumbnail."""
+        for entry_id in self._entry_items:
+            self._set_selected(entry_id, self.is_selected(entry_id))
 
     def _set_selected(self, entry_id: int, value: bool = True):
         if entry_id not in self._entry_items:
@@ -159,24 +250,52 @@ class ThumbGridLayout(QLayout):
             self._item_thumbs[index].thumb_button.set_selected(value)
 
     def add_tags(self, entry_ids: list[int], tag_ids: list[int]):
-        for tag_id in tag_ids:
-            self._tag_entries.setdefault(tag_id, set()).update(entry_ids)
+        if flags := self._tag_flags(tag_ids):
+            self._flags[self._indices(entry_ids)] |= flags
 
     def remove_tags(self, entry_ids: list[int], tag_ids: list[int]):
+        if flags := self._tag_flags(tag_ids):
+            self._flags[self._indices(entry_ids)] &= ~np.uint8(flags)
+
+    def update_badges(self):
+        """Show the badges of every laid out thumbnail, repainting the grid once."""
+        self.scroll_area.setUpdatesEnabled(False)
+        try:
+            for entry_id, item_index in self._entry_items.items():
+                index = self._position(entry_id)
+                if index is None or item_index >= len(self._item_thumbs):
+                    continue
+                flags = int(self._flags[index])
+                for badge_type, flag in _BADGE_FLAGS.items():
+                    self._item_thumbs[item_index].assign_badge(badge_type, bool(flags & flag))
+        finally:
+            self.scroll_area.setUpdatesEnabled(True)
+
+    def _tag_flags(self, tag_ids: Iterable[int]) -> int:
+        """Return the flags for the tags shown as badges among the given tags."""
+        flags = 0
         for tag_id in tag_ids:
-            self._tag_entries.setdefault(tag_id, set()).difference_update(entry_ids)
+            flags |= _TAG_FLAGS.get(tag_id, 0)
+        return flags
+
+    def _fetch_entries(self, start: int, end: int):
+        """Load the paths and badges of the results in a range that haven't been loaded yet."""
+        is_fetched = (self._flags[start:end] & _FETCHED) != 0
+        ids: list[int] = self._ids[start:end][~is_fetched].tolist()
+        if not ids:
+            return
 
-    def _fetch_entries(self, ids: list[int]):
-        ids = [id for id in ids if id not in self._entries]
-        entries = self.driver.lib.get_entries(ids)
-        for entry in entries:
-            self._entry_paths[unwrap(self.driver.lib.library_dir) / entry.path] = entry.id
-            self._entries[entry.id] = entry
+        library_dir = unwrap(self.driver.lib.library_dir)
+        for entry_id, path in self.driver.lib.get_entry_paths(ids).items():
+            path = library_dir / path
+            self._paths[entry_id] = path
+            self._entry_paths[path] = entry_id
 
-        tag_ids = [TAG_ARCHIVED, TAG_FAVORITE]
-        tag_entries = self.driver.lib.get_tag_entries(tag_ids, ids)
+        indices = self._indices(ids)
+        self._flags[indices] = (self._flags[indices] & _SELECTED) | _FETCHED
+        tag_entries = self.driver.lib.get_tag_entries(list(_TAG_FLAGS), ids)
         for tag_id, entries in tag_entries.items():
-            self._tag_entries.setdefault(tag_id, set()).update(entries)
+            self._flags[self._indices(entries)] |= _TAG_FLAGS[tag_id]
 
     def _on_rendered(self, timestamp: float, image: QPixmap, size: QSize, file_path: Path):
         if timestamp < self._render_cutoff:
@@ -224,7 +343,7 @@ class ThumbGridLayout(QLayout):
         return self._item_thumbs[index]
 
     def _size(self, width: int) -> tuple[int, int, int]:
-        if len(self._entry_ids) == 0:
+        if self._count == 0:
             return 0, 0, 0
         spacing = self.spacing()
 
@@ -249,13 +368,13 @@ class ThumbGridLayout(QLayout):
         per_row, _, height_offset = self._size(width)
         if per_row == 0:
             return height_offset
-        return math.ceil(len(self._entry_ids) / per_row) * height_offset
+        return math.ceil(self._count / per_row) * height_offset
 
     @override
     def setGeometry(self, arg__1: QRect) -> None:
         super().setGeometry(arg__1)
         rect = arg__1
-        if len(self._entry_ids) == 0:
+        if self._count == 0:
             for item in self._item_thumbs:
                 item.setGeometry(32_000, 32_000, 0, 0)
             return
@@ -274,10 +393,11 @@ class ThumbGridLayout(QLayout):
         end += per_row * 3
 
         start = max(0, start)
-        end = min(len(self._entry_ids), end)
+        end = min(self._count, end)
         if (start, end) == self._last_page_update:
             return
         self._last_page_update = (start, end)
+        ids: list[int] = self._ids[start:end].tolist()
 
         # Clear render queue if len > 2 pages
         if len(self.driver.thumb_job_queue.queue) > (per_row * visible_rows * 2):
@@ -292,10 +412,7 @@ class ThumbGridLayout(QLayout):
         # Reorder items so previously rendered rows will reuse same item_thumbs
         # When scrolling down top row gets moved to end of list
         _ = self._item_thumb(end - start - 1)
-        for item_index, i in enumerate(range(start, end)):
-            if i >= len(self._entry_ids):
-                continue
-            entry_id = self._entry_ids[i]
+        for item_index, entry_id in enumerate(ids):
             if entry_id not in self._entry_items:
                 continue
             prev_item_index = self._entry_items[entry_id]
@@ -318,13 +435,9 @@ class ThumbGridLayout(QLayout):
             self.driver.main_window.thumb_size,
         )
         timestamp = time.time()
-        for item_index, i in enumerate(range(start, end)):
-            entry_id = self._entry_ids[i]
-            if entry_id not in self._entries:
-                ids = self._entry_ids[start:end]
-                self._fetch_entries(ids)
-
-            entry = self._entries[entry_id]
+        self._fetch_entries(start, end)
+        for item_index, entry_id in enumerate(ids):
+            i = start + item_index
             row = int(i / per_row)
             self._entry_items[entry_id] = item_index
             item_thumb = self._item_thumb(item_index)
@@ -333,8 +446,9 @@ class ThumbGridLayout(QLayout):
             item_x = width_offset * col
             item_y = height_offset * row
             item_thumb.setGeometry(QRect(QPoint(item_x, item_y), item.sizeHint()))
-            file_path = unwrap(self.driver.lib.library_dir) / entry.path
-            item_thumb.set_item(entry)
+            file_path = self._paths[entry_id]
+            item_thumb.set_item_id(entry_id)
+            item_thumb.set_item_path(file_path)
 
             if result := self._render_results.get(file_path):
                 _t, im, s, p = result
@@ -357,16 +471,13 @@ class ThumbGridLayout(QLayout):
 
         # set_selected causes stutters making thumbs after selected not show for a frame
         # setting it after positioning thumbs fixes this
-        for i in range(start, end):
-            if i >= len(self._entry_ids):
-                continue
-            entry_id = self._entry_ids[i]
+        for entry_id, flags in zip(ids, self._flags[start:end].tolist(), strict=True):
             item_index = self._entry_items[entry_id]
             item_thumb = self._item_thumbs[item_index]
-            item_thumb.thumb_button.set_selected(entry_id in self._selected)
+            item_thumb.thumb_button.set_selected(bool(flags & _SELECTED))
 
-            item_thumb.assign_badge(BadgeType.ARCHIVED, entry_id in self._tag_entries[TAG_ARCHIVED])
-            item_thumb.assign_badge(BadgeType.FAVORITE, entry_id in self._tag_entries[TAG_FAVORITE])
+            for badge_type, flag in _BADGE_FLAGS.items():
+                item_thumb.assign_badge(badge_type, bool(flags & flag))
 
     @override
     def addItem(self, arg__1: QLayoutItem) -> None:
@@ -374,7 +485,7 @@ class ThumbGridLayout(QLayout):
 
     @override
     def count(self) -> int:
-        return len(self._entries)
+        return len(self._paths)
 
     @override
     def hasHeightForWidth(self) -> bool:
@@ -20,7 +20,7 @@ from argparse import Namespace
 from pathlib import Path
 from queue import Queue
 from shutil import which
-from typing import Generic, TypeVar
+from typing import TYPE_CHECKING, Generic, TypeVar
 from warnings import catch_warnings
 
 import structlog
@@ -51,48 +51,35 @@ from tagstudio.core.driver import DriverMixin
 from tagstudio.core.enums import MacroID, SettingItems, ShowFilepathOption
 from tagstudio.core.library.alchemy.enums import (
     BrowsingState,
-    FieldTypeEnum,
     SortingModeEnum,
 )
-from tagstudio.core.library.alchemy.fields import FieldID
 from tagstudio.core.library.alchemy.library import Library, LibraryStatus
 from tagstudio.core.library.alchemy.models import Entry
 from tagstudio.core.library.ignore import Ignore
 from tagstudio.core.library.refresh import RefreshTracker
+from tagstudio.core.macro_engine import MacroEngine
 from tagstudio.core.media_types import MediaCategories
 from tagstudio.core.query_lang.util import ParsingError
-from tagstudio.core.ts_core import TagStudioCore
-from tagstudio.core.utils.str_formatting import strip_web_protocol
-from tagstudio.core.utils.types import unwrap
+from tagstudio.core.utils.metrics import metrics
+from tagstudio.core.utils.startup_profiler import startup_profiler
+from tagstudio.qt.badge_updater import BadgeChange, BadgeUpdater
 from tagstudio.qt.cache_manager import CacheManager
 from tagstudio.qt.controllers.ffmpeg_missing_message_box import FfmpegMissingMessageBox
 
 # this import has side-effect of import PySide resources
-from tagstudio.qt.controllers.fix_ignored_modal_controller import FixIgnoredEntriesModal
-from tagstudio.qt.controllers.ignore_modal_controller import IgnoreModal
-from tagstudio.qt.controllers.library_info_window_controller import LibraryInfoWindow
 from tagstudio.qt.global_settings import (
     DEFAULT_GLOBAL_SETTINGS_PATH,
     GlobalSettings,
     Theme,
 )
-from tagstudio.qt.mixed.about_modal import AboutModal
-from tagstudio.qt.mixed.build_tag import BuildTagPanel
-from tagstudio.qt.mixed.drop_import_modal import DropImportModal
-from tagstudio.qt.mixed.fix_dupe_files import FixDupeFilesModal
-from tagstudio.qt.mixed.fix_unlinked import FixUnlinkedEntriesModal
-from tagstudio.qt.mixed.folders_to_tags import FoldersToTagsModal
 from tagstudio.qt.mixed.item_thumb import BadgeType
-from tagstudio.qt.mixed.migration_modal import JsonMigrationModal
 from tagstudio.qt.mixed.progress_bar import ProgressWidget
-from tagstudio.qt.mixed.settings_panel import SettingsPanel
-from tagstudio.qt.mixed.tag_color_manager import TagColorManager
-from tagstudio.qt.mixed.tag_database import TagDatabasePanel
 from tagstudio.qt.mixed.tag_search import TagSearchModal
 from tagstudio.qt.models.palette import ColorType, UiColor, get_ui_color
 from tagstudio.qt.platform_strings import trash_term
 from tagstudio.qt.previews.vendored.ffmpeg import FFMPEG_CMD, FFPROBE_CMD
 from tagstudio.qt.resource_manager import ResourceManager
+from tagstudio.qt.search_loader import SearchLoader
 from tagstudio.qt.translations import Translations
 from tagstudio.qt.utils.custom_runnable import CustomRunnable
 from tagstudio.qt.utils.file_deleter import delete_file
@@ -101,6 +88,17 @@ from tagstudio.qt.views.main_window import MainWindow
 from tagstudio.qt.views.panel_modal import PanelModal
 from tagstudio.qt.views.splash import SplashScreen
 
+# Modals are imported when they're first opened, so that they don't add to startup time.
+if TYPE_CHECKING:
+    from tagstudio.qt.controllers.fix_ignored_modal_controller import FixIgnoredEntriesModal
+    from tagstudio.qt.controllers.library_info_window_controller import LibraryInfoWindow
+    from tagstudio.qt.mixed.about_modal import AboutModal
+    from tagstudio.qt.mixed.fix_dupe_files import FixDupeFilesModal
+    from tagstudio.qt.mixed.fix_unlinked import FixUnlinkedEntriesModal
+    from tagstudio.qt.mixed.folders_to_tags import FoldersToTagsModal
+    from tagstudio.qt.mixed.migration_modal import JsonMigrationModal
+    from tagstudio.qt.mixed.tag_color_manager import TagColorManager
+
 BADGE_TAGS = {
     BadgeType.FAVORITE: TAG_FAVORITE,
     BadgeType.ARCHIVED: TAG_ARCHIVED,
@@ -133,6 +131,7 @@ class Consumer(QThread):
         while True:
             try:
                 job = self.queue.get()
+                metrics.set_gauge("thumbnails.queue", self.queue.qsize())
                 if job == self.MARKER_QUIT:
                     break
                 job[0](*job[1])
@@ -178,15 +177,15 @@ class QtDriver(DriverMixin, QObject):
     SIGTERM = Signal()
 
     tag_manager_panel: PanelModal | None = None
-    color_manager_panel: TagColorManager | None = None
+    color_manager_panel: "TagColorManager | None" = None
     ignore_modal: PanelModal | None = None
-    add_tag_modal: PanelModal | None = None
-    folders_modal: FoldersToTagsModal
-    about_modal: AboutModal
-    unlinked_modal: FixUnlinkedEntriesModal
-    ignored_modal: FixIgnoredEntriesModal
-    dupe_modal: FixDupeFilesModal
-    library_info_window: LibraryInfoWindow
+    add_tag_modal: TagSearchModal | None = None
+    folders_modal: "FoldersToTagsModal"
+    about_modal: "AboutModal"
+    unlinked_modal: "FixUnlinkedEntriesModal"
+    ignored_modal: "FixIgnoredEntriesModal"
+    dupe_modal: "FixDupeFilesModal"
+    library_info_window: "LibraryInfoWindow"
 
     applied_theme: Theme
 
@@ -202,8 +201,16 @@ class QtDriver(DriverMixin, QObject):
         self.lib = Library()
         self.rm: ResourceManager = ResourceManager()
         self.args = args
+        self.lib.log_queries = self.args.debug
         self.frame_content: list[int] = []  # List of Entry IDs on the current page
         self.pages_count = 0
+        self.search_loader = SearchLoader()
+        self.search_loader.chunk_loaded.connect(self.__on_search_chunk_loaded)
+        self.search_loader.counted.connect(self.__on_search_counted)
+        self.badge_updater = BadgeUpdater()
+        self.badge_updater.applied.connect(self.__on_badges_written)
+        self.badge_updater.undone.connect(self.__on_badges_undone)
+        self.__search_start_time: float = 0.0
 
         self.scrollbar_pos = 0
         self.spacing = None
@@ -223,6 +230,8 @@ class QtDriver(DriverMixin, QObject):
         else:
             logger.info("[Settings] Global Settings File Path not specified, using default")
         self.settings = GlobalSettings.read_settings(self.global_settings_path)
+        self.lib.use_search_index = self.settings.in_memory_search
+        self.lib.use_write_ahead_log = self.settings.write_ahead_log
         if not self.global_settings_path.exists():
             logger.warning(
                 "[Settings] Global Settings File does not exist creating",
@@ -254,7 +263,7 @@ class QtDriver(DriverMixin, QObject):
 
     @property
     def selected(self) -> list[int]:
-        return list(self.main_window.thumb_layout._selected.keys())
+        return self.main_window.thumb_layout.selected_ids()
 
     def __reset_navigation(self) -> None:
         self.browsing_history = History(BrowsingState.show_all())
@@ -292,7 +301,8 @@ class QtDriver(DriverMixin, QObject):
         """Launch the main Qt window."""
         if self.settings.theme == Theme.SYSTEM and platform.system() == "Windows":
             sys.argv += ["-platform", "windows:darkmode=2"]
-        self.app = QApplication(sys.argv)
+        with startup_profiler.phase("QApplication"):
+            self.app = QApplication(sys.argv)
         self.app.setStyle("Fusion")
         if self.settings.theme == Theme.SYSTEM:
             # TODO: detect theme instead of always setting dark
@@ -324,20 +334,22 @@ class QtDriver(DriverMixin, QObject):
         timer.timeout.connect(lambda: None)
 
         # self.main_window = loader.load(home_path)
-        self.main_window = MainWindow(self)
+        with startup_profiler.phase("Main window"):
+            self.main_window = MainWindow(self)
         self.main_window.setWindowTitle(self.base_title)
         self.main_window.mousePressEvent = self.mouse_navigation
         self.main_window.dragEnterEvent = self.drag_enter_event
         self.main_window.dragMoveEvent = self.drag_move_event
         self.main_window.dropEvent = self.drop_event
 
-        self.splash: SplashScreen = SplashScreen(
-            resource_manager=self.rm,
-            screen_width=QGuiApplication.primaryScreen().geometry().width(),
-            splash_name=self.settings.splash,
-            device_ratio=self.main_window.devicePixelRatio(),
-        )
-        self.splash.show()
+        with startup_profiler.phase("Splash screen"):
+            self.splash: SplashScreen = SplashScreen(
+                resource_manager=self.rm,
+                screen_width=QGuiApplication.primaryScreen().geometry().width(),
+                splash_name=self.settings.splash,
+                device_ratio=self.main_window.devicePixelRatio(),
+            )
+            self.splash.show()
 
         if os.name == "nt":
             appid = "cyanvoxel.tagstudio.9"
@@ -353,28 +365,6 @@ class QtDriver(DriverMixin, QObject):
             if platform.system() != "Windows":
                 self.app.setDesktopFileName("tagstudio")
 
-        # Initialize the Tag Manager panel
-        self.tag_manager_panel = PanelModal(
-            widget=TagDatabasePanel(self, self.lib),
-            title=Translations["tag_manager.title"],
-            done_callback=lambda checked=False,
-            s=self.selected: self.main_window.preview_panel.set_selection(s, update_preview=False),
-            has_save=False,
-        )
-
-        # Initialize the Color Group Manager panel
-        self.color_manager_panel = TagColorManager(self)
-
-        # Initialize the Tag Search panel
-        self.add_tag_modal = TagSearchModal(self.lib, is_tag_chooser=True)
-        self.add_tag_modal.tsp.set_driver(self)
-        self.add_tag_modal.tsp.tag_chosen.connect(
-            lambda t, s=self.selected: (
-                self.add_tags_to_selected_callback(t),
-                self.main_window.preview_panel.set_selection(s),
-            )
-        )
-
         # region Menu Bar
 
         # region File Menu ============================================================
@@ -412,12 +402,21 @@ class QtDriver(DriverMixin, QObject):
             lambda: self.call_if_library_open(self.add_new_files_callback)
         )
 
+        # Add Root Folder
+        self.main_window.menu_bar.add_root_folder_action.triggered.connect(
+            lambda: self.call_if_library_open(self.add_root_folder_from_dialog)
+        )
+
         # Close Library
         self.main_window.menu_bar.close_library_action.triggered.connect(self.close_library)
 
         # endregion
 
         # region Edit Menu ============================================================
+        self.main_window.menu_bar.undo_badges_action.triggered.connect(
+            lambda: self.badge_updater.undo(self.lib)
+        )
+
         self.main_window.menu_bar.new_tag_action.triggered.connect(
             lambda: self.add_tag_action_callback()
         )
@@ -445,25 +444,31 @@ class QtDriver(DriverMixin, QObject):
         )
 
         self.main_window.menu_bar.add_tag_to_selected_action.triggered.connect(
-            self.add_tag_modal.show
+            self.open_add_tag_modal
         )
 
         self.main_window.menu_bar.delete_file_action.triggered.connect(
             lambda f="": self.delete_files_callback(f)
         )
 
-        self.main_window.menu_bar.tag_manager_action.triggered.connect(self.tag_manager_panel.show)
+        self.main_window.menu_bar.tag_manager_action.triggered.connect(self.open_tag_manager_panel)
 
         self.main_window.menu_bar.color_manager_action.triggered.connect(
-            self.color_manager_panel.show
+            self.open_color_manager_panel
         )
 
+        self.main_window.menu_bar.ignore_modal_action.triggered.connect(self.open_ignore_modal)
+
         # endregion
 
         # region View Menu ============================================================
 
         def create_library_info_window():
             if not hasattr(self, "library_info_window"):
+                from tagstudio.qt.controllers.library_info_window_controller import (
+                    LibraryInfoWindow,
+                )
+
                 self.library_info_window = LibraryInfoWindow(self.lib, self)
             self.library_info_window.show()
 
@@ -503,6 +508,8 @@ class QtDriver(DriverMixin, QObject):
 
         def create_fix_unlinked_entries_modal():
             if not hasattr(self, "unlinked_modal"):
+                from tagstudio.qt.mixed.fix_unlinked import FixUnlinkedEntriesModal
+
                 self.unlinked_modal = FixUnlinkedEntriesModal(self.lib, self)
             self.unlinked_modal.show()
 
@@ -512,6 +519,10 @@ class QtDriver(DriverMixin, QObject):
 
         def create_ignored_entries_modal():
             if not hasattr(self, "ignored_modal"):
+                from tagstudio.qt.controllers.fix_ignored_modal_controller import (
+                    FixIgnoredEntriesModal,
+                )
+
                 self.ignored_modal = FixIgnoredEntriesModal(self.lib, self)
             self.ignored_modal.show()
 
@@ -521,6 +532,8 @@ class QtDriver(DriverMixin, QObject):
 
         def create_dupe_files_modal():
             if not hasattr(self, "dupe_modal"):
+                from tagstudio.qt.mixed.fix_dupe_files import FixDupeFilesModal
+
                 self.dupe_modal = FixDupeFilesModal(self.lib, self)
             self.dupe_modal.show()
 
@@ -536,6 +549,8 @@ class QtDriver(DriverMixin, QObject):
         # region Macros Menu ==========================================================
         def create_folders_tags_modal():
             if not hasattr(self, "folders_modal"):
+                from tagstudio.qt.mixed.folders_to_tags import FoldersToTagsModal
+
                 self.folders_modal = FoldersToTagsModal(self.lib, self)
             self.folders_modal.show()
 
@@ -548,6 +563,8 @@ class QtDriver(DriverMixin, QObject):
         # region Help Menu ============================================================
         def create_about_modal():
             if not hasattr(self, "about_modal"):
+                from tagstudio.qt.mixed.about_modal import AboutModal
+
                 self.about_modal = AboutModal(self.global_settings_path)
             self.about_modal.show()
 
@@ -574,22 +591,28 @@ class QtDriver(DriverMixin, QObject):
             str(Path(__file__).parents[1] / "resources/qt/fonts/Oxanium-Bold.ttf")
         )
 
-        self.init_library_window()
-        self.migration_modal: JsonMigrationModal = None
+        with startup_profiler.phase("Library window"):
+            self.init_library_window()
+        self.migration_modal: JsonMigrationModal | None = None
 
-        path_result = self.evaluate_path(str(self.args.open).lstrip().rstrip())
-        if path_result.success and path_result.library_path:
-            self.open_library(path_result.library_path)
-        elif self.settings.open_last_loaded_on_startup:
-            # evaluate_path() with argument 'None' returns a LibraryStatus for the last library
-            path_result = self.evaluate_path(None)
+        with startup_profiler.phase("Open library"):
+            path_result = self.evaluate_path(str(self.args.open).lstrip().rstrip())
             if path_result.success and path_result.library_path:
                 self.open_library(path_result.library_path)
+            elif self.settings.open_last_loaded_on_startup:
+                # evaluate_path() with argument 'None' returns a LibraryStatus for the last library
+                path_result = self.evaluate_path(None)
+                if path_result.success and path_result.library_path:
+                    self.open_library(path_result.library_path)
 
         # Check if FFmpeg or FFprobe are missing and show warning if so
         if not which(FFMPEG_CMD) or not which(FFPROBE_CMD):
             FfmpegMissingMessageBox().show()
 
+        if startup_profiler.enabled:
+            startup_profiler.disable()
+            logger.info(f"[QtDriver] Startup profile\n{startup_profiler.report()}")
+
         self.app.exec()
         self.shutdown()
 
@@ -670,22 +693,59 @@ class QtDriver(DriverMixin, QObject):
         self.splash.finish(self.main_window)
 
     def init_ignore_modal(self):
-        """Initialize the Ignore Files panel."""
+        """Reset the Ignore Files panel, which is built again the next time it's opened."""
         if self.ignore_modal:
             with catch_warnings(record=True):
-                self.main_window.menu_bar.ignore_modal_action.triggered.disconnect()
                 self.ignore_modal.saved.disconnect()
             self.ignore_modal.deleteLater()
             self.ignore_modal = None
 
-        panel = IgnoreModal(self.lib)
-        self.ignore_modal = PanelModal(
-            panel,
-            Translations["menu.edit.ignore_files"],
-            has_save=True,
-        )
-        self.ignore_modal.saved.connect(panel.save)
-        self.main_window.menu_bar.ignore_modal_action.triggered.connect(self.ignore_modal.show)
+    def open_ignore_modal(self):
+        if self.ignore_modal is None:
+            from tagstudio.qt.controllers.ignore_modal_controller import IgnoreModal
+
+            panel = IgnoreModal(self.lib)
+            self.ignore_modal = PanelModal(
+                panel,
+                Translations["menu.edit.ignore_files"],
+                has_save=True,
+            )
+            self.ignore_modal.saved.connect(panel.save)
+        self.ignore_modal.show()
+
+    def open_tag_manager_panel(self):
+        if self.tag_manager_panel is None:
+            from tagstudio.qt.mixed.tag_database import TagDatabasePanel
+
+            self.tag_manager_panel = PanelModal(
+                widget=TagDatabasePanel(self, self.lib),
+                title=Translations["tag_manager.title"],
+                done_callback=lambda checked=False,
+                s=self.selected: self.main_window.preview_panel.set_selection(
+                    s, update_preview=False
+                ),
+                has_save=False,
+            )
+        self.tag_manager_panel.show()
+
+    def open_color_manager_panel(self):
+        if self.color_manager_panel is None:
+            from tagstudio.qt.mixed.tag_color_manager import TagColorManager
+
+            self.color_manager_panel = TagColorManager(self)
+        self.color_manager_panel.show()
+
+    def open_add_tag_modal(self):
+        if self.add_tag_modal is None:
+            self.add_tag_modal = TagSearchModal(self.lib, is_tag_chooser=True)
+            self.add_tag_modal.tsp.set_driver(self)
+            self.add_tag_modal.tsp.tag_chosen.connect(
+                lambda t, s=self.selected: (
+                    self.add_tags_to_selected_callback(t),
+                    self.main_window.preview_panel.set_selection(s),
+                )
+            )
+        self.add_tag_modal.show()
 
     def show_grid_filenames(self, value: bool):
         for thumb in self.main_window.thumb_layout._item_thumbs:
@@ -732,6 +792,10 @@ class QtDriver(DriverMixin, QObject):
         scrollbar.verticalScrollBar().setValue(0)
         self.__reset_navigation()
 
+        self.search_loader.cancel()
+        self.search_loader.wait()
+        self.badge_updater.wait()
+        self.badge_updater.clear()
         self.lib.close()
         self.cache_manager = None
 
@@ -760,10 +824,12 @@ class QtDriver(DriverMixin, QObject):
             self.main_window.menu_bar.save_library_backup_action.setEnabled(False)
             self.main_window.menu_bar.close_library_action.setEnabled(False)
             self.main_window.menu_bar.refresh_dir_action.setEnabled(False)
+            self.main_window.menu_bar.add_root_folder_action.setEnabled(False)
             self.main_window.menu_bar.tag_manager_action.setEnabled(False)
             self.main_window.menu_bar.color_manager_action.setEnabled(False)
             self.main_window.menu_bar.ignore_modal_action.setEnabled(False)
             self.main_window.menu_bar.new_tag_action.setEnabled(False)
+            self.main_window.menu_bar.undo_badges_action.setEnabled(False)
             self.main_window.menu_bar.fix_unlinked_entries_action.setEnabled(False)
             self.main_window.menu_bar.fix_ignored_entries_action.setEnabled(False)
             self.main_window.menu_bar.fix_dupe_files_action.setEnabled(False)
@@ -787,20 +853,46 @@ class QtDriver(DriverMixin, QObject):
         )
 
     def backup_library(self):
+        """Save a library backup on a worker thread, reporting the result in the status bar."""
         logger.info("Backing Up Library...")
         self.main_window.status_bar.showMessage(Translations["status.library_backup_in_progress"])
         start_time = time.time()
-        target_path = self.lib.save_library_backup_to_disk()
-        end_time = time.time()
-        self.main_window.status_bar.showMessage(
-            Translations.format(
-                "status.library_backup_success",
-                path=target_path,
-                time_span=format_timespan(end_time - start_time),
-            )
-        )
+        result: list[Path] = []
+        errors: list[Exception] = []
+
+        def backup():
+            try:
+                result.append(
+                    self.lib.save_library_backup_to_disk(
+                        compress=self.settings.compress_backups,
+                        keep=self.settings.max_backups,
+                    )
+                )
+            except Exception as e:
+                logger.exception("[QtDriver] Couldn't back up library", error=e)
+                errors.append(e)
+
+        def on_done():
+            if result:
+                message = Translations.format(
+                    "status.library_backup_success",
+                    path=result[0],
+                    time_span=format_timespan(time.time() - start_time),
+                )
+            else:
+                message = Translations.format(
+                    "status.library_backup_failed",
+                    error=errors[0] if errors else "",
+                )
+            self.main_window.status_bar.showMessage(message)
+
+        r = CustomRunnable(backup)
+        r.done.connect(on_done)
+        QThreadPool.globalInstance().start(r)
 
     def add_tag_action_callback(self):
+        from tagstudio.qt.mixed.build_tag import BuildTagPanel
+
         panel = BuildTagPanel(self.lib)
         self.modal = PanelModal(
             panel,
@@ -988,9 +1080,29 @@ class QtDriver(DriverMixin, QObject):
 
         return msg.exec()
 
+    def add_root_folder_from_dialog(self):
+        """Add a folder outside of the library directory to be scanned along with it."""
+        dir = QFileDialog.getExistingDirectory(
+            parent=None,
+            caption=Translations["menu.file.add_root_folder"],
+            options=QFileDialog.Option.ShowDirsOnly,
+        )
+        if dir in (None, ""):
+            return
+        try:
+            self.lib.add_folder(Path(dir))
+        except ValueError as e:
+            logger.warning("[QtDriver] Couldn't add root folder", path=dir, error=e)
+            QMessageBox.warning(self.main_window, Translations["menu.file.add_root_folder"], str(e))
+            return
+        self.add_new_files_callback()
+
     def add_new_files_callback(self):
         """Run when user initiates adding new files to the Library."""
-        tracker = RefreshTracker(self.lib)
+        tracker = RefreshTracker(
+            self.lib,
+            new_file_macro=MacroID.AUTOFILL if self.settings.autofill_new_files else None,
+        )
 
         pw = ProgressWidget(
             cancel_button_text=None,
@@ -1001,23 +1113,25 @@ class QtDriver(DriverMixin, QObject):
         pw.update_label(Translations["library.refresh.scanning_preparing"])
         pw.show()
 
-        iterator = FunctionIterator(
-            lambda lib=unwrap(self.lib.library_dir): tracker.refresh_dir(lib)  # noqa: B008
-        )
-        iterator.value.connect(
-            lambda x: (
-                pw.update_progress(x + 1),
-                pw.update_label(
-                    Translations.format(
-                        "library.refresh.scanning.plural"
-                        if x + 1 != 1
-                        else "library.refresh.scanning.singular",
-                        searched_count=f"{x + 1:n}",
-                        found_count=f"{tracker.files_count:n}",
-                    )
-                ),
+        def update_progress(progress: dict[Path, int]):
+            searched = sum(progress.values())
+            label = Translations.format(
+                "library.refresh.scanning.plural"
+                if searched != 1
+                else "library.refresh.scanning.singular",
+                searched_count=f"{searched:n}",
+                found_count=f"{tracker.files_count:n}",
             )
-        )
+            # Each root is listed when there are several, so a slow one can be told apart.
+            if len(progress) > 1:
+                label += "".join(
+                    f"\n{root.name or root}: {count:n}" for root, count in progress.items()
+                )
+            pw.update_progress(searched)
+            pw.update_label(label)
+
+        iterator = FunctionIterator(tracker.refresh_roots)
+        iterator.value.connect(update_progress)
         r = CustomRunnable(iterator.run)
         r.done.connect(
             lambda: (
@@ -1067,64 +1181,14 @@ class QtDriver(DriverMixin, QObject):
         )
         QThreadPool.globalInstance().start(r)
 
-    def new_file_macros_runnable(self, new_ids):
-        """Threaded method that runs macros on a set of Entry IDs."""
-        # for i, id in enumerate(new_ids):
-        # 	# pb.setValue(i)
-        # 	# pb.setLabelText(f'Running Configured Macros on {i}/{len(new_ids)} New Entries')
-        # 	# self.run_macro('autofill', id)
-        yield 0
-
     def run_macros(self, name: MacroID, entry_ids: list[int]):
         """Run a specific Macro on a group of given entry_ids."""
-        for entry_id in entry_ids:
-            self.run_macro(name, entry_id)
+        for _ in MacroEngine(self.lib).run(name, entry_ids):
+            pass
 
     def run_macro(self, name: MacroID, entry_id: int):
         """Run a specific Macro on an Entry given a Macro name."""
-        entry: Entry = self.lib.get_entry(entry_id)
-        full_path = self.lib.library_dir / entry.path
-        source = "" if entry.path.parent == Path(".") else entry.path.parts[0].lower()
-
-        logger.info(
-            "running macro",
-            source=source,
-            macro=name,
-            entry_id=entry.id,
-            grid_idx=entry_id,
-        )
-
-        if name == MacroID.AUTOFILL:
-            for macro_id in MacroID:
-                if macro_id == MacroID.AUTOFILL:
-                    continue
-                self.run_macro(macro_id, entry_id)
-
-        elif name == MacroID.SIDECAR:
-            parsed_items = TagStudioCore.get_gdl_sidecar(full_path, source)
-            for field_id, value in parsed_items.items():
-                if isinstance(value, list) and len(value) > 0 and isinstance(value[0], str):
-                    value = self.lib.tag_from_strings(value)
-                self.lib.add_field_to_entry(
-                    entry.id,
-                    field_id=field_id,
-                    value=value,
-                )
-
-        elif name == MacroID.BUILD_URL:
-            url = TagStudioCore.build_url(entry, source)
-            if url is not None:
-                self.lib.add_field_to_entry(entry.id, field_id=FieldID.SOURCE, value=url)
-        elif name == MacroID.MATCH:
-            TagStudioCore.match_conditions(self.lib, entry.id)
-        elif name == MacroID.CLEAN_URL:
-            for field in entry.text_fields:
-                if field.type.type == FieldTypeEnum.TEXT_LINE and field.value:
-                    self.lib.update_entry_field(
-                        entry_ids=entry.id,
-                        field=field,
-                        content=strip_web_protocol(field.value),
-                    )
+        self.run_macros(name, [entry_id])
 
     def sorting_direction_callback(self):
         logger.info("Sorting Direction Changed", ascending=self.main_window.sorting_direction)
@@ -1198,19 +1262,12 @@ class QtDriver(DriverMixin, QObject):
         self.set_clipboard_menu_viability()
 
     def paste_fields_action_callback(self):
-        for id in self.selected:
-            entry = self.lib.get_entry_full(id, with_fields=True, with_tags=False)
-            if not entry:
-                continue
-            existing_fields = entry.fields
-            for field in self.copy_buffer["fields"]:
-                exists = False
-                for e in existing_fields:
-                    if field.type_key == e.type_key and field.value == e.value:
-                        exists = True
-                if not exists:
-                    self.lib.add_field_to_entry(id, field_id=field.type_key, value=field.value)
-            self.lib.add_tags_to_entries(id, self.copy_buffer["tags"])
+        self.lib.add_fields_to_entries(
+            self.selected,
+            [(field.type_key, field.value) for field in self.copy_buffer["fields"]],
+            skip_existing=True,
+        )
+        self.lib.add_tags_to_entries(self.selected, self.copy_buffer["tags"])
         if len(self.selected) > 1:
             if TAG_ARCHIVED in self.copy_buffer["tags"]:
                 self.update_badges({BadgeType.ARCHIVED: True}, origin_id=0, add_tags=False)
@@ -1306,9 +1363,15 @@ class QtDriver(DriverMixin, QObject):
             return
 
         if query_type == "tag":
-            completion_list = list(map(lambda x: prefix + "tag:" + x.name, self.lib.tags))
+            names = self.lib.tag_catalogue.names_with_prefix(query_value.strip('"'))
+            completion_list = list(map(lambda x: prefix + "tag:" + x, names))
         elif query_type == "tag_id":
-            completion_list = list(map(lambda x: prefix + "tag_id:" + str(x.id), self.lib.tags))
+            completion_list = list(
+                map(
+                    lambda x: prefix + "tag_id:" + str(x),
+                    filter(lambda y: str(y).startswith(query_value), self.lib.tag_catalogue.ids),
+                )
+            )
         elif query_type == "path":
             completion_list = list(
                 map(lambda x: prefix + "path:" + x, self.lib.get_paths(limit=100))
@@ -1363,6 +1426,10 @@ class QtDriver(DriverMixin, QObject):
     def update_badges(self, badge_values: dict[BadgeType, bool], origin_id: int, add_tags=True):
         """Update the tag badges for item_thumbs.
 
+        The badges of every affected entry are updated in the grid right away, repainting only
+        the visible thumbnails. Any tags are then written to the library in the background, and
+        can be undone with the "Undo Badge Change" action.
+
         Args:
             badge_values(dict[BadgeType, bool]): The BadgeType and associated viability state.
             origin_id(int): The ID of the item_thumb calling this method. If the ID is found as a
@@ -1371,42 +1438,49 @@ class QtDriver(DriverMixin, QObject):
             add_tags(bool): Flag determining if tags associated with the badges need to be added to
                 the items. Defaults to True.
         """
-        item_ids = self.selected if (not origin_id or origin_id in self.selected) else [origin_id]
-        pending_entries: dict[BadgeType, list[int]] = {}
+        layout = self.main_window.thumb_layout
+        selected = self.selected
+        item_ids = selected if (not origin_id or layout.is_selected(origin_id)) else [origin_id]
 
         logger.info(
             "[QtDriver][update_badges] Updating ItemThumb badges",
             badge_values=badge_values,
             origin_id=origin_id,
+            count=len(item_ids),
             add_tags=add_tags,
         )
-        for it in self.main_window.thumb_layout._item_thumbs:
-            if it.item_id in item_ids:
-                for badge_type, value in badge_values.items():
-                    if add_tags:
-                        if not pending_entries.get(badge_type):
-                            pending_entries[badge_type] = []
-                        pending_entries[badge_type].append(it.item_id)
-                        it.toggle_item_tag(it.item_id, value, BADGE_TAGS[badge_type])
-                    it.assign_badge(badge_type, value)
+        self.__show_badges(
+            [BadgeChange(badge_type, value, item_ids) for badge_type, value in badge_values.items()]
+        )
 
         if not add_tags:
             return
 
-        logger.info(
-            "[QtDriver][update_badges] Adding tags to updated entries",
-            pending_entries=pending_entries,
-        )
-        for badge_type, value in badge_values.items():
-            entry_ids = pending_entries.get(badge_type, [])
-            tag_ids = [BADGE_TAGS[badge_type]]
-
-            if value:
-                self.main_window.thumb_layout.add_tags(entry_ids, tag_ids)
-                self.lib.add_tags_to_entries(entry_ids, tag_ids)
+        if len(selected) == 1 and selected[0] in item_ids:
+            for badge_type, value in badge_values.items():
+                self.main_window.preview_panel.field_containers_widget.update_toggled_tag(
+                    BADGE_TAGS[badge_type], value
+                )
+        self.badge_updater.apply(self.lib, item_ids, badge_values)
+
+    def __show_badges(self, changes: list[BadgeChange]) -> None:
+        """Show badge changes in the grid without reading them back from the library."""
+        thumb_layout = self.main_window.thumb_layout
+        for change in changes:
+            tag_ids = [BADGE_TAGS[change.badge_type]]
+            if change.value:
+                thumb_layout.add_tags(change.entry_ids, tag_ids)
             else:
-                self.main_window.thumb_layout.remove_tags(entry_ids, tag_ids)
-                self.lib.remove_tags_from_entries(entry_ids, tag_ids)
+                thumb_layout.remove_tags(change.entry_ids, tag_ids)
+        thumb_layout.update_badges()
+
+    def __on_badges_written(self, _changes: list[BadgeChange]) -> None:
+        self.main_window.menu_bar.undo_badges_action.setEnabled(self.badge_updater.can_undo())
+
+    def __on_badges_undone(self, changes: list[BadgeChange]) -> None:
+        self.__show_badges(changes)
+        self.main_window.menu_bar.undo_badges_action.setEnabled(self.badge_updater.can_undo())
+        self.main_window.preview_panel.set_selection(self.selected)
 
     def update_browsing_state(self, state: BrowsingState | None = None) -> None:
         """Navigates to a new BrowsingState when state is given, otherwise updates the results."""
@@ -1426,10 +1500,15 @@ class QtDriver(DriverMixin, QObject):
         # search the library
         start_time = time.time()
         Ignore.get_patterns(self.lib.library_dir, include_global=True)
-        page_size = 0 if self.settings.infinite_scroll else self.settings.page_size
+        if self.settings.infinite_scroll:
+            self.__stream_browsing_state(start_time)
+            return
+
+        page_size = self.settings.page_size
         results = self.lib.search_library(self.browsing_history.current, page_size)
         logger.info("items to render", count=len(results))
         end_time = time.time()
+        metrics.observe("browsing.search", end_time - start_time)
 
         # inform user about completed search
         self.main_window.status_bar.showMessage(
@@ -1445,14 +1524,48 @@ class QtDriver(DriverMixin, QObject):
         self.update_thumbs()
 
         # update pagination
-        if page_size > 0:
-            self.pages_count = math.ceil(results.total_count / page_size)
-        else:
-            self.pages_count = 1
+        self.pages_count = math.ceil(results.total_count / page_size)
+        self.main_window.pagination.update_buttons(
+            self.pages_count, self.browsing_history.current.page_index, emit=False
+        )
+
+    def __stream_browsing_state(self, start_time: float) -> None:
+        """Show the results of the current search as they're streamed in from the library.
+
+        The grid is cleared right away and filled as chunks of results arrive, so the first
+        thumbnails are shown long before every result has been read.
+        """
+        self.__search_start_time = start_time
+        self.frame_content = []
+        self.update_thumbs()
+        self.search_loader.request(self.lib, self.browsing_history.current)
+
+        self.pages_count = 1
         self.main_window.pagination.update_buttons(
             self.pages_count, self.browsing_history.current.page_index, emit=False
         )
 
+    def __on_search_chunk_loaded(self, request_id: int, entry_ids: list[int]) -> None:
+        if not self.search_loader.is_current(request_id):
+            return
+        self.frame_content.extend(entry_ids)
+        self.main_window.thumb_layout.append_entries(entry_ids)
+        self.main_window.thumb_layout.update()
+
+    def __on_search_counted(self, request_id: int, total: int) -> None:
+        if not self.search_loader.is_current(request_id):
+            return
+        logger.info("items to render", count=total)
+        duration = time.time() - self.__search_start_time
+        metrics.observe("browsing.search", duration)
+        self.main_window.status_bar.showMessage(
+            Translations.format(
+                "status.results_found",
+                count=total,
+                time_span=format_timespan(duration),
+            )
+        )
+
     def remove_recent_library(self, item_key: str):
         self.cached_values.beginGroup(SettingItems.LIBS_LIST)
         self.cached_values.remove(item_key)
@@ -1520,6 +1633,8 @@ class QtDriver(DriverMixin, QObject):
         self.update_recent_lib_menu()
 
     def open_settings_modal(self):
+        from tagstudio.qt.mixed.settings_panel import SettingsPanel
+
         SettingsPanel.build_modal(self).show()
 
     def open_library(self, path: Path) -> None:
@@ -1565,6 +1680,8 @@ class QtDriver(DriverMixin, QObject):
 
         # Migration is required
         if open_status.json_migration_req:
+            from tagstudio.qt.mixed.migration_modal import JsonMigrationModal
+
             self.migration_modal = JsonMigrationModal(path)
             self.migration_modal.migration_finished.connect(
                 lambda: self._init_library(path, self.lib.open_library(path))
@@ -1584,6 +1701,8 @@ class QtDriver(DriverMixin, QObject):
             return open_status
 
         assert self.lib.library_dir
+        if self.settings.queue_library_writes:
+            self.lib.start_writer()
         self.init_workers()
         Ignore.get_patterns(self.lib.library_dir, include_global=True)
         self.__reset_navigation()
@@ -1613,6 +1732,7 @@ class QtDriver(DriverMixin, QObject):
         self.main_window.menu_bar.save_library_backup_action.setEnabled(True)
         self.main_window.menu_bar.close_library_action.setEnabled(True)
         self.main_window.menu_bar.refresh_dir_action.setEnabled(True)
+        self.main_window.menu_bar.add_root_folder_action.setEnabled(True)
         self.main_window.menu_bar.tag_manager_action.setEnabled(True)
         self.main_window.menu_bar.color_manager_action.setEnabled(True)
         self.main_window.menu_bar.ignore_modal_action.setEnabled(True)
@@ -1646,6 +1766,8 @@ class QtDriver(DriverMixin, QObject):
 
         urls = event.mimeData().urls()
         logger.info("New items dragged in", urls=urls)
+        from tagstudio.qt.mixed.drop_import_modal import DropImportModal
+
         drop_import = DropImportModal(self)
         drop_import.import_urls(urls)
 
@@ -14,10 +14,13 @@ from PySide6.QtWidgets import (
     QGraphicsOpacityEffect,
     QGridLayout,
     QHBoxLayout,
+    QHeaderView,
     QLabel,
     QPushButton,
     QSizePolicy,
     QSpacerItem,
+    QTableWidget,
+    QTabWidget,
     QVBoxLayout,
     QWidget,
 )
@@ -82,6 +85,8 @@ class LibraryInfoWindowView(QWidget):
         self.stats_namespaces_row: int = 3
         self.stats_colors_row: int = 4
         self.stats_macros_row: int = 5
+        self.stats_untagged_row: int = 6
+        self.stats_size_row: int = 7
 
         # NOTE: Alternating rows for visual padding
         self.stats_labels_col: int = 0
@@ -100,6 +105,10 @@ class LibraryInfoWindowView(QWidget):
         self.colors_label.setAlignment(cell_alignment)
         self.macros_label: QLabel = QLabel(Translations["library_info.stats.macros"])
         self.macros_label.setAlignment(cell_alignment)
+        self.untagged_label: QLabel = QLabel(Translations["library_info.stats.untagged"])
+        self.untagged_label.setAlignment(cell_alignment)
+        self.size_label: QLabel = QLabel(Translations["library_info.stats.size"])
+        self.size_label.setAlignment(cell_alignment)
 
         self.stats_grid_layout.addWidget(
             self.entries_label,
@@ -131,6 +140,16 @@ class LibraryInfoWindowView(QWidget):
             self.stats_macros_row,
             self.stats_labels_col,
         )
+        self.stats_grid_layout.addWidget(
+            self.untagged_label,
+            self.stats_untagged_row,
+            self.stats_labels_col,
+        )
+        self.stats_grid_layout.addWidget(
+            self.size_label,
+            self.stats_size_row,
+            self.stats_labels_col,
+        )
 
         self.stats_grid_layout.setRowMinimumHeight(self.stats_entries_row, row_height)
         self.stats_grid_layout.setRowMinimumHeight(self.stats_tags_row, row_height)
@@ -138,6 +157,8 @@ class LibraryInfoWindowView(QWidget):
         self.stats_grid_layout.setRowMinimumHeight(self.stats_namespaces_row, row_height)
         self.stats_grid_layout.setRowMinimumHeight(self.stats_colors_row, row_height)
         self.stats_grid_layout.setRowMinimumHeight(self.stats_macros_row, row_height)
+        self.stats_grid_layout.setRowMinimumHeight(self.stats_untagged_row, row_height)
+        self.stats_grid_layout.setRowMinimumHeight(self.stats_size_row, row_height)
 
         self.entry_count_label: QLabel = QLabel()
         self.entry_count_label.setAlignment(cell_alignment)
@@ -151,6 +172,10 @@ class LibraryInfoWindowView(QWidget):
         self.color_count_label.setAlignment(cell_alignment)
         self.macros_count_label: QLabel = QLabel()
         self.macros_count_label.setAlignment(cell_alignment)
+        self.untagged_count_label: QLabel = QLabel()
+        self.untagged_count_label.setAlignment(cell_alignment)
+        self.size_value_label: QLabel = QLabel()
+        self.size_value_label.setAlignment(cell_alignment)
 
         self.stats_grid_layout.addWidget(
             self.entry_count_label,
@@ -182,6 +207,16 @@ class LibraryInfoWindowView(QWidget):
             self.stats_macros_row,
             self.stats_values_col,
         )
+        self.stats_grid_layout.addWidget(
+            self.untagged_count_label,
+            self.stats_untagged_row,
+            self.stats_values_col,
+        )
+        self.stats_grid_layout.addWidget(
+            self.size_value_label,
+            self.stats_size_row,
+            self.stats_values_col,
+        )
 
         self.manage_tags_button = QPushButton(Translations["edit.tag_manager"])
         self.manage_colors_button = QPushButton(Translations["color_manager.title"])
@@ -436,6 +471,59 @@ class LibraryInfoWindowView(QWidget):
             QSpacerItem(0, 0, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
         )
 
+        # Performance ----------------------------------------------------------
+        self.performance_widget = QWidget()
+        self.performance_layout = QVBoxLayout(self.performance_widget)
+        self.performance_layout.setContentsMargins(6, 6, 6, 6)
+        self.performance_layout.setSpacing(6)
+
+        self.metrics_table = QTableWidget(0, 6)
+        self.metrics_table.setHorizontalHeaderLabels(
+            [
+                Translations["library_info.performance.metric"],
+                Translations["library_info.performance.count"],
+                Translations["library_info.performance.mean"],
+                Translations["library_info.performance.p50"],
+                Translations["library_info.performance.p95"],
+                Translations["library_info.performance.max"],
+            ]
+        )
+        self.metrics_table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch
+        )
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.metrics_table.setSortingEnabled(True)
+        self.metrics_table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.performance_layout.addWidget(self.metrics_table)
+
+        self.metrics_buttons = QWidget()
+        self.metrics_buttons_layout = QHBoxLayout(self.metrics_buttons)
+        self.metrics_buttons_layout.setContentsMargins(0, 0, 0, 0)
+        self.refresh_metrics_button = QPushButton(Translations["library_info.performance.refresh"])
+        self.reset_metrics_button = QPushButton(Translations["generic.reset"])
+        self.export_json_button = QPushButton(Translations["library_info.performance.export_json"])
+        self.export_prometheus_button = QPushButton(
+            Translations["library_info.performance.export_prometheus"]
+        )
+        self.metrics_buttons_layout.addWidget(self.refresh_metrics_button)
+        self.metrics_buttons_layout.addWidget(self.reset_metrics_button)
+        self.metrics_buttons_layout.addStretch(1)
+        self.metrics_buttons_layout.addWidget(self.export_json_button)
+        self.metrics_buttons_layout.addWidget(self.export_prometheus_button)
+        self.performance_layout.addWidget(self.metrics_buttons)
+
+        # Tabs -----------------------------------------------------------------
+        self.overview_widget = QWidget()
+        self.overview_layout = QVBoxLayout(self.overview_widget)
+        self.overview_layout.setContentsMargins(0, 6, 0, 0)
+        self.overview_layout.addWidget(self.body_widget)
+        self.overview_layout.addStretch(1)
+
+        self.tab_widget = QTabWidget()
+        self.tab_widget.addTab(self.overview_widget, Translations["library_info.overview"])
+        self.tab_widget.addTab(self.performance_widget, Translations["library_info.performance"])
+
         # Details --------------------------------------------------------------
         self.details_container = QWidget()
         self.details_layout = QHBoxLayout(self.details_container)
@@ -458,8 +546,6 @@ class LibraryInfoWindowView(QWidget):
 
         # Add to root layout ---------------------------------------------------
         self.root_layout.addWidget(self.title_label)
-        self.root_layout.addWidget(self.body_widget)
-        self.root_layout.addStretch(1)
-        self.root_layout.addStretch(2)
+        self.root_layout.addWidget(self.tab_widget, stretch=1)
         self.root_layout.addWidget(self.details_container)
         self.root_layout.addWidget(self.button_container)
@@ -61,6 +61,7 @@ class MainMenuBar(QMenuBar):
     settings_action: QAction
     open_on_start_action: QAction
     refresh_dir_action: QAction
+    add_root_folder_action: QAction
     close_library_action: QAction
 
     edit_menu: QMenu
@@ -159,6 +160,11 @@ class MainMenuBar(QMenuBar):
         self.refresh_dir_action.setEnabled(False)
         self.file_menu.addAction(self.refresh_dir_action)
 
+        # Add Root Folder
+        self.add_root_folder_action = QAction(Translations["menu.file.add_root_folder"], self)
+        self.add_root_folder_action.setEnabled(False)
+        self.file_menu.addAction(self.add_root_folder_action)
+
         self.file_menu.addSeparator()
 
         # Close Library
@@ -174,6 +180,20 @@ class MainMenuBar(QMenuBar):
     def setup_edit_menu(self):
         self.edit_menu = QMenu(Translations["generic.edit_alt"], self)
 
+        # Undo Badge Change
+        self.undo_badges_action = QAction(Translations["menu.edit.undo_badges"], self)
+        self.undo_badges_action.setShortcut(
+            QtCore.QKeyCombination(
+                QtCore.Qt.KeyboardModifier(QtCore.Qt.KeyboardModifier.ControlModifier),
+                QtCore.Qt.Key.Key_Z,
+            )
+        )
+        self.undo_badges_action.setToolTip("Ctrl+Z")
+        self.undo_badges_action.setEnabled(False)
+        self.edit_menu.addAction(self.undo_badges_action)
+
+        self.edit_menu.addSeparator()
+
         # New Tag
         self.new_tag_action = QAction(Translations["menu.edit.new_tag"], self)
         self.new_tag_action.setShortcut(
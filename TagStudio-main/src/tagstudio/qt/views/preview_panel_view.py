@@ -3,7 +3,6 @@
 
 import traceback
 import typing
-from pathlib import Path
 
 import structlog
 from PySide6.QtCore import Qt
@@ -17,12 +16,11 @@ from PySide6.QtWidgets import (
 
 from tagstudio.core.enums import Theme
 from tagstudio.core.library.alchemy.library import Library
-from tagstudio.core.library.alchemy.models import Entry
-from tagstudio.core.utils.types import unwrap
 from tagstudio.qt.controllers.preview_thumb_controller import PreviewThumb
 from tagstudio.qt.mixed.field_containers import FieldContainers
 from tagstudio.qt.mixed.file_attributes import FileAttributeData, FileAttributes
 from tagstudio.qt.models.palette import ColorType, UiColor, get_ui_color
+from tagstudio.qt.previews.preview_loader import EntryPreviewData, PreviewLoader
 from tagstudio.qt.translations import Translations
 
 if typing.TYPE_CHECKING:
@@ -65,6 +63,8 @@ class PreviewPanelView(QWidget):
         self.lib = library
 
         self.__thumb = PreviewThumb(self.lib, driver)
+        self.__loader = PreviewLoader(self.lib)
+        self.__loader.loaded.connect(self.__preview_loaded)
         self.__file_attrs = FileAttributes(self.lib, driver)
         self._fields = FieldContainers(
             self.lib, driver
@@ -144,6 +144,7 @@ class PreviewPanelView(QWidget):
         try:
             # No Items Selected
             if len(selected) == 0:
+                self.__loader.cancel()
                 self.__thumb.hide_preview()
                 self.__file_attrs.update_stats()
                 self.__file_attrs.update_date_label()
@@ -153,16 +154,9 @@ class PreviewPanelView(QWidget):
 
             # One Item Selected
             elif len(selected) == 1:
-                entry_id = selected[0]
-                entry: Entry = unwrap(self.lib.get_entry(entry_id))
-
-                filepath: Path = unwrap(self.lib.library_dir) / entry.path
-
-                if update_preview:
-                    stats: FileAttributeData = self.__thumb.display_file(filepath)
-                    self.__file_attrs.update_stats(filepath, stats)
-                self.__file_attrs.update_date_label(filepath)
-                self._fields.update_from_entry(entry_id)
+                # The entry and its file are loaded in the background, see __preview_loaded()
+                self._fields.cached_entries = []
+                self.__loader.request(selected[0], load_file=update_preview)
 
                 self._set_selection_callback()
 
@@ -171,6 +165,7 @@ class PreviewPanelView(QWidget):
             # Multiple Selected Items
             elif len(selected) > 1:
                 # items: list[Entry] = [self.lib.get_entry_full(x) for x in self.driver.selected]
+                self.__loader.cancel()
                 self.__thumb.hide_preview()  # TODO: Render mixed selection
                 self.__file_attrs.update_multi_selection(len(selected))
                 self.__file_attrs.update_date_label()
@@ -184,6 +179,20 @@ class PreviewPanelView(QWidget):
             logger.error("[Preview Panel] Error updating selection", error=e)
             traceback.print_exc()
 
+    def __preview_loaded(self, data: EntryPreviewData):
+        """Show the data loaded for a single selected entry."""
+        if not self.__loader.is_current(data.request_id) or self._selected != [data.entry.id]:
+            return
+        try:
+            if data.file is not None:
+                stats: FileAttributeData = self.__thumb.display_preview(data.file)
+                self.__file_attrs.update_stats(data.filepath, stats)
+            self.__file_attrs.update_date_label(data.filepath)
+            self._fields.set_entry(data.entry, data.hierarchy_tags)
+        except Exception as e:
+            logger.error("[Preview Panel] Error displaying selection", error=e)
+            traceback.print_exc()
+
     @property
     def add_buttons_enabled(self) -> bool:  # needed for the tests
         field = self.__add_field_button.isEnabled()
@@ -209,3 +218,7 @@ class PreviewPanelView(QWidget):
     @property
     def preview_thumb(self) -> PreviewThumb:
         return self.__thumb
+
+    @property
+    def preview_loader(self) -> PreviewLoader:
+        return self.__loader
@@ -252,8 +252,11 @@ class PreviewThumbView(QWidget):
         self.__render_thumb(filepath)
         return FileAttributeData(duration=self.__update_media_player(filepath))
 
-    def _display_gif(self, gif_data: bytes, size: tuple[int, int]) -> FileAttributeData | None:
-        """Update the animated image preview from a filepath."""
+    def _display_gif(self, source: Path | bytes, size: tuple[int, int]) -> FileAttributeData | None:
+        """Update the animated image preview from a filepath or from in-memory GIF data.
+
+        Animations played from a filepath are read from disk a frame at a time.
+        """
         stats = FileAttributeData()
 
         # Ensure that any movie and buffer from previous animations are cleared.
@@ -266,8 +269,11 @@ class PreviewThumbView(QWidget):
 
         self.__image_ratio = stats.width / stats.height
 
-        self.__gif_buffer.setData(gif_data)
-        movie = QMovie(self.__gif_buffer, QByteArray())
+        if isinstance(source, Path):
+            movie = QMovie(str(source), QByteArray())
+        else:
+            self.__gif_buffer.setData(source)
+            movie = QMovie(self.__gif_buffer, QByteArray())
         self.__preview_gif.setMovie(movie)
 
         # If the animation only has 1 frame, it isn't animated and shouldn't be treated as such
@@ -0,0 +1,116 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Compare full and reduced resolution decoding of image thumbnails.
+
+Run with `python tests/benchmarks/bench_image_thumbs.py [--megapixels N] [--size N]`.
+
+Each format and decode mode is timed in its own process so that the reported peak memory use
+belongs to that case alone. The "imports" row is the peak memory use of a process that only
+imports the renderer.
+"""
+
+import argparse
+import math
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FORMATS: dict[str, dict] = {
+    "jpeg": {"quality": 90},
+    "png": {"compress_level": 1},
+    "webp": {"quality": 90},
+    "tiff": {},
+    "heic": {"quality": 90},
+    "avif": {"quality": 90},
+}
+
+
+def make_image(path: Path, megapixels: float, save_args: dict, queue) -> None:
+    """Write a noisy gradient image, which compresses roughly like a photograph."""
+    import numpy as np
+    import pillow_avif  # noqa: F401 # pyright: ignore[reportUnusedImport]
+    from PIL import Image
+    from pillow_heif import register_heif_opener
+
+    register_heif_opener()
+    width = math.isqrt(int(megapixels * 1_000_000 * 3 / 2))
+    height = width * 2 // 3
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 12, (height, width)).astype(np.float32)
+    channels = [x + noise, y + noise, (x + y) / 2 - noise]
+    array = np.clip(np.dstack(np.broadcast_arrays(*channels)), 0, 255).astype(np.uint8)
+    try:
+        Image.fromarray(array, "RGB").save(path, **save_args)
+        queue.put(None)
+    except (KeyError, OSError) as e:
+        queue.put(str(e))
+
+
+def run_case(path: str, size: int | None, repeat: int, queue) -> None:
+    from tagstudio.qt.previews.renderer import ThumbRenderer
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ThumbRenderer._image_thumb(Path(path), size)
+    elapsed = time.perf_counter() - start
+    throughput = repeat / elapsed if repeat else 0.0
+
+    peak_mb = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    queue.put((throughput, peak_mb))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=24)
+    parser.add_argument("--size", type=int, default=256, help="Thumbnail size in pixels.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # The peak memory use of a process carries over to the processes it starts, so every
+    # allocation of note, including generating the test images, happens in a child process.
+    context = multiprocessing.get_context("spawn")
+    out = sys.stdout
+
+    def run(target, *target_args):
+        queue = context.Queue()
+        process = context.Process(target=target, args=(*target_args, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        return result
+
+    def write_row(name: str, mode: str, throughput: float, peak_mb: float | None):
+        peak = f"{peak_mb:.0f}" if peak_mb is not None else "n/a"
+        out.write(f"{name:<8} {mode:<8} {throughput:>10.2f} {peak:>14}\n")
+
+    out.write(f"{args.megapixels} MP images, {args.size} px thumbnails\n")
+    out.write(f"{'format':<8} {'mode':<8} {'images/s':>10} {'peak RSS (MB)':>14}\n")
+    write_row("imports", "", *run(run_case, "", None, 0))
+    with TemporaryDirectory() as temp_dir:
+        for ext, save_args in FORMATS.items():
+            path = Path(temp_dir) / f"image.{ext}"
+            error = run(make_image, path, args.megapixels, save_args)
+            if error:
+                out.write(f"{ext:<8} skipped: {error}\n")
+                continue
+
+            for mode, size in (("full", None), ("reduced", args.size)):
+                write_row(ext, mode, *run(run_case, str(path), size, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Time many small library calls, on their own and within a single `Library.batch()`.
+
+Run with `python tests/benchmarks/bench_library_calls.py [--calls N] [--tags N]`.
+
+Small lookups like `get_tag` spend much of their time getting a connection and starting a
+session and transaction, rather than running the query itself. A batch pays for those once.
+"""
+
+import argparse
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import FIRST_TAG_ID, LibrarySpec, entry_path, make_library
+
+from tagstudio.core.library.alchemy.library import Library
+
+
+def time_calls(lib: Library, call: Callable[[int], object], calls: int, tags: int) -> float:
+    """Return the time in seconds of calling a function with a different tag index each time."""
+    start = time.perf_counter()
+    for i in range(calls):
+        call(i % tags)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=10_000)
+    parser.add_argument("--tags", type=int, default=1_000)
+    args = parser.parse_args()
+
+    # structlog logs some of these calls, which would dominate the timings.
+    import structlog
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+    out = sys.stdout
+
+    with TemporaryDirectory() as temp_dir:
+        # One entry per tag.
+        spec = LibrarySpec(entries=args.tags, tags=args.tags, depth=1)
+        lib = make_library(Path(temp_dir), spec)
+        paths = [entry_path(spec, i + 1) for i in range(args.tags)]
+        cases: dict[str, Callable[[int], object]] = {
+            "get_tag": lambda i: lib.get_tag(FIRST_TAG_ID + i),
+            "get_entry": lambda i: lib.get_entry(i + 1),
+            "has_path_entry": lambda i: lib.has_path_entry(paths[i]),
+        }
+
+        out.write(f"{args.calls} calls on a library with {args.tags} tags\n")
+        out.write(f"{'call':<16} {'total (s)':>10} {'per call (us)':>14} {'batched (us)':>13}\n")
+        for name, call in cases.items():
+            total = time_calls(lib, call, args.calls, args.tags)
+            with lib.batch():
+                batched = time_calls(lib, call, args.calls, args.tags)
+            out.write(
+                f"{name:<16} {total:>10.2f} {total / args.calls * 1e6:>14.0f} "
+                f"{batched / args.calls * 1e6:>13.0f}\n"
+            )
+        lib.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Time library searches on synthetic libraries with uniform and skewed tag distributions.
+
+Run with `python tests/benchmarks/bench_search.py [--entries N] [--tags N] [--skew S]`, adding
+`--search-index` to search with the in-memory search index instead of SQL.
+
+Tags are named "tag_<rank>", where tag_0 is the most common tag. With a skewed distribution,
+the number of entries a tag is on falls off with its rank following Zipf's law, so queries can
+mix very common and very rare tags.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from sqlalchemy.orm import Session
+from synthetic import LibrarySpec, make_library
+
+from tagstudio.core.library.alchemy.enums import BrowsingState
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.alchemy.search_index import SearchIndex
+from tagstudio.core.utils.types import unwrap
+
+PAGE_SIZE = 500
+
+QUERIES: list[str] = [
+    "tag_0",
+    "tag_0 and tag_1",
+    "tag_0 and tag_1 and tag_{rare}",
+    "tag_{rare} and tag_0",
+    "tag_0 and tag_{mid} and tag_{rare}",
+    "tag_0 or tag_{rare}",
+    "tag_0 and not tag_1",
+    "(tag_0 or tag_1) and tag_{mid}",
+    "special:untagged",
+]
+
+
+def time_query(lib: Library, query: str, repeat: int) -> tuple[float, float, int]:
+    """Return the time of the first search, the best time of later searches, and the count."""
+    state = BrowsingState.from_search_query(query)
+    lib.invalidate_query_plans()
+
+    start = time.perf_counter()
+    count = lib.search_library(state, PAGE_SIZE).total_count
+    first = time.perf_counter() - start
+
+    best = first
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lib.search_library(state, PAGE_SIZE)
+        best = min(best, time.perf_counter() - start)
+    return first, best, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--tags", type=int, default=1_000)
+    parser.add_argument("--tags-per-entry", type=int, default=5)
+    parser.add_argument("--skew", type=float, default=1.2, help="Zipf exponent of tag use.")
+    parser.add_argument("--untagged", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--search-index", action="store_true", help="Search with the in-memory search index."
+    )
+    args = parser.parse_args()
+
+    # structlog logs every search, which would dominate the timings.
+    import structlog
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+    out = sys.stdout
+
+    for distribution, skew in (("uniform", 0.0), ("skewed", args.skew)):
+        with TemporaryDirectory() as temp_dir:
+            start = time.perf_counter()
+            spec = LibrarySpec(
+                entries=args.entries,
+                tags=args.tags,
+                depth=1,
+                tags_per_entry=args.tags_per_entry,
+                skew=skew,
+                untagged=args.untagged,
+                field_density=0,
+            )
+            lib = make_library(Path(temp_dir), spec)
+            if args.search_index:
+                with Session(unwrap(lib.engine)) as session:
+                    lib.search_index = SearchIndex.from_session(session)
+            out.write(
+                f"\n{distribution} library: {args.entries} entries, {args.tags} tags "
+                f"(built in {time.perf_counter() - start:.1f}s)\n"
+            )
+            out.write(f"{'query':<40} {'first (ms)':>10} {'best (ms)':>10} {'count':>8}\n")
+            for query in QUERIES:
+                query = query.format(mid=args.tags // 10, rare=args.tags - 1)
+                first, best, count = time_query(lib, query, args.repeat)
+                out.write(f"{query:<40} {first * 1000:>10.1f} {best * 1000:>10.1f} {count:>8}\n")
+            lib.close()
+
+
+if __name__ == "__main__":
+    main()
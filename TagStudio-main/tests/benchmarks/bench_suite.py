@@ -0,0 +1,307 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Time the main library operations on a synthetic library, and compare them across commits.
+
+Run with `python tests/benchmarks/bench_suite.py [--preset NAME] [--output FILE]`, adding
+`--compare FILE` to check the results against an earlier run. A case regresses when it takes
+longer than the earlier run times its threshold in `thresholds.json`, and the script then exits
+with status 1.
+
+Every case reports the best of `--repeat` runs, in seconds. Cases that change the library run
+after the ones that only read it, and migration uses a tenth of the entries, since it adds them
+one at a time.
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, replace
+from fnmatch import fnmatch
+from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from synthetic import (
+    FIRST_TAG_ID,
+    LibrarySpec,
+    make_json_library,
+    make_library,
+    write_file_tree,
+    write_media_samples,
+)
+
+from tagstudio.core.library.alchemy.enums import BrowsingState, SortingModeEnum
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.refresh import RefreshTracker
+from tagstudio.core.utils.types import unwrap
+
+CWD = Path(__file__).parent
+THRESHOLDS_PATH = CWD / "thresholds.json"
+PAGE_SIZE = 500
+
+PRESETS: dict[str, LibrarySpec] = {
+    "small": LibrarySpec(entries=2_000, tags=200),
+    "medium": LibrarySpec(entries=20_000, tags=1_000),
+    "large": LibrarySpec(entries=100_000, tags=5_000, depth=4),
+}
+
+# A query for each type of search constraint.
+SEARCH_QUERIES: dict[str, str] = {
+    "tag": "tag_0",
+    "tag_hierarchy": "tag_1",
+    "tag_and": "tag_0 and tag_2",
+    "tag_or_not": "(tag_0 or tag_3) and not tag_2",
+    "tag_id": f"tag_id:{FIRST_TAG_ID + 5}",
+    "mediatype": "mediatype:image",
+    "filetype": "filetype:png",
+    "path": "path:1/*",
+    "special": "special:untagged",
+}
+TAG_QUERIES: dict[str, str] = {
+    "exact": "tag_7",
+    "prefix": "tag_1",
+    "alias": "alias_1",
+    "all": "",
+}
+
+
+def best_time(repeat: int, function: Callable[..., object], *args: object) -> float:
+    """Return the shortest time in seconds of calling a function several times."""
+    times: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_search(lib: Library, spec: LibrarySpec, repeat: int) -> Iterator[tuple[str, float]]:
+    for name, query in SEARCH_QUERIES.items():
+        state = BrowsingState.from_search_query(query)
+        yield f"search.{name}", best_time(repeat, lib.search_library, state, PAGE_SIZE)
+
+    for mode in SortingModeEnum:
+        state = BrowsingState.from_search_query("").with_sorting_mode(mode)
+        yield (
+            f"search.sort.{mode.name.lower()}",
+            best_time(repeat, lib.search_library, state, PAGE_SIZE),
+        )
+
+
+def bench_search_tags(lib: Library, spec: LibrarySpec, repeat: int) -> Iterator[tuple[str, float]]:
+    for name, query in TAG_QUERIES.items():
+        yield f"search_tags.{name}", best_time(repeat, lib.search_tags, query)
+
+
+def bench_thumbnails(lib: Library, spec: LibrarySpec, repeat: int) -> Iterator[tuple[str, float]]:
+    try:
+        from PySide6.QtGui import QGuiApplication
+
+        from tagstudio.qt.global_settings import GlobalSettings
+        from tagstudio.qt.previews.renderer import ThumbRenderer
+    except ImportError as e:
+        sys.stdout.write(f"skipping thumbnails: {e}\n")
+        return
+
+    class Driver:
+        settings = GlobalSettings()
+
+    # Vector images are drawn with Qt, which needs an application.
+    _app = QGuiApplication.instance() or QGuiApplication([])
+    renderer = ThumbRenderer(Driver())  # pyright: ignore[reportArgumentType]
+    render = partial(renderer._render, is_grid_thumb=True)
+    with TemporaryDirectory() as temp_dir:
+        for name, path in write_media_samples(Path(temp_dir)).items():
+            # Some types need tools that aren't installed everywhere, such as FFmpeg.
+            if render(0, path, (256, 256), 1.0) is None:
+                sys.stdout.write(f"skipping thumbnails.{name}: nothing was rendered\n")
+                continue
+            yield f"thumbnails.{name}", best_time(repeat, render, 0, path, (256, 256), 1.0)
+
+
+def bench_tagging(lib: Library, spec: LibrarySpec, repeat: int) -> Iterator[tuple[str, float]]:
+    # The least common tags, on every other entry.
+    entry_ids = list(range(1, spec.entries + 1, 2))
+    tag_ids = [FIRST_TAG_ID + spec.tags - 1 - i for i in range(3)]
+    added: list[float] = []
+    removed: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lib.add_tags_to_entries(entry_ids, tag_ids)
+        added.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        lib.remove_tags_from_entries(entry_ids, tag_ids)
+        removed.append(time.perf_counter() - start)
+    yield "tagging.add", min(added)
+    yield "tagging.remove", min(removed)
+
+
+def bench_refresh(lib: Library, spec: LibrarySpec, repeat: int) -> Iterator[tuple[str, float]]:
+    library_dir = unwrap(lib.library_dir)
+    write_file_tree(library_dir, spec)
+
+    def scan() -> RefreshTracker:
+        tracker = RefreshTracker(lib)
+        for _ in tracker.refresh_dir(library_dir, force_internal_tools=True):
+            pass
+        return tracker
+
+    yield "refresh.scan", best_time(repeat, scan)
+
+    # A tenth as many new files, saved once since they're only new the first time.
+    new = replace(spec, entries=spec.entries + spec.entries // 10)
+    write_file_tree(library_dir, new, first=spec.entries + 1)
+    start = time.perf_counter()
+    tracker = scan()
+    for _ in tracker.save_new_files():
+        pass
+    yield "refresh.new_files", time.perf_counter() - start
+
+
+def bench_migration(lib: Library, spec: LibrarySpec, repeat: int) -> Iterator[tuple[str, float]]:
+    small = replace(spec, entries=max(spec.entries // 10, 1))
+    times: list[float] = []
+    for _ in range(repeat):
+        with TemporaryDirectory() as temp_dir:
+            json_lib = make_json_library(Path(temp_dir), small)
+            sql_lib = Library()
+            assert sql_lib.open_library(Path(temp_dir)).success
+            start = time.perf_counter()
+            sql_lib.migrate_json_to_sqlite(json_lib)
+            times.append(time.perf_counter() - start)
+            sql_lib.close()
+    yield "migration.json", min(times)
+
+
+# In the order they're run, which leaves the cases that change the library for last.
+BENCHMARKS: dict[str, Callable[[Library, LibrarySpec, int], Iterator[tuple[str, float]]]] = {
+    "search": bench_search,
+    "search_tags": bench_search_tags,
+    "thumbnails": bench_thumbnails,
+    "tagging": bench_tagging,
+    "refresh": bench_refresh,
+    "migration": bench_migration,
+}
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=CWD, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], thresholds: dict
+) -> list[tuple[str, float, float, float]]:
+    """Return the cases that took longer than the baseline allows.
+
+    Returns:
+        A list of (case, baseline time, time, allowed ratio) tuples.
+    """
+    regressions: list[tuple[str, float, float, float]] = []
+    for case, seconds in results.items():
+        if case not in baseline:
+            continue
+        allowed: float = thresholds.get("default", 1.25)
+        for pattern, ratio in thresholds.get("cases", {}).items():
+            if fnmatch(case, pattern):
+                allowed = ratio
+        # Very short cases are dominated by noise, so they get an absolute allowance as well.
+        limit = max(baseline[case] * allowed, baseline[case] + thresholds.get("min_seconds", 0))
+        if seconds > limit:
+            regressions.append((case, baseline[case], seconds, allowed))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    parser.add_argument("--entries", type=int, help="Override the number of entries.")
+    parser.add_argument("--tags", type=int, help="Override the number of tags.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="*", choices=BENCHMARKS, help="Only run these groups of cases."
+    )
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Compare against the results in this file.")
+    parser.add_argument("--thresholds", type=Path, default=THRESHOLDS_PATH)
+    args = parser.parse_args()
+
+    # structlog logs every search, which would dominate the timings.
+    import structlog
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(40))
+    out = sys.stdout
+
+    spec = PRESETS[args.preset]
+    if args.entries is not None:
+        spec = replace(spec, entries=args.entries)
+    if args.tags is not None:
+        spec = replace(spec, tags=args.tags)
+
+    results: dict[str, float] = {}
+    with TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        lib = make_library(Path(temp_dir), spec)
+        out.write(f"{spec}\nbuilt in {time.perf_counter() - start:.1f}s\n")
+        out.write(f"{'case':<28} {'best (ms)':>10}\n")
+        for name, benchmark in BENCHMARKS.items():
+            if args.only and name not in args.only:
+                continue
+            for case, seconds in benchmark(lib, spec, args.repeat):
+                results[case] = seconds
+                out.write(f"{case:<28} {seconds * 1000:>10.1f}\n")
+        lib.close()
+        # Leave nothing behind that keeps the directory from being removed on Windows.
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "preset": args.preset,
+        "spec": asdict(spec),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if baseline.get("spec") != report["spec"]:
+            out.write("warning: the baseline was run on a library with a different spec\n")
+        thresholds = json.loads(args.thresholds.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline["results"], thresholds)
+        ratios = [
+            results[case] / baseline["results"][case]
+            for case in results
+            if baseline["results"].get(case)
+        ]
+        if ratios:
+            out.write(
+                f"\ncompared with {baseline.get('commit')}: "
+                f"median ratio {statistics.median(ratios):.2f}\n"
+            )
+        for case, before, after, allowed in regressions:
+            out.write(
+                f"REGRESSION {case}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms "
+                f"(allowed x{allowed})\n"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
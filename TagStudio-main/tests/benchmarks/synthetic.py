@@ -0,0 +1,335 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+"""Generate deterministic synthetic libraries for the benchmarks.
+
+Tags are named "tag_<rank>", where tag_0 is the most common tag. With a skewed distribution,
+the number of entries a tag is on falls off with its rank following Zipf's law. Every tag below
+the top level of the hierarchy has a parent one level up, and every tenth tag has an alias
+named "alias_<rank>".
+
+Entries are spread over folders of a thousand, split into subfolders of a hundred, and their
+file types follow MEDIA_MIX. The same spec always generates the same library.
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from tagstudio.core.library.alchemy.fields import FieldID, TextField
+from tagstudio.core.library.alchemy.joins import TagEntry, TagParent
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.alchemy.models import Entry, Folder, Tag, TagAlias
+from tagstudio.core.library.json.library import Entry as JsonEntry
+from tagstudio.core.library.json.library import Library as JsonLibrary
+from tagstudio.core.library.json.library import Tag as JsonTag
+from tagstudio.core.utils.types import unwrap
+
+FIRST_TAG_ID = 10_000
+# The share of entries with each file extension.
+MEDIA_MIX: dict[str, float] = {
+    "png": 0.3,
+    "jpg": 0.25,
+    "webp": 0.05,
+    "mp4": 0.1,
+    "mp3": 0.05,
+    "txt": 0.1,
+    "md": 0.05,
+    "pdf": 0.1,
+}
+# The text fields entries can have, which each entry gets with a chance of the field density.
+TEXT_FIELDS: list[FieldID] = [FieldID.TITLE, FieldID.DESCRIPTION, FieldID.NOTES]
+# The legacy JSON field that holds an entry's tags.
+JSON_TAG_FIELD = 6
+FIRST_DATE = datetime(2020, 1, 1)
+
+
+@dataclass(frozen=True)
+class LibrarySpec:
+    """The shape of a synthetic library.
+
+    Attributes:
+        entries (int): The number of entries.
+        tags (int): The number of tags.
+        depth (int): The number of levels in the tag hierarchy, where 1 means no parent tags.
+        tags_per_entry (int): The number of tags on each tagged entry.
+        skew (float): The Zipf exponent of tag popularity, or 0 for a uniform distribution.
+        untagged (float): The share of entries that have no tags.
+        field_density (float): The chance of an entry having each of the TEXT_FIELDS.
+        seed (int): The seed of the random choices.
+    """
+
+    entries: int = 10_000
+    tags: int = 500
+    depth: int = 3
+    tags_per_entry: int = 5
+    skew: float = 1.2
+    untagged: float = 0.05
+    field_density: float = 0.5
+    seed: int = 0
+
+
+def entry_path(spec: LibrarySpec, entry_id: int) -> Path:
+    """Return the path of an entry relative to the library directory."""
+    suffix = random.Random(spec.seed * 1_000_003 + entry_id).choices(
+        list(MEDIA_MIX), list(MEDIA_MIX.values())
+    )[0]
+    return Path(f"{entry_id // 1000}/{entry_id // 100 % 10}/{entry_id}.{suffix}")
+
+
+def tag_level(spec: LibrarySpec, rank: int) -> int:
+    """Return the level of a tag in the hierarchy, where 0 is the top."""
+    return rank % max(spec.depth, 1)
+
+
+def tag_parents(spec: LibrarySpec) -> dict[int, int]:
+    """Return the rank of each tag's parent, by the rank of the tag."""
+    rng = random.Random(spec.seed)
+    levels: list[list[int]] = [[] for _ in range(max(spec.depth, 1))]
+    for rank in range(spec.tags):
+        levels[tag_level(spec, rank)].append(rank)
+    return {
+        rank: rng.choice(levels[level - 1])
+        for level in range(1, len(levels))
+        if levels[level - 1]
+        for rank in levels[level]
+    }
+
+
+def entry_tags(spec: LibrarySpec) -> dict[int, set[int]]:
+    """Return the ranks of the tags on each tagged entry, by entry ID."""
+    rng = random.Random(spec.seed)
+    weights = [1 / (rank + 1) ** spec.skew for rank in range(spec.tags)]
+    tags: dict[int, set[int]] = {}
+    for entry_id in range(1, spec.entries + 1):
+        if rng.random() < spec.untagged:
+            continue
+        ranks: set[int] = set()
+        while len(ranks) < min(spec.tags_per_entry, spec.tags):
+            ranks.update(rng.choices(range(spec.tags), weights, k=spec.tags_per_entry - len(ranks)))
+        tags[entry_id] = ranks
+    return tags
+
+
+def entry_fields(spec: LibrarySpec) -> list[tuple[int, FieldID, str]]:
+    """Return the text fields of every entry, as (entry ID, field, value) tuples."""
+    rng = random.Random(spec.seed)
+    return [
+        (entry_id, field_id, f"{field_id.name.lower()} {entry_id}")
+        for entry_id in range(1, spec.entries + 1)
+        for field_id in TEXT_FIELDS
+        if rng.random() < spec.field_density
+    ]
+
+
+def make_library(path: Path, spec: LibrarySpec) -> Library:
+    """Create a library with the given shape in a directory, with bulk inserts."""
+    lib = Library()
+    assert lib.open_library(path).success
+
+    with Session(unwrap(lib.engine)) as session:
+        session.execute(
+            insert(Tag),
+            [
+                {
+                    "id": FIRST_TAG_ID + rank,
+                    "name": f"tag_{rank}",
+                    "color_namespace": "tagstudio-standard",
+                    "color_slug": "red",
+                    "is_category": False,
+                    "is_hidden": False,
+                }
+                for rank in range(spec.tags)
+            ],
+        )
+        if parents := tag_parents(spec):
+            session.execute(
+                insert(TagParent),
+                [
+                    {"parent_id": FIRST_TAG_ID + parent, "child_id": FIRST_TAG_ID + rank}
+                    for rank, parent in parents.items()
+                ],
+            )
+        if aliases := range(0, spec.tags, 10):
+            session.execute(
+                insert(TagAlias),
+                [{"name": f"alias_{rank}", "tag_id": FIRST_TAG_ID + rank} for rank in aliases],
+            )
+        session.commit()
+
+    # The library folder is only stored along with its first entry.
+    lib.add_entries(
+        [
+            Entry(
+                path=entry_path(spec, 1),
+                folder=unwrap(lib.folder),
+                fields=[],
+                date_added=FIRST_DATE,
+            )
+        ]
+    )
+
+    with Session(unwrap(lib.engine)) as session:
+        folder_id = unwrap(session.scalar(select(Folder.id)))
+        if spec.entries > 1:
+            rows: list[dict] = []
+            for entry_id in range(2, spec.entries + 1):
+                path = entry_path(spec, entry_id)
+                rows.append(
+                    {
+                        "id": entry_id,
+                        "folder_id": folder_id,
+                        "path": path,
+                        "filename": path.name,
+                        "suffix": path.suffix[1:],
+                        "date_added": FIRST_DATE + timedelta(minutes=entry_id),
+                    }
+                )
+            session.execute(insert(Entry), rows)
+        if tag_rows := [
+            {"tag_id": FIRST_TAG_ID + rank, "entry_id": entry_id}
+            for entry_id, ranks in entry_tags(spec).items()
+            for rank in ranks
+        ]:
+            session.execute(insert(TagEntry), tag_rows)
+        if field_rows := [
+            {"type_key": field_id.name, "entry_id": entry_id, "value": value}
+            for entry_id, field_id, value in entry_fields(spec)
+        ]:
+            session.execute(insert(TextField), field_rows)
+        session.commit()
+
+    lib.invalidate_tag_catalogue()
+    return lib
+
+
+def make_json_library(path: Path, spec: LibrarySpec) -> JsonLibrary:
+    """Return a legacy JSON library with the given shape, without saving it."""
+    json_lib = JsonLibrary()
+    json_lib.library_dir = path
+    parents = tag_parents(spec)
+    json_lib.tags = [
+        JsonTag(
+            id=FIRST_TAG_ID + rank,
+            name=f"tag_{rank}",
+            shorthand="",
+            aliases=[f"alias_{rank}"] if rank % 10 == 0 else [],
+            subtags_ids=[FIRST_TAG_ID + parents[rank]] if rank in parents else [],
+            color="",
+        )
+        for rank in range(spec.tags)
+    ]
+
+    tags = entry_tags(spec)
+    text_fields: dict[int, list[dict]] = {}
+    for entry_id, field_id, value in entry_fields(spec):
+        text_fields.setdefault(entry_id, []).append({field_id.value.id: value})
+    for entry_id in range(1, spec.entries + 1):
+        path = entry_path(spec, entry_id)
+        fields: list[dict] = text_fields.get(entry_id, [])
+        if entry_id in tags:
+            fields.append(
+                {JSON_TAG_FIELD: [FIRST_TAG_ID + rank for rank in sorted(tags[entry_id])]}
+            )
+        # JSON entry IDs start at 0 instead of 1.
+        json_lib.entries.append(JsonEntry(entry_id - 1, path.name, path.parent, fields))
+    return json_lib
+
+
+def write_file_tree(path: Path, spec: LibrarySpec, first: int = 1, last: int | None = None):
+    """Create an empty file for each entry in a range of entry IDs, inclusive."""
+    folders: set[Path] = set()
+    for entry_id in range(first, (last or spec.entries) + 1):
+        file = path / entry_path(spec, entry_id)
+        if file.parent not in folders:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            folders.add(file.parent)
+        file.touch()
+
+
+def write_media_samples(path: Path, size: int = 1024) -> dict[str, Path]:
+    """Write a small file of each media type that has a thumbnail renderer.
+
+    Types that can't be written with the installed packages are left out.
+
+    Returns:
+        The path of each sample, by its media type.
+    """
+    import math
+    import shutil
+    import wave
+
+    import numpy as np
+    from PIL import Image
+
+    x = np.linspace(0, 255, size, dtype=np.float32)
+    noise = np.random.default_rng(0).normal(0, 12, (size, size)).astype(np.float32)
+    channels = [x + noise, x[:, None] + noise, (x + x[:, None]) / 2 - noise]
+    array = np.clip(np.dstack(np.broadcast_arrays(*channels)), 0, 255).astype(np.uint8)
+    image = Image.fromarray(array, "RGB")
+
+    samples: dict[str, Path] = {}
+    formats: dict[str, dict[str, Any]] = {
+        "png": {},
+        "jpg": {"quality": 90},
+        "webp": {"quality": 90},
+    }
+    for name, save_args in formats.items():
+        samples[name] = path / f"sample.{name}"
+        image.save(samples[name], **save_args)
+    samples["pdf"] = path / "sample.pdf"
+    image.save(samples["pdf"])
+
+    samples["svg"] = path / "sample.svg"
+    samples["svg"].write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+        + "".join(
+            f'<circle cx="{50 + 40 * math.cos(i)}" cy="{50 + 40 * math.sin(i)}" r="8" '
+            f'fill="#{i * 40 % 256:02x}80c0"/>'
+            for i in range(64)
+        )
+        + "</svg>",
+        encoding="utf-8",
+    )
+
+    samples["txt"] = path / "sample.txt"
+    samples["txt"].write_text(
+        "\n".join(f"Line {i}: the quick brown fox jumps over the lazy dog." for i in range(2000)),
+        encoding="utf-8",
+    )
+
+    samples["wav"] = path / "sample.wav"
+    rate = 22_050
+    tone = np.sin(np.linspace(0, 440 * 2 * math.pi * 10, rate * 10)) * np.linspace(0, 1, rate * 10)
+    with wave.open(str(samples["wav"]), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((tone * 20_000).astype(np.int16).tobytes())
+
+    font = Path(__file__).parents[2] / "src/tagstudio/resources/qt/fonts/Oxanium-Bold.ttf"
+    if font.is_file():
+        samples["ttf"] = path / "sample.ttf"
+        shutil.copy(font, samples["ttf"])
+
+    try:
+        import cv2
+
+        samples["mp4"] = path / "sample.mp4"
+        video = cv2.VideoWriter(
+            str(samples["mp4"]), cv2.VideoWriter.fourcc(*"mp4v"), 30, (size // 2, size // 2)
+        )
+        small = cv2.cvtColor(array[: size // 2, : size // 2], cv2.COLOR_RGB2BGR)
+        for i in range(60):
+            video.write(np.roll(small, i * 4, axis=1))
+        video.release()
+        if not samples["mp4"].stat().st_size:
+            del samples["mp4"]
+    except (ImportError, OSError):
+        samples.pop("mp4", None)
+    return samples
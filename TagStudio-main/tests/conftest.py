@@ -10,7 +10,7 @@ from tempfile import TemporaryDirectory
 from unittest.mock import Mock, patch
 
 import pytest
-from PySide6.QtWidgets import QScrollArea
+from PySide6.QtWidgets import QApplication, QScrollArea
 
 CWD = Path(__file__).parent
 # this needs to be above `src` imports
@@ -154,12 +154,13 @@ def entry_full(library: Library):
 
 
 @pytest.fixture
-def qt_driver(library: Library, library_dir: Path):
+def qt_driver(qapp: QApplication, library: Library, library_dir: Path):
     class Args:
         settings_file = library_dir / "settings.toml"
         cache_file = library_dir / "tagstudio.ini"
         open = library_dir
         ci = True
+        debug = False
 
     with patch("tagstudio.qt.ts_qt.Consumer"), patch("tagstudio.qt.ts_qt.CustomRunnable"):
         driver = QtDriver(Args())  # pyright: ignore[reportArgumentType]
@@ -0,0 +1,87 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.importer import FileImporter, ImportJob, copy_file, hash_file
+from tagstudio.core.utils.types import unwrap
+
+
+@pytest.mark.parametrize("checksum", [True, False])
+def test_copy_file(tmp_path: Path, checksum: bool):
+    source = tmp_path / "source.bin"
+    source.write_bytes(bytes(range(256)) * 10_000)
+
+    digest = copy_file(source, tmp_path / "copy.bin", checksum=checksum)
+
+    assert (tmp_path / "copy.bin").read_bytes() == source.read_bytes()
+    assert digest == (hash_file(source) if checksum else None)
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_import_files(library: Library, tmp_path: Path):
+    library_dir = unwrap(library.library_dir)
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    # The same contents as a.txt.
+    (tmp_path / "c.txt").write_text("a")
+    jobs = [
+        ImportJob(tmp_path / "a.txt", Path("import/a.txt")),
+        ImportJob(tmp_path / "b.txt", Path("import/nested/b.txt")),
+        ImportJob(tmp_path / "c.txt", Path("import/c.txt")),
+    ]
+
+    importer = FileImporter(library, max_workers=1, skip_duplicates=True)
+    progress = list(importer.run(jobs))[-1]
+
+    assert progress.files_done == 3
+    assert progress.bytes_done == progress.bytes_total == 3
+    assert progress.duplicates == 1
+    assert (library_dir / "import/nested/b.txt").read_text() == "b"
+    assert not (library_dir / "import/c.txt").exists()
+    assert len(importer.entry_ids) == 2
+    assert library.has_path_entry(Path("import/a.txt"))
+    assert library.has_path_entry(Path("import/nested/b.txt"))
+    assert not library.has_path_entry(Path("import/c.txt"))
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_import_overwrite(library: Library, tmp_path: Path):
+    (tmp_path / "foo.txt").write_text("new")
+
+    importer = FileImporter(library)
+    list(importer.run([ImportJob(tmp_path / "foo.txt", Path("foo.txt"))]))
+
+    # foo.txt already has an entry, so none is added.
+    assert importer.entry_ids == []
+    assert (unwrap(library.library_dir) / "foo.txt").read_text() == "new"
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_import_duplicates(library: Library, tmp_path: Path):
+    library_dir = unwrap(library.library_dir)
+    (library_dir / "foo.txt").write_text("old")
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("a")
+    jobs = [
+        ImportJob(tmp_path / "a.txt", Path("a.txt")),
+        ImportJob(tmp_path / "b.txt", Path("foo.txt")),
+    ]
+
+    # Files with the same contents are kept unless duplicates are skipped.
+    importer = FileImporter(library, max_workers=1)
+    progress = list(importer.run([jobs[0], ImportJob(tmp_path / "b.txt", Path("b.txt"))]))[-1]
+    assert progress.duplicates == 0
+    assert len(importer.entry_ids) == 2
+
+    # A duplicate that would overwrite an existing file leaves it alone.
+    progress = list(FileImporter(library, max_workers=1, skip_duplicates=True).run(jobs))[-1]
+    assert progress.duplicates == 1
+    assert (library_dir / "foo.txt").read_text() == "old"
+    assert library.has_path_entry(Path("foo.txt"))
+    # The temporary copies are cleaned up.
+    assert not list(library_dir.glob("*.partial"))
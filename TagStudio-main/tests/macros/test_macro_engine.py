@@ -0,0 +1,104 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+import json
+import shutil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from tagstudio.core.constants import TS_FOLDER_NAME
+from tagstudio.core.enums import MacroID
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.refresh import RefreshTracker
+from tagstudio.core.macro_engine import ConditionMatcher, MacroEngine
+from tagstudio.core.utils.types import unwrap
+
+CWD = Path(__file__).parent
+
+
+def add_newgrounds_file(library_dir: Path) -> Path:
+    path = Path("newgrounds/post.png")
+    (library_dir / path.parent).mkdir(exist_ok=True)
+    (library_dir / path).touch()
+    shutil.copy(
+        CWD.parent / "fixtures" / "sidecar_newgrounds.json",
+        library_dir / "newgrounds/post.png.json",
+    )
+    return path
+
+
+def write_conditions(library_dir: Path, conditions: list[dict]):
+    (library_dir / TS_FOLDER_NAME).mkdir(exist_ok=True)
+    with open(library_dir / TS_FOLDER_NAME / "conditions.json", "w", encoding="utf8") as f:
+        json.dump({"conditions": conditions}, f)
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_autofill_new_files(library: Library):
+    library_dir = unwrap(library.library_dir)
+    path = add_newgrounds_file(library_dir)
+    write_conditions(
+        library_dir,
+        [{"path_conditions": ["newgrounds"], "fields": [{"id": "NOTES", "value": "gallery"}]}],
+    )
+
+    tracker = RefreshTracker(library, files_not_in_library=[path], new_file_macro=MacroID.AUTOFILL)
+    list(tracker.save_new_files())
+
+    entry = unwrap(library.get_entry_full_by_path(path))
+    assert {t.name for t in entry.tags} == {"ng_tag", "ng_tag2"}
+    assert {(f.type_key, f.value) for f in entry.fields} == {
+        ("ARTIST", "NG artist"),
+        ("DESCRIPTION", "NG description"),
+        ("DATE_PUBLISHED", "2024-01-02"),
+        ("NOTES", "gallery"),
+        # Cleaned by the CLEAN_URL macro before being written.
+        ("SOURCE", "ng.com"),
+    }
+
+    # Running the macros again doesn't duplicate anything.
+    list(MacroEngine(library).run(MacroID.AUTOFILL, [entry.id]))
+    entry = unwrap(library.get_entry_full_by_path(path))
+    assert len(entry.tags) == 2
+    assert len(entry.fields) == 5
+
+
+def test_match_updates_existing_fields(library: Library):
+    write_conditions(
+        unwrap(library.library_dir),
+        [
+            {"path_conditions": ["one"], "fields": [{"id": "TITLE", "value": "www.one.com"}]},
+            {"path_conditions": ["two"], "fields": [{"id": "TITLE", "value": "two"}]},
+        ],
+    )
+    try:
+        engine = MacroEngine(library)
+        list(engine.run(MacroID.MATCH, [1, 2]))
+        list(engine.run(MacroID.CLEAN_URL, [1, 2]))
+    finally:
+        (unwrap(library.library_dir) / TS_FOLDER_NAME / "conditions.json").unlink()
+
+    # Only the entry inside the "one" folder matches, and its default title is set.
+    assert [(f.type_key, f.value) for f in unwrap(library.get_entry_full(2)).fields] == [
+        ("TITLE", "one.com")
+    ]
+    assert [f.value for f in unwrap(library.get_entry_full(1)).fields] == [None]
+
+
+def test_condition_matcher(tmp_path: Path):
+    write_conditions(
+        tmp_path,
+        [
+            {
+                "path_conditions": ["a", str(tmp_path / "a/b")],
+                "fields": [{"id": "X", "value": "1"}],
+            },
+            {"path_conditions": ["a/b/c.png"], "fields": [{"id": "Y", "value": "2"}]},
+        ],
+    )
+    matcher = ConditionMatcher.load(tmp_path)
+    assert matcher.match(Path("a/b/c.png")) == [("X", "1"), ("X", "1"), ("Y", "2")]
+    assert matcher.match(Path("ab/c.png")) == []
+    assert ConditionMatcher.load(tmp_path / "missing").match(Path("a")) == []
@@ -9,6 +9,7 @@ import pytest
 
 from tagstudio.core.library.alchemy.enums import BrowsingState
 from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.alchemy.models import Entry
 from tagstudio.core.library.alchemy.registries.unlinked_registry import UnlinkedRegistry
 from tagstudio.core.utils.types import unwrap
 
@@ -36,3 +37,29 @@ def test_refresh_missing_files(library: Library):
     results = library.search_library(BrowsingState.from_path("bar.md"), page_size=500)
     entries = library.get_entries(results.ids)
     assert entries[0].path == Path("bar.md")
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_refresh_missing_files_in_root(library: Library, tmp_path: Path):
+    folder = library.add_folder(tmp_path)
+    (tmp_path / "old").mkdir()
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "moved.md").touch()
+    [entry_id] = library.add_entries(
+        [Entry(path=tmp_path / "old" / "moved.md", folder=folder, fields=[])]
+    )
+
+    # Files in other roots are matched by their paths relative to their own root.
+    assert library.relative_to_root(tmp_path / "new" / "moved.md") == Path("new/moved.md")
+    assert library.entry_path(tmp_path / "new" / "moved.md") == tmp_path / "new" / "moved.md"
+    assert library.relative_to_root(Path("one/two/bar.md")) == Path("one/two/bar.md")
+    assert library.entry_path(unwrap(library.library_dir) / "bar.md") == Path("bar.md")
+    assert library.entry_path(tmp_path.parent / "elsewhere.md") is None
+
+    registry = UnlinkedRegistry(lib=library)
+    list(registry.refresh_unlinked_files())
+    registry.unlinked_entries = [e for e in registry.unlinked_entries if e.id == entry_id]
+    list(registry.fix_unlinked_entries())
+
+    assert registry.files_fixed_count == 1
+    assert unwrap(library.get_entry(entry_id)).path == tmp_path / "new" / "moved.md"
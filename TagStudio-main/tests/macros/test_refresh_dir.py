@@ -29,3 +29,42 @@ def test_refresh_new_files(library: Library, exclude_mode: bool):
     # Test if the single file was added
     list(registry.refresh_dir(library_dir, force_internal_tools=True))
     assert registry.files_not_in_library == [Path("FOO.MD")]
+
+
+@pytest.mark.parametrize("force_internal_tools", [True, False])
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_refresh_roots(library: Library, tmp_path: Path, force_internal_tools: bool):
+    library_dir = unwrap(library.library_dir)
+    library.included_files.clear()
+    (library_dir / "new.txt").touch()
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "other.txt").touch()
+    folder = library.add_folder(tmp_path)
+
+    registry = RefreshTracker(library=library)
+    progress = list(registry.refresh_roots(force_internal_tools=force_internal_tools))
+
+    assert progress[-1][tmp_path] == 1
+    assert registry.files_not_in_library == [
+        Path("new.txt"),
+        tmp_path / "nested" / "other.txt",
+    ]
+
+    list(registry.save_new_files())
+    entry = unwrap(library.get_entry_full_by_path(tmp_path / "nested" / "other.txt"))
+    assert entry.folder_id == folder.id
+    entry = unwrap(library.get_entry_full_by_path(Path("new.txt")))
+    assert entry.folder_id == library.folders[0].id
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_add_folder_overlap(library: Library, tmp_path: Path):
+    library_dir = unwrap(library.library_dir)
+    (library_dir / "inner").mkdir()
+    library.add_folder(tmp_path)
+
+    with pytest.raises(ValueError):
+        library.add_folder(library_dir / "inner")
+    with pytest.raises(ValueError):
+        library.add_folder(tmp_path)
+    assert len(library.folders) == 2
@@ -0,0 +1,77 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+
+import tarfile
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from tagstudio.qt.previews import archives
+
+COMIC_INFO = b"""<?xml version="1.0"?>
+<ComicInfo><Pages>
+<Page Image="0" /><Page Image="1" Type="FrontCover" />
+</Pages></ComicInfo>"""
+
+
+@pytest.fixture(autouse=True)
+def clear_cover_cache():
+    archives.cover_cache.clear()
+    yield
+    archives.cover_cache.clear()
+
+
+def write_zip(path: Path, files: dict[str, bytes]):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+
+
+def test_read_cover_first_image(tmp_path: Path):
+    path = tmp_path / "comic.cbz"
+    write_zip(path, {"notes.txt": b"text", "01.png": b"first", "02.png": b"second"})
+    assert archives.read_cover(path, ".cbz") == b"first"
+
+
+def test_read_cover_comic_info(tmp_path: Path):
+    path = tmp_path / "comic.cbz"
+    write_zip(path, {archives.COMIC_INFO: COMIC_INFO, "01.png": b"first", "02.png": b"second"})
+    assert archives.read_cover(path, ".cbz") == b"second"
+
+
+def test_read_cover_tar(tmp_path: Path):
+    path = tmp_path / "comic.cbt"
+    with tarfile.open(path, "w") as archive:
+        for name, data in {"01.jpg": b"first", "02.jpg": b"second"}.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, BytesIO(data))
+    assert archives.read_cover(path, ".cbt") == b"first"
+
+
+def test_read_cover_cached(tmp_path: Path):
+    path = tmp_path / "comic.cbz"
+    write_zip(path, {"01.png": b"first"})
+    archives.read_cover(path, ".cbz")
+    is_cached, name = archives.cover_cache.get((path, path.stat().st_mtime_ns))
+    assert is_cached
+    assert name == "01.png"
+
+
+def test_read_cover_cached_without_cover(tmp_path: Path):
+    path = tmp_path / "comic.cbz"
+    write_zip(path, {"notes.txt": b"text"})
+    assert archives.read_cover(path, ".cbz") is None
+    # Archives without a cover are cached too, so they aren't listed again.
+    assert archives.cover_cache.get((path, path.stat().st_mtime_ns)) == (True, None)
+    assert archives.cover_cache.get((path, 0)) == (False, None)
+
+
+def test_read_cover_too_large(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(archives, "MAX_COVER_SIZE", 4)
+    path = tmp_path / "comic.cbz"
+    write_zip(path, {"01.png": b"first"})
+    assert archives.read_cover(path, ".cbz") is None
@@ -0,0 +1,38 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+
+from pytestqt.qtbot import QtBot
+
+from tagstudio.core.constants import TAG_ARCHIVED, TAG_FAVORITE
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.qt.badge_updater import BadgeChange, BadgeUpdater
+from tagstudio.qt.mixed.item_thumb import BadgeType
+
+
+def test_apply_and_undo(qtbot: QtBot, library: Library):
+    updater = BadgeUpdater()
+    library.add_tags_to_entries(1, TAG_FAVORITE)
+
+    with qtbot.waitSignal(updater.applied) as blocker:
+        updater.apply(library, [1, 2], {BadgeType.FAVORITE: True, BadgeType.ARCHIVED: True})
+    assert blocker.args == [
+        [
+            BadgeChange(BadgeType.FAVORITE, value=True, entry_ids=[2]),
+            BadgeChange(BadgeType.ARCHIVED, value=True, entry_ids=[1, 2]),
+        ]
+    ]
+    assert updater.can_undo()
+    tag_ids = [TAG_FAVORITE, TAG_ARCHIVED]
+    assert library.get_tag_entries(tag_ids, [1, 2]) == {TAG_FAVORITE: {1, 2}, TAG_ARCHIVED: {1, 2}}
+
+    # Only the entries that were changed are reverted.
+    with qtbot.waitSignal(updater.undone):
+        updater.undo(library)
+    assert not updater.can_undo()
+    assert library.get_tag_entries(tag_ids, [1, 2]) == {TAG_FAVORITE: {1}, TAG_ARCHIVED: set()}
+
+    # Undoing with nothing left to undo does nothing.
+    updater.undo(library)
+    updater.wait()
+    assert library.get_tag_entries(tag_ids, [1, 2]) == {TAG_FAVORITE: {1}, TAG_ARCHIVED: set()}
@@ -0,0 +1,35 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+
+from pathlib import Path
+
+import pytest
+from PySide6.QtCore import QUrl
+from pytestqt.qtbot import QtBot
+
+from tagstudio.core.library.importer import FileImporter
+from tagstudio.qt.mixed.drop_import_modal import DropImportModal
+from tagstudio.qt.translations import Translations
+from tagstudio.qt.ts_qt import QtDriver
+
+
+def test_import_failure(
+    qtbot: QtBot, qt_driver: QtDriver, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    def fail(*_):
+        raise OSError("No space left on device")
+        yield
+
+    monkeypatch.setattr(FileImporter, "run", fail)
+    source = tmp_path / "new.txt"
+    source.write_text("new")
+
+    # The modal and its progress window are closed even though the import failed.
+    modal = DropImportModal(qt_driver)
+    with qtbot.waitSignal(modal.destroyed):
+        modal.import_urls([QUrl.fromLocalFile(str(source))])
+
+    qt_driver.main_window.status_bar.showMessage.assert_called_with(
+        Translations.format("drop_import.failed", error="No space left on device")
+    )
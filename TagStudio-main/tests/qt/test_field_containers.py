@@ -3,6 +3,8 @@
 # Created for TagStudio: https://github.com/CyanVoxel/TagStudio
 
 
+from pytestqt.qtbot import QtBot
+
 from tagstudio.core.library.alchemy.library import Library
 from tagstudio.core.library.alchemy.models import Entry, Tag
 from tagstudio.core.utils.types import unwrap
@@ -23,12 +25,15 @@ def test_update_selection_empty(qt_driver: QtDriver, library: Library):
         assert container.isHidden()
 
 
-def test_update_selection_single(qt_driver: QtDriver, library: Library, entry_full: Entry):
+def test_update_selection_single(
+    qtbot: QtBot, qt_driver: QtDriver, library: Library, entry_full: Entry
+):
     panel = PreviewPanel(library, qt_driver)
 
     # Select the single entry
     qt_driver.toggle_item_selection(entry_full.id, append=False, bridge=False)
-    panel.set_selection(qt_driver.selected)
+    with qtbot.waitSignal(panel.preview_loader.loaded):
+        panel.set_selection(qt_driver.selected)
 
     # FieldContainer should show all applicable tags and field containers
     for container in panel.field_containers_widget.containers:
@@ -124,7 +129,7 @@ def test_add_tag_to_selection_multiple(qt_driver: QtDriver, library: Library):
     assert not tag_absent_on_some
 
 
-def test_meta_tag_category(qt_driver: QtDriver, library: Library, entry_full: Entry):
+def test_meta_tag_category(qtbot: QtBot, qt_driver: QtDriver, library: Library, entry_full: Entry):
     panel = PreviewPanel(library, qt_driver)
 
     # Ensure the Favorite tag is on entry_full
@@ -132,7 +137,8 @@ def test_meta_tag_category(qt_driver: QtDriver, library: Library, entry_full: En
 
     # Select the single entry
     qt_driver.toggle_item_selection(entry_full.id, append=False, bridge=False)
-    panel.set_selection(qt_driver.selected)
+    with qtbot.waitSignal(panel.preview_loader.loaded):
+        panel.set_selection(qt_driver.selected)
 
     # FieldContainer should hide all containers
     assert len(panel.field_containers_widget.containers) == 3
@@ -152,7 +158,9 @@ def test_meta_tag_category(qt_driver: QtDriver, library: Library, entry_full: En
                 pass
 
 
-def test_custom_tag_category(qt_driver: QtDriver, library: Library, entry_full: Entry):
+def test_custom_tag_category(
+    qtbot: QtBot, qt_driver: QtDriver, library: Library, entry_full: Entry
+):
     panel = PreviewPanel(library, qt_driver)
 
     # Set tag 1000 (foo) as a category
@@ -167,7 +175,8 @@ def test_custom_tag_category(qt_driver: QtDriver, library: Library, entry_full:
 
     # Select the single entry
     qt_driver.toggle_item_selection(entry_full.id, append=False, bridge=False)
-    panel.set_selection(qt_driver.selected)
+    with qtbot.waitSignal(panel.preview_loader.loaded):
+        panel.set_selection(qt_driver.selected)
 
     # FieldContainer should hide all containers
     assert len(panel.field_containers_widget.containers) == 3
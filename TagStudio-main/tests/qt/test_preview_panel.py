@@ -3,6 +3,8 @@
 # Created for TagStudio: https://github.com/CyanVoxel/TagStudio
 
 
+from pytestqt.qtbot import QtBot
+
 from tagstudio.core.library.alchemy.library import Library
 from tagstudio.core.library.alchemy.models import Entry
 from tagstudio.qt.controllers.preview_panel_controller import PreviewPanel
@@ -42,3 +44,20 @@ def test_update_selection_multiple(qt_driver: QtDriver, library: Library):
 
     # Panel should enable UI that allows for entry modification
     assert panel.add_buttons_enabled
+
+
+def test_update_selection_superseded(qtbot: QtBot, qt_driver: QtDriver, library: Library):
+    panel = PreviewPanel(library, qt_driver)
+    fields = panel.field_containers_widget
+
+    # Select one entry and then another before the first has been shown
+    qt_driver.toggle_item_selection(1, append=False, bridge=False)
+    panel.set_selection(qt_driver.selected)
+    qt_driver.toggle_item_selection(2, append=False, bridge=False)
+    panel.set_selection(qt_driver.selected)
+
+    # Only the latest selection should be shown
+    qtbot.waitUntil(lambda: len(fields.cached_entries) > 0)
+    panel.preview_loader.wait()
+    qtbot.wait(50)
+    assert [e.id for e in fields.cached_entries] == [2]
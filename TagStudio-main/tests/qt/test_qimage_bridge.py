@@ -0,0 +1,59 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+
+import pytest
+from PIL import Image
+from PySide6.QtGui import QColor, QImage
+
+from tagstudio.qt.helpers.qimage_bridge import pil_to_qimage, qimage_to_pil
+
+
+def sample_image(mode: str) -> Image.Image:
+    # An odd width, so rows aren't aligned to 4 bytes
+    size = (5, 3)
+    return Image.frombytes(mode, size, bytes(range(size[0] * size[1] * len(mode))))
+
+
+@pytest.mark.parametrize(
+    ["mode", "q_format"],
+    [
+        ("RGB", QImage.Format.Format_RGB888),
+        ("RGBA", QImage.Format.Format_RGBA8888),
+        ("L", QImage.Format.Format_Grayscale8),
+    ],
+)
+def test_round_trip(mode: str, q_format: QImage.Format):
+    image = sample_image(mode)
+    q_image = pil_to_qimage(image)
+    assert q_image.format() == q_format
+    assert (q_image.width(), q_image.height()) == image.size
+
+    # Pixels aren't swapped or shifted on the way into Qt
+    rgb = image.convert("RGB")
+    for x, y in ((0, 0), (4, 0), (2, 1), (4, 2)):
+        pixel = QColor(q_image.pixel(x, y))
+        assert (pixel.red(), pixel.green(), pixel.blue()) == rgb.getpixel((x, y))
+
+    # ...or on the way back. RGB888 isn't mapped directly, so it's read back as RGBA.
+    result = qimage_to_pil(q_image)
+    assert result.mode == ("RGBA" if mode == "RGB" else mode)
+    assert result.tobytes() == image.convert(result.mode).tobytes()
+
+
+def test_qimage_to_pil_outlives_qimage():
+    q_image = QImage(3, 2, QImage.Format.Format_RGBA8888)
+    q_image.fill(QColor(10, 20, 30, 40))
+    image = qimage_to_pil(q_image)
+    del q_image
+
+    assert image.getpixel((2, 1)) == (10, 20, 30, 40)
+
+
+def test_pil_to_qimage_converts_other_modes():
+    image = Image.new("P", (2, 2))
+    image.putpalette([255, 0, 0])
+
+    q_image = pil_to_qimage(image)
+    assert q_image.format() == QImage.Format.Format_RGBA8888
+    assert QColor(q_image.pixel(1, 1)).getRgb() == (255, 0, 0, 255)
@@ -2,43 +2,75 @@
 # Licensed under the GPL-3.0 License.
 # Created for TagStudio: https://github.com/CyanVoxel/TagStudio
 
+import pytest
+from pytestqt.qtbot import QtBot
+
 from tagstudio.core.library.alchemy.enums import BrowsingState
 from tagstudio.core.utils.types import unwrap
+from tagstudio.qt import ts_qt
+from tagstudio.qt.translations import Translations
 from tagstudio.qt.ts_qt import QtDriver
 
 
-def test_browsing_state_update(qt_driver: QtDriver):
+def update_browsing_state(qtbot: QtBot, qt_driver: QtDriver, state: BrowsingState | None = None):
+    """Update the browsing state and wait for any streamed results to arrive."""
+    if not qt_driver.settings.infinite_scroll:
+        qt_driver.update_browsing_state(state)
+        return
+    with qtbot.waitSignal(qt_driver.search_loader.finished):
+        qt_driver.update_browsing_state(state)
+
+
+@pytest.mark.parametrize("infinite_scroll", [True, False])
+def test_browsing_state_update(qtbot: QtBot, qt_driver: QtDriver, infinite_scroll: bool):
     # Given
+    qt_driver.settings.infinite_scroll = infinite_scroll
     entries = qt_driver.lib.all_entries(with_joins=True)
     ids = [e.id for e in entries]
     qt_driver.frame_content = ids
     qt_driver.main_window.thumb_layout.set_entries(ids)
 
     # no filter, both items are returned
-    qt_driver.update_browsing_state()
+    update_browsing_state(qtbot, qt_driver)
     assert len(qt_driver.frame_content) == 2
 
     # filter by tag
     state = BrowsingState.from_tag_name("foo")
-    qt_driver.update_browsing_state(state)
+    update_browsing_state(qtbot, qt_driver, state)
     assert len(qt_driver.frame_content) == 1
     entry = unwrap(qt_driver.lib.get_entry_full(qt_driver.frame_content[0]))
     assert list(entry.tags)[0].name == "foo"
 
     # When state is not changed, previous one is still applied
-    qt_driver.update_browsing_state()
+    update_browsing_state(qtbot, qt_driver)
     assert len(qt_driver.frame_content) == 1
     entry = unwrap(qt_driver.lib.get_entry_full(qt_driver.frame_content[0]))
     assert list(entry.tags)[0].name == "foo"
 
     # When state property is changed, previous one is overwritten
     state = BrowsingState.from_path("*bar.md")
-    qt_driver.update_browsing_state(state)
+    update_browsing_state(qtbot, qt_driver, state)
     assert len(qt_driver.frame_content) == 1
     entry = unwrap(qt_driver.lib.get_entry_full(qt_driver.frame_content[0]))
     assert list(entry.tags)[0].name == "bar"
 
 
+def test_browsing_state_update_superseded(qtbot: QtBot, qt_driver: QtDriver):
+    qt_driver.settings.infinite_scroll = True
+
+    # Results of the first search are never shown once the second one has started.
+    qt_driver.update_browsing_state(BrowsingState.from_tag_name("foo"))
+    with qtbot.waitSignal(qt_driver.search_loader.finished):
+        qt_driver.update_browsing_state(BrowsingState.from_path("*bar.md"))
+    qt_driver.search_loader.wait()
+    qtbot.wait(50)
+
+    assert len(qt_driver.frame_content) == 1
+    entry = unwrap(qt_driver.lib.get_entry_full(qt_driver.frame_content[0]))
+    assert list(entry.tags)[0].name == "bar"
+    assert qt_driver.main_window.thumb_layout.entry_ids.tolist() == qt_driver.frame_content
+
+
 def test_close_library(qt_driver: QtDriver):
     # Given
     qt_driver.close_library()
@@ -47,8 +79,24 @@ def test_close_library(qt_driver: QtDriver):
     assert qt_driver.lib.library_dir is None
     assert not qt_driver.frame_content
     assert not qt_driver.selected
-    assert len(qt_driver.main_window.thumb_layout._entry_ids) == 0
+    assert len(qt_driver.main_window.thumb_layout.entry_ids) == 0
 
     # close library again to see there's no error
     qt_driver.close_library()
     qt_driver.close_library(is_shutdown=True)
+
+
+def test_backup_library_failure(qt_driver: QtDriver, monkeypatch: pytest.MonkeyPatch):
+    def fail(**kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(qt_driver.lib, "save_library_backup_to_disk", fail)
+
+    qt_driver.backup_library()
+    # CustomRunnable is mocked by the qt_driver fixture, so run the backup and its slot here.
+    runnable = ts_qt.CustomRunnable
+    runnable.call_args.args[0]()  # pyright: ignore[reportAttributeAccessIssue]
+    runnable.return_value.done.connect.call_args.args[0]()  # pyright: ignore[reportAttributeAccessIssue]
+
+    message = qt_driver.main_window.status_bar.showMessage.call_args.args[0]
+    assert message == Translations.format("status.library_backup_failed", error="disk full")
@@ -0,0 +1,84 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+from PIL import ExifTags, Image
+from PySide6.QtGui import QPixmap
+from pytestqt.qtbot import QtBot
+from wcmatch import fnmatch
+
+from tagstudio.core.library.ignore import PATH_GLOB_FLAGS, Ignore, ignore_to_glob
+from tagstudio.core.utils.types import unwrap
+from tagstudio.qt.previews.renderer import ThumbRenderer
+from tagstudio.qt.ts_qt import QtDriver
+
+
+def test_render_root_folder_entry(
+    qtbot: QtBot, qt_driver: QtDriver, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    qt_driver.lib.add_folder(tmp_path)
+    qt_driver.cache_manager = Mock(get_file_path=Mock(return_value=None))
+    monkeypatch.setattr(
+        Ignore,
+        "compiled_patterns",
+        fnmatch.compile(ignore_to_glob(["ignored.png"]), PATH_GLOB_FLAGS),
+    )
+    for name in ("shown.png", "ignored.png"):
+        Image.new("RGB", (64, 64), "blue").save(tmp_path / name)
+
+    def render(path: Path) -> QPixmap:
+        renderer = ThumbRenderer(qt_driver)
+        with qtbot.waitSignal(renderer.updated) as blocker:
+            renderer.render(0, path, (64, 64), 1, is_grid_thumb=True)
+        assert blocker.args is not None
+        assert blocker.args[3] == path
+        return blocker.args[1]
+
+    # Ignore patterns are matched relative to the entry's own root folder.
+    shown = render(tmp_path / "shown.png")
+    ignored = render(tmp_path / "ignored.png")
+    assert not shown.isNull()
+    assert shown.toImage() != ignored.toImage()
+
+
+@pytest.mark.parametrize(
+    ["suffix", "reduced_size"],
+    [
+        # JPEGs are drafted by the decoder at 1/8 scale
+        (".jpg", (250, 125)),
+        # Other images are shrunk to at least twice the requested size
+        (".png", (200, 100)),
+    ],
+)
+def test_image_thumb_reduced(tmp_path: Path, suffix: str, reduced_size: tuple[int, int]):
+    path = tmp_path / f"image{suffix}"
+    image = Image.new("RGB", (2000, 1000), "red")
+    image.paste("blue", (1000, 0, 2000, 1000))
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    image.save(path, exif=exif)
+
+    reduced = ThumbRenderer._open_reduced(Image.open(path), 100)
+    assert reduced.size == reduced_size
+    assert reduced.getexif()[ExifTags.Base.Orientation] == 6
+
+    # The orientation is still applied to the reduced image, turning the left half to the top
+    thumb = unwrap(ThumbRenderer._image_thumb(path, 100))
+    assert thumb.size == reduced_size[::-1]
+    top = thumb.getpixel((thumb.width // 2, thumb.height // 4))
+    bottom = thumb.getpixel((thumb.width // 2, thumb.height * 3 // 4))
+    assert isinstance(top, tuple) and top[0] > 200 and top[2] < 50
+    assert isinstance(bottom, tuple) and bottom[2] > 200 and bottom[0] < 50
+
+
+@pytest.mark.parametrize("suffix", [".jpg", ".png"])
+def test_open_reduced_small_image(tmp_path: Path, suffix: str):
+    path = tmp_path / f"image{suffix}"
+    Image.new("RGB", (80, 40), "red").save(path)
+
+    # Images that are already small enough are left at their full size
+    assert ThumbRenderer._open_reduced(Image.open(path), 100).size == (80, 40)
@@ -0,0 +1,67 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+
+import numpy as np
+import pytest
+from PIL import Image, ImageChops, ImageDraw, ImageEnhance
+
+from tagstudio.qt.helpers.gradients import four_corner_gradient
+from tagstudio.qt.helpers.thumb_finishing import finish_thumb, make_edge_overlay
+
+SIZE = (64, 64)
+
+
+def make_edge() -> tuple[Image.Image, Image.Image]:
+    highlight = Image.new("RGBA", (128, 128), "#00000000")
+    ImageDraw.Draw(highlight).rounded_rectangle(
+        (2, 2, 125, 125), radius=13, outline="white", width=2
+    )
+    shadow = Image.new("RGBA", (128, 128), "#00000000")
+    ImageDraw.Draw(shadow).rounded_rectangle((0, 0, 127, 127), radius=16, outline="black", width=2)
+    return (
+        highlight.resize(SIZE, resample=Image.Resampling.BILINEAR),
+        shadow.resize(SIZE, resample=Image.Resampling.BILINEAR),
+    )
+
+
+def make_mask() -> Image.Image:
+    mask = Image.new("L", (128, 128), "black")
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, 127, 127), radius=16, fill="white")
+    return mask.resize(SIZE, resample=Image.Resampling.BILINEAR)
+
+
+def reference_finish(
+    image: Image.Image, mask: Image.Image, edge: tuple[Image.Image, Image.Image], faded: bool
+) -> Image.Image:
+    """Composite a thumbnail with Pillow alone."""
+    im = four_corner_gradient(image, SIZE, mask)
+    im_hl, im_sh = edge[0].copy(), edge[1].copy()
+    opacity = 0.8 if faded else 1.0
+    im_hl.putalpha(ImageEnhance.Brightness(im_hl.getchannel(3)).enhance(opacity))
+    im.paste(ImageChops.soft_light(im, im_hl), mask=im_hl.getchannel(3))
+    im_sh.putalpha(ImageEnhance.Brightness(im_sh.getchannel(3)).enhance(max(0, opacity - 0.3)))
+    im.paste(im_sh, mask=im_sh.getchannel(3))
+    return im
+
+
+@pytest.mark.parametrize("image_size", [SIZE, (40, 24)])
+@pytest.mark.parametrize("faded", [False, True])
+def test_finish_thumb_matches_pillow(image_size: tuple[int, int], faded: bool):
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (*image_size[::-1], 3), dtype=np.uint8), "RGB")
+    mask = make_mask()
+    edge = make_edge()
+
+    opacity = 0.8 if faded else 1.0
+    overlay = make_edge_overlay(edge, opacity, max(0, opacity - 0.3))
+    finished = finish_thumb(image, SIZE, mask, overlay)
+
+    expected = reference_finish(image, mask, edge, faded)
+    assert finished.mode == "RGBA"
+    assert np.array_equal(np.asarray(finished), np.asarray(expected))
+
+
+def test_edge_overlay_covers_only_the_edge():
+    overlay = make_edge_overlay(make_edge(), 1.0, 1.0)
+    assert 0 < len(overlay.indices) < SIZE[0] * SIZE[1] // 2
@@ -0,0 +1,83 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+
+from tagstudio.core.constants import TAG_ARCHIVED, TAG_FAVORITE
+from tagstudio.qt.ts_qt import QtDriver
+
+
+def test_selection(qt_driver: QtDriver):
+    layout = qt_driver.main_window.thumb_layout
+    layout.set_entries([5, 3, 9, 1, 7])
+
+    layout.select_entry(3)
+    layout.select_to_entry(1)
+    assert qt_driver.selected == [3, 9, 1]
+
+    layout.select_entry(9)
+    assert qt_driver.selected == [3, 1]
+    assert not layout.is_selected(9)
+
+    layout.select_inverse()
+    assert qt_driver.selected == [5, 9, 7]
+
+    # Entries that aren't in the results are selected after those that are
+    layout.select_entry(2)
+    assert layout.is_selected(2)
+    assert qt_driver.selected == [5, 9, 7, 2]
+    # until they're added to the results.
+    layout.append_entries([2, 4])
+    assert qt_driver.selected == [5, 9, 7, 2]
+    layout.select_entry(6)
+    layout.select_entry(6)
+    assert not layout.is_selected(6)
+
+    layout.select_all()
+    assert qt_driver.selected == [5, 3, 9, 1, 7, 2, 4]
+
+    layout.clear_selected()
+    assert qt_driver.selected == []
+
+
+def test_select_to_entry_backwards(qt_driver: QtDriver):
+    layout = qt_driver.main_window.thumb_layout
+    layout.set_entries([5, 3, 9, 1, 7])
+
+    layout.select_entry(7)
+    layout.select_to_entry(3)
+    assert qt_driver.selected == [3, 9, 1, 7]
+
+
+def test_append_entries_keeps_selection(qt_driver: QtDriver):
+    layout = qt_driver.main_window.thumb_layout
+    layout.set_entries([1, 2])
+    layout.select_entry(2)
+
+    layout.append_entries([4, 3])
+    layout.append_entries([6])
+    layout.select_entry(6)
+    assert layout.entry_ids.tolist() == [1, 2, 4, 3, 6]
+    assert qt_driver.selected == [2, 6]
+
+    # New results clear the selection, and entries from earlier results are forgotten.
+    layout.set_entries([3])
+    assert qt_driver.selected == []
+    layout.select_entry(1)
+    layout.select_to_entry(3)
+    assert qt_driver.selected == [3, 1]
+
+
+def test_badge_flags(qt_driver: QtDriver):
+    layout = qt_driver.main_window.thumb_layout
+    layout.set_entries([1, 2])
+    layout.select_entry(1)
+
+    layout.add_tags([1, 2], [TAG_FAVORITE, TAG_ARCHIVED, 1000])
+    layout.remove_tags([2], [TAG_ARCHIVED])
+    assert layout._tag_flags([TAG_FAVORITE, TAG_ARCHIVED, 1000]) == (
+        layout._tag_flags([TAG_FAVORITE]) | layout._tag_flags([TAG_ARCHIVED])
+    )
+    assert layout.is_selected(1)
+    assert bool(layout._flags[0] & layout._tag_flags([TAG_ARCHIVED]))
+    assert not bool(layout._flags[1] & layout._tag_flags([TAG_ARCHIVED]))
+    assert bool(layout._flags[1] & layout._tag_flags([TAG_FAVORITE]))
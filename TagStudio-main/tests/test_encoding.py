@@ -0,0 +1,50 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+import os
+from pathlib import Path
+
+import pytest
+
+from tagstudio.core.utils import encoding
+from tagstudio.core.utils.encoding import (
+    TEXT_SAMPLE_SIZE,
+    detect_char_encoding,
+    detect_sample_encoding,
+)
+
+
+@pytest.mark.parametrize(
+    ["text", "codec", "expected"],
+    [
+        ("plain text", "ascii", "utf-8"),
+        ("grüße, 世界", "utf-8", "utf-8"),
+        ("grüße", "utf-8-sig", "utf-8-sig"),
+        ("grüße", "utf-16", "utf-16"),
+        ("grüße", "utf-32", "utf-32"),
+    ],
+)
+def test_detect_sample_encoding(text: str, codec: str, expected: str):
+    assert detect_sample_encoding(text.encode(codec)) == expected
+
+
+def test_detect_sample_encoding_cut_off():
+    # A sample cut off in the middle of a character is still UTF-8.
+    sample = "ü".encode() * 10
+    assert detect_sample_encoding(sample[:-1], complete=False) == "utf-8"
+
+
+def test_detect_char_encoding_reads_sample(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    filepath = tmp_path / "large.txt"
+    # Invalid UTF-8 past the sample doesn't affect detection.
+    filepath.write_bytes(b"a" * TEXT_SAMPLE_SIZE + b"\xff\xfe\xfd")
+    assert detect_char_encoding(filepath) == "utf-8"
+
+    # The result is cached until the file changes.
+    monkeypatch.setattr(encoding, "read_text_sample", lambda _: pytest.fail("not cached"))
+    assert detect_char_encoding(filepath) == "utf-8"
+
+    monkeypatch.undo()
+    filepath.write_bytes("grüße".encode("utf-16"))
+    os.utime(filepath, ns=(0, 0))
+    assert detect_char_encoding(filepath) == "utf-16"
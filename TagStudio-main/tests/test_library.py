@@ -3,21 +3,29 @@
 # Created for TagStudio: https://github.com/CyanVoxel/TagStudio
 
 
+import sqlite3
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 import pytest
 import structlog
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 
 from tagstudio.core.enums import DefaultEnum, LibraryPrefs
-from tagstudio.core.library.alchemy.enums import BrowsingState
+from tagstudio.core.library.alchemy import visitors
+from tagstudio.core.library.alchemy.backup import BackupManifest
+from tagstudio.core.library.alchemy.enums import BrowsingState, SortingModeEnum
 from tagstudio.core.library.alchemy.fields import (
     FieldID,  # pyright: ignore[reportPrivateUsage]
     TextField,
 )
 from tagstudio.core.library.alchemy.library import Library
 from tagstudio.core.library.alchemy.models import Entry, Tag
+from tagstudio.core.library.alchemy.search_index import SearchIndex
+from tagstudio.core.library.alchemy.writer import LibraryWriter
 from tagstudio.core.utils.types import unwrap
 
 logger = structlog.get_logger()
@@ -128,6 +136,121 @@ def test_library_search(library: Library, entry_full: Entry):
     assert len(results) == 1
 
 
+def test_library_search_plans_follow_tag_changes(
+    library: Library, generate_tag: Callable[..., Tag]
+):
+    def search_ids(query: str, page_index: int = 0) -> list[int]:
+        state = BrowsingState.from_search_query(query).with_page_index(page_index)
+        return library.search_library(state, page_size=1).ids
+
+    assert search_ids("qux") == []
+    assert library.add_alias("qux", 2000)
+    assert search_ids("QUX") == [2]
+
+    assert search_ids("subbar or foo") == [1]
+    assert search_ids("foo or subbar", page_index=1) == [2]
+
+    child = unwrap(library.add_tag(generate_tag("child", id=3000)))
+    assert library.add_tags_to_entries(1, child.id)
+    assert library.add_parent_tag(1500, child.id)
+    assert search_ids("subbar", page_index=1) == [2]
+    assert search_ids("subbar") == [1]
+
+
+@pytest.mark.parametrize("semi_join_ratio", [1, 1_000])
+def test_library_search_all_tags(
+    library: Library,
+    generate_tag: Callable[..., Tag],
+    monkeypatch: pytest.MonkeyPatch,
+    semi_join_ratio: int,
+):
+    monkeypatch.setattr(visitors, "SEMI_JOIN_RATIO", semi_join_ratio)
+    common = unwrap(library.add_tag(generate_tag("common", id=3000)))
+    unused = unwrap(library.add_tag(generate_tag("unused", id=3001)))
+    assert library.add_tags_to_entries([1, 2], common.id)
+
+    def search_ids(query: str) -> list[int]:
+        return library.search_library(BrowsingState.from_search_query(query), page_size=500).ids
+
+    assert search_ids("common and foo") == [1]
+    assert search_ids("bar and common") == [2]
+    assert search_ids("common and unused") == []
+    assert search_ids("foo and bar and common") == []
+
+    assert library.add_tags_to_entries(2, unused.id)
+    assert search_ids("common and unused") == [2]
+
+
+def test_search_index_matches_sql(library: Library, generate_tag: Callable[..., Tag]):
+    queries = [
+        "",
+        "foo",
+        "subbar",
+        "foo or bar",
+        "not foo",
+        "tag_id:2000 and not tag_id:1000",
+        "special:untagged",
+        "filetype:TXT",
+        "mediatype:plaintext",
+        "path:*bar*",
+        "foo or path:*bar*",
+    ]
+
+    def search_both() -> tuple[list[list[int]], list[list[int]]]:
+        results: tuple[list[list[int]], list[list[int]]] = ([], [])
+        for search_index in (None, index):
+            library.search_index = search_index
+            for query in queries:
+                for mode in (SortingModeEnum.DATE_ADDED, SortingModeEnum.FILE_NAME):
+                    for ascending in (True, False):
+                        state = (
+                            BrowsingState.from_search_query(query)
+                            .with_sorting_mode(mode)
+                            .with_sorting_direction(ascending)
+                        )
+                        result = library.search_library(state, page_size=500)
+                        assert result.total_count == len(result.ids)
+                        results[search_index is not None].append(result.ids)
+        return results
+
+    with Session(library.engine) as session:
+        index = SearchIndex.from_session(session)
+    sql_ids, index_ids = search_both()
+    assert sql_ids == index_ids
+
+    library.search_index = index
+    tag = unwrap(library.add_tag(generate_tag("new", id=3000)))
+    library.add_entries([Entry(path=Path("new.txt"), folder=unwrap(library.folder), fields=[])])
+    library.add_tags_to_entries([1, 2], tag.id)
+    library.remove_tags_from_entries(1, 1000)
+    library.remove_entries([2])
+    queries.append("new")
+    sql_ids, index_ids = search_both()
+    assert sql_ids == index_ids
+
+
+@pytest.mark.parametrize("use_search_index", [False, True])
+def test_search_library_chunks(library: Library, use_search_index: bool):
+    library.add_entries(
+        [
+            Entry(path=Path(f"chunk_{i}.txt"), folder=unwrap(library.folder), fields=[])
+            for i in range(5)
+        ]
+    )
+    if use_search_index:
+        with Session(library.engine) as session:
+            library.search_index = SearchIndex.from_session(session)
+
+    for query in ("", "path:chunk_*", "foo", "missing"):
+        state = BrowsingState.from_search_query(query).with_sorting_direction(ascending=False)
+        chunks = list(library.search_library_chunks(state, chunk_size=2))
+        expected = library.search_library(state, page_size=0).ids
+
+        assert all(0 < len(chunk) <= 2 for chunk in chunks)
+        assert [i for chunk in chunks for i in chunk] == expected
+        assert library.count_search(state) == len(expected)
+
+
 def test_tag_search(library: Library):
     tag = library.tags[0]
 
@@ -137,6 +260,64 @@ def test_tag_search(library: Library):
     assert library.search_tags(tag.name * 2) == [set(), set()]
 
 
+def test_tag_search_ranks_prefix_matches(library: Library, generate_tag: Callable[..., Tag]):
+    for i in range(5):
+        library.add_tag(generate_tag(f"abc_{i}_xyz", id=2000 + i))
+    library.add_tag(generate_tag("xyz", id=2010))
+
+    direct_tags, _ = library.search_tags("xyz", limit=2)
+    assert 2010 in {t.id for t in direct_tags}
+    assert len(direct_tags) == 2
+
+
+def test_tag_search_children(library: Library, generate_tag: Callable[..., Tag]):
+    parent = unwrap(library.add_tag(generate_tag("vehicle", id=2100)))
+    child = unwrap(library.add_tag(generate_tag("car", id=2101), parent_ids={parent.id}))
+    grandchild = unwrap(library.add_tag(generate_tag("sedan", id=2102), parent_ids={child.id}))
+
+    direct_tags, child_tags = library.search_tags("vehicle")
+    assert {t.id for t in direct_tags} == {parent.id}
+    assert {t.id for t in child_tags} == {child.id, grandchild.id}
+    assert all(t.parent_tags is not None for t in child_tags)
+
+
+def test_tag_search_ranked(library: Library, generate_tag: Callable[..., Tag]):
+    vehicle = unwrap(library.add_tag(generate_tag("Vehicle", id=2100)))
+    library.add_tag(generate_tag("car", id=2101), parent_ids={vehicle.id})
+    library.add_tag(generate_tag("electric vehicle", id=2102))
+    library.add_tag(generate_tag("vehicles", id=2103))
+    library.add_tag(generate_tag("unrelated", id=2104))
+
+    chunks = list(library.search_tags_ranked("vehicle", limit=-1, chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 2]
+    assert [t.id for c in chunks for t in c] == [2100, 2103, 2102, 2101]
+
+    results = [t.id for c in library.search_tags_ranked("vehicle", exclude=[2103]) for t in c]
+    assert results == [2100, 2102, 2101]
+
+    assert sum(len(c) for c in library.search_tags_ranked(None, limit=-1)) == len(library.tags)
+
+
+def test_tag_catalogue(library: Library, generate_tag: Callable[..., Tag]):
+    tag_count = library.tags_count
+    assert tag_count == len(library.tags)
+
+    tag = unwrap(library.add_tag(generate_tag("Cheese", id=3000)))
+    library.add_alias("Fromage", tag.id)
+    library.add_tag(generate_tag("cheesecake", id=3001))
+
+    catalogue = library.tag_catalogue
+    assert library.tags_count == tag_count + 2
+    assert catalogue.prefix_search("CHEESE") == [3000, 3001]
+    assert catalogue.prefix_search("from") == [3000]
+    assert catalogue.names_with_prefix("chee") == ["Cheese", "cheesecake"]
+    assert library.tag_catalogue is catalogue
+
+    library.remove_tag(3001)
+    assert library.tag_catalogue is not catalogue
+    assert library.tag_catalogue.names_with_prefix("chee") == ["Cheese"]
+
+
 def test_get_entry(library: Library, entry_min: Entry):
     result = unwrap(library.get_entry_full(unwrap(entry_min.id)))
     assert len(result.tags) == 1
@@ -297,6 +478,38 @@ def test_mirror_entry_fields(library: Library, entry_full: Entry):
     }
 
 
+def test_add_fields_to_entries(library: Library, entry_full: Entry):
+    folder = unwrap(library.folder)
+    ids = library.add_entries(
+        [
+            Entry(folder=folder, path=Path("a"), fields=[]),
+            Entry(folder=folder, path=Path("b"), fields=[]),
+        ]
+    )
+    entry_ids = [entry_full.id, *ids]
+    fields = [(FieldID.NOTES, "note"), (FieldID.NOTES.name, "other note")]
+
+    # When
+    assert library.add_fields_to_entries(entry_ids, fields, skip_existing=True) == 6
+    # Then adding them again adds nothing
+    assert library.add_fields_to_entries(entry_ids, fields, skip_existing=True) == 0
+
+    for entry_id in entry_ids:
+        entry = unwrap(library.get_entry_full(entry_id))
+        notes = [f for f in entry.text_fields if f.type_key == FieldID.NOTES.name]
+        assert [(f.value, f.position) for f in notes] == [("note", 0), ("other note", 1)]
+
+
+def test_add_fields_unknown_key(library: Library, entry_full: Entry):
+    fields = [("NOT_A_FIELD", "lost"), (FieldID.NOTES, "note")]
+
+    # Unknown fields are skipped without dropping the rest of the batch
+    assert library.add_fields_to_entries(entry_full.id, fields) == 1
+    entry = unwrap(library.get_entry_full(entry_full.id))
+    assert "lost" not in [f.value for f in entry.text_fields]
+    assert "note" in [f.value for f in entry.text_fields]
+
+
 def test_merge_entries(library: Library):
     folder = unwrap(library.folder)
 
@@ -341,6 +554,27 @@ def test_merge_entries(library: Library):
     assert tag_2.id in b_tags
 
 
+def test_merge_entries_same_fields(library: Library):
+    folder = unwrap(library.folder)
+    ids = library.add_entries(
+        [
+            Entry(
+                folder=folder,
+                path=Path(name),
+                fields=[TextField(type_key=FieldID.NOTES.name, value="same note", position=0)],
+            )
+            for name in ("a", "b")
+        ]
+    )
+    entry_a = unwrap(library.get_entry_full(ids[0]))
+    entry_b = unwrap(library.get_entry_full(ids[1]))
+
+    # Merging fields the entry already has still succeeds
+    assert library.merge_entries(entry_a, entry_b)
+    assert not library.has_path_entry(Path("a"))
+    assert len(unwrap(library.get_entry_full(ids[1])).fields) == 2
+
+
 def test_remove_tags_from_entries(library: Library, entry_full: Entry):
     removed_tag_id = -1
     for tag in entry_full.tags:
@@ -351,6 +585,163 @@ def test_remove_tags_from_entries(library: Library, entry_full: Entry):
     assert removed_tag_id not in [t.id for t in entry.tags]
 
 
+def test_set_tags_on_entries(library: Library):
+    # Entry 1 already has tag 1000, so only entry 2 changes.
+    assert library.set_tags_on_entries([1, 2, 2], [1000], value=True) == {1000: [2]}
+    assert library.add_tags_to_entries([1, 2], [1000, 2000]) == 1
+    assert library.get_tag_entries([1000, 2000], [1, 2]) == {1000: {1, 2}, 2000: {1, 2}}
+
+    changed = library.set_tags_on_entries([1, 2], [1000, 2000], value=False)
+    assert changed == {1000: [1, 2], 2000: [1, 2]}
+    assert library.set_tags_on_entries([1, 2], 1000, value=False) == {}
+
+    # Undo by applying the opposite change to the entries that changed.
+    for tag_id, entry_ids in changed.items():
+        library.set_tags_on_entries(entry_ids, tag_id, value=True)
+    assert library.get_tag_entries([1000, 2000], [1, 2]) == {1000: {1, 2}, 2000: {1, 2}}
+
+
+def test_transaction(library: Library):
+    with library.transaction():
+        library.add_tags_to_entries(2, 1000)
+        library.add_tags_to_entries(1, 2000)
+        # Changes are visible within the transaction.
+        assert library.get_tag_entries([1000, 2000], [1, 2]) == {1000: {1, 2}, 2000: {1, 2}}
+
+    with pytest.raises(ValueError), library.transaction():
+        library.remove_tags_from_entries([1, 2], [1000, 2000])
+        raise ValueError
+    assert library.get_tag_entries([1000, 2000], [1, 2]) == {1000: {1, 2}, 2000: {1, 2}}
+
+
+def test_transaction_defers_caches(library: Library, generate_tag: Callable[..., Tag]):
+    with Session(library.engine) as session:
+        library.search_index = SearchIndex.from_session(session)
+    catalogue = library.tag_catalogue
+    cheese = BrowsingState.from_search_query("cheese")
+    cheese_path = BrowsingState.from_search_query("path:cheese.txt")
+
+    def fail():
+        library.add_tags_to_entries(2, 3000)
+        raise ValueError
+
+    with pytest.raises(ValueError), library.transaction():
+        library.add_tag(generate_tag("Cheese", id=3000))
+        entry_ids = library.add_entries(
+            [Entry(path=Path("cheese.txt"), folder=unwrap(library.folder), fields=[])]
+        )
+        # The thread sees its own changes, while the shared catalogue only changes on commit.
+        assert library.tag_catalogue.prefix_search("cheese") == [3000]
+        assert library.search_library(cheese_path, page_size=0).ids == entry_ids
+        with ThreadPoolExecutor(1) as executor:
+            assert executor.submit(lambda: library.tag_catalogue).result() is catalogue
+        raise ValueError
+
+    assert library.tag_catalogue is catalogue
+    assert library.search_library(cheese_path, page_size=0).ids == []
+
+    writer = LibraryWriter(library)
+    try:
+        writer.submit(library.add_tag, generate_tag("Cheese", id=3000))
+        writer.submit(library.add_tags_to_entries, 1, 3000)
+        failed = writer.submit(fail)
+        # Flushing from the writer thread doesn't wait on itself.
+        assert writer.submit(writer.flush, 1).result(5) is None
+        with pytest.raises(ValueError):
+            failed.result()
+    finally:
+        writer.close()
+
+    assert library.tag_catalogue is not catalogue
+    assert library.search_library(cheese, page_size=0).ids == [1]
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_batch(library: Library):
+    with library.batch():
+        tag = unwrap(library.get_tag(2000))
+        assert {p.id for p in tag.parent_tags} == {1500}
+        # Nested batches and reads share the same session.
+        with library.batch():
+            assert library.has_path_entry(Path("foo.txt"))
+            library.add_tags_to_entries(1, 2000)
+        # Changes are visible within the batch.
+        assert library.get_tag_entries([2000], [1, 2]) == {2000: {1, 2}}
+
+    # Loaded objects are released after each call and can still be used.
+    assert tag.name == "bar"
+    assert library.get_tag_entries([2000], [1, 2]) == {2000: {1, 2}}
+
+    with pytest.raises(ValueError), library.batch():
+        library.remove_tags_from_entries(1, 2000)
+        assert library.get_tag_entries([2000], [1, 2]) == {2000: {2}}
+        raise ValueError
+    assert library.get_tag_entries([2000], [1, 2]) == {2000: {1, 2}}
+
+
+@pytest.mark.parametrize(["write_ahead_log", "journal_mode"], [(False, "delete"), (True, "wal")])
+def test_library_file_connections(tmp_path: Path, write_ahead_log: bool, journal_mode: str):
+    lib = Library()
+    lib.use_write_ahead_log = write_ahead_log
+    assert lib.open_library(tmp_path).success
+    try:
+        with Session(unwrap(lib.engine)) as session:
+            assert session.execute(text("PRAGMA journal_mode")).scalar() == journal_mode
+
+        with lib.batch():
+            lib.add_entries([Entry(path=Path("new.txt"), folder=unwrap(lib.folder), fields=[])])
+            # Other threads read the last committed snapshot, and aren't blocked by the batch.
+            with ThreadPoolExecutor(1) as executor:
+                assert not executor.submit(lib.has_path_entry, Path("new.txt")).result()
+            assert lib.has_path_entry(Path("new.txt"))
+        assert lib.has_path_entry(Path("new.txt"))
+    finally:
+        lib.close()
+
+
+def test_library_writer(library: Library):
+    def fail():
+        library.add_tags_to_entries(1, 2000)
+        raise ValueError
+
+    writer = LibraryWriter(library)
+    try:
+        added = writer.submit(library.add_tags_to_entries, 2, 1000)
+        failed = writer.submit(fail)
+        removed = writer.submit(library.remove_tags_from_entries, 1, 1000)
+
+        # A failing command only undoes its own changes.
+        assert added.result() == 1
+        assert removed.result()
+        with pytest.raises(ValueError):
+            failed.result()
+        assert library.get_tag_entries([1000, 2000], [1, 2]) == {1000: {2}, 2000: {2}}
+
+        writer.submit(library.add_tags_to_entries, 1, 1000)
+        writer.flush()
+        assert library.get_tag_entries([1000], [1]) == {1000: {1}}
+    finally:
+        writer.close()
+
+    with pytest.raises(RuntimeError):
+        writer.submit(library.add_tags_to_entries, 1, 1000)
+
+
+def test_library_write(library: Library):
+    # Without a writer, changes are made right away.
+    assert library.write(library.add_tags_to_entries, 2, 1000).done()
+
+    library.start_writer()
+    try:
+        assert library.write(library.add_tags_to_entries, [1, 2], 2000).result() == 1
+        # Changes made from the writer thread don't wait on the writer thread.
+        nested = library.write(lambda: library.write(library.add_tags_to_entries, 1, 2000))
+        assert nested.result().result() == 0
+    finally:
+        unwrap(library.writer).close()
+        library.writer = None
+
+
 @pytest.mark.parametrize(
     ["query_name", "has_result"],
     [
@@ -513,3 +904,68 @@ def test_filetype_return_one_filetype(
 def test_mediatype_search(library: Library, mediatype: str, num_of_mediatype: int):
     results = library.search_library(BrowsingState.from_mediatype(mediatype), page_size=500)
     assert len(results.ids) == num_of_mediatype
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_library_backup(library: Library):
+    backup_path = library.save_library_backup_to_disk()
+    assert backup_path.exists()
+
+    with sqlite3.connect(backup_path) as conn:
+        entries_count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    assert entries_count == library.entries_count
+
+    manifest = library.get_backup_manifest()
+    assert manifest.count == 1
+    assert manifest.total_size == backup_path.stat().st_size
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_library_backup_compressed_and_pruned(library: Library):
+    paths = [library.save_library_backup_to_disk(compress=True, keep=2) for _ in range(3)]
+
+    assert all(p.name.endswith(".sqlite.gz") for p in paths)
+    assert not paths[0].exists()
+    assert paths[1].exists() and paths[2].exists()
+    assert library.get_backup_manifest().count == 2
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_library_backup_prune_keeps_other_files(library: Library):
+    backups_dir = library.save_library_backup_to_disk().parent
+    legacy = backups_dir / "ts_library_backup_2024-01-01_000000.json"
+    notes = backups_dir / "notes.txt"
+    legacy.write_text("{}")
+    notes.write_text("notes")
+
+    # Only backups made by TagStudio are counted and pruned.
+    manifest = BackupManifest.load(backups_dir)
+    assert manifest.count == 1
+    library.save_library_backup_to_disk(keep=1)
+    assert legacy.exists() and notes.exists()
+    assert library.get_backup_manifest().count == 1
+
+
+@pytest.mark.parametrize("library", [TemporaryDirectory()], indirect=True)
+def test_get_stats(library: Library):
+    stats = library.get_stats()
+    assert stats.entries == library.entries_count == 2
+    assert stats.tagged_entries == 2
+    assert stats.untagged_entries == 0
+    assert stats.tags == library.tags_count
+    assert stats.fields == len(library.field_types)
+    assert stats.namespaces == len(library.namespaces)
+    assert stats.colors == sum(len(c) for c in library.tag_color_groups.values())
+    # foo.txt and bar.md.
+    assert stats.media_types["plaintext"] == 2
+    assert {name for _, name, _ in stats.top_tags} == {"foo", "bar"}
+    assert stats.total_bytes is None
+
+    # Cached until the next change.
+    assert library.get_stats() is stats
+    library.remove_tags_from_entries(1, [tag.id for tag in unwrap(library.get_entry_full(1)).tags])
+    assert library.get_stats().untagged_entries == 1
+
+    library_dir = unwrap(library.library_dir)
+    (library_dir / "foo.txt").write_bytes(b"12345")
+    assert library.get_stats(with_file_sizes=True).total_bytes == 5
@@ -0,0 +1,105 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+import json
+
+import pytest
+
+from tagstudio.core.library.alchemy.enums import BrowsingState
+from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.utils.lru_cache import LruCache
+from tagstudio.core.utils.metrics import Histogram, Metrics, metrics
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in [0.5] * 50 + [1.5] * 45 + [3.0] * 5:
+        histogram.observe(value)
+
+    assert histogram.count == 100
+    assert histogram.max == 3.0
+    assert histogram.sum == pytest.approx(25 + 67.5 + 15)
+    assert 0 < histogram.quantile(0.5) <= 1.0
+    assert 1.0 < histogram.quantile(0.95) <= 2.0
+    assert histogram.quantile(1.0) == 3.0
+    assert histogram.snapshot()["buckets"] == {"1.0": 50, "2.0": 45, "4.0": 5, "+Inf": 0}
+
+
+def test_empty_histogram():
+    assert Histogram().quantile(0.5) == 0.0
+    assert Histogram().snapshot()["mean"] == 0.0
+
+
+def test_span_and_timed():
+    registry = Metrics()
+
+    @registry.timed("double")
+    def double(x: int) -> int:
+        return x * 2
+
+    assert double(2) == 4
+    with pytest.raises(ValueError), registry.span("failing"):
+        raise ValueError
+
+    histogram = registry.histogram("double")
+    assert histogram is not None and histogram.count == 1
+    failing = registry.histogram("failing")
+    assert failing is not None and failing.count == 1
+
+    registry.enabled = False
+    double(2)
+    assert histogram.count == 1
+
+
+def test_counters_and_gauges():
+    registry = Metrics()
+    registry.increment("cache.hits")
+    registry.increment("cache.hits", 2)
+    registry.set_gauge("queue", 5)
+
+    assert registry.counter("cache.hits") == 3
+    assert registry.counter("cache.misses") == 0
+    assert registry.gauge("queue") == 5
+
+    registry.reset()
+    assert registry.snapshot() == {"histograms": {}, "counters": {}, "gauges": {}}
+
+
+def test_exports():
+    registry = Metrics()
+    registry.observe("library.search_library", 0.003)
+    registry.observe("library.search_library", 20.0)
+    registry.increment('odd"name')
+    registry.set_gauge("queue", 2)
+
+    snapshot = json.loads(registry.to_json())
+    assert snapshot["histograms"]["library.search_library"]["count"] == 2
+    assert snapshot["counters"] == {'odd"name': 1}
+
+    text = registry.to_prometheus()
+    assert "# TYPE tagstudio_duration_seconds histogram" in text
+    assert 'tagstudio_duration_seconds_bucket{name="library.search_library",le="0.005"} 1' in text
+    assert 'tagstudio_duration_seconds_bucket{name="library.search_library",le="+Inf"} 2' in text
+    assert 'tagstudio_duration_seconds_count{name="library.search_library"} 2' in text
+    assert 'tagstudio_events_total{name="odd\\"name"} 1' in text
+    assert 'tagstudio_gauge{name="queue"} 2' in text
+
+
+def test_lru_cache_counts_hits():
+    metrics.reset()
+    cache: LruCache[str, int] = LruCache(2, "test_cache")
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    assert metrics.counter("test_cache.hits") == 1
+    assert metrics.counter("test_cache.misses") == 1
+
+
+def test_library_is_instrumented(library: Library):
+    metrics.reset()
+    library.search_library(BrowsingState.from_search_query("foo"), page_size=10)
+
+    histogram = metrics.histogram("library.search_library")
+    assert histogram is not None
+    assert histogram.count == 1
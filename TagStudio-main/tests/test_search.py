@@ -8,6 +8,8 @@ import structlog
 
 from tagstudio.core.library.alchemy.enums import BrowsingState
 from tagstudio.core.library.alchemy.library import Library
+from tagstudio.core.library.alchemy.query_plans import QueryKeyBuilder
+from tagstudio.core.query_lang.parser import parse_query
 from tagstudio.core.query_lang.util import ParsingError
 
 logger = structlog.get_logger()
@@ -146,3 +148,21 @@ def test_parent_tags(search_library: Library, query: str, count: int):
 def test_syntax(search_library: Library, invalid_query: str):
     with pytest.raises(ParsingError) as e_info:  # noqa: F841  # pyright: ignore[reportUnusedVariable]
         search_library.search_library(BrowsingState.from_search_query(invalid_query), page_size=500)
+
+
+@pytest.mark.parametrize(
+    ["query_a", "query_b", "equal"],
+    [
+        ("a and (b and C)", "c and a and b", True),
+        ("a or b or a", "B or A", True),
+        ("tag_id:0042", "tag_id:42", True),
+        ("filetype:PNG", "filetype:png", True),
+        ("path:A", "path:a", False),
+        ("a and b", "a or b", False),
+        ("not a", "a", False),
+    ],
+)
+def test_query_key(query_a: str, query_b: str, equal: bool):
+    key_a = QueryKeyBuilder().visit(parse_query(query_a))
+    key_b = QueryKeyBuilder().visit(parse_query(query_b))
+    assert (key_a == key_b) == equal
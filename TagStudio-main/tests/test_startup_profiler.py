@@ -0,0 +1,27 @@
+# Licensed under the GPL-3.0 License.
+# Created for TagStudio: https://github.com/CyanVoxel/TagStudio
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from tagstudio.core.utils.startup_profiler import StartupProfiler
+
+
+def test_profile_imports_on_threads():
+    modules = ["colorsys", "netrc", "wave"]
+    for name in modules:
+        sys.modules.pop(name, None)
+
+    profiler = StartupProfiler()
+    profiler.enable()
+    try:
+        with ThreadPoolExecutor(len(modules)) as executor:
+            list(executor.map(__import__, modules))
+    finally:
+        profiler.disable()
+
+    assert set(modules) <= profiler.imports.keys()
+    for name in modules:
+        timing = profiler.imports[name]
+        assert 0 <= timing.own <= timing.total
+    assert "colorsys" in profiler.report()